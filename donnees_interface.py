@@ -0,0 +1,578 @@
+"""
+Accès en cache au fichier `data/data_interface.json` (données saisies dans l'interface).
+
+Les callbacks des pages Informations, Contraintes et Contraintes optionnelles lisent
+ce fichier à chaque chargement de page et à chaque saisie. Le document est donc
+analysé une seule fois par processus, puis servi depuis la mémoire :
+
+- la clé de cache est la signature du fichier (date de modification en ns, taille,
+  inode) : une modification faite hors de l'application est prise en compte au
+  prochain accès ;
+- chaque rechargement ou enregistrement incrémente `generation` ;
+- les lectures renvoient une vue en lecture seule (DictLecture / ListeLecture,
+  sous-classes de dict et list, donc sérialisables telles quelles par Dash) ;
+  une modification directe lève TypeError. Pour modifier le document, on part
+  de `copie()` puis on passe par `enregistrer()`, ou on remplace une seule section
+  avec `remplacer_section()`.
+
+Les modifications sont appliquées tout de suite en mémoire (les lectures suivantes
+les voient) et écrites en différé : les modifications rapprochées (saisie dans un
+tableau) sont regroupées en une seule écriture, au plus tard DELAI_MAX_ECRITURE
+secondes après la première. `vider()` force l'écriture ; elle est faite avant la
+transformation vers config.json, avant un calcul et à l'arrêt du processus.
+L'écriture passe par un fichier temporaire renommé sur le fichier final : en cas
+d'arrêt brutal, le fichier contient l'ancienne ou la nouvelle version, jamais un
+mélange (seules les modifications encore en attente sont perdues).
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Mapping, Sequence
+
+from fichiers import ecrire_atomique
+
+FICHIER_INTERFACE = "data/data_interface.json"
+
+# Stockage du document : "json" (le fichier lui-même) ou "sqlite" (une ligne par
+# section, voir DocumentInterfaceSQLite) ; choisi par la variable d'environnement
+# EDT_STOCKAGE_INTERFACE
+STOCKAGE_INTERFACE = os.environ.get("EDT_STOCKAGE_INTERFACE", "json")
+
+# Sections stockées avec une ligne par sous-clé en SQLite
+SECTIONS_DECOUPEES = ("2_langues_et_options", "3_ressources", "4_programme_national",
+                      "affichage", "contraintes", "contraintes_3_4", "options_par_niveau")
+
+# Écriture différée : délai après la dernière modification, et délai maximal
+# après la première modification non écrite (en secondes)
+DELAI_ECRITURE = 0.5
+DELAI_MAX_ECRITURE = 2.0
+
+
+def _lecture_seule(self, *args, **kwargs):
+    raise TypeError("Données de data_interface.json en lecture seule : modifier une copie (copie())")
+
+
+class DictLecture(dict):
+    """Dictionnaire en lecture seule servi par le cache."""
+
+    __setitem__ = __delitem__ = __ior__ = _lecture_seule
+    clear = pop = popitem = setdefault = update = _lecture_seule
+
+    def copy(self):
+        return copie_modifiable(self)
+
+    def __copy__(self):
+        return copie_modifiable(self)
+
+    def __deepcopy__(self, memo):
+        return copie_modifiable(self)
+
+    def __reduce__(self):
+        return (dict, (copie_modifiable(self),))
+
+
+class ListeLecture(list):
+    """Liste en lecture seule servie par le cache."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _lecture_seule
+    append = clear = extend = insert = pop = remove = reverse = sort = _lecture_seule
+
+    def copy(self):
+        return copie_modifiable(self)
+
+    def __copy__(self):
+        return copie_modifiable(self)
+
+    def __deepcopy__(self, memo):
+        return copie_modifiable(self)
+
+    def __reduce__(self):
+        return (list, (copie_modifiable(self),))
+
+
+def figer(valeur):
+    """
+    Vue en lecture seule (récursive) d'une valeur JSON, telle qu'elle serait relue
+    depuis le fichier (clés non textuelles converties comme par json, tuples en listes).
+    """
+    if isinstance(valeur, (DictLecture, ListeLecture)):
+        return valeur
+    if isinstance(valeur, dict):
+        return DictLecture({
+            cle if isinstance(cle, str) else json.dumps(cle): figer(v)
+            for cle, v in valeur.items()
+        })
+    if isinstance(valeur, (list, tuple)):
+        return ListeLecture([figer(v) for v in valeur])
+    return valeur
+
+
+def _remplacer(noeud, cles, valeur):
+    """
+    Copie de noeud où le chemin cles mène à valeur : seuls les dictionnaires du
+    chemin sont recréés, le reste (figé) est partagé.
+    """
+    if not cles:
+        return valeur
+    base = noeud if isinstance(noeud, dict) else {}
+    nouveau = dict(base)
+    nouveau[cles[0]] = _remplacer(base.get(cles[0]), cles[1:], valeur)
+    return DictLecture(nouveau)
+
+
+def _valeur_au_chemin(noeud, cles):
+    """Valeur au chemin cles, ou None si le chemin n'existe pas."""
+    for cle in cles:
+        if not isinstance(noeud, dict):
+            return None
+        noeud = noeud.get(cle)
+    return noeud
+
+
+def fusionner_dicts(ancien, nouveau):
+    """
+    Fusion récursive de nouveau dans une copie de ancien (les clés de nouveau
+    l'emportent, les sous-dictionnaires présents des deux côtés sont fusionnés).
+    """
+    resultat = copie_modifiable(ancien)
+    for cle, valeur in nouveau.items():
+        if isinstance(resultat.get(cle), dict) and isinstance(valeur, dict):
+            resultat[cle] = fusionner_dicts(resultat[cle], valeur)
+        else:
+            resultat[cle] = valeur
+    return resultat
+
+
+def _valeur_finale(noeud, cles, valeur, fusionner):
+    """Valeur à écrire au chemin cles : valeur, ou sa fusion avec l'ancienne si demandé."""
+    if fusionner and isinstance(valeur, dict):
+        ancienne = _valeur_au_chemin(noeud, cles)
+        if isinstance(ancienne, dict):
+            return fusionner_dicts(ancienne, valeur)
+    return valeur
+
+
+def copie_modifiable(valeur):
+    """Copie modifiable (dict et list ordinaires) d'une valeur JSON, figée ou non."""
+    if isinstance(valeur, dict):
+        return {cle: copie_modifiable(v) for cle, v in valeur.items()}
+    if isinstance(valeur, list):
+        return [copie_modifiable(v) for v in valeur]
+    return valeur
+
+
+def empreinte_json(valeur):
+    """
+    Empreinte SHA-256 du contenu d'une valeur JSON, indépendante de l'ordre des clés
+    et de la mise en forme (sérialisation canonique).
+    """
+    texte = json.dumps(valeur, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+
+def signature_fichier(chemin):
+    """(date de modification en ns, taille, inode) du fichier, ou None s'il n'existe pas."""
+    try:
+        st = os.stat(chemin)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class DocumentInterface:
+    """
+    Document data_interface.json mis en cache pour tout le processus.
+
+    Attributs:
+        chemin (str): Chemin du fichier.
+        generation (int): Incrémenté à chaque rechargement ou modification.
+        lectures (int): Nombre d'analyses du fichier depuis le démarrage.
+        ecritures (int): Nombre d'écritures du fichier depuis le démarrage.
+    """
+
+    def __init__(self, chemin=FICHIER_INTERFACE):
+        self.chemin = chemin
+        self.generation = 0
+        self.lectures = 0
+        self.ecritures = 0
+        self._document = None
+        self._signature = None
+        self._verrou = threading.RLock()
+        # Écriture différée : modifications non écrites, date de la première, minuteur
+        self._en_attente = False
+        self._premiere_modification = None
+        self._minuteur = None
+
+    def _signature_fichier(self):
+        return signature_fichier(self.chemin)
+
+    def vue(self) -> Mapping[str, Any]:
+        """
+        Document complet en lecture seule, relu seulement si le fichier a changé
+        (et qu'aucune modification n'est en attente d'écriture).
+        Retourne un DictLecture vide si le fichier est absent ou illisible.
+        """
+        if self._en_attente:
+            return self._document
+        signature = self._signature_fichier()
+        with self._verrou:
+            if self._en_attente:
+                return self._document
+            if self._document is None or signature != self._signature:
+                try:
+                    with open(self.chemin, encoding="utf-8") as f:
+                        document = json.load(f)
+                    self.lectures += 1
+                except (OSError, ValueError):
+                    document = {}
+                self._document = figer(document if isinstance(document, dict) else {})
+                self._signature = signature
+                self.generation += 1
+            return self._document
+
+    def copie(self) -> dict:
+        """Copie modifiable du document (sans relire le fichier s'il n'a pas changé)."""
+        return copie_modifiable(self.vue())
+
+    def enregistrer(self, data, immediat=False):
+        """
+        Remplace le document complet. Le cache est mis à jour tout de suite ;
+        le fichier est écrit en différé, ou tout de suite si immediat=True.
+        """
+        self._modifier(figer(data), immediat)
+
+    def remplacer_section(self, cles, valeur, fusionner=False, immediat=False):
+        """
+        Remplace la valeur au chemin cles (liste de clés, les dictionnaires manquants
+        sont créés) sans copier le reste du document. Avec fusionner=True, un
+        dictionnaire est fusionné dans l'ancien (voir fusionner_dicts).
+        """
+        cles = list(cles)
+        with self._verrou:
+            document = self.vue()
+            valeur = _valeur_finale(document, cles, valeur, fusionner)
+            self._modifier(_remplacer(document, cles, figer(valeur)), immediat)
+
+    def _modifier(self, document, immediat):
+        with self._verrou:
+            self._document = document
+            self.generation += 1
+            if not self._en_attente:
+                self._en_attente = True
+                self._premiere_modification = time.monotonic()
+            if immediat:
+                self.vider()
+            else:
+                self._planifier()
+
+    def _planifier(self):
+        """(Re)lance le minuteur d'écriture, sans dépasser DELAI_MAX_ECRITURE après la première modification."""
+        if self._minuteur is not None:
+            self._minuteur.cancel()
+        restant = self._premiere_modification + DELAI_MAX_ECRITURE - time.monotonic()
+        self._minuteur = threading.Timer(max(0.0, min(DELAI_ECRITURE, restant)), self.vider)
+        self._minuteur.daemon = True
+        self._minuteur.start()
+
+    def vider(self):
+        """
+        Écrit tout de suite les modifications en attente.
+
+        Returns:
+            bool: True si le fichier a été écrit.
+        """
+        with self._verrou:
+            if not self._en_attente:
+                return False
+            if self._minuteur is not None:
+                self._minuteur.cancel()
+                self._minuteur = None
+            try:
+                ecrire_atomique(self.chemin, json.dumps(self._document, ensure_ascii=False, indent=2))
+            except OSError as e:
+                # Les modifications restent en attente : nouvel essai au prochain vider()
+                print(f"⚠️ Écriture de {self.chemin} impossible : {e}")
+                return False
+            self._en_attente = False
+            self._premiere_modification = None
+            self._signature = self._signature_fichier()
+            self.ecritures += 1
+            return True
+
+    def invalider(self):
+        """Force la relecture du fichier au prochain accès (après écriture des modifications en attente)."""
+        with self._verrou:
+            self.vider()
+            self._document = None
+
+    # Accès typés aux sections (vues en lecture seule)
+
+    def section(self, nom: str, defaut=None):
+        """Section de premier niveau (dict vide par défaut)."""
+        valeur = self.vue().get(nom)
+        if valeur is None:
+            return DictLecture() if defaut is None else defaut
+        return valeur
+
+    def horaires(self) -> Mapping[str, Any]:
+        """Section "1_horaires"."""
+        return self.section("1_horaires")
+
+    def langues_et_options(self) -> Mapping[str, Any]:
+        """Section "2_langues_et_options"."""
+        return self.section("2_langues_et_options")
+
+    def ressources(self) -> Mapping[str, Sequence[Mapping[str, Any]]]:
+        """Section "3_ressources" (classes, professeurs, salles)."""
+        return self.section("3_ressources")
+
+    def programme_national(self) -> Mapping[str, Any]:
+        """Section "4_programme_national"."""
+        return self.section("4_programme_national")
+
+    def options_par_niveau(self) -> Mapping[str, Sequence[Mapping[str, Any]]]:
+        """Section "options_par_niveau"."""
+        return self.section("options_par_niveau")
+
+    def affichage(self) -> Mapping[str, Any]:
+        """Section "affichage" (listes générées pour les pages de contraintes)."""
+        return self.section("affichage")
+
+    def contraintes(self, entite: str) -> Mapping[str, Any]:
+        """Indisponibilités d'une entité ("profs", "groupes" ou "salles")."""
+        return self.section("contraintes").get(entite) or DictLecture()
+
+    def contraintes_3_4(self, cle: str) -> Sequence[Mapping[str, Any]]:
+        """Entrées de la contrainte "contraintes_3_4.<cle>"."""
+        return self.section("contraintes_3_4").get(cle) or ListeLecture()
+
+    def contraintes_additionnelles(self) -> Mapping[str, Any]:
+        """Section "contraintes_additionnelles"."""
+        return self.section("contraintes_additionnelles")
+
+
+class DocumentInterfaceSQLite(DocumentInterface):
+    """
+    Variante du document stockée dans une base SQLite (STOCKAGE_INTERFACE = "sqlite").
+
+    Une ligne par section : les sections de SECTIONS_DECOUPEES ont une ligne par
+    sous-clé (ressources.classes, contraintes.profs...), les autres une seule ligne.
+    Chaque modification de section est une transaction (BEGIN IMMEDIATE) qui relit
+    la ligne concernée avant de l'écrire : deux callbacks qui modifient des sections
+    différentes en parallèle ne s'écrasent plus. Le mode WAL laisse les lectures se
+    faire pendant une écriture, y compris depuis d'autres processus.
+
+    Le document est importé depuis data_interface.json à la création de la base, et
+    `vider()` réexporte ce fichier au format JSON habituel s'il a changé.
+    """
+
+    def __init__(self, chemin, chemin_json=FICHIER_INTERFACE):
+        super().__init__(chemin)
+        self.chemin_json = chemin_json
+        self._version = None
+        self._generation_exportee = None
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self._connexion = sqlite3.connect(chemin, isolation_level=None, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA synchronous=NORMAL")
+        self._connexion.execute("PRAGMA busy_timeout=5000")
+        self._connexion.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " section TEXT NOT NULL, cle TEXT NOT NULL, rang INTEGER NOT NULL, valeur TEXT NOT NULL,"
+            " PRIMARY KEY (section, cle))"
+        )
+        vide = self._connexion.execute("SELECT 1 FROM sections LIMIT 1").fetchone() is None
+        if vide and os.path.exists(chemin_json):
+            self.importer_json()
+        else:
+            # La base fait foi : le fichier JSON est réexporté au premier vider()
+            self._generation_exportee = -1
+
+    # Lignes de la table <-> document
+
+    @staticmethod
+    def _lignes(document):
+        """Lignes {(section, cle): (rang, valeur JSON)} d'un document (cle "" : ligne de la section)."""
+        lignes = {}
+        for rang, (section, valeur) in enumerate(document.items()):
+            if section in SECTIONS_DECOUPEES and isinstance(valeur, dict):
+                lignes[(section, "")] = (rang, "{}")
+                for rang_cle, (cle, sous_valeur) in enumerate(valeur.items()):
+                    lignes[(section, cle)] = (rang_cle, json.dumps(sous_valeur, ensure_ascii=False))
+            else:
+                lignes[(section, "")] = (rang, json.dumps(valeur, ensure_ascii=False))
+        return lignes
+
+    def _lire_lignes(self, section=None):
+        requete = "SELECT section, cle, rang, valeur FROM sections"
+        if section is None:
+            rangees = self._connexion.execute(requete).fetchall()
+        else:
+            rangees = self._connexion.execute(requete + " WHERE section = ?", (section,)).fetchall()
+        return {(s, c): (rang, valeur) for s, c, rang, valeur in rangees}
+
+    @staticmethod
+    def _assembler(lignes):
+        """Document (dict ordinaire) reconstitué à partir des lignes."""
+        sous_cles = {}
+        for (section, cle), (rang, valeur) in lignes.items():
+            if cle:
+                sous_cles.setdefault(section, []).append((rang, cle, valeur))
+        document = {}
+        for (section, cle), (rang, valeur) in sorted(lignes.items(), key=lambda x: x[1][0]):
+            if cle:
+                continue
+            valeur = json.loads(valeur)
+            if section in SECTIONS_DECOUPEES and valeur == {}:
+                valeur = {c: json.loads(v) for _, c, v in sorted(sous_cles.get(section, []))}
+            document[section] = valeur
+        return document
+
+    def _ecrire_lignes(self, anciennes, nouvelles):
+        """Écrit la différence entre deux jeux de lignes (dans la transaction en cours)."""
+        supprimees = [cle for cle in anciennes if cle not in nouvelles]
+        modifiees = [(s, c, rang, valeur) for (s, c), (rang, valeur) in nouvelles.items()
+                     if anciennes.get((s, c)) != (rang, valeur)]
+        self._connexion.executemany("DELETE FROM sections WHERE section = ? AND cle = ?", supprimees)
+        self._connexion.executemany(
+            "INSERT OR REPLACE INTO sections (section, cle, rang, valeur) VALUES (?, ?, ?, ?)", modifiees
+        )
+
+    def _transaction(self, modification):
+        """
+        Exécute modification() dans une transaction BEGIN IMMEDIATE (les autres écrivains
+        attendent) ; modification renvoie le nouveau document figé, ou None pour recharger.
+        """
+        with self._verrou:
+            self._connexion.execute("BEGIN IMMEDIATE")
+            try:
+                # Modifié par un autre processus depuis le dernier chargement : le cache est rechargé après
+                a_jour = self._version == self._version_base()
+                document = modification()
+                self._connexion.execute("COMMIT")
+            except BaseException:
+                self._connexion.execute("ROLLBACK")
+                raise
+            self.ecritures += 1
+            self.generation += 1
+            self._document = document if a_jour else None
+
+    def _version_base(self):
+        return self._connexion.execute("PRAGMA data_version").fetchone()[0]
+
+    # Interface de DocumentInterface
+
+    def vue(self) -> Mapping[str, Any]:
+        """Document complet en lecture seule, relu seulement si la base a été modifiée ailleurs."""
+        with self._verrou:
+            version = self._version_base()
+            if self._document is None or version != self._version:
+                self._document = figer(self._assembler(self._lire_lignes()))
+                self._version = version
+                self.lectures += 1
+                self.generation += 1
+            return self._document
+
+    def enregistrer(self, data, immediat=False):
+        """Remplace le document complet : seules les lignes qui changent sont réécrites."""
+        document = figer(data)
+
+        def modification():
+            self._ecrire_lignes(self._lire_lignes(), self._lignes(document))
+            return document
+
+        self._transaction(modification)
+
+    def remplacer_section(self, cles, valeur, fusionner=False, immediat=False):
+        """
+        Remplace la valeur au chemin cles dans une transaction ; seule la ligne de la
+        section concernée est relue puis réécrite.
+        """
+        cles = list(cles)
+        section = cles[0]
+
+        def modification():
+            anciennes = self._lire_lignes(section)
+            ancienne = self._assembler(anciennes).get(section)
+            finale = _valeur_finale({section: ancienne}, cles, valeur, fusionner)
+            nouvelle_section = _remplacer({section: ancienne}, cles, figer(finale))[section]
+            lignes = self._lignes({section: nouvelle_section})
+            if (section, "") in anciennes:
+                rang = anciennes[(section, "")][0]
+            else:
+                rang = self._connexion.execute(
+                    "SELECT COALESCE(MAX(rang) + 1, 0) FROM sections WHERE cle = ''"
+                ).fetchone()[0]
+            lignes[(section, "")] = (rang, lignes[(section, "")][1])
+            self._ecrire_lignes(anciennes, lignes)
+            if self._document is None:
+                return None
+            return _remplacer(self._document, cles, figer(finale))
+
+        self._transaction(modification)
+
+    def vider(self):
+        """Réexporte data_interface.json (format JSON habituel) si le document a changé."""
+        with self._verrou:
+            document = self.vue()
+            if self._generation_exportee == self.generation:
+                return False
+            self.exporter_json(document=document)
+            self._generation_exportee = self.generation
+            return True
+
+    def invalider(self):
+        """Force la relecture de la base au prochain accès."""
+        with self._verrou:
+            self._document = None
+
+    def importer_json(self, chemin=None):
+        """Remplace le contenu de la base par celui d'un fichier au format data_interface.json."""
+        with open(chemin or self.chemin_json, encoding="utf-8") as f:
+            self.enregistrer(json.load(f))
+        self._generation_exportee = self.generation
+
+    def exporter_json(self, chemin=None, document=None):
+        """Écrit le document au format data_interface.json (écriture atomique)."""
+        document = self.vue() if document is None else document
+        ecrire_atomique(chemin or self.chemin_json, json.dumps(document, ensure_ascii=False, indent=2))
+
+
+_documents = {}
+_verrou_documents = threading.Lock()
+
+
+def vider_tout():
+    """Écrit les modifications en attente de tous les documents (appelé aussi à l'arrêt du processus)."""
+    for document in list(_documents.values()):
+        document.vider()
+
+
+atexit.register(vider_tout)
+
+
+def document_interface(chemin=FICHIER_INTERFACE) -> DocumentInterface:
+    """
+    Document en cache du processus pour ce chemin (créé au premier appel), stocké
+    selon STOCKAGE_INTERFACE : le fichier JSON lui-même, ou une base SQLite à côté
+    (même nom, extension .sqlite3).
+    """
+    cle = os.path.abspath(chemin)
+    document = _documents.get(cle)
+    if document is None:
+        with _verrou_documents:
+            document = _documents.get(cle)
+            if document is None:
+                if STOCKAGE_INTERFACE == "sqlite":
+                    document = DocumentInterfaceSQLite(os.path.splitext(cle)[0] + ".sqlite3", chemin_json=cle)
+                else:
+                    document = DocumentInterface(cle)
+                _documents[cle] = document
+    return document
@@ -0,0 +1,51 @@
+"""
+Utilitaires d'écriture de fichiers partagés par les modules de données
+(donnees_interface, format_edt, solver, fonctions).
+
+`ecrire_atomique` écrit dans un fichier temporaire du même dossier, puis le
+renomme sur le fichier final : en cas d'arrêt brutal, le fichier contient
+l'ancienne ou la nouvelle version, jamais un mélange. Le module ne dépend que
+de la bibliothèque standard.
+"""
+
+import os
+import tempfile
+
+
+def ecrire_atomique(chemin, texte):
+    """
+    Écriture atomique : fichier temporaire du même dossier, fsync, puis renommage.
+    texte peut être une chaîne (écrite en UTF-8) ou des octets.
+    """
+    dossier = os.path.dirname(chemin) or "."
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(
+        dir=dossier, prefix="." + os.path.basename(chemin) + ".", suffix=".tmp"
+    )
+    try:
+        if isinstance(texte, str):
+            texte = texte.encode("utf-8")
+        with os.fdopen(descripteur, "wb") as f:
+            f.write(texte)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crée le fichier en 0600 : on reprend les droits du fichier remplacé
+        try:
+            mode = os.stat(chemin).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temporaire, mode)
+        os.replace(temporaire, chemin)
+        # Rend le renommage lui-même durable (sans objet hors POSIX)
+        if hasattr(os, "O_DIRECTORY"):
+            fd_dossier = os.open(dossier, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd_dossier)
+            finally:
+                os.close(fd_dossier)
+    except BaseException:
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
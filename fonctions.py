@@ -28,6 +28,10 @@ import base64
 import io
 import re
 
+import format_edt
+from donnees_interface import document_interface, empreinte_json, copie_modifiable, signature_fichier
+from fichiers import ecrire_atomique
+
 from styles import style_liste_choix
 
 import json
@@ -199,46 +203,48 @@ def initialiser_fichier_si_absent():
     Initialise le fichier `data_interface.json` s'il est absent, vide,
     ou invalide (structure manquante ou corrompue).
     """
-    chemin = FICHIER_INTERFACE
-    fichier_invalide = False
-
-    if os.path.exists(chemin) and os.path.getsize(chemin) > 0:
-        try:
-            with open(chemin, "r", encoding="utf-8") as f:
-                contenu = json.load(f)
-            # Vérifie que les principales sections existent
-            cles_essentielles = ["1_horaires", "2_langues_et_options", "3_ressources", "4_programme_national"]
-            if not all(cle in contenu for cle in cles_essentielles):
-                fichier_invalide = True
-        except Exception:
-            fichier_invalide = True
-    else:
-        fichier_invalide = True
+    # Le document en cache vaut {} si le fichier est absent, vide ou illisible
+    contenu = document_interface().vue()
 
-    if fichier_invalide:
+    # Vérifie que les principales sections existent
+    cles_essentielles = ["1_horaires", "2_langues_et_options", "3_ressources", "4_programme_national"]
+    if not all(cle in contenu for cle in cles_essentielles):
         # print("Fichier JSON absent, vide ou invalide : génération d'un squelette par défaut.")
-        os.makedirs(os.path.dirname(chemin), exist_ok=True)
-        donnees = generer_squelette_json_interface()
-        with open(chemin, "w", encoding="utf-8") as f:
-            json.dump(donnees, f, ensure_ascii=False, indent=2)
+        document_interface().enregistrer(generer_squelette_json_interface(), immediat=True)
 
 
 def charger_donnees_interface():
     """
     Charge les données depuis le fichier JSON `data_interface.json`.
     Retourne un dictionnaire vide en cas d'erreur.
+
+    Le fichier n'est relu que s'il a changé (voir donnees_interface) ; le dictionnaire
+    renvoyé est une copie modifiable. En lecture seule, préférer lire_donnees_interface()
+    ou section_interface().
     """
-    try:
-        with open("data/data_interface.json", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        data = {}
-    return data
+    return document_interface().copie()
+
+def lire_donnees_interface():
+    """
+    Renvoie le contenu de `data_interface.json` en lecture seule, depuis le cache
+    du processus (sans copie ni relecture du fichier s'il n'a pas changé).
+    """
+    return document_interface().vue()
+
+def section_interface(nom):
+    """
+    Renvoie une section de premier niveau de `data_interface.json` en lecture seule
+    (dictionnaire vide si elle est absente).
+    """
+    return document_interface().section(nom)
 
 def sauvegarder_donnees_interface(data, force=False):
     """
     Sauvegarde le fichier JSON complet. Par défaut, si les données semblent trop incomplètes,
     on empêche l'écrasement sauf si `force=True`.
+
+    Les données sont visibles tout de suite ; l'écriture du fichier est différée et
+    regroupée avec les modifications suivantes (voir donnees_interface).
     """
     if not isinstance(data, dict):
         return
@@ -248,9 +254,7 @@ def sauvegarder_donnees_interface(data, force=False):
     if not force and not all(k in data for k in cles_essentielles):
         return
 
-    os.makedirs("data", exist_ok=True)
-    with open("data/data_interface.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    document_interface().enregistrer(data)
 
 
 def merge_dicts(d1, d2):
@@ -272,26 +276,28 @@ def mettre_a_jour_section_interface(section, nouvelle_valeur):
     """
     Met à jour une section spécifique du fichier JSON interface sans écraser les autres données.
     La section peut être un chemin séparé par '.' pour sous-clés (ex : "4_programme_national.emc").
+
+    Seule la section est remplacée dans le document en cache ; l'écriture du fichier
+    est différée (voir sauvegarder_donnees_interface).
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     keys = section.split('.')
-    d = data
 
-    # Navigue jusqu'au dernier niveau
-    for key in keys[:-1]:
-        if key not in d or not isinstance(d[key], dict):
-            d[key] = {}
-        d = d[key]
-
-    last_key = keys[-1]
+    # Même garde que sauvegarder_donnees_interface sur les sections essentielles
+    cles_essentielles = ["1_horaires", "2_langues_et_options", "3_ressources", "4_programme_national"]
+    if not all(k in data or k == keys[0] for k in cles_essentielles):
+        return
 
     # Si la section existait déjà et que c'est un dict, on merge sinon on remplace
-    if last_key in d and isinstance(d[last_key], dict) and isinstance(nouvelle_valeur, dict):
-        d[last_key] = merge_dicts(d[last_key], nouvelle_valeur)
-    else:
-        d[last_key] = nouvelle_valeur
+    # (la fusion est faite par le stockage, dans la même transaction que l'écriture)
+    document_interface().remplacer_section(keys, nouvelle_valeur, fusionner=True)
 
-    sauvegarder_donnees_interface(data)
+def remplacer_section_interface(section, nouvelle_valeur):
+    """
+    Remplace une section du fichier JSON interface (chemin séparé par '.'), sans
+    fusion avec l'ancienne valeur et sans toucher aux autres sections.
+    """
+    document_interface().remplacer_section(section.split('.'), nouvelle_valeur)
 
 #################################################################################################################################################################
 
@@ -426,7 +432,7 @@ def calculer_horaires_affichage():
     """
     from datetime import datetime, timedelta
 
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     horaires = data.get("1_horaires", {})
     horaires_cl = horaires.get("horaires_classiques", {})
 
@@ -507,7 +513,7 @@ def generer_professeurs_affichage():
     Génère la liste des noms complets des professeurs pour affichage :
     "M. Dupont Alice", "Mme Martin Julie", ...
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     profs = data.get("3_ressources", {}).get("professeurs", [])
     if not profs:
         # print("Aucun professeur trouvé : génération annulée.")
@@ -532,7 +538,7 @@ def generer_volume_horaire():
     - Les LV3/LV4 à 2h par défaut si activés
     - Les options par niveau
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     programme = data.get("4_programme_national", {})
     langues_data = data.get("2_langues_et_options", {})
     autres_langues = langues_data.get("autres_langues", {})
@@ -634,7 +640,7 @@ def generer_salles_affichage():
     Génère la liste des noms de salles pour affichage simple.
     Exemple : ["Salle A", "Salle B", "Salle Physique"]
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     salles = data.get("3_ressources", {}).get("salles", [])
     if not salles:
         # print("Aucune salle trouvée, génération annulée.")
@@ -648,14 +654,30 @@ def generer_salles_affichage():
 
     mettre_a_jour_section_interface("affichage.salles_affichage", noms_salles)
 
+# Dernière transformation : (empreinte de l'interface, chemin de config.json) → (config, signature du fichier écrit)
+_configs_transformees = {}
+
 def transformer_interface_vers_config(path_interface="data/data_interface.json", path_config="data/config.json"):
     """
     Transforme le fichier de configuration brut de l'interface utilisateur (data_interface.json)
     en un fichier de configuration allégé et structuré (config.json) pour le solveur.
     Retourne également le dictionnaire résultant.
+
+    Mémoïsé sur l'empreinte du contenu de l'interface : si elle n'a pas changé et
+    que config.json est toujours celui écrit lors de l'appel précédent, le fichier
+    n'est ni recalculé ni réécrit.
     """
-    with open(path_interface, encoding="utf-8") as f:
-        interface = json.load(f)
+    # Lu depuis le stockage de l'interface ; les modifications en attente sont
+    # d'abord écrites pour que data_interface.json corresponde à config.json
+    document = document_interface(path_interface)
+    document.vider()
+    interface = document.vue()
+
+    cle = (empreinte_json(interface), os.path.abspath(path_config))
+    if cle in _configs_transformees:
+        config, signature = _configs_transformees[cle]
+        if signature == signature_fichier(path_config):
+            return copie_modifiable(config)
 
     config = {}
 
@@ -704,10 +726,11 @@ def transformer_interface_vers_config(path_interface="data/data_interface.json",
     config["poids_cartable_max_somme_par_niveau"] = interface.get("poids_cartable_max_somme_par_niveau", {})
 
     # Enregistre le résultat
-    with open(path_config, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    ecrire_atomique(path_config, json.dumps(config, indent=2, ensure_ascii=False))
+    _configs_transformees.clear()
+    _configs_transformees[cle] = (config, signature_fichier(path_config))
 
-    return config
+    return copie_modifiable(config)
 
 
 def charger_statistiques_contraintes(path="data/tous_rapports_contraintes.json"):
@@ -809,10 +832,9 @@ def charger_config():
     Charge la configuration complète de l'application à partir du fichier JSON principal.
 
     Returns:
-        dict: Le contenu du fichier de configuration `data_interface.json`.
+        dict: Le contenu du fichier de configuration `data_interface.json`, en lecture seule.
     """
-    with open("data/data_interface.json", encoding="utf-8") as f:
-        return json.load(f)
+    return document_interface().vue()
 
 
 def charger_contraintes_interface(entite: str) -> dict:
@@ -825,14 +847,7 @@ def charger_contraintes_interface(entite: str) -> dict:
     Returns:
         dict: Dictionnaire des contraintes avec pour chaque nom les cases marquées.
     """
-    fichier = "data/data_interface.json"
-    if not os.path.exists(fichier):
-        return {}
-
-    with open(fichier, encoding="utf-8") as f:
-        data = json.load(f)
-
-    entite_data = data.get("contraintes", {}).get(entite, {})
+    entite_data = document_interface().contraintes(entite)
     part = entite_data.get("indisponibilites_partielles", {})
     tot  = entite_data.get("indisponibilites_totales", {})
 
@@ -903,16 +918,6 @@ def save_constraints_interface(entite: str, contraintes: dict):
         entite (str): Nom de l'entité ("profs", "groupes", "salles").
         contraintes (dict): Dictionnaire des contraintes marquées.
     """
-    fichier = "data/data_interface.json"
-    if os.path.exists(fichier):
-        with open(fichier, encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = {}
-
-    if "contraintes" not in data:
-        data["contraintes"] = {}
-
     part = {}
     tot = {}
 
@@ -926,13 +931,10 @@ def save_constraints_interface(entite: str, contraintes: dict):
             cible.setdefault(nom, {}).setdefault(jour, []).append(ligne)
 
 
-    data["contraintes"][entite] = {
+    document_interface().remplacer_section(["contraintes", entite], {
         "indisponibilites_partielles": part,
         "indisponibilites_totales": tot
-    }
-
-    with open(fichier, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    })
 
 
 
@@ -974,9 +976,7 @@ def charger_contraintes_3_4(cle: str) -> list:
     Returns:
         list: Liste des contraintes enregistrées pour cette clé.
     """
-    with open("data/data_interface.json", encoding="utf-8") as f:
-        data = json.load(f)
-    return data.get("contraintes_3_4", {}).get(cle, [])
+    return document_interface().contraintes_3_4(cle).copy()
 
 def enregistrer_contraintes_3_4(cle: str, contenu: list):
     """
@@ -1240,8 +1240,9 @@ def charger_donnees_edt():
     """
     Charge les données d'emploi du temps depuis le fichier JSON principal.
 
-    Ouvre le fichier 'data/emploi_du_temps_global.json', charge son contenu sous forme de dictionnaire
-    et extrait la liste triée de tous les horaires présents dans l'emploi du temps (pour les deux semaines).
+    Charge le dernier emploi du temps enregistré (JSON historique ou format compact, voir format_edt)
+    sous forme de dictionnaire et extrait la liste triée de tous les horaires présents dans
+    l'emploi du temps (pour les deux semaines).
 
     Returns:
         tuple: Un tuple (edt_global, heures) où :
@@ -1251,8 +1252,7 @@ def charger_donnees_edt():
         """
     
     try:
-        with open("data/emploi_du_temps_global.json", encoding="utf-8") as f:
-            edt_global = json.load(f)
+        edt_global = format_edt.charger_edt()
     except Exception:
         edt_global = {}
         return edt_global, []
@@ -1290,12 +1290,50 @@ def charger_donnees_edt():
 
     return edt_global, heures
 
+def options_runs_dernier_lot():
+    """
+    Liste les runs du dernier lot de calcul (journal format_edt.JournalRuns de data/runs).
+
+    Returns:
+        list: Options de dropdown {"label": "Run <seed> — <taux> %", "value": seed},
+              triées par taux décroissant, ou liste vide si aucun lot n'est disponible.
+    """
+    try:
+        journal = format_edt.JournalRuns.dernier()
+    except Exception:
+        return []
+    if journal is None:
+        return []
+    return [
+        {"label": f"Run {seed} — {taux * 100:.1f} %", "value": seed}
+        for seed, taux in sorted(journal.taux(), key=lambda x: -x[1])
+    ]
+
+def charger_edt_run(seed):
+    """
+    Charge l'emploi du temps d'un run du dernier lot de calcul.
+
+    Seule la ligne du run demandé est relue dans le journal du lot.
+
+    Args:
+        seed (int): Graine du run.
+
+    Returns:
+        dict: Emploi du temps global du run (edt_classe, edt_prof, edt_salle),
+              ou None si le run est introuvable.
+    """
+    try:
+        journal = format_edt.JournalRuns.dernier()
+        return journal.charger(seed)["edt"] if journal is not None else None
+    except (KeyError, OSError, ValueError):
+        return None
+
 def sauvegarder_edt_global(edt_global):
     """
-    Sauvegarde l'emploi du temps global dans le fichier JSON principal.
+    Sauvegarde l'emploi du temps global dans le fichier principal.
 
-    Prend en entrée les données d'emploi du temps et les enregistre dans
-    'data/emploi_du_temps_global.json' au format JSON (UTF-8, indenté).
+    Prend en entrée les données d'emploi du temps et les enregistre dans le format
+    du fichier déjà présent (JSON historique ou compact, voir format_edt).
 
     Args:
         edt_global (dict): Données globales de l'emploi du temps à sauvegarder.
@@ -1304,9 +1342,7 @@ def sauvegarder_edt_global(edt_global):
         None
     """
     try:
-        with open("data/emploi_du_temps_global.json", "w", encoding="utf-8") as f:
-            json.dump(edt_global, f, ensure_ascii=False, indent=2)
-            
+        format_edt.sauvegarder_edt(edt_global)
     except Exception as e:
         print("Erreur lors de la sauvegarde :", e)
 
@@ -2134,67 +2170,6 @@ def build_edit_panel(cell, vue, semaine="A"):
 
 
 
-def transformer_interface_vers_config(path_interface="data/data_interface.json", path_config="data/config.json"):
-    """
-    Transforme le fichier de configuration brut de l'interface utilisateur (data_interface.json)
-    en un fichier de configuration allégé et structuré (config.json) pour le solveur.
-    Retourne également le dictionnaire résultant.
-    """
-    with open(path_interface, encoding="utf-8") as f:
-        interface = json.load(f)
-
-    config = {}
-
-    config["jours"] = interface["1_horaires"]["jours_classiques"]
-    config["heures"] = interface["affichage"]["horaires_affichage"]
-
-    config["matieres"] = sorted({m for niveau in interface["affichage"]["volume_horaire_affichage"].values() for m in niveau})
-    config["niveaux"] = list(interface["affichage"]["volume_horaire_affichage"].keys())
-    config["volume_horaire"] = interface["affichage"]["volume_horaire_affichage"]
-
-    # Classes base
-    classes = interface["3_ressources"]["classes"]
-    config["classes_base"] = [c["Classe"] for c in classes if not c["Dependances"]]
-    config["capacites_classes"] = {c["Classe"]: int(c["Effectif"]) for c in classes}
-
-    # Professeurs
-    profs = interface["3_ressources"]["professeurs"]
-    config["professeurs"] = {}  
-    config["volume_par_professeur"] = {f"{p['Civilite']} {p['Nom']} {p['Prenom']}": int(p["Volume"]) for p in profs}
-
-    # Salles
-    salles = interface["3_ressources"]["salles"]
-    config["capacites_salles"] = {s["Nom"]: int(s["Capacite"]) for s in salles}
-
-    # Indisponibilités
-    config["indisponibilites_profs"] = interface.get("contraintes", {}).get("profs", {}).get("indisponibilites_totales", {})
-    config["indisponibilites_salles"] = interface.get("contraintes", {}).get("salles", {}).get("indisponibilites_totales", {})
-
-    # Sous-groupes
-    config["sous_groupes_config"] = {}
-    for groupe in interface["3_ressources"]["classes"]:
-        if groupe["Dependances"]:
-            matiere = groupe["MatiereGroupe"]
-            niveau = groupe["Niveau"]
-            suffixe = "_" + groupe["Classe"].split("_")[-1] if "_" in groupe["Classe"] else "_" + matiere[:2]
-            if matiere not in config["sous_groupes_config"]:
-                config["sous_groupes_config"][matiere] = {"niveaux": [], "suffixe": suffixe}
-            if niveau not in config["sous_groupes_config"][matiere]["niveaux"]:
-                config["sous_groupes_config"][matiere]["niveaux"].append(niveau)
-
-    # Affectations spécifiques
-    config["affectation_matiere_salle"] = interface.get("affectation_matiere_salle", {})
-
-    # Poids et contraintes supplémentaires 
-    config["poids_matieres"] = interface.get("poids_matieres", {})
-    config["poids_cartable_max_somme_par_niveau"] = interface.get("poids_cartable_max_somme_par_niveau", {})
-
-    # Enregistre le résultat
-    with open(path_config, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
-
-    return config
-
 def charger_data_interface_et_modeles():
     """
     Transforme data_interface.json en config utilisable,
@@ -2251,99 +2226,6 @@ def charger_data_interface_et_modeles():
         solve_et_verifie
     )
 
-def charger_statistiques_contraintes(path="data/tous_rapports_contraintes.json"):
-    """
-    Charge les statistiques depuis le JSON et retourne :
-    - pourcentage global
-    - table_data pour Dash
-    - violations (set)
-    - détails groupés par contrainte
-    - stats : volume_horaire %, obligatoires %, optionnelles %
-    """
-
-    CORRECTIONS_ACCENTS = {
-        "Volume horaire": "Volume horaire",
-        "Volume par professeur": "Volume par professeur",
-        "Indisponibilites profs": "Indisponibilités profs",
-        "Indisponibilites salles": "Indisponibilités salles",
-        "Double affectation profs": "Double affectation profs",
-        "Double affectation salles": "Double affectation salles",
-        "Jours sans apres midi": "Jours sans après-midi",
-        "Mat exclu suite": "Matière exclue en suite",
-        "Mat inclu suite": "Matière incluse en suite",
-        "Mat horaire donne v2": "Horaire imposé pour groupe de matières",
-        "Max heures par etendue": "Maximum heures par étendue",
-        "Mem niveau cours": "Cours synchronisés par niveau",
-        "Cantine": "Réfectoire",
-        "Permanence": "Permanence",
-        "Poids cartable": "Poids du cartable",
-        "Preferences salle professeur": "Préférences de salle (professeurs)"
-    }
-
-    with open(path, encoding="utf-8") as f:
-        data_stats = json.load(f)
-
-    stats = data_stats["0"]
-    pourcentage_global = data_stats.get("pourcentage_global", 0)
-
-    table_data = []
-    violations = set()
-    details_violations_grouped = {}
-
-    # Compteurs pour statistiques
-    total_obl, respectees_obl = 0, 0
-    total_opt, respectees_opt = 0, 0
-    volume_horaire_pct = None
-
-    for key, val in stats.items():
-        total = val["total"]
-        respectees = val["respectees"]
-        statut = val.get("statut", "optionnelle")
-        details = val.get("details", [])
-        nom_brut = key.replace("_", " ").capitalize()
-        nom_affiche = CORRECTIONS_ACCENTS.get(nom_brut, nom_brut)
-
-        if total == 0:
-            taux = "-"
-        else:
-            taux = f"{round(respectees / total * 100, 1)}%"
-            if respectees < total:
-                violations.add(key)
-                if details:
-                    details_violations_grouped[nom_affiche] = list(set(details))
-
-        # Ajouter à table
-        table_data.append({
-            "contrainte": nom_affiche,
-            "statut": statut.capitalize(),
-            "respectees": respectees,
-            "total": total,
-            "taux": taux
-        })
-
-        # Compter pour stats
-        if statut == "obligatoire":
-            total_obl += total
-            respectees_obl += respectees
-        else:
-            total_opt += total
-            respectees_opt += respectees
-
-        if key == "volume_horaire":
-            volume_horaire_pct = f"{round((respectees / total) * 100, 1)}%" if total > 0 else "-"
-
-    # Pourcentages synthétiques
-    taux_obligatoire = f"{round((respectees_obl / total_obl) * 100, 1)}%" if total_obl else "-"
-    taux_optionnel = f"{round((respectees_opt / total_opt) * 100, 1)}%" if total_opt else "-"
-
-    stats_globales = {
-        "volume_horaire": volume_horaire_pct,
-        "contraintes_obligatoires": taux_obligatoire,
-        "contraintes_optionnelles": taux_optionnel
-    }
-
-    return pourcentage_global, table_data, violations, details_violations_grouped, stats_globales
-
 def harmoniser_intitule(matiere: str) -> str:
     """
     Met en forme l'intitulé d'une matière :
@@ -0,0 +1,498 @@
+"""
+Format de stockage de l'emploi du temps global (vues edt_classe, edt_prof et edt_salle).
+
+Deux formats coexistent :
+- le JSON historique (`emploi_du_temps_global.json`), où les trois vues répètent
+  chaque matière, prof et salle en toutes lettres ; il reste disponible en export ;
+- un format compact (`emploi_du_temps_global.edt`, éventuellement compressé en
+  `.edt.gz` ou `.edt.xz`) :
+    * toutes les chaînes sont internées dans une table unique et remplacées par leur indice ;
+    * la vue des classes est la vue canonique, stockée comme une liste de cours codés
+      en entiers [semaine, classe, jour, heure, matière, prof, salle, sous-groupe] ;
+    * les vues des profs et des salles en sont déduites à la lecture, et ne sont stockées
+      (toujours internées) que si elles ne s'en déduisent plus, par exemple après une
+      modification faite à la main dans la page des résultats.
+
+La lecture reconnaît le format au contenu du fichier (gzip, xz, JSON compact ou
+historique) et, sans chemin explicite, prend le fichier le plus récent parmi ceux
+des différents formats.
+
+Les runs d'un lot de calcul sont consignés au fil de l'eau dans un journal en ajout
+seul (JournalRuns, un fichier JSONL par lot dans data/runs) : chaque ligne porte les
+résultats des contraintes et l'emploi du temps compact d'un run, relu à la demande.
+"""
+
+import gzip
+import json
+import lzma
+import os
+import time
+
+from fichiers import ecrire_atomique
+
+# Chemin (sans extension) des fichiers de l'emploi du temps global
+BASE_EDT = "data/emploi_du_temps_global"
+
+# Extension de fichier de chaque format
+EXTENSIONS = {
+    "json": ".json",
+    "compact": ".edt",
+    "compact.gz": ".edt.gz",
+    "compact.xz": ".edt.xz",
+}
+
+# Format écrit quand aucun fichier n'existe encore
+FORMAT_PAR_DEFAUT = "compact.gz"
+
+# Nom et version du format compact (clé "format" du fichier)
+FORMAT_COMPACT = "edt-compact"
+VERSION_COMPACT = 1
+
+VUES = ("edt_classe", "edt_prof", "edt_salle")
+
+# Dossier des journaux de runs, et nombre de lots conservés (les plus récents)
+DOSSIER_RUNS = "data/runs"
+LOTS_CONSERVES = 5
+
+
+class TableChaines:
+    """Table des chaînes internées : chaque chaîne distincte reçoit un indice, dans l'ordre d'apparition."""
+
+    def __init__(self):
+        self.chaines = []
+        self.indices = {}
+
+    def __call__(self, chaine):
+        indice = self.indices.get(chaine)
+        if indice is None:
+            indice = self.indices[chaine] = len(self.chaines)
+            self.chaines.append(chaine)
+        return indice
+
+
+def libelle_cours(matiere, groupe):
+    """Libellé d'un cours dans la vue des classes : "Espagnol (5e1_esp)" pour un sous-groupe."""
+    return f"{matiere} ({groupe})" if groupe else matiere
+
+
+def separer_libelle(libelle):
+    """Inverse de libelle_cours : (matière, sous-groupe ou None)."""
+    if libelle.endswith(")") and " (" in libelle:
+        matiere, groupe = libelle[:-1].split(" (", 1)
+        return matiere, groupe
+    return libelle, None
+
+
+def cours_depuis_vue_classes(edt_classe):
+    """
+    Liste des cours de la vue des classes, un tuple
+    (semaine, classe, jour, heure, matière, prof, salle, sous-groupe) par cours,
+    dans l'ordre de la vue.
+
+    Retourne None si une cellule n'a pas la forme produite par le solveur
+    (matiere, professeurs et salle : listes de chaînes de même longueur).
+    """
+    cours = []
+    for semaine, classes in edt_classe.items():
+        for classe, jours in classes.items():
+            for jour, heures in jours.items():
+                for heure, cellule in heures.items():
+                    if not isinstance(cellule, dict) or set(cellule) != {"matiere", "professeurs", "salle"}:
+                        return None
+                    colonnes = (cellule["matiere"], cellule["professeurs"], cellule["salle"])
+                    if not colonnes[0] or len({len(col) for col in colonnes}) != 1:
+                        return None
+                    for libelle, prof, salle in zip(*colonnes):
+                        if not all(isinstance(x, str) for x in (libelle, prof, salle)):
+                            return None
+                        matiere, groupe = separer_libelle(libelle)
+                        cours.append((semaine, classe, jour, heure, matiere, prof, salle, groupe))
+    return cours
+
+
+def vue_classes(cours, squelette):
+    """
+    Reconstruit la vue des classes à partir des cours et du squelette
+    {semaine: {classe: [jours]}} (classes et jours présents, même sans cours).
+    """
+    edt_classe = {
+        semaine: {classe: {jour: {} for jour in jours} for classe, jours in classes.items()}
+        for semaine, classes in squelette.items()
+    }
+    for semaine, classe, jour, heure, matiere, prof, salle, groupe in cours:
+        cellule = edt_classe[semaine][classe][jour].setdefault(
+            heure, {"matiere": [], "professeurs": [], "salle": []}
+        )
+        cellule["matiere"].append(libelle_cours(matiere, groupe))
+        cellule["professeurs"].append(prof)
+        cellule["salle"].append(salle)
+    return edt_classe
+
+
+def identiques(a, b):
+    """Égalité de deux vues, ordre des clés compris (l'ordre est rendu tel quel à la lecture)."""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and list(a) == list(b) and all(identiques(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(map(identiques, a, b))
+    return a == b
+
+
+def ordre_suffixes(groupes):
+    """
+    Rang de chaque suffixe de sous-groupe, retrouvé depuis les cellules de la vue
+    des classes (les sous-groupes d'une cellule y suivent l'ordre des suffixes).
+
+    Arguments:
+        groupes (list): cours de sous-groupe, tuples de cours_depuis_vue_classes.
+
+    Retourne:
+        dict: suffixe → rang.
+    """
+    cellules = {}
+    for semaine, classe, jour, heure, *_, groupe in groupes:
+        if groupe.startswith(classe):
+            cellules.setdefault((semaine, classe, jour, heure), []).append(groupe[len(classe):])
+    # Tri topologique des précédences observées, à égalité par première apparition
+    vus = list(dict.fromkeys(s for suite in cellules.values() for s in suite))
+    precedents = {s: set() for s in vus}
+    for suite in cellules.values():
+        for avant, apres in zip(suite, suite[1:]):
+            if avant != apres:
+                precedents[apres].add(avant)
+    ordre = []
+    while vus:
+        suffixe = next((s for s in vus if not precedents[s] - set(ordre)), vus[0])
+        vus.remove(suffixe)
+        ordre.append(suffixe)
+    return {suffixe: rang for rang, suffixe in enumerate(ordre)}
+
+
+def vues_profs_salles(cours, semaines, jours):
+    """
+    Déduit les vues edt_prof et edt_salle des cours de la vue des classes, comme
+    generer_json_edt les construit : un cours de sous-groupe y apparaît sous le nom
+    du sous-groupe, et le dernier cours rencontré sur un créneau l'emporte.
+
+    Retourne:
+        tuple: (edt_prof, edt_salle).
+    """
+    edt_prof = {semaine: {} for semaine in semaines}
+    edt_salle = {semaine: {} for semaine in semaines}
+    # Cours des classes d'abord, puis ceux des sous-groupes dans l'ordre de la fusion :
+    # par suffixe, puis par classe de base (l'ordre des cours de la vue, stable, fait le reste)
+    groupes = [c for c in cours if c[7]]
+    suffixes = ordre_suffixes(groupes)
+    groupes.sort(key=lambda c: suffixes.get(c[7][len(c[1]):], len(suffixes)))
+    ordonnes = [c for c in cours if not c[7]] + groupes
+    for semaine, classe, jour, heure, matiere, prof, salle, groupe in ordonnes:
+        classe = groupe or classe
+        vue_prof = edt_prof[semaine].setdefault(prof, {j: {} for j in jours})
+        vue_prof.setdefault(jour, {})[heure] = {"classe": [classe], "matiere": [matiere], "salle": [salle]}
+        vue_salle = edt_salle[semaine].setdefault(salle, {j: {} for j in jours})
+        vue_salle.setdefault(jour, {})[heure] = {"classe": [classe], "matiere": [matiere], "professeurs": [prof]}
+    return edt_prof, edt_salle
+
+
+def encoder_vue(vue, interner):
+    """
+    Encode une vue quelconque {semaine: {entité: {jour: {heure: cellule}}}} en listes
+    [clé, enfants] de chaînes internées. Une cellule dont les valeurs sont des listes
+    de chaînes devient [[clé, [valeurs]], ...] ; les autres (None comprise) sont gardées telles quelles.
+    Une vue d'une autre forme est gardée entière sous {"brut": vue}.
+    """
+    def noeud(obj, profondeur):
+        if profondeur == 4:
+            if isinstance(obj, dict) and all(
+                isinstance(v, list) and all(isinstance(x, str) for x in v) for v in obj.values()
+            ):
+                return [[interner(k), [interner(x) for x in v]] for k, v in obj.items()]
+            if obj is None or isinstance(obj, dict):
+                return obj
+            raise ValueError("cellule inattendue")
+        if not isinstance(obj, dict):
+            raise ValueError("niveau inattendu")
+        return [[interner(k), noeud(v, profondeur + 1)] for k, v in obj.items()]
+
+    try:
+        return noeud(vue, 0)
+    except ValueError:
+        return {"brut": vue}
+
+
+def decoder_vue(code, chaines):
+    """Inverse de encoder_vue."""
+    if isinstance(code, dict):
+        return code["brut"]
+
+    def noeud(obj, profondeur):
+        if profondeur == 4:
+            if isinstance(obj, list):
+                return {chaines[k]: [chaines[x] for x in v] for k, v in obj}
+            return obj
+        return {chaines[k]: noeud(v, profondeur + 1) for k, v in obj}
+
+    return noeud(code, 0)
+
+
+def encoder_edt(edt_global):
+    """
+    Encode l'emploi du temps global (dict des trois vues) au format compact.
+
+    La vue des classes est stockée comme liste de cours codés en entiers si elle
+    se reconstruit à l'identique ; les vues des profs et des salles ne sont stockées
+    que si elles diffèrent de celles qui s'en déduisent. Toute autre clé est
+    stockée telle quelle.
+
+    Retourne:
+        dict: contenu compact, sérialisable en JSON.
+    """
+    interner = TableChaines()
+    compact = {"format": FORMAT_COMPACT, "version": VERSION_COMPACT}
+    edt_classe = edt_global.get("edt_classe")
+    vues = {}
+    autres = {}
+
+    cours = cours_depuis_vue_classes(edt_classe) if isinstance(edt_classe, dict) else None
+    squelette = None
+    if cours is not None:
+        try:
+            squelette = {
+                semaine: {classe: list(jours) for classe, jours in classes.items()}
+                for semaine, classes in edt_classe.items()
+            }
+        except AttributeError:
+            cours = None
+    if cours is not None and not identiques(vue_classes(cours, squelette), edt_classe):
+        cours = None
+
+    derivees = {}
+    if cours is not None:
+        jours = list(dict.fromkeys(j for classes in squelette.values() for js in classes.values() for j in js))
+        derivees["edt_prof"], derivees["edt_salle"] = vues_profs_salles(cours, list(squelette), jours)
+        compact["jours"] = [interner(j) for j in jours]
+        compact["squelette"] = [
+            [interner(semaine), [[interner(classe), [interner(j) for j in js]] for classe, js in classes.items()]]
+            for semaine, classes in squelette.items()
+        ]
+        compact["cours"] = [
+            [interner(s), interner(c), interner(j), interner(h), interner(m), interner(p), interner(r),
+             interner(g) if g else -1]
+            for s, c, j, h, m, p, r, g in cours
+        ]
+
+    for nom, vue in edt_global.items():
+        if nom == "edt_classe" and cours is not None:
+            continue
+        if nom in derivees and identiques(derivees[nom], vue):
+            continue
+        if nom in VUES:
+            vues[nom] = encoder_vue(vue, interner)
+        else:
+            autres[nom] = vue
+    compact["vues"] = vues
+    compact["autres"] = autres
+    compact["ordre"] = list(edt_global)
+    compact["chaines"] = interner.chaines
+    return compact
+
+
+def decoder_edt(compact):
+    """Inverse de encoder_edt : reconstruit le dict des trois vues."""
+    chaines = compact["chaines"]
+    resultat = {}
+    if "cours" in compact:
+        squelette = {
+            chaines[s]: {chaines[c]: [chaines[j] for j in js] for c, js in classes}
+            for s, classes in compact["squelette"]
+        }
+        cours = [
+            (chaines[s], chaines[c], chaines[j], chaines[h], chaines[m], chaines[p], chaines[r],
+             chaines[g] if g >= 0 else None)
+            for s, c, j, h, m, p, r, g in compact["cours"]
+        ]
+        resultat["edt_classe"] = vue_classes(cours, squelette)
+        jours = [chaines[j] for j in compact["jours"]]
+        resultat["edt_prof"], resultat["edt_salle"] = vues_profs_salles(cours, list(squelette), jours)
+    for nom, code in compact["vues"].items():
+        resultat[nom] = decoder_vue(code, chaines)
+    resultat.update(compact["autres"])
+    # Seules les vues présentes à l'écriture sont rendues, dans leur ordre d'origine
+    return {nom: resultat[nom] for nom in compact["ordre"]}
+
+
+def chemin_format(format, base=BASE_EDT):
+    """Chemin du fichier d'un format ("json", "compact", "compact.gz" ou "compact.xz")."""
+    return base + EXTENSIONS[format]
+
+
+def format_existant(base=BASE_EDT):
+    """Format du fichier le plus récent parmi ceux de base, ou None s'il n'y en a aucun."""
+    existants = [
+        (os.path.getmtime(chemin_format(fmt, base)), fmt)
+        for fmt in EXTENSIONS if os.path.exists(chemin_format(fmt, base))
+    ]
+    return max(existants)[1] if existants else None
+
+
+def sauvegarder_edt(edt_global, format=None, base=BASE_EDT):
+    """
+    Écrit l'emploi du temps global dans le format demandé (par défaut celui du
+    fichier existant le plus récent, sinon FORMAT_PAR_DEFAUT).
+
+    Arguments:
+        edt_global (dict): vues edt_classe, edt_prof et edt_salle.
+        format (str): "json" (export historique, indenté), "compact", "compact.gz" ou "compact.xz".
+        base (str): chemin sans extension.
+
+    Retourne:
+        str: chemin du fichier écrit.
+    """
+    format = format or format_existant(base) or FORMAT_PAR_DEFAUT
+    if format not in EXTENSIONS:
+        raise ValueError(f"Format d'emploi du temps inconnu : {format}")
+    chemin = chemin_format(format, base)
+    if format == "json":
+        donnees = json.dumps(edt_global, ensure_ascii=False, indent=4).encode("utf-8")
+    else:
+        donnees = json.dumps(encoder_edt(edt_global), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if format == "compact.gz":
+            donnees = gzip.compress(donnees, compresslevel=6, mtime=0)
+        elif format == "compact.xz":
+            donnees = lzma.compress(donnees)
+    # Fichier temporaire renommé : une lecture concurrente (page des résultats, hint
+    # du solveur) voit l'ancienne ou la nouvelle version, jamais un fichier tronqué
+    ecrire_atomique(chemin, donnees)
+    return chemin
+
+
+def lire_edt(chemin):
+    """
+    Lit un fichier d'emploi du temps dans n'importe quel format, reconnu à son
+    contenu (gzip, xz, JSON compact ou JSON historique).
+    """
+    with open(chemin, "rb") as f:
+        donnees = f.read()
+    if donnees[:2] == b"\x1f\x8b":
+        donnees = gzip.decompress(donnees)
+    elif donnees[:6] == b"\xfd7zXZ\x00":
+        donnees = lzma.decompress(donnees)
+    contenu = json.loads(donnees.decode("utf-8"))
+    if isinstance(contenu, dict) and contenu.get("format") == FORMAT_COMPACT:
+        return decoder_edt(contenu)
+    return contenu
+
+
+def charger_edt(chemin=None, base=BASE_EDT):
+    """
+    Charge l'emploi du temps global : le fichier donné, sinon le plus récent des
+    fichiers de base (tous formats confondus).
+
+    Lève FileNotFoundError s'il n'y a aucun fichier.
+    """
+    if chemin is None:
+        format = format_existant(base)
+        if format is None:
+            raise FileNotFoundError(f"Aucun emploi du temps enregistré ({base}.*)")
+        chemin = chemin_format(format, base)
+    return lire_edt(chemin)
+
+
+class JournalRuns:
+    """
+    Journal en ajout seul des runs d'un lot : un fichier JSONL, une ligne
+    {"seed", "taux", "resultats", "edt"} par run terminé, "edt" étant l'emploi du
+    temps du run au format compact (encoder_edt).
+
+    Seules la position de chaque ligne et le taux du run sont gardés en mémoire ;
+    les résultats et l'emploi du temps d'un run sont relus à la demande (charger).
+    Une dernière ligne incomplète (lot interrompu) est ignorée à la relecture.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.positions = {}  # seed → (position de la ligne, taux)
+        if os.path.exists(chemin):
+            position = 0
+            with open(chemin, "rb") as f:
+                for ligne in f:
+                    if ligne.endswith(b"\n"):
+                        run = json.loads(ligne)
+                        self.positions[run["seed"]] = (position, run["taux"])
+                    position += len(ligne)
+
+    @classmethod
+    def nouveau(cls, dossier=DOSSIER_RUNS):
+        """
+        Crée le journal d'un nouveau lot (lot_AAAAMMJJ_HHMMSS.jsonl), après avoir
+        supprimé les plus anciens pour n'en garder que LOTS_CONSERVES au total.
+        """
+        os.makedirs(dossier, exist_ok=True)
+        lots = cls.lots(dossier)
+        # Plusieurs lots dans la même seconde : suffixe croissant, pour que le nouveau
+        # lot reste le dernier dans l'ordre des noms (même après la rotation)
+        nom = time.strftime("lot_%Y%m%d_%H%M%S")
+        fichier = f"{nom}.jsonl"
+        n = 1
+        while lots and lots[-1].startswith(nom) and fichier <= lots[-1]:
+            n += 1
+            fichier = f"{nom}_{n:03d}.jsonl"
+        for ancien in lots[:max(0, len(lots) - (LOTS_CONSERVES - 1))]:
+            os.remove(os.path.join(dossier, ancien))
+        chemin = os.path.join(dossier, fichier)
+        ecrire_atomique(chemin, b"")
+        return cls(chemin)
+
+    @staticmethod
+    def lots(dossier=DOSSIER_RUNS):
+        """Noms des fichiers de lots du dossier, du plus ancien au plus récent (horodatés dans le nom)."""
+        if not os.path.isdir(dossier):
+            return []
+        return sorted(nom for nom in os.listdir(dossier) if nom.startswith("lot_") and nom.endswith(".jsonl"))
+
+    @classmethod
+    def dernier(cls, dossier=DOSSIER_RUNS):
+        """Journal du lot le plus récent, ou None s'il n'y en a aucun."""
+        lots = cls.lots(dossier)
+        return cls(os.path.join(dossier, lots[-1])) if lots else None
+
+    def ajouter(self, seed, taux, resultats, edt_global):
+        """Ajoute la ligne d'un run terminé à la fin du journal."""
+        ligne = json.dumps(
+            {"seed": seed, "taux": taux, "resultats": resultats, "edt": encoder_edt(edt_global)},
+            ensure_ascii=False, separators=(",", ":")
+        )
+        with open(self.chemin, "ab") as f:
+            position = f.tell()
+            f.write(ligne.encode("utf-8") + b"\n")
+        self.positions[seed] = (position, taux)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def taux(self):
+        """Liste (seed, taux) des runs, dans l'ordre du journal."""
+        return [(seed, taux) for seed, (_, taux) in self.positions.items()]
+
+    def __iter__(self):
+        """Parcourt les runs un par un : (seed, taux, resultats), sans garder les précédents."""
+        with open(self.chemin, "rb") as f:
+            for ligne in f:
+                if ligne.endswith(b"\n"):
+                    run = json.loads(ligne)
+                    yield run["seed"], run["taux"], run["resultats"]
+
+    def charger(self, seed):
+        """
+        Relit un run du journal.
+
+        Retourne:
+            dict: {"seed", "taux", "resultats", "edt"} avec "edt" décodé (vues
+            edt_classe, edt_prof et edt_salle).
+        """
+        position, _ = self.positions[seed]
+        with open(self.chemin, "rb") as f:
+            f.seek(position)
+            run = json.loads(f.readline())
+        run["edt"] = decoder_edt(run["edt"])
+        return run
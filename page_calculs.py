@@ -3,6 +3,7 @@ Page Dash dédiée au lancement du solver
 
 Cette page présente une sections principale organisée :
 - Explication
+- Analyse préalable de la configuration (problèmes bloquants et avertissements)
 - Saisie et bouton pour lancer le solver avec un nombre de runs définis
 - Barre de chargements avec du textes pour donner des informations complémentaires.
 
@@ -19,6 +20,8 @@ from textes import texte_explications_page_calculs_1,texte_explications_page_cal
 import math
 import threading
 
+from donnees_interface import document_interface
+
 import time
 
 # ---------- LAYOUT PRINCIPAL DE LA PAGE ----------
@@ -28,6 +31,7 @@ def layout_calculs():
         dcc.Store(id="store-demarrage", data=False, storage_type="memory"),
         dcc.Store(id="store-resultats-solver", storage_type="session"),
         dcc.Store(id="store-progress", data=0),  # Pour suivre l'avancement
+        dcc.Store(id="store-diagnostic", data=True),  # Déclenche l'analyse préalable au chargement
         dcc.Interval(id="interval-chargement", interval=1000, n_intervals=0, disabled=True),  # Boucle de progression
         dcc.Location(id="redirect-calculs", refresh=True),  # Redirection après calcul terminé
 
@@ -43,6 +47,9 @@ def layout_calculs():
                 html.Br(),
                 texte_explications_page_calculs_4,
                 ], style={**explication_style, "marginBottom": "30px"}),
+
+        # Analyse préalable de config.json (remplie au chargement de la page)
+        html.Div(id="diagnostic-faisabilite", style={"marginBottom": "20px"}),
         
         html.Div([
             html.Label("Combien d'emplois du temps souhaitez-vous comparer ?", style={"fontWeight": "bold", "marginBottom": "10px"}),
@@ -90,6 +97,15 @@ def layout_calculs():
                html.Div(id="taux-regroupes", style={"fontSize": "14px", "marginTop": "8px", "display": "flex", "gap": "20px","textAlign":"center","width": "100%"}),
             ]),
 
+            # Bouton d'annulation (affiché seulement pendant le calcul)
+            html.Div(id="bouton-annuler-container", children=[
+                html.Br(),
+                dbc.Button([
+                    html.I(className="bi bi-stop-fill me-2"),
+                    "Annuler le calcul"
+                ], id="btn-annuler-calcul", color="danger", outline=True)
+            ], style={"display": "none", "textAlign": "center", "marginTop": "20px"}),
+
             # NOUVEAU : Bouton pour aller aux résultats (affiché seulement quand terminé)
             html.Div(id="bouton-resultats-container", children=[
                 html.Br(),
@@ -116,12 +132,60 @@ def layout_calculs():
 
 # ---------- CALLBACKS ----------
 
+def alertes_diagnostic(diagnostic):
+    """
+    Met en forme le résultat de analyser_faisabilite : une alerte rouge pour les
+    problèmes bloquants, une alerte orange pour les avertissements.
+    """
+    if not diagnostic["bloquants"] and not diagnostic["avertissements"]:
+        return dbc.Alert(
+            f"✅ Analyse préalable : aucun problème détecté ({diagnostic['duree_ms']:.0f} ms)",
+            color="success"
+        )
+    alertes = []
+    if diagnostic["bloquants"]:
+        alertes.append(dbc.Alert([
+            html.Strong("⛔ Configuration infaisable : le calcul ne peut pas aboutir."),
+            html.Ul([html.Li(probleme) for probleme in diagnostic["bloquants"]], style={"marginBottom": 0}),
+        ], color="danger"))
+    if diagnostic["avertissements"]:
+        alertes.append(dbc.Alert([
+            html.Strong("⚠️ Points d'attention (le calcul reste possible) :"),
+            html.Ul([html.Li(probleme) for probleme in diagnostic["avertissements"]], style={"marginBottom": 0}),
+        ], color="warning"))
+    return alertes
+
+
+@callback(
+    Output("diagnostic-faisabilite", "children"),
+    Output("btn-lancer-calcul", "disabled"),
+    Input("store-diagnostic", "data"),
+)
+def afficher_diagnostic(_):
+    """
+    Analyse config.json au chargement de la page (analyser_faisabilite, quelques
+    millisecondes, sans construire le modèle) et désactive le lancement si un
+    problème bloquant rend le calcul infaisable d'emblée.
+
+    Returns:
+        tuple: (alertes à afficher, bouton "Lancer le calcul" désactivé ou non)
+    """
+    from solver import diagnostiquer_config
+    try:
+        diagnostic = diagnostiquer_config()
+    except (OSError, ValueError, KeyError) as e:
+        diagnostic = {"bloquants": [f"Configuration illisible : {e!r}"], "avertissements": [], "duree_ms": 0}
+    return alertes_diagnostic(diagnostic), bool(diagnostic["bloquants"])
+
+
 # Callback déclenché au clic sur "Lancer le calcul"
 @callback(
     Output("bloc-chargement", "style"),           # Affiche le bloc
     Output("interval-chargement", "disabled"),    # Active le tick
     Output("store-progress", "data"),             # Réinitialise la progression
     Output("store-demarrage", "data"),            # Indique que le calcul démarre
+    Output("btn-annuler-calcul", "disabled", allow_duplicate=True),   # Réactive l'annulation
+    Output("btn-annuler-calcul", "children", allow_duplicate=True),
     Input("btn-lancer-calcul", "n_clicks"),
     prevent_initial_call=True
 )
@@ -142,12 +206,14 @@ def demarrer_calcul(n):
             - bool: False pour activer l'intervalle de mise à jour
             - int: 0 pour réinitialiser la progression
             - bool: True pour indiquer que le calcul démarre
+            - bool, list: bouton d'annulation réactivé avec son libellé initial
     
     Note:
         Ce callback utilise prevent_initial_call=True pour éviter l'exécution
         au chargement initial de la page.
     """
-    return {"display": "block"}, False, 0, True
+    libelle_annuler = [html.I(className="bi bi-stop-fill me-2"), "Annuler le calcul"]
+    return {"display": "block"}, False, 0, True, False, libelle_annuler
 
 
 
@@ -175,6 +241,33 @@ def aller_aux_resultats(n):
     return dash.no_update
 
 
+@callback(
+    Output("btn-annuler-calcul", "disabled"),
+    Output("btn-annuler-calcul", "children"),
+    Input("btn-annuler-calcul", "n_clicks"),
+    prevent_initial_call=True
+)
+def annuler_calcul(n):
+    """
+    Annule le calcul en cours.
+
+    Callback Dash déclenché lors du clic sur le bouton "Annuler le calcul".
+    Les résolutions en cours sont interrompues et les essais restants abandonnés ;
+    la meilleure solution déjà trouvée est tout de même vérifiée et enregistrée.
+
+    Args:
+        n (int): Nombre de clics sur le bouton (fourni automatiquement par Dash)
+
+    Returns:
+        tuple: (bool, str) état désactivé et libellé du bouton
+    """
+    if not n:
+        raise dash.exceptions.PreventUpdate
+    from solver import demander_arret
+    demander_arret()
+    return True, "Annulation en cours..."
+
+
 etat_solver = {"en_cours": False, "thread_demarre": False}
 
 
@@ -219,6 +312,8 @@ def lancer_solver_thread(nombre_runs):
             etat_solver["thread_demarre"] = False
 
     if not etat_solver["thread_demarre"]:
+        # Le calcul relit les fichiers de data/ : les saisies en attente y sont écrites d'abord
+        document_interface().vider()
         etat_solver["en_cours"] = True
         etat_solver["thread_demarre"] = True
         threading.Thread(target=tache, daemon=True).start()
@@ -234,6 +329,7 @@ def lancer_solver_thread(nombre_runs):
     Output("bouton-resultats-container", "style"),
     Output("store-progress", "data", allow_duplicate=True),
     Output("store-resultats-solver", "data"),
+    Output("bouton-annuler-container", "style"),
     Input("interval-chargement", "n_intervals"),
     State("store-progress", "data"),
     State("store-demarrage", "data"),
@@ -256,7 +352,7 @@ def progression(n, progress_store, actif, nombre_runs):
         nombre_runs (int): Nombre de runs d'optimisation configuré
     
     Returns:
-        tuple: Un tuple de 9 éléments pour mettre à jour l'interface :
+        tuple: Un tuple de 10 éléments pour mettre à jour l'interface :
             - int: Valeur de la barre de progression (0-100)
             - str: Texte d'estimation de temps
             - str: Message principal de statut
@@ -266,6 +362,7 @@ def progression(n, progress_store, actif, nombre_runs):
             - dict: Style CSS du container des boutons résultats
             - int: Nouvelle valeur de progression à stocker
             - dict or dash.no_update: Données des résultats finaux
+            - dict: Style CSS du container du bouton d'annulation
     
     Information:
         - Au premier tick (progress_store == 0) : lance le solver dans un thread
@@ -283,6 +380,9 @@ def progression(n, progress_store, actif, nombre_runs):
     if not actif or n == 0:
         raise dash.exceptions.PreventUpdate
 
+    # Le bouton d'annulation reste visible tant que le calcul n'est pas terminé
+    style_annulation = {"display": "block", "textAlign": "center", "marginTop": "20px"}
+
     # Au premier tick, lance le solver
     if progress_store == 0 and not etat_solver["thread_demarre"]:
         lancer_solver_thread(nombre_runs)
@@ -297,7 +397,7 @@ def progression(n, progress_store, actif, nombre_runs):
             5, temps_initial, message_initial, 
             "Initialisation du solveur...", 
             "",   # taux_regroupes vide
-            False, {"display": "none"}, 1, dash.no_update
+            False, {"display": "none"}, 1, dash.no_update, style_annulation
         )
 
     # Récupère les informations d'avancement depuis le solver
@@ -326,6 +426,17 @@ def progression(n, progress_store, actif, nombre_runs):
         }
         etape_detaillee = etapes_detaillees.get(info["etape"], "")
 
+        # Dernière solution améliorante publiée par le solveur (run en cours)
+        if info.get("objectif") is not None:
+            penalites = info.get("penalites", {})
+            etape_detaillee = (
+                f"Solution n°{info['solutions_trouvees']} : objectif {info['objectif']:.0f} "
+                f"(borne {info['borne']:.0f}, écart {info['gap']*100:.1f} %) | "
+                f"permanences {penalites.get('permanence', 0)}, "
+                f"préférences {penalites.get('preferences', 0)}, "
+                f"cartable {penalites.get('cartable', 0)}"
+            )
+
 
         # 3. Formatage du temps
         temps_str = ""
@@ -391,37 +502,58 @@ def progression(n, progress_store, actif, nombre_runs):
             # Récupération des résultats
             resultats = {}
             try:
-                from solver import fusions_par_run, taux_par_run, meilleur_seed, meilleure_fusion, meilleur_resultats
+                # Uniquement des données sérialisables en JSON : les emplois du temps
+                # de chaque run sont relus depuis le journal du lot (data/runs)
+                from solver import journal_runs, taux_par_run, meilleur_seed, meilleur_resultats
                 resultats = {
-                    "fusions_par_run": fusions_par_run,
+                    "journal_runs": journal_runs.chemin if journal_runs is not None else None,
                     "taux_par_run": taux_par_run,
                     "meilleur_seed": meilleur_seed,
-                    "meilleure_fusion": meilleure_fusion,
                     "meilleur_resultats": meilleur_resultats,
                 }
-                try:
-                    from solver import fusion_choisie
-                    resultats["fusion_choisie"] = fusion_choisie
-                except:
-                    pass
             except Exception as e:
                 print(f"Impossible de récupérer tous les résultats: {e}")
 
+            # Raison de la fin du lot (arrêt anticipé ou toutes les runs effectuées)
+            raisons_arret = {
+                "taux_parfait": "Arrêt anticipé : 100 % des contraintes respectées",
+                "stagnation": "Arrêt anticipé : plus d'amélioration depuis plusieurs runs",
+                "budget_total": "Arrêt anticipé : budget de temps total atteint",
+                "annulation": "Calcul annulé : meilleure solution trouvée conservée",
+            }
+            etape_detaillee = raisons_arret.get(info.get("raison_arret"), etape_detaillee)
+
+            message_final = messages_phases["termine"]    # "✅ Calcul terminé avec succès !"
+            if info.get("raison_arret") == "annulation":
+                message_final = "⏹️ Calcul annulé"
+
+            # Lot refusé par l'analyse préalable : aucun résultat à afficher
+            if info.get("raison_arret") == "infaisable":
+                bloquants = info["diagnostic"]["bloquants"]
+                return (
+                    100, "",
+                    "⛔ Calcul refusé : configuration infaisable",
+                    " | ".join(bloquants[:3]) + (f" (+{len(bloquants) - 3} autres)" if len(bloquants) > 3 else ""),
+                    "",
+                    True, {"display": "none"},
+                    100, dash.no_update, {"display": "none"}
+                )
+
             # Message principal bien terminé
             return (
                 100, temps_final, 
-                messages_phases["termine"],    # Affiche "✅ Calcul terminé avec succès !"
+                message_final,
                 etape_detaillee,
                 taux_regroupes_text,
                 True, {"display": "block", "textAlign": "center", "marginTop": "20px"},
-                100, {"success": True}
+                100, {"success": True}, {"display": "none"}
             )
 
         # Retour normal pendant le calcul
         return (
             info["pourcentage"], temps_str, message_principal, etape_detaillee,
             taux_regroupes_text,
-            False, {"display": "none"}, info["pourcentage"], dash.no_update
+            False, {"display": "none"}, info["pourcentage"], dash.no_update, style_annulation
         )
 
     except ImportError as e:
@@ -429,7 +561,7 @@ def progression(n, progress_store, actif, nombre_runs):
         return (
             10, "Chargement...", "Chargement du solveur", 
             "Importation des modules...", "",
-            False, {"display": "none"}, progress_store + 1, dash.no_update
+            False, {"display": "none"}, progress_store + 1, dash.no_update, style_annulation
         )
 
     except Exception as e:
@@ -439,5 +571,5 @@ def progression(n, progress_store, actif, nombre_runs):
         return (
             progress_store, f"Erreur: {str(e)}", "❌ Erreur durant le calcul", 
             "Voir console pour détails", "",
-            True, {"display": "none"}, progress_store, dash.no_update
+            True, {"display": "none"}, progress_store, dash.no_update, {"display": "none"}
         )
@@ -231,7 +231,7 @@ def prefill_activer_poids(_):
     Returns:
         str: "oui" ou "non"
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     poids = data.get("contraintes_additionnelles", {}).get("poids_par_niveau", {})
     # Si au moins un niveau a des données => on coche oui
     if any(poids.get(niv) for niv in poids):
@@ -260,7 +260,7 @@ def charger_matieres_et_poids(niveau):
     if not niveau:
         raise PreventUpdate
 
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     matieres = data.get("affichage", {}).get("volume_horaire_affichage", {}).get(niveau, {})
     poids_enregistres = data.get("contraintes_additionnelles", {}).get("poids_par_niveau", {}).get(niveau, {})
     poids_max = poids_enregistres.get("poids_max")
@@ -341,7 +341,7 @@ def prefill_cantine_permanence(_):
     Returns:
         tuple: Capacité cantine, taux cantine, capacité permanence, fin_jeunes (oui/non)
     """
-    data = charger_donnees_interface().get("contraintes_additionnelles", {})
+    data = lire_donnees_interface().get("contraintes_additionnelles", {})
     bloc = data.get("cantine_permanence", {})
     capacite = bloc.get("capacite_cantine", None)
     taux = bloc.get("taux_cantine", None)
@@ -396,7 +396,7 @@ def charger_ordre_contraintes(_):
     Returns:
         tuple: (table_data à afficher, ordre effectif des contraintes)
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
 
     # Liste dynamique des contraintes réellement actives
     contraintes_dynamiques = []
@@ -644,10 +644,8 @@ def reset_si_desactivation_poids(choix, refresh_state):
     if ctx.triggered_id != "activer-poids-materiel" or choix != "non":
         raise PreventUpdate
 
-    data = charger_donnees_interface()
-    if "poids_par_niveau" in data.get("contraintes_additionnelles", {}):
-        data["contraintes_additionnelles"]["poids_par_niveau"] = {}
-        sauvegarder_donnees_interface(data)
+    if "poids_par_niveau" in section_interface("contraintes_additionnelles"):
+        remplacer_section_interface("contraintes_additionnelles.poids_par_niveau", {})
         return (refresh_state or 0) + 1
 
     raise PreventUpdate
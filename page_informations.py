@@ -1156,9 +1156,7 @@ def gerer_reset_ou_import(confirm_click, json_contents, json_filename):
 
     if triggered == "confirm-reset":
         donnees = generer_squelette_json_interface()
-        os.makedirs("data", exist_ok=True)
-        with open("data/data_interface.json", "w", encoding="utf-8") as f:
-            json.dump(donnees, f, ensure_ascii=False, indent=2)
+        sauvegarder_donnees_interface(donnees, force=True)
         return "Données réinitialisées avec succès.", donnees
 
     if triggered == "import-json" and json_contents and json_filename.endswith(".json"):
@@ -1167,9 +1165,7 @@ def gerer_reset_ou_import(confirm_click, json_contents, json_filename):
             decoded = base64.b64decode(content_string)
             donnees = json.loads(decoded.decode('utf-8'))
 
-            os.makedirs("data", exist_ok=True)
-            with open("data/data_interface.json", "w", encoding="utf-8") as f:
-                json.dump(donnees, f, ensure_ascii=False, indent=2)
+            sauvegarder_donnees_interface(donnees, force=True)
 
             return f"Données importées depuis « {json_filename} ». ", donnees
         except Exception as e:
@@ -1205,7 +1201,7 @@ def charger_emc_au_chargement(_, niveau):
     if not niveau:
         niveau = "6e"
 
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     emc = data.get("4_programme_national", {}).get("emc", {}).get(niveau, {"inclus": "oui", "volume": None})
     return emc.get("inclus", "oui"), emc.get("volume", None)
 
@@ -1227,7 +1223,7 @@ def charger_emc(niveau):
             - str: Valeur du champ "emc-inclus".
             - float|None: Volume horaire associé à l'EMC pour ce niveau.
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     emc = data.get("4_programme_national", {}).get("emc", {}).get(niveau, {"inclus": "oui", "volume": None})
     return emc.get("inclus", "oui"), emc.get("volume", None)
 
@@ -1254,7 +1250,7 @@ def initialiser_emc_au_chargement(_, niveau):
             - str: "oui" ou "non" selon que l'EMC est incluse.
             - float|None: Volume horaire d'EMC enregistré (si disponible).
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     emc = data.get("4_programme_national", {}).get("emc", {}).get(niveau or "6e", {})
     return emc.get("inclus", "oui"), emc.get("volume", None)
 
@@ -1276,7 +1272,7 @@ def afficher_programme(niveau):
     if not niveau:
         raise PreventUpdate
 
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     prog = data.get("4_programme_national", {})
     lignes = prog.get(niveau, [])
 
@@ -1311,7 +1307,7 @@ def sauvegarder_programme_niveau(table_data, emc_inclus, emc_volume, niveau, fre
         # On ne sauvegarde rien si le tableau est vide ou niveau invalide
         return dash.no_update
 
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
 
     # Nettoyer EMC du tableau
     table_data_sans_emc = [
@@ -1507,7 +1503,7 @@ def prefill_jours_horaires(_, reset_msg):
             - list[str]: Jours classiques sélectionnés.
             - list[str]: Jours particuliers sélectionnés.
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     jc = data.get("1_horaires", {}).get("jours_classiques", [])
     jp = data.get("1_horaires", {}).get("jours_particuliers", [])
     return jc, jp
@@ -1541,7 +1537,7 @@ def prefill_horaires(_, reset_msg, ident):
             - int|None: Heure à préremplir (ou None si non disponible)
             - int|None: Minute à préremplir (ou None si non disponible)
     """
-    data = charger_donnees_interface().get("1_horaires", {})
+    data = lire_donnees_interface().get("1_horaires", {})
     categorie = ident["categorie"]  # "classique" ou "particulier"
     index = ident["index"]
     label = HORAIRES_LABELS[index]
@@ -1581,7 +1577,7 @@ def prefill_infos_journee(_, reset_msg):
             - int: Heures de la pause méridienne.
             - int: Minutes de la pause méridienne.
     """
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     horaires = data.get("1_horaires", {})
     pause = horaires.get("pause_meridienne", "00:00")
     h, m = pause.split(":") if ":" in pause else ("0", "0")
@@ -2095,7 +2091,7 @@ def prefill_langues(_, reset_msg):
     Returns:
         tuple: Valeurs pour LV1, LV2, LV3, LV4 et état d'activation LV3/LV4.
     """
-    data = charger_donnees_interface().get("2_langues_et_options", {})
+    data = lire_donnees_interface().get("2_langues_et_options", {})
     return data.get("lv1", []), data.get("lv2", []), data.get("lv3", []), data.get("lv4", []), \
            ("oui" if data.get("lv3_active") else "non"), ("oui" if data.get("lv4_active") else "non")
 
@@ -2117,7 +2113,7 @@ def prefill_autres_langues(_, reset_msg):
     Returns:
         tuple: Listes de langues personnalisées LV1 à LV4.
     """
-    autres = charger_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
+    autres = lire_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
     return (
         autres.get("lv1", []),
         autres.get("lv2", []),
@@ -2141,7 +2137,7 @@ def prefill_options_depuis_json(_, reset_msg):
     Returns:
         tuple: Valeurs par catégorie et liste des options personnalisées.
     """
-    data = charger_donnees_interface().get("2_langues_et_options", {}).get("options", {})
+    data = lire_donnees_interface().get("2_langues_et_options", {}).get("options", {})
     predef = data.get("predefinies", [])
     autres = data.get("autres", [])
 
@@ -2178,7 +2174,7 @@ def charger_autres_langues(_):
             - list[str]: Langues personnalisées pour LV3.
             - list[str]: Langues personnalisées pour LV4.
     """
-    data = charger_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
+    data = lire_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
     return (
         list(data.get("lv1", [])),
         list(data.get("lv2", [])),
@@ -2396,7 +2392,7 @@ def prefill_niveaux_lv3(_, reset_msg):
     Returns:
         list[int]: Plage de niveaux pour la LV3 (ex. [0, 3]).
     """
-    data = charger_donnees_interface().get("2_langues_et_options", {}).get("langues", {})
+    data = lire_donnees_interface().get("2_langues_et_options", {}).get("langues", {})
     return data.get("lv3_niveaux", [0, 3])
 
 # Affiche ou masque dynamiquement le bloc de saisie LV3 en fonction du choix "oui" ou "non"
@@ -2829,7 +2825,7 @@ def init_autres_langues(_):
     Returns:
         tuple: Quatre listes de langues pour LV1, LV2, LV3, LV4.
     """
-    autres = charger_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
+    autres = lire_donnees_interface().get("2_langues_et_options", {}).get("autres_langues", {})
     return (
         autres.get("lv1", []),
         autres.get("lv2", []),
@@ -2905,7 +2901,7 @@ def afficher_blocs_volumes_par_option(liste_checklist, autres_options):
     """
 
     slider_marks = {i: NIVEAUX[i] for i in range(4)}
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     valeurs_existees = data.get("2_langues_et_options", {}).get("options", {}).get("niveaux_par_option", {})
 
     options = set()
@@ -2966,7 +2962,7 @@ def afficher_options_par_niveau(niveau, sliders_values, sliders_ids):
             options_visibles.append(ident["option"])
 
     # 2. On récupère les données actuelles dans le JSON (toutes les options déjà enregistrées)
-    data = charger_donnees_interface()
+    data = lire_donnees_interface()
     options_data = data.get("options_par_niveau", {}).get(niveau, [])
 
     # 3. On fusionne intelligemment
@@ -3087,9 +3083,7 @@ def sauvegarder_ancien_tableau_options(niveau_actuel, niveau_precedent, tableau)
         str: Le nouveau niveau sélectionné.
     """
     if niveau_precedent and isinstance(tableau, list):
-        data = charger_donnees_interface()
-        data.setdefault("options_par_niveau", {})[niveau_precedent] = tableau
-        sauvegarder_donnees_interface(data)
+        mettre_a_jour_section_interface(f"options_par_niveau.{niveau_precedent}", tableau)
     return niveau_actuel
 
 #######################################
@@ -3115,9 +3109,7 @@ def valider_tableau_options(n_clicks, niveau, tableau):
     """
     if not niveau or not tableau:
         return "Aucune donnée à enregistrer."
-    data = charger_donnees_interface()
-    data.setdefault("options_par_niveau", {})[niveau] = tableau
-    sauvegarder_donnees_interface(data)
+    mettre_a_jour_section_interface(f"options_par_niveau.{niveau}", tableau)
     return f"Options de {niveau} enregistrées avec succès."
 
 #######################################
@@ -3235,7 +3227,7 @@ def prefill_ressources(_, reset_msg):
             - list[dict]: Données des professeurs.
             - list[dict]: Données des salles.
     """
-    data = charger_donnees_interface().get("3_ressources", {})
+    data = lire_donnees_interface().get("3_ressources", {})
     return data.get("classes", []), data.get("professeurs", []), data.get("salles", [])
 
 
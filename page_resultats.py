@@ -85,6 +85,13 @@ def layout_resultats():
                 style=vue_dropdown_style
             ),
             dcc.Dropdown(id="entite-dropdown", style=entite_dropdown_style),
+            # Runs du dernier lot (aucune sélection : emploi du temps enregistré)
+            dcc.Dropdown(
+                id="run-dropdown",
+                options=options_runs_dernier_lot(),
+                placeholder="Emploi du temps enregistré",
+                style=vue_dropdown_style
+            ),
             html.Div([
                 dbc.RadioItems(
                     options=[
@@ -744,6 +751,29 @@ def update_sidepanel(mode, move_source, pending_action, edit_source, edt, vue, e
         html.Div("Aucune sélection", style=view_no_selection_style)
     ])
 
+@app.callback(
+    Output("edt-memory", "data", allow_duplicate=True),
+    Input("run-dropdown", "value"),
+    prevent_initial_call=True
+)
+def afficher_run(seed):
+    """
+    Affiche l'emploi du temps d'un run du dernier lot de calcul.
+
+    L'emploi du temps du run est relu depuis le journal du lot (data/runs) ;
+    sans sélection, l'emploi du temps enregistré est rechargé.
+
+    Args:
+        seed (int or None): Graine du run sélectionné.
+
+    Returns:
+        dict: Emploi du temps global à afficher, ou no_update si le run est introuvable.
+    """
+    if seed is None:
+        return charger_donnees_edt()[0]
+    edt = charger_edt_run(seed)
+    return edt if edt is not None else no_update
+
 @app.callback(
     Output("sidepanel-wrapper", "style"),
     Input("mode-radio", "value"),
@@ -1,12 +1,25 @@
 # Liste des imports nécessaires
 from ortools.sat.python import cp_model
+from ortools.sat.python import cp_model_helper
+import ortools
 import json
 import random
 from tabulate import tabulate
 import time
 import copy
 from collections import defaultdict
+from dataclasses import dataclass
 import os
+import numpy as np
+import multiprocessing
+import concurrent.futures
+import queue
+import threading
+import hashlib
+import io
+import pickle
+import format_edt
+from fichiers import ecrire_atomique
 
 # Afficher le chargement
 avancement = 0
@@ -14,6 +27,17 @@ current_seed = None
 fusion_choisie = None
 resultats_choisis = None
 
+# Résultats du dernier calcul lancé depuis l'interface (voir lancer_depuis_interface) ;
+# les runs du lot sont dans journal_runs (format_edt.JournalRuns), seule la meilleure fusion reste en mémoire
+journal_runs = None
+taux_par_run = []
+meilleur_seed = None
+meilleure_fusion = None
+meilleur_resultats = None
+
+# Session de calcul courante (créée à la demande par get_session)
+session = None
+
 # def transformer_interface_vers_config(path_interface="data/data_interface.json", path_config="data/config.json"):
 #     """
 #     Transforme le fichier de configuration brut de l'interface utilisateur (data_interface.json)
@@ -549,57 +573,495 @@ def initialiser_globals(chemin_config="data/config.json"):
         CLASSES
     )
 
-(
-    config,
-    SEMAINES,
-    JOURS,
-    HEURES,
-    MATIERES,
-    PROFESSEURS,
-    VOLUME_HORAIRE,
-    INDISPONIBILITES_PROFS,
-    INDISPONIBILITES_SALLES,
-    PREFERENCES_PROFS,
-    SOUS_GROUPES_CONFIG,
-    NIVEAUX,
-    AFFECTATION_MATIERE_SALLE,
-    SALLES_GENERALES,
-    CLASSES_BASE,
-    CAPACITES_SALLES,
-    CAPACITES_CLASSES,
-    MAX_HEURES_PAR_ETENDUE,
-    JOURS_SANS_APRES_MIDI,
-    PREFERENCES_SALLE_PROF,
-    MATIERES_SOUSGROUPES,
-    MATIERES_SCIENTIFIQUE,
-    MATIERES_LANGUES,
-    MATIERES_ARTISTIQUES,
-    SOUS_GROUPES,
-    SOUS_GROUPES_SUFFIXES,
-    SOUS_GROUPES_TYPES,
-    CLASSES
-) = initialiser_globals()
+# Les constantes ci-dessus (config, SEMAINES, JOURS, CLASSES, ...) ne sont plus
+# chargées à l'import : SolverSession.charger() les publie au niveau du module.
 
 
 
-def creer_modele():
+def encoder_one_hot(model, var, valeurs, nom):
     """
-    Construit et retourne un modèle CP-SAT configuré pour générer un emploi du
-    temps bihebdomadaire (Semaine A/B) respectant un ensemble de contraintes.
+    Canalise une variable entière vers un jeu de BoolVar « var == v » (encodage one-hot).
+
+    Les littéraux sont créés une seule fois par variable : toutes les familles de
+    contraintes réutilisent ensuite ces mêmes booléens au lieu de recréer leur
+    propre BoolVar réifiée (== / !=) à chaque usage.
+
+    Arguments:
+        model (cp_model.CpModel): le modèle CP-SAT.
+        var (IntVar): variable entière à encoder.
+        valeurs (iterable): valeurs possibles de la variable (son domaine).
+        nom (str): préfixe des noms de variables créées.
 
-    Ce modèle comprend :
-      - Attribution des salles pour chaque professeur n'ayant pas de salle dédiée.
-      - Variables d'assignation des matières, des salles et des professeurs par créneau.
-      - Contraintes de non-chevauchement de professeurs et de salles.
-      - Tenue du volume horaire bihebdomadaire pour chaque classe / sous-groupe.
-      - Gestion des jours sans après-midi, cantine, permanence, etc.
-      - Objectif de minimisation des heures de permanence et des pénalités de préférence.
-    
     Retourne:
-        model (cp_model.CpModel): le modèle CP-SAT prêt à être résolu.
-        emploi_du_temps (dict): dictionnaire de variables IntVar pour matières.
-        emploi_du_temps_salles (dict): dictionnaire de variables IntVar pour salles.
-        emploi_du_temps_profs (dict): dictionnaire de variables IntVar/BoolVar pour professeurs.
+        dict: valeur → BoolVar (exactement un littéral vrai par solution).
+    """
+    litteraux = {v: model.NewBoolVar(f"{nom}_est_{v}") for v in valeurs}
+    model.AddExactlyOne(litteraux.values())
+    model.Add(var == sum(v * b for v, b in litteraux.items()))
+    return litteraux
+
+
+
+def imposer_precedence_valeurs(model, sequence, rangs, nom):
+    """
+    Brise la symétrie entre valeurs interchangeables (profs de même profil) :
+    dans l'ordre de la séquence, la première occurrence de rangs[t] précède
+    toujours celle de rangs[t + 1] (ordre lexicographique des affectations).
+    Taille linéaire : un littéral « déjà utilisé » par position et par paire.
+
+    Arguments:
+        model (cp_model.CpModel): le modèle CP-SAT.
+        sequence (list): encodages one-hot (valeur → BoolVar), dans un ordre fixe.
+        rangs (list): valeurs interchangeables, triées.
+        nom (str): préfixe des noms de variables créées.
+    """
+    for a, b in zip(rangs, rangs[1:]):
+        deja = None  # « a est déjà apparu avant la position courante »
+        for k, litteraux in enumerate(sequence):
+            if deja is None:
+                model.Add(litteraux[b] == 0)
+            else:
+                model.AddImplication(litteraux[b], deja)
+            suivant = model.NewBoolVar(f"{nom}_{a}_vu_{k}")
+            if deja is None:
+                model.Add(suivant == litteraux[a])
+            else:
+                model.AddBoolOr([deja, litteraux[a], suivant.Not()])
+                model.AddImplication(deja, suivant)
+                model.AddImplication(litteraux[a], suivant)
+            deja = suivant
+
+
+def statistiques_modele(model):
+    """
+    Retourne la taille d'un modèle CP-SAT (nombre de variables et de contraintes).
+
+    Arguments:
+        model (cp_model.CpModel): le modèle à mesurer.
+
+    Retourne:
+        dict: {"variables": int, "contraintes": int}
+    """
+    proto = model.Proto()
+    return {"variables": len(proto.variables), "contraintes": len(proto.constraints)}
+
+
+def repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config):
+    """
+    Lit les paramètres de cantine et calcule le créneau de déjeuner de chaque
+    classe de base (capacité suffisante, répartition automatique ou par niveau).
+
+    Retourne:
+        tuple: (h_dej, classe_creneau_dej) avec h_dej l'indice du créneau principal
+            (celui qui commence par "12h") et classe_creneau_dej le mapping
+            classe → indice du créneau déjeuner.
+    """
+    cantine_config     = config.get("cantine", {})
+    cap_cantine        = cantine_config.get("capacite", 200)
+    ratio_demi         = cantine_config.get("proportion_demi_pensionnaire", 0.8)
+    creneaux_dej       = cantine_config.get("creneaux_dejeuner", [])
+    assignation_niveaux= cantine_config.get("assignation_niveaux", {})
+    priorite_active    = cantine_config.get("priorite_active", True)
+
+    # Vérification que tous les créneaux dejeuner figurent bien dans HEURES 
+    for c in creneaux_dej:
+        if c not in HEURES:
+            raise ValueError(f"Créneau cantine '{c}' non reconnu dans HEURES.")
+
+    # On recherche dynamiquement le créneau principal commençant par "12h"
+    lunch_slot = next((slot for slot in HEURES if slot.startswith("12h")), None)
+    if lunch_slot is None:
+        raise ValueError("Aucun créneau HEURES ne commence par '12h'")
+    h_dej = HEURES.index(lunch_slot)
+
+    # Allocation des créneaux déjeuner selon la capacité de la cantine
+    if lunch_slot in creneaux_dej:
+        total_eleves = sum(int(CAPACITES_CLASSES.get(cl, 0) * ratio_demi) for cl in CLASSES_BASE)
+        if total_eleves <= cap_cantine:
+            # Capacité suffisante
+            classe_creneau_dej = {cl: h_dej for cl in CLASSES_BASE}
+            print(f"✅ Tous les élèves peuvent déjeuner à {lunch_slot} (capacité suffisante)")
+        else:
+            if not priorite_active:
+                # Répartition automatique sans priorité
+                from itertools import cycle
+                print("🔁 Capacité insuffisante : répartition automatique sans priorité")
+                iter_slots = cycle([HEURES.index(c) for c in creneaux_dej])
+                classe_creneau_dej = {cl: next(iter_slots) for cl in CLASSES_BASE}
+            else:
+                # Répartition par priorité de niveaux
+                print(f"❌ Capacité insuffisante à {lunch_slot} : assignation par niveau")
+                classe_creneau_dej = {}
+                for cl in CLASSES_BASE:
+                    niv = cl[:2]
+                    for slot, niveaux in assignation_niveaux.items():
+                        if niv in niveaux:
+                            classe_creneau_dej[cl] = HEURES.index(slot)
+                            break
+                    else:
+                        raise ValueError(f"Aucun créneau cantine défini pour le niveau '{niv}' (classe {cl}).")
+    else:
+        raise ValueError(f"Le créneau principal '{lunch_slot}' doit être inclus dans les créneaux possibles.")
+
+    return h_dej, classe_creneau_dej
+
+
+def matieres_interdites_par_creneau(classe_creneau_dej, h_dej, donnees=None):
+    """
+    Pré-calcul (vectorisé sur classes × jours × heures) des matières interdites
+    à chaque créneau, avant la création des variables :
+      - indisponibilités des professeurs (matières qu'ils enseignent à la classe),
+      - indisponibilités des salles (matières données dans la salle),
+      - après-midi des jours sans après-midi (h ≥ 5),
+      - créneau de 12h et créneau de déjeuner de chaque classe de base.
+
+    Arguments:
+        classe_creneau_dej (dict): classe de base → indice du créneau déjeuner.
+        h_dej (int): indice du créneau principal de déjeuner.
+        donnees (dict, optionnel): constantes (init_donnees) à utiliser à la place
+            des globales du module publiées par la session.
+
+    Retourne:
+        np.ndarray: booléens [classe, jour, heure, indice matière] (indices de
+            CLASSES, JOURS, HEURES ; indice matière 0 = pas de cours, jamais interdit).
+    """
+    d = globals() if donnees is None else donnees
+    CLASSES, JOURS, HEURES, MATIERES = d["CLASSES"], d["JOURS"], d["HEURES"], d["MATIERES"]
+    PROFESSEURS, VOLUME_HORAIRE = d["PROFESSEURS"], d["VOLUME_HORAIRE"]
+    INDISPONIBILITES_PROFS, INDISPONIBILITES_SALLES = d["INDISPONIBILITES_PROFS"], d["INDISPONIBILITES_SALLES"]
+    AFFECTATION_MATIERE_SALLE, JOURS_SANS_APRES_MIDI = d["AFFECTATION_MATIERE_SALLE"], d["JOURS_SANS_APRES_MIDI"]
+
+    n_c, n_j, n_h, n_m = len(CLASSES), len(JOURS), len(HEURES), len(MATIERES) + 1
+    interdit = np.zeros((n_c, n_j, n_h, n_m), dtype=bool)
+
+    def grille(indispos):
+        """Grille [jour, heure] des créneaux indisponibles."""
+        g = np.zeros((n_j, n_h), dtype=bool)
+        for jour_str, heures in indispos.items():
+            if jour_str in JOURS:
+                g[JOURS.index(jour_str), list(heures)] = True
+        return g
+
+    def profs_du_niveau(prof_ref, niveau):
+        if isinstance(prof_ref, dict):
+            prof_ref = prof_ref.get(niveau)
+        return [prof_ref] if isinstance(prof_ref, str) else (prof_ref or [])
+
+    # Indisponibilités des professeurs : concerne[p, c, m] = p enseigne m à la classe c
+    profs = list(INDISPONIBILITES_PROFS)
+    if profs:
+        concerne = np.zeros((len(profs), n_c, n_m), dtype=bool)
+        for c, classe in enumerate(CLASSES):
+            for matiere, prof_ref in PROFESSEURS.items():
+                for prof in profs_du_niveau(prof_ref, classe[:2]):
+                    if prof in INDISPONIBILITES_PROFS:
+                        concerne[profs.index(prof), c, MATIERES.index(matiere) + 1] = True
+        indispo = np.stack([grille(INDISPONIBILITES_PROFS[p]) for p in profs])
+        interdit |= np.einsum("pcm,pjh->cjhm", concerne.astype(np.int32), indispo.astype(np.int32)) > 0
+
+    # Indisponibilités des salles : matières données dans la salle (spécialisée ou générale)
+    salles = list(INDISPONIBILITES_SALLES)
+    if salles:
+        matieres_generales = set(MATIERES) - set(AFFECTATION_MATIERE_SALLE.keys())
+        concerne = np.zeros((len(salles), n_c, n_m), dtype=bool)
+        for i, salle in enumerate(salles):
+            if salle in AFFECTATION_MATIERE_SALLE.values():
+                matieres_concernees = [m for m, sl in AFFECTATION_MATIERE_SALLE.items() if sl == salle]
+            else:
+                matieres_concernees = matieres_generales
+            for c, classe in enumerate(CLASSES):
+                for matiere in matieres_concernees:
+                    if matiere in VOLUME_HORAIRE.get(classe[:2], {}):
+                        concerne[i, c, MATIERES.index(matiere) + 1] = True
+        indispo = np.stack([grille(INDISPONIBILITES_SALLES[sl]) for sl in salles])
+        interdit |= np.einsum("scm,sjh->cjhm", concerne.astype(np.int32), indispo.astype(np.int32)) > 0
+
+    # Jours sans après-midi : aucun cours à partir de l'indice 5
+    for jour in JOURS_SANS_APRES_MIDI:
+        if jour in JOURS:
+            interdit[:, JOURS.index(jour), 5:, 1:] = True
+
+    # Créneau de 12h pour tous, puis créneau de déjeuner de chaque classe de base
+    interdit[:, :, h_dej, 1:] = True
+    for cl, h in classe_creneau_dej.items():
+        if cl in CLASSES:
+            interdit[CLASSES.index(cl), :, h, 1:] = True
+
+    return interdit
+
+
+def index_enseignements_profs(classes, memniv_actives=()):
+    """
+    Construit l'index prof → enseignements possibles, à partir de PROFESSEURS
+    (valeur chaîne, dictionnaire niveau → prof(s) ou liste de profs).
+
+    Arguments:
+        classes (list): classes à indexer (classes de base).
+        memniv_actives (set): couples (niveau, matière) exclus pour les profs uniques
+            (cours « même niveau, même cours » gérés à part).
+
+    Retourne:
+        dict: prof → liste de (classe, matière, indice matière, rang) où rang est
+            la position du prof dans la liste des profs possibles (variable
+            d'indice de prof du créneau), None s'il est le seul prof.
+    """
+    enseignements = defaultdict(list)
+    for cl in classes:
+        niveau = cl[:2]
+        for m_idx, mat in enumerate(MATIERES, start=1):
+            prof_ref = PROFESSEURS.get(mat)
+            if isinstance(prof_ref, dict):
+                prof_ref = prof_ref.get(niveau)
+            elif isinstance(prof_ref, str) and (niveau, mat) in memniv_actives:
+                continue
+            if isinstance(prof_ref, str):
+                enseignements[prof_ref].append((cl, mat, m_idx, None))
+            elif isinstance(prof_ref, list):
+                for rang, prof in enumerate(prof_ref):
+                    enseignements[prof].append((cl, mat, m_idx, rang))
+    return dict(enseignements)
+
+
+
+def profs_interchangeables(liste_profs, matiere, classes_concernees, enseignements):
+    """
+    Regroupe les profs d'une liste d'équité qui sont interchangeables : mêmes
+    indisponibilités, préférences, salle préférée et volume, et aucun autre
+    enseignement que cette matière pour ces classes. Échanger deux d'entre eux
+    transforme une solution en une autre solution de même coût.
+
+    Arguments:
+        liste_profs (list): profs possibles (le rang dans la liste est la valeur de la variable).
+        matiere (str): matière du groupe d'équité.
+        classes_concernees (list): classes du groupe d'équité.
+        enseignements (dict): index prof → enseignements (index_enseignements_profs).
+
+    Retourne:
+        list: listes triées (≥ 2 éléments) de rangs de profs interchangeables.
+    """
+    profils = defaultdict(list)
+    for rang, prof in enumerate(liste_profs):
+        cours = {(cl, mat) for cl, mat, _, _ in enseignements.get(prof, [])}
+        if any(mat != matiere or cl not in classes_concernees for cl, mat in cours):
+            continue
+        profil = (
+            frozenset(cours),
+            repr(sorted((INDISPONIBILITES_PROFS.get(prof) or {}).items())),
+            repr(sorted((PREFERENCES_PROFS.get(prof) or {}).items())),
+            PREFERENCES_SALLE_PROF.get(prof),
+            config.get("volume_par_professeur", {}).get(prof),
+        )
+        profils[profil].append(rang)
+    return [rangs for rangs in profils.values() if len(rangs) > 1]
+
+
+def matieres_a_salle_generale(niveau):
+    """
+    Matières d'un niveau dont le cours a besoin d'une salle générale : ni la
+    matière ni l'un de ses profs possibles n'a de salle dédiée dans
+    AFFECTATION_MATIERE_SALLE (même règle que la fusion).
+
+    Retourne:
+        set: noms des matières concernées.
+    """
+    matieres = set()
+    for mat, prof_ref in PROFESSEURS.items():
+        if AFFECTATION_MATIERE_SALLE.get(mat):
+            continue
+        if isinstance(prof_ref, dict):
+            prof_ref = prof_ref.get(niveau)
+        profs = prof_ref if isinstance(prof_ref, list) else [prof_ref]
+        if any(prof is not None and not AFFECTATION_MATIERE_SALLE.get(prof) for prof in profs):
+            matieres.add(mat)
+    return matieres
+
+
+def heures_par_semaine_hint(edt_classe, niveau, matiere):
+    """
+    Compte, dans un emploi du temps exporté, les heures d'une matière pour les
+    classes (et sous-groupes) d'un niveau, en Semaine A et en Semaine B.
+
+    Retourne:
+        dict: {"Semaine A": int, "Semaine B": int}
+    """
+    heures = {}
+    for semaine in SEMAINES:
+        heures[semaine] = sum(
+            1
+            for cl, jours in edt_classe.get(semaine, {}).items() if cl.startswith(niveau)
+            for creneaux in jours.values()
+            for contenu in creneaux.values()
+            for mat in contenu["matiere"]
+            if mat.split(" (", 1)[0] == matiere
+        )
+    return heures
+
+
+def lire_hints_edt(edt_classe, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs):
+    """
+    Traduit un emploi du temps exporté (clé "edt_classe" du format de
+    emploi_du_temps_global.json) en valeurs de départ pour les variables du modèle : indice de
+    matière, de salle et de professeur pour chaque créneau de chaque classe
+    et sous-groupe (0 = pas de cours pour les créneaux absents du fichier).
+
+    Les cours qui ne correspondent plus au modèle (matière, classe ou salle
+    inconnue, valeur hors du domaine de la variable) sont ignorés et comptés.
+
+    Arguments:
+        edt_classe (dict): emploi du temps des classes (dernier calcul ou run archivé).
+        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs (dict):
+            variables du modèle retournées par creer_modele.
+
+    Retourne:
+        tuple: (hints, stats) avec hints la liste des couples (variable, valeur)
+            et stats = {"cours_lus", "cours_ignores", "hints"}.
+    """
+    def dans_domaine(var, valeur):
+        bornes = var.Proto().domain
+        return any(bornes[i] <= valeur <= bornes[i + 1] for i in range(0, len(bornes), 2))
+
+    heures_simples = [heure.split("-", 1)[0] for heure in HEURES]
+    valeurs = {}
+    stats = {"cours_lus": 0, "cours_ignores": 0, "hints": 0}
+
+    for semaine in SEMAINES:
+        # Par défaut, aucun cours sur le créneau (matière 0, salle 0)
+        for key, var in emploi_du_temps[semaine].items():
+            valeurs[var.Index()] = (var, 0)
+            valeurs[emploi_du_temps_salles[semaine][key].Index()] = (emploi_du_temps_salles[semaine][key], 0)
+
+        for cl, jours in edt_classe.get(semaine, {}).items():
+            for jour, creneaux in jours.items():
+                for heure, contenu in creneaux.items():
+                    if jour not in JOURS or heure not in heures_simples:
+                        stats["cours_ignores"] += len(contenu["matiere"])
+                        continue
+                    j, h = JOURS.index(jour), heures_simples.index(heure)
+                    for mat, prof, salle in zip(contenu["matiere"], contenu["professeurs"], contenu["salle"]):
+                        stats["cours_lus"] += 1
+                        # Les cours de sous-groupe sont exportés sous la forme "Espagnol (5e1_esp)"
+                        classe = cl
+                        if mat.endswith(")") and " (" in mat:
+                            mat, classe = mat[:-1].split(" (", 1)
+                        key = (classe, j, h)
+                        if mat not in MATIERES or key not in emploi_du_temps[semaine]:
+                            stats["cours_ignores"] += 1
+                            continue
+                        var_mat = emploi_du_temps[semaine][key]
+                        if not dans_domaine(var_mat, MATIERES.index(mat) + 1):
+                            stats["cours_ignores"] += 1
+                            continue
+                        valeurs[var_mat.Index()] = (var_mat, MATIERES.index(mat) + 1)
+
+                        # Salle générale : indice dans SALLES_GENERALES (les salles dédiées sont implicites)
+                        var_salle = emploi_du_temps_salles[semaine][key]
+                        valeurs.pop(var_salle.Index(), None)
+                        if salle in SALLES_GENERALES and dans_domaine(var_salle, SALLES_GENERALES.index(salle) + 1):
+                            valeurs[var_salle.Index()] = (var_salle, SALLES_GENERALES.index(salle) + 1)
+
+                        # Professeur choisi parmi plusieurs (liste par niveau ou liste globale,
+                        # dans l'ordre des valeurs de la variable créée par creer_modele)
+                        var_prof = emploi_du_temps_profs[semaine].get((classe, j, h, mat, semaine))
+                        profs_niv = profs_possibles(mat, classe[:2])
+                        if var_prof is not None and prof in profs_niv:
+                            valeurs[var_prof.Index()] = (var_prof, profs_niv.index(prof))
+
+    hints = list(valeurs.values())
+    stats["hints"] = len(hints)
+    return hints, stats
+
+
+def reparer_hint(model, temps_max=10.0):
+    """
+    Transforme le hint partiel du modèle (matières, salles, profs) en une
+    solution complète et réalisable, que CP-SAT reprend alors directement comme
+    première solution.
+
+    Si le hint est réalisable tel quel, il est complété en fixant les variables
+    hintées. Sinon (contrainte modifiée depuis le calcul précédent), on cherche
+    la solution qui conserve le plus de valeurs du hint.
+
+    Arguments:
+        model (cp_model.CpModel): modèle complet (contraintes de cantine comprises).
+        temps_max (float): limite de temps de chaque résolution de réparation.
+
+    Retourne:
+        dict ou None: {"hints", "realisable", "repares", "temps"} (repares vaut
+            None si aucune réparation n'a été trouvée), None si le modèle n'a pas de hint.
+    """
+    hint = model.Proto().solution_hint
+    if not hint.vars:
+        return None
+    debut = time.time()
+    stats = {"hints": len(hint.vars), "realisable": False, "repares": None, "temps": 0.0}
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = temps_max
+    solver.parameters.fix_variables_to_their_hinted_value = True
+    status = solver.Solve(model)
+    stats["realisable"] = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    if not stats["realisable"]:
+        # Solution la plus proche du hint : nombre maximal de valeurs conservées
+        copie = model.Clone()
+        copie.Proto().ClearField("objective")
+        conserves = []
+        for index, valeur in zip(hint.vars, hint.values):
+            b = copie.NewBoolVar(f"hint_conserve_{index}")
+            copie.Add(copie.GetIntVarFromProtoIndex(index) == valeur).OnlyEnforceIf(b)
+            conserves.append(b)
+        copie.Maximize(sum(conserves))
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = temps_max
+        status = solver.Solve(copie)
+
+    stats["temps"] = time.time() - debut
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print(f"⚠️ Hint non réparé en {stats['temps']:.1f}s : il reste partiel")
+        return stats
+
+    valeurs = solver.ResponseProto().solution
+    stats["repares"] = sum(1 for index, valeur in zip(hint.vars, hint.values) if valeurs[index] != valeur)
+    model.ClearHints()
+    for index in range(len(model.Proto().variables)):
+        model.AddHint(model.GetIntVarFromProtoIndex(index), valeurs[index])
+    print(f"🧭 Hint réparé en {stats['temps']:.1f}s : {stats['repares']}/{stats['hints']} valeurs modifiées")
+    return stats
+
+
+def statistiques_hints(model, solver):
+    """
+    Compare la solution trouvée aux valeurs de départ (hints) du modèle : nombre
+    de valeurs conservées et de valeurs modifiées par la recherche.
+
+    Arguments:
+        model (cp_model.CpModel): modèle contenant les hints.
+        solver (CpSolver ou SolutionFigee): solveur ayant résolu ce modèle.
+
+    Retourne:
+        dict ou None: {"hints", "conserves", "repares", "taux_conservation"},
+            None si le modèle n'a pas de hint.
+    """
+    hint = model.Proto().solution_hint
+    if not hint.vars:
+        return None
+    conserves = sum(
+        1 for index, valeur in zip(hint.vars, hint.values)
+        if solver.Value(model.GetIntVarFromProtoIndex(index)) == valeur
+    )
+    return {
+        "hints": len(hint.vars),
+        "conserves": conserves,
+        "repares": len(hint.vars) - conserves,
+        "taux_conservation": conserves / len(hint.vars),
+    }
+
+
+def attribuer_salles_professeurs():
+    """
+    Complète AFFECTATION_MATIERE_SALLE : chaque professeur sans salle (ni par
+    sa matière ni en propre) reçoit sa salle préférée, sinon une salle
+    générale en round-robin.
     """
     # On collecte d'abord la liste des professeurs qui n'ont pas de salle assignée
     professeurs_sans_salle = set()
@@ -616,6 +1078,11 @@ def creer_modele():
                 else:
                     if profs not in AFFECTATION_MATIERE_SALLE:
                         professeurs_sans_salle.add(profs)
+        elif isinstance(prof, list):
+            # Liste globale de profs pour toute la matière
+            for prof_nom in prof:
+                if prof_nom not in AFFECTATION_MATIERE_SALLE:
+                    professeurs_sans_salle.add(prof_nom)
         else:
             # Un seul professeur pour toute la matière
             if prof not in AFFECTATION_MATIERE_SALLE:
@@ -651,7 +1118,15 @@ def creer_modele():
         print(f"{prof} → {salle}")
 
 
-    # On calcule maintenant le volume horaire bihebdomadaire pour chaque niveau/matière
+def calculer_volume_bihebdo(edt_hint=None):
+    """
+    Volume horaire de chaque niveau/matière pour la Semaine A et la Semaine B :
+    une demi-heure hebdomadaire est placée sur l'une des deux semaines, au
+    hasard ou comme dans l'emploi du temps de départ edt_hint.
+
+    Retourne:
+        dict: niveau → matière → {"Semaine A": heures, "Semaine B": heures}.
+    """
     VOLUME_HORAIRE_BIHEBDO = {}
     for niveau, matieres in VOLUME_HORAIRE.items():
         VOLUME_HORAIRE_BIHEBDO[niveau] = {}
@@ -662,200 +1137,725 @@ def creer_modele():
                 A = B = volume
             else:
                 # Sinon, on répartit la demi-heure aléatoirement entre A et B
-                if random.choice([True, False]):
+                # (ou comme dans l'emploi du temps de départ, pour que le hint reste réalisable)
+                semaine_longue = None
+                if edt_hint is not None:
+                    heures = heures_par_semaine_hint(edt_hint, niveau, matiere)
+                    if heures["Semaine A"] != heures["Semaine B"]:
+                        semaine_longue = heures["Semaine A"] > heures["Semaine B"]
+                if semaine_longue is None:
+                    semaine_longue = random.choice([True, False])
+                if semaine_longue:
                     A, B = base + 1, base
                 else:
                     A, B = base, base + 1
             VOLUME_HORAIRE_BIHEBDO[niveau][matiere] = {"Semaine A": A, "Semaine B": B}
+    return VOLUME_HORAIRE_BIHEBDO
 
-    # Initialisation du modèle
-    model = cp_model.CpModel()
 
-    # Nombre fixe de salles : on numérote de 1 à N
-    NOMBRE_DE_SALLES = 24
+def exclusion_imposee(entry):
+    """
+    Indique si une règle de mat_exclu_suite est imposée par le modèle (contrainte
+    "forte" ou "faible", "forte" par défaut) ; les autres ne sont que vérifiées
+    a posteriori par verifier_matExcluSuite.
+    """
+    return entry.get("contrainte", "forte") in ("forte", "faible")
 
-    # Dictionnaires pour stocker les variables du modèle
-    emploi_du_temps = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les matières
-    emploi_du_temps_salles = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les salles
-    emploi_du_temps_profs = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les professeurs
 
-    # Pour chaque classe (base et sous-groupes), chaque semaine, jour et heure :
-    for classe in CLASSES:
-        for semaine in SEMAINES:
-            for j, jour in enumerate(JOURS):
-                for h, heure in enumerate(HEURES):
-                    niveau = classe[:2]
+def compiler_automate_suites(exclusions, suites_forcees, nb_valeurs):
+    """
+    Compile les règles de suite de matières d'une classe (exclusions et
+    inclusions fortes) en un seul automate (AddAutomaton) sur la semaine : il lit
+    les créneaux de chaque journée dans l'ordre (valeurs 0..nb_valeurs-1,
+    0 = pas de cours), les journées étant séparées par la valeur nb_valeurs.
 
-                    # Détermination des matières autorisées : 
-                    # si c'est un sous-groupe, seule la langue correspondante
-                    for suffixe, langue in SOUS_GROUPES_SUFFIXES.items():
-                        if suffixe in classe:
-                            matieres_autorisees = [langue]
-                            break
-                    else:
-                        # sinon, toutes les matières générales hors sous-groupes
-                        matieres_autorisees = [
-                            m for m in VOLUME_HORAIRE[niveau].keys()
-                            if m not in SOUS_GROUPES_SUFFIXES.values()
-                        ]
+    Arguments:
+        exclusions (list): couples (m1, m2) d'indices de matière : m2 ne suit jamais m1.
+        suites_forcees (list): couples (m1, m2) : m1 est toujours suivi de m2, sauf
+            en fin de journée.
+        nb_valeurs (int): nombre de valeurs possibles d'un créneau.
 
-                    # Indices admis pour la variable : 0 = pas de cours, 1..N = index matière
-                    matiere_indices_autorises = [0] + [
-                        MATIERES.index(m) + 1 for m in matieres_autorisees
-                    ]
+    Retourne:
+        tuple: (etat_initial, etats_finaux, transitions) pour model.AddAutomaton.
+    """
+    interdites = set(exclusions)
+    suivantes = {}  # m1 → matières pouvant suivre m1 (intersection des inclusions fortes)
+    for m1, m2 in suites_forcees:
+        suivantes[m1] = suivantes.get(m1, {m2}) & {m2}
+
+    # Un état par matière de tête d'une règle (la dernière vue), plus l'état neutre
+    tetes = sorted({m1 for m1, _ in exclusions} | set(suivantes))
+    numeros = {None: 0}
+    numeros.update({m1: n for n, m1 in enumerate(tetes, start=1)})
+
+    transitions = []
+    for dernier, depart in numeros.items():
+        # Changement de journée : une inclusion forte en attente n'est plus exigée
+        transitions.append((depart, nb_valeurs, 0))
+        for v in range(nb_valeurs):
+            if (dernier, v) in interdites:
+                continue
+            if dernier in suivantes and v not in suivantes[dernier]:
+                continue
+            transitions.append((depart, v, numeros.get(v, 0)))
 
-                    key = (classe, j, h)
-                    # Variable IntVar pour la matière attribuée à ce créneau
-                    emploi_du_temps[semaine][key] = model.NewIntVarFromDomain(
-                        cp_model.Domain.FromValues(matiere_indices_autorises),
-                        f"{classe}_{jour}_{heure}_{semaine.replace(' ', '_')}"
-                    )
-                    # Variable IntVar pour la salle (0 signifie pas de cours)
-                    emploi_du_temps_salles[semaine][key] = model.NewIntVar(
-                        0, NOMBRE_DE_SALLES,
-                        f"salle_{classe}_{jour}_{heure}_{semaine.replace(' ', '_')}"
-                    )
+    return 0, list(numeros.values()), transitions
 
-                    # Pour chaque matière autorisée, si plusieurs profs possibles, créer IntVar prof
-                    for m in matieres_autorisees:
-                        prof_ref = PROFESSEURS[m]
-                        if isinstance(prof_ref, dict):
-                            # Extraction de la liste de profs pour ce niveau
-                            profs_niv = prof_ref.get(niveau, [])
-                            if isinstance(profs_niv, list) and len(profs_niv) > 1:
-                                key_prof = (classe, j, h, m, semaine)
-                                emploi_du_temps_profs[semaine][key_prof] = model.NewIntVar(
-                                    0, len(profs_niv) - 1,
-                                    f"prof_{classe}_{j}_{h}_{m}_{semaine.replace(' ', '_')}"
-                                )
 
-    # Dictionnaire d'assignation prof/classe par matière ; utile dans certaines contraintes
-    assignation_prof_classe = {}  # (classe, matiere, semaine) → bool ou indice
+def analyser_faisabilite(donnees):
+    """
+    Analyse statique de la configuration, avant la construction du modèle :
+    bornes offre/demande (heures de cours par semaine face aux créneaux ouverts)
+    par classe, par matière d'un niveau, par professeur et par salle, calculées
+    sur la grille des matières interdites (matieres_interdites_par_creneau).
 
-    # Pour chaque matière, on introduit les variables d'équité de répartition des profs
-    for matiere, prof_ref in PROFESSEURS.items():
-        # ─── Cas A : dictionnaire niveau → liste de profs (ex. Maths : {"6e": ["Dupont", ...], ...})
+    Les problèmes bloquants rendent le modèle infaisable à coup sûr (ou empêchent
+    sa construction). Les avertissements signalent une infaisabilité qui dépend
+    du tirage des demi-heures entre semaines A et B (calculer_volume_bihebdo), ou
+    des contraintes vérifiées après la résolution qui ne pourront pas être respectées
+    (volume_par_professeur, capacité des salles).
+
+    Les bornes sont optimistes (conditions nécessaires) : une configuration sans
+    problème bloquant peut rester infaisable.
+
+    Arguments:
+        donnees (dict): constantes issues de init_donnees() (les globales du module
+            ne sont ni lues ni modifiées).
+
+    Retourne:
+        dict: {"bloquants": [str], "avertissements": [str], "duree_ms": float}
+    """
+    debut = time.perf_counter()
+    bloquants, avertissements = [], []
+    config = donnees["config"]
+    JOURS, HEURES, MATIERES = donnees["JOURS"], donnees["HEURES"], donnees["MATIERES"]
+    CLASSES, CLASSES_BASE = donnees["CLASSES"], donnees["CLASSES_BASE"]
+    PROFESSEURS, VOLUME_HORAIRE = donnees["PROFESSEURS"], donnees["VOLUME_HORAIRE"]
+    SOUS_GROUPES_SUFFIXES, SOUS_GROUPES_CONFIG = donnees["SOUS_GROUPES_SUFFIXES"], donnees["SOUS_GROUPES_CONFIG"]
+    CAPACITES_SALLES, CAPACITES_CLASSES = donnees["CAPACITES_SALLES"], donnees["CAPACITES_CLASSES"]
+    SALLES_GENERALES, AFFECTATION_MATIERE_SALLE = donnees["SALLES_GENERALES"], donnees["AFFECTATION_MATIERE_SALLE"]
+
+    def resultat():
+        return {
+            "bloquants": bloquants,
+            "avertissements": avertissements,
+            "duree_ms": (time.perf_counter() - debut) * 1000
+        }
+
+    def heures(v):
+        return f"{v:g} h"
+
+    # 1) Matières suivies par chaque classe (mêmes règles que creer_modele)
+    langues = set(SOUS_GROUPES_SUFFIXES.values())
+    matieres_classe = {}
+    for classe in CLASSES:
+        niveau = classe[:2]
+        if niveau not in VOLUME_HORAIRE:
+            bloquants.append(f"{classe} : aucun volume horaire défini pour le niveau {niveau}")
+            continue
+        suffixe = next((s for s in SOUS_GROUPES_SUFFIXES if s in classe), None)
+        if suffixe is not None:
+            matieres = [SOUS_GROUPES_SUFFIXES[suffixe]] if SOUS_GROUPES_SUFFIXES[suffixe] in VOLUME_HORAIRE[niveau] else []
+        else:
+            matieres = [m for m in VOLUME_HORAIRE[niveau] if m not in langues]
+        matieres_classe[classe] = matieres
+
+    inconnues = sorted({m for matieres in matieres_classe.values() for m in matieres if m not in MATIERES})
+    for m in inconnues:
+        bloquants.append(f"Matière « {m} » : présente dans les volumes horaires mais absente de la liste des matières")
+    for m in sorted({m for matieres in matieres_classe.values() for m in matieres} - set(PROFESSEURS)):
+        bloquants.append(f"Matière « {m} » : aucun professeur renseigné")
+    try:
+        h_dej, classe_creneau_dej = repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config)
+    except ValueError as e:
+        bloquants.append(f"Cantine : {e}")
+    if bloquants:
+        # Le modèle ne peut pas être construit : inutile de calculer les bornes
+        return resultat()
+
+    def profs_du_niveau(matiere, niveau):
+        prof_ref = PROFESSEURS.get(matiere)
         if isinstance(prof_ref, dict):
-            for niveau, liste_profs in prof_ref.items():
-                # Si liste_profs n'est pas une liste ou a longueur ≤ 1, on skip
-                if not isinstance(liste_profs, list) or len(liste_profs) <= 1:
-                    continue
+            prof_ref = prof_ref.get(niveau)
+        return [prof_ref] if isinstance(prof_ref, str) else list(prof_ref or [])
+
+    # 2) Grille des créneaux possibles [classe, jour, heure, indice matière]. Les salles
+    # générales sont attribuées aux profs par creer_modele (attribuer_salles_professeurs) :
+    # leurs indisponibilités ne retirent alors aucune matière, on les considère toutes ainsi
+    affectation = dict(AFFECTATION_MATIERE_SALLE)
+    affectation.update({salle: salle for salle in SALLES_GENERALES if salle not in affectation.values()})
+    interdit = matieres_interdites_par_creneau(
+        classe_creneau_dej, h_dej, dict(donnees, AFFECTATION_MATIERE_SALLE=affectation)
+    )
+    # Créneaux comptés par la contrainte de volume horaire (hors 12h-13h et après-midi libérés)
+    ouvert = np.ones((len(JOURS), len(HEURES)), dtype=bool)
+    ouvert[:, 4:5] = False
+    for j, jour in enumerate(JOURS):
+        if jour in donnees["JOURS_SANS_APRES_MIDI"]:
+            ouvert[j, 5:] = False
+    possible = ~interdit & ouvert[None, :, :, None]
+
+    # Volume hebdomadaire [classe, indice matière] ; une demi-heure (1,5 h) donne
+    # 2 h une semaine et 1 h l'autre
+    volume = np.zeros((len(CLASSES), len(MATIERES) + 1))
+    for c, classe in enumerate(CLASSES):
+        for m in matieres_classe.get(classe, []):
+            volume[c, MATIERES.index(m) + 1] = VOLUME_HORAIRE[classe[:2]][m]
+    plancher, plafond = np.floor(volume), np.ceil(volume)
+    demi = (volume != plancher).astype(int)
+
+    def comparer(libelle, plancher_total, nb_demi, plafond_total, total, offre,
+                 bloquant=True, unite="créneaux possibles"):
+        """Charge hebdomadaire d'une ressource (un cours par créneau) face à son offre."""
+        # La semaine la plus chargée a au moins la moitié (arrondie au-dessus) des demi-heures
+        minimum = int(plancher_total) + (int(nb_demi) + 1) // 2
+        if minimum > offre:
+            (bloquants if bloquant else avertissements).append(
+                f"{libelle} : {heures(total)} de cours par semaine pour {offre:g} {unite}"
+            )
+        elif plafond_total > offre:
+            avertissements.append(
+                f"{libelle} : jusqu'à {heures(plafond_total)} de cours une semaine pour {offre:g} "
+                f"{unite}, selon la répartition des demi-heures entre semaines A et B"
+            )
 
-                # 1) Pour chaque créneau d'une classe de base de ce niveau, on crée un IntVar d'indice du prof
-                for semaine in SEMAINES:
-                    for cl in CLASSES_BASE:
-                        if not cl.startswith(niveau):
-                            continue
-                        for j in range(len(JOURS)):
-                            for h in range(len(HEURES)):
-                                key_prof = (cl, j, h, matiere, semaine)
-                                emploi_du_temps_profs[semaine][key_prof] = model.NewIntVar(
-                                    0, len(liste_profs) - 1,
-                                    f"prof_{cl}_{j}_{h}_{matiere}_{semaine.replace(' ', '_')}"
-                                )
+    # 3) Chaque matière d'une classe : une semaine sur deux au moins, le volume arrondi au-dessus
+    creneaux_matiere = possible.sum(axis=(1, 2))
+    for c, m in np.argwhere((volume > 0) & (plafond > creneaux_matiere)).tolist():
+        bloquants.append(
+            f"{CLASSES[c]} : {MATIERES[m - 1]} demande {heures(plafond[c, m])} sur une semaine "
+            f"pour {creneaux_matiere[c, m]} créneaux possibles"
+        )
+
+    # 4) Chaque classe : un seul cours par créneau
+    creneaux_classe = (possible & (volume > 0)[:, None, None, :]).any(axis=3).sum(axis=(1, 2))
+    for c, classe in enumerate(CLASSES):
+        comparer(classe, plancher[c].sum(), demi[c].sum(), plafond[c].sum(), volume[c].sum(), creneaux_classe[c])
+
+    # 5) Une matière d'un niveau : au plus une classe du niveau à la fois
+    # (sauf « même niveau, même cours » et langues en sous-groupes)
+    memniv = {(e["niveau"], e["matiere"]) for e in config.get("memnivmemcours", [])}
+    for niveau in donnees["NIVEAUX"]:
+        rangs = [CLASSES.index(cl) for cl in CLASSES_BASE if cl.startswith(niveau)]
+        if len(rangs) < 2:
+            continue
+        for m_idx, matiere in enumerate(MATIERES, start=1):
+            if (niveau, matiere) in memniv or SOUS_GROUPES_CONFIG.get(matiere, {}).get("type") == "LV":
+                continue
+            if not volume[rangs, m_idx].any():
+                continue
+            comparer(
+                f"{matiere} en {niveau}", plancher[rangs, m_idx].sum(), demi[rangs, m_idx].sum(),
+                plafond[rangs, m_idx].sum(), volume[rangs, m_idx].sum(),
+                possible[rangs, :, :, m_idx].any(axis=0).sum()
+            )
+
+    # 6) Professeurs seuls sur un enseignement : un cours à la fois (classes de base ;
+    # un cours « même niveau, même cours » compte une fois pour tout le niveau)
+    profs = sorted({
+        p for classe in CLASSES_BASE for m in matieres_classe.get(classe, []) for p in profs_du_niveau(m, classe[:2])
+    })
+    cours_seul = np.zeros((len(profs), len(CLASSES), len(MATIERES) + 1), dtype=np.int32)
+    referent = np.zeros_like(cours_seul)
+    niveaux_vus = set()
+    for classe in CLASSES_BASE:
+        c, niveau = CLASSES.index(classe), classe[:2]
+        for m in matieres_classe.get(classe, []):
+            profs_m = profs_du_niveau(m, niveau)
+            if not profs_m:
+                if (niveau, m) not in niveaux_vus:
+                    avertissements.append(f"{m} en {niveau} : aucun professeur pour ce niveau")
+                niveaux_vus.add((niveau, m))
+                continue
+            # Référent compté par verifier_volume_par_professeur : le premier prof de la liste
+            referent[profs.index(profs_m[0]), c, MATIERES.index(m) + 1] = 1
+            if len(profs_m) == 1 and ((niveau, m) not in memniv or (niveau, m) not in niveaux_vus):
+                cours_seul[profs.index(profs_m[0]), c, MATIERES.index(m) + 1] = 1
+            niveaux_vus.add((niveau, m))
+    if profs:
+        creneaux_prof = (np.einsum("pcm,cjhm->pjh", cours_seul, possible.astype(np.int32)) > 0).sum(axis=(1, 2))
+        charges = [np.einsum("pcm,cm->p", cours_seul, t) for t in (plancher, demi, plafond, volume)]
+        for p, prof in enumerate(profs):
+            if cours_seul[p].any():
+                comparer(prof, *(t[p] for t in charges), creneaux_prof[p])
+
+        # Volume maximal de chaque prof (vérifié après la résolution)
+        volume_par_prof = config.get("volume_par_professeur", {})
+        charges = [np.einsum("pcm,cm->p", referent, t) for t in (plancher, demi, plafond, volume)]
+        for p, prof in enumerate(profs):
+            if prof in volume_par_prof and referent[p].any():
+                comparer(
+                    prof, *(t[p] for t in charges), volume_par_prof[prof],
+                    bloquant=False, unite="h autorisées (volume par professeur)"
+                )
+
+    # 7) Salles : capacité face à l'effectif des classes, occupation des salles dédiées
+    capacite_generale = max((CAPACITES_SALLES.get(s, 0) for s in SALLES_GENERALES), default=0)
+    for classe in CLASSES_BASE:
+        effectif = CAPACITES_CLASSES.get(classe, 0)
+        if effectif > capacite_generale:
+            avertissements.append(
+                f"{classe} : aucune salle générale pour {effectif} élèves (au plus {capacite_generale} places)"
+            )
+    for salle in sorted(set(AFFECTATION_MATIERE_SALLE.values())):
+        matieres = [m for m, s in AFFECTATION_MATIERE_SALLE.items() if s == salle and m in MATIERES]
+        if not matieres:
+            continue
+        indices = [MATIERES.index(m) + 1 for m in matieres]
+        capacite = CAPACITES_SALLES.get(salle, 0)
+        trop_petites = [
+            f"{classe} ({CAPACITES_CLASSES.get(classe, 0)})" for c, classe in enumerate(CLASSES)
+            if volume[c, indices].any() and CAPACITES_CLASSES.get(classe, 0) > capacite
+        ]
+        if trop_petites:
+            avertissements.append(
+                f"{salle} ({capacite} places, {', '.join(matieres)}) trop petite pour : {', '.join(trop_petites)}"
+            )
+        creneaux_salle = possible[:, :, :, indices].any(axis=(0, 3)).sum()
+        comparer(
+            salle, plancher[:, indices].sum(), demi[:, indices].sum(), plafond[:, indices].sum(),
+            volume[:, indices].sum(), creneaux_salle, bloquant=False
+        )
+
+    return resultat()
+
+
+def diagnostiquer_config(chemin_config="data/config.json"):
+    """Lit un fichier de configuration et l'analyse (analyser_faisabilite)."""
+    return analyser_faisabilite(init_donnees(chemin_config))
+
+
+def creer_modele(chemin_hint=None, salles_deux_phases=None, volume_bihebdo=None):
+    """
+    Construit et retourne un modèle CP-SAT configuré pour générer un emploi du
+    temps bihebdomadaire (Semaine A/B) respectant un ensemble de contraintes.
+
+    Si chemin_hint est donné (ou config["parametres_solveur"]["hint_edt"] : un
+    chemin, ou True pour le dernier emploi du temps enregistré, quel que soit son
+    format), l'emploi du temps de ce fichier sert de point de départ à la recherche (AddHint).
+
+    Avec config["parametres_solveur"]["affectation_prof"] = "classe", une classe
+    garde le même prof pour une matière toute l'année : une seule variable
+    d'indice de prof par (classe, matière), partagée par tous ses créneaux, et
+    l'équité porte sur la charge horaire de chaque prof.
+
+    Avec salles_deux_phases (argument, sinon
+    config["parametres_solveur"]["salles_deux_phases"]), le modèle ne choisit
+    pas les salles : seules des contraintes agrégées de capacité par créneau
+    sont posées, les salles étant affectées ensuite par couplage
+    (voir affecter_salles).
 
-                # 2) Création de compteurs pour chaque prof (nombre d'heures attribuées)
-                counts = []
-                for prof in liste_profs:
-                    var_count = model.NewIntVar(
-                        0,
-                        len(CLASSES_BASE) * len(JOURS) * len(HEURES),
-                        f"nb_{matiere}_{niveau}_{prof.replace(' ', '_')}"
+    volume_bihebdo (résultat de calculer_volume_bihebdo) sert à reconstruire un
+    modèle déjà construit (repli de la résolution en deux phases) : les demi-heures
+    restent dans la même semaine et les salles des profs, déjà attribuées, sont
+    conservées. Le volume utilisé est conservé dans model.volume_bihebdo.
+
+    Ce modèle comprend :
+      - Attribution des salles pour chaque professeur n'ayant pas de salle dédiée.
+      - Variables d'assignation des matières, des salles et des professeurs par créneau.
+      - Contraintes de non-chevauchement de professeurs et de salles.
+      - Tenue du volume horaire bihebdomadaire pour chaque classe / sous-groupe.
+      - Gestion des jours sans après-midi, cantine, permanence, etc.
+      - Objectif de minimisation des heures de permanence et des pénalités de préférence.
+    
+    Retourne:
+        model (cp_model.CpModel): le modèle CP-SAT prêt à être résolu.
+        emploi_du_temps (dict): dictionnaire de variables IntVar pour matières.
+        emploi_du_temps_salles (dict): dictionnaire de variables IntVar pour salles.
+        emploi_du_temps_profs (dict): dictionnaire de variables IntVar/BoolVar pour professeurs.
+    """
+    # Chaque professeur sans salle dédiée reçoit une salle générale
+    if volume_bihebdo is None:
+        attribuer_salles_professeurs()
+
+    # Démarrage à chaud : un emploi du temps déjà calculé sert de point de départ
+    if chemin_hint is None:
+        chemin_hint = config.get("parametres_solveur", {}).get("hint_edt")
+    edt_hint = None
+    if chemin_hint:
+        try:
+            # Format (JSON historique ou compact) reconnu au contenu du fichier
+            edt_hint = format_edt.charger_edt(None if chemin_hint is True else chemin_hint)["edt_classe"]
+        except FileNotFoundError:
+            print(f"⚠️ Fichier de hint introuvable : {chemin_hint}")
+
+    # On calcule maintenant le volume horaire bihebdomadaire pour chaque niveau/matière
+    if volume_bihebdo is None:
+        volume_bihebdo = calculer_volume_bihebdo(edt_hint)
+    VOLUME_HORAIRE_BIHEBDO = volume_bihebdo
+
+    # Initialisation du modèle
+    model = cp_model.CpModel()
+    model.volume_bihebdo = VOLUME_HORAIRE_BIHEBDO
+
+    # Nombre fixe de salles : on numérote de 1 à N
+    NOMBRE_DE_SALLES = 24
+
+    # Dictionnaires pour stocker les variables du modèle
+    emploi_du_temps = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les matières
+    emploi_du_temps_salles = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les salles
+    emploi_du_temps_profs = {semaine: {} for semaine in SEMAINES} # Dictionnaire pour les professeurs
+
+    # Couche d'indicateurs partagée (encodage one-hot), créée une seule fois par variable :
+    #   est_matiere[semaine][(classe, j, h)][m] ⇔ emploi_du_temps[semaine][(classe, j, h)] == m
+    #   est_salle[semaine][(classe, j, h)][s]   ⇔ emploi_du_temps_salles[...] == s
+    #   est_prof[semaine][key_prof][i]          ⇔ emploi_du_temps_profs[...] == i
+    #   est_affecte[(classe, m)][i]             ⇔ affectation_prof[(classe, m)] == i (mode "classe")
+    est_matiere = {semaine: {} for semaine in SEMAINES}
+    est_salle = {semaine: {} for semaine in SEMAINES}
+    est_prof = {semaine: {} for semaine in SEMAINES}
+
+    # Mode d'affectation des profs : "creneau" (un prof choisi par créneau) ou
+    # "classe" (un prof par classe et matière pour toute l'année)
+    prof_par_classe = config.get("parametres_solveur", {}).get("affectation_prof", "creneau") == "classe"
+    if salles_deux_phases is None:
+        salles_deux_phases = config.get("parametres_solveur", {}).get("salles_deux_phases", False)
+    affectation_prof = {}
+    est_affecte = {}
+
+    # Littéral toujours faux, renvoyé pour une matière hors du domaine d'un créneau
+    faux = model.NewBoolVar("faux")
+    model.Add(faux == 0)
+
+    # Registre des contrôles de resultats_contraintes, lus directement dans la solution :
+    # catégorie → [(violation, nb_controles, détail)], où violation est un littéral, une
+    # variable de pénalité ou un entier nul si la contrainte est respectée (0 : garantie par
+    # une contrainte dure). violation et nb_controles peuvent aussi être une somme de
+    # littéraux comparée à une borne (voir valeur_controle), sans variable supplémentaire.
+    # Porté par le modèle, qui peut être remplacé (repli du modèle joint) ; une catégorie
+    # absente du registre reste vérifiée par son verifier_* dans solve_et_verifie.
+    registre = defaultdict(list)
+    model.registre_contraintes = registre
+
+    def enregistrer(categorie, violation, detail, nb_controles=1):
+        """Ajoute au registre nb_controles contrôles d'une catégorie, violés ssi violation ≠ 0."""
+        registre[categorie].append((violation, nb_controles, detail))
+
+    def x(semaine, classe, j, h, m_idx):
+        """Littéral « la classe a la matière d'indice m_idx (0 = pas de cours) à (j, h) »."""
+        return est_matiere[semaine][(classe, j, h)].get(m_idx, faux)
+
+    def enseigne(semaine, classe, j, h, matiere, prof):
+        """Contrôle « prof assure le cours de matiere de la classe à (j, h) » (voir valeur_controle)."""
+        profs = profs_possibles(matiere, classe[:2])
+        if prof not in profs:
+            return 0
+        rang = profs.index(prof)
+        cours = x(semaine, classe, j, h, MATIERES.index(matiere) + 1)
+        key_prof = (classe, j, h, matiere, semaine)
+        if key_prof in est_prof[semaine]:
+            choix = est_prof[semaine][key_prof][rang]
+        elif (classe, matiere) in est_affecte:
+            choix = est_affecte[(classe, matiere)][rang]
+        else:
+            # Pas de variable de prof : le cours revient au premier prof (prof_du_creneau)
+            return cours if rang == 0 else 0
+        return ([(1, cours), (1, choix)], 1)
+
+    def creer_var_prof(semaine, key_prof, nb_profs):
+        """Crée (une seule fois) l'IntVar d'indice du prof d'un créneau et son encodage one-hot."""
+        if prof_par_classe:
+            # Le créneau reprend la variable d'affectation de sa (classe, matière)
+            cl, _, _, m, _ = key_prof
+            if (cl, m) not in affectation_prof:
+                nom = f"prof_{cl}_{m}"
+                affectation_prof[(cl, m)] = model.NewIntVar(0, nb_profs - 1, nom)
+                est_affecte[(cl, m)] = encoder_one_hot(
+                    model, affectation_prof[(cl, m)], range(nb_profs), nom
+                )
+            emploi_du_temps_profs[semaine][key_prof] = affectation_prof[(cl, m)]
+        elif key_prof not in emploi_du_temps_profs[semaine]:
+            cl, j, h, m, _ = key_prof
+            nom = f"prof_{cl}_{j}_{h}_{m}_{semaine.replace(' ', '_')}"
+            emploi_du_temps_profs[semaine][key_prof] = model.NewIntVar(0, nb_profs - 1, nom)
+            est_prof[semaine][key_prof] = encoder_one_hot(
+                model, emploi_du_temps_profs[semaine][key_prof], range(nb_profs), nom
+            )
+        return emploi_du_temps_profs[semaine][key_prof]
+
+    def creer_vars_creneau(semaine, classe, j, h, matiere_indices_autorises):
+        """Variables matière et salle d'un créneau, avec leurs indicateurs one-hot."""
+        key = (classe, j, h)
+        jour, heure = JOURS[j], HEURES[h]
+        # Variable IntVar pour la matière attribuée à ce créneau
+        emploi_du_temps[semaine][key] = model.NewIntVarFromDomain(
+            cp_model.Domain.FromValues(matiere_indices_autorises),
+            f"{classe}_{jour}_{heure}_{semaine.replace(' ', '_')}"
+        )
+        est_matiere[semaine][key] = encoder_one_hot(
+            model, emploi_du_temps[semaine][key], matiere_indices_autorises,
+            f"{classe}_{j}_{h}_{semaine.replace(' ', '_')}"
+        )
+        # Variable IntVar pour la salle (0 signifie pas de cours),
+        # restreinte d'emblée aux salles de capacité suffisante
+        salles_valides = [
+            s for s in salles_valides_par_classe[classe] if s <= NOMBRE_DE_SALLES
+        ]
+        emploi_du_temps_salles[semaine][key] = model.NewIntVarFromDomain(
+            cp_model.Domain.FromValues(salles_valides),
+            f"salle_{classe}_{jour}_{heure}_{semaine.replace(' ', '_')}"
+        )
+        if salles_deux_phases:
+            # Salle choisie après la résolution : le domaine suffit au couplage
+            est_salle[semaine][key] = {}
+            return
+        est_salle[semaine][key] = encoder_one_hot(
+            model, emploi_du_temps_salles[semaine][key], salles_valides,
+            f"salle_{classe}_{j}_{h}_{semaine.replace(' ', '_')}"
+        )
+
+    # Pré-calcul des domaines : matières interdites par créneau (indisponibilités,
+    # jours sans après-midi, cantine), appliquées dès la création des variables
+    h_dej, classe_creneau_dej = repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config)
+    interdit = matieres_interdites_par_creneau(classe_creneau_dej, h_dej)
+    nb_valeurs_retirees = 0
+
+    # Salles valides par capacité, calculées une fois par classe (0 = pas de cours)
+    salles_valides_par_classe = {}
+    for classe in CLASSES:
+        # On détermine la classe de base si c'est un sous-groupe
+        classe_base = classe
+        for suffixe in SOUS_GROUPES_SUFFIXES:
+            if classe.endswith(suffixe):
+                classe_base = classe.replace(suffixe, "")
+                break
+
+        capacite_classe = CAPACITES_CLASSES.get(classe_base, 0)
+        # Sélection des salles valides par capacité
+        salles_valides = [
+            i
+            for i, nom in enumerate(SALLES_GENERALES, 1)
+            if CAPACITES_SALLES.get(nom, 0) >= capacite_classe
+        ]
+        # On ajoute aussi les salles spécialisées suffisantes
+        for nom_salle, cap in CAPACITES_SALLES.items():
+            if nom_salle not in SALLES_GENERALES and cap >= capacite_classe:
+                if nom_salle in AFFECTATION_MATIERE_SALLE.values():
+                    try:
+                        index = SALLES_GENERALES.index(nom_salle) + 1
+                    except ValueError:
+                        # Salle spécialisée non listée dans SALLES_GENERALES
+                        continue
+                    salles_valides.append(index)
+        # Si aucune salle dispo, la variable ne peut valoir que 0 (pas de cours)
+        salles_valides_par_classe[classe] = [0] + salles_valides
+
+    # Pour chaque classe (base et sous-groupes), chaque semaine, jour et heure :
+    for c, classe in enumerate(CLASSES):
+        for semaine in SEMAINES:
+            for j, jour in enumerate(JOURS):
+                for h, heure in enumerate(HEURES):
+                    niveau = classe[:2]
+
+                    # Détermination des matières autorisées : 
+                    # si c'est un sous-groupe, seule la langue correspondante
+                    for suffixe, langue in SOUS_GROUPES_SUFFIXES.items():
+                        if suffixe in classe:
+                            matieres_autorisees = [langue]
+                            break
+                    else:
+                        # sinon, toutes les matières générales hors sous-groupes
+                        matieres_autorisees = [
+                            m for m in VOLUME_HORAIRE[niveau].keys()
+                            if m not in SOUS_GROUPES_SUFFIXES.values()
+                        ]
+
+                    # Indices admis pour la variable : 0 = pas de cours, 1..N = index matière,
+                    # hors matières interdites à ce créneau par le pré-calcul
+                    matiere_indices_autorises = [0] + [
+                        MATIERES.index(m) + 1 for m in matieres_autorisees
+                        if not interdit[c, j, h, MATIERES.index(m) + 1]
+                    ]
+                    nb_valeurs_retirees += len(matieres_autorisees) + 1 - len(matiere_indices_autorises)
+
+                    key = (classe, j, h)
+                    if matiere_indices_autorises == [0]:
+                        # Créneau sans cours possible : constantes (matière et salle à 0)
+                        emploi_du_temps[semaine][key] = model.NewConstant(0)
+                        est_matiere[semaine][key] = {0: faux.Not()}
+                        emploi_du_temps_salles[semaine][key] = model.NewConstant(0)
+                        est_salle[semaine][key] = {0: faux.Not()}
+                    else:
+                        creer_vars_creneau(semaine, classe, j, h, matiere_indices_autorises)
+
+                    # Pour chaque matière autorisée, si plusieurs profs possibles, créer IntVar prof
+                    for m in matieres_autorisees:
+                        prof_ref = PROFESSEURS[m]
+                        if isinstance(prof_ref, dict):
+                            # Extraction de la liste de profs pour ce niveau
+                            profs_niv = prof_ref.get(niveau, [])
+                            if isinstance(profs_niv, list) and len(profs_niv) > 1:
+                                creer_var_prof(semaine, (classe, j, h, m, semaine), len(profs_niv))
+
+    print(f"✂️ Pré-calcul des domaines : {nb_valeurs_retirees} valeurs de matière retirées")
+
+    # Contrôles des interdictions appliquées aux domaines : la violation est le littéral
+    # de la matière interdite (faux si la valeur a été retirée du domaine)
+    for semaine in SEMAINES:
+        for classe in CLASSES:
+            for j, jour in enumerate(JOURS):
+                if jour not in config.get("jours_sans_apres_midi", []):
+                    continue
+                for h in range(5, len(HEURES)):
+                    enregistrer(
+                        "jours_sans_apres_midi", x(semaine, classe, j, h, 0).Not(),
+                        f"{classe} - {jour} {HEURES[h]} : Cours interdit"
                     )
-                    counts.append(var_count)
 
-                # 3) Pour chaque prof d'indice i, créer les BoolVar indiquant "ce prof est choisi ici"
-                for i, prof in enumerate(liste_profs):
-                    occurrences = []
-                    for semaine in SEMAINES:
-                        for cl in CLASSES_BASE:
-                            if not cl.startswith(niveau):
+        if config.get("indisponibilites_profs"):
+            for prof, indispos in INDISPONIBILITES_PROFS.items():
+                for jour_str, heures in indispos.items():
+                    if jour_str not in JOURS:
+                        continue
+                    jour_index = JOURS.index(jour_str)
+                    for classe in CLASSES:
+                        for matiere, prof_ref in PROFESSEURS.items():
+                            # Même périmètre que verifier_indisponibilites_profs
+                            if isinstance(prof_ref, dict):
+                                prof_ref = prof_ref.get(classe[:2])
+                                if isinstance(prof_ref, list) and prof in prof_ref:
+                                    prof_ref = prof
+                            if prof_ref != prof:
                                 continue
-                            for j in range(len(JOURS)):
-                                for h in range(len(HEURES)):
-                                    key_prof = (cl, j, h, matiere, semaine)
-                                    if key_prof in emploi_du_temps_profs[semaine]:
-                                        b = model.NewBoolVar(
-                                            f"occur_{matiere}_{niveau}_{cl}_{j}_{h}_{prof.replace(' ', '_')}_{semaine.replace(' ', '_')}"
-                                        )
-                                        model.Add(
-                                            emploi_du_temps_profs[semaine][key_prof] == i
-                                        ).OnlyEnforceIf(b)
-                                        model.Add(
-                                            emploi_du_temps_profs[semaine][key_prof] != i
-                                        ).OnlyEnforceIf(b.Not())
-                                        occurrences.append(b)
-                    # 4) Impose que le compteur = somme des occurrences pour ce prof
-                    model.Add(counts[i] == sum(occurrences))
-
-                # 5) Contrainte d'équité : pour tout couple (a,b), différence ≤ 1
-                for a in range(len(liste_profs)):
-                    for b in range(a + 1, len(liste_profs)):
-                        model.Add(counts[a] - counts[b] <= 1)
-                        model.Add(counts[b] - counts[a] <= 1)
+                            for h in heures:
+                                if (classe, jour_index, h) not in emploi_du_temps[semaine]:
+                                    continue
+                                enregistrer(
+                                    "indisponibilites_profs",
+                                    x(semaine, classe, jour_index, h, MATIERES.index(matiere) + 1),
+                                    f"{classe} - {jour_str} {HEURES[h]} : "
+                                    f"{matiere} planifié(e) alors que {prof} est indisponible"
+                                )
+
+        if config.get("indisponibilites_salles"):
+            for salle, indispos in INDISPONIBILITES_SALLES.items():
+                matieres_concernees = [
+                    m for m in AFFECTATION_MATIERE_SALLE
+                    if m in MATIERES and AFFECTATION_MATIERE_SALLE[m] == salle
+                ]
+                for jour_str, heures in indispos.items():
+                    if jour_str not in JOURS:
+                        continue
+                    jour_index = JOURS.index(jour_str)
+                    for classe in CLASSES:
+                        for matiere in matieres_concernees:
+                            for h in heures:
+                                enregistrer(
+                                    "indisponibilites_salles",
+                                    x(semaine, classe, jour_index, h, MATIERES.index(matiere) + 1),
+                                    f"{classe} - {jour_str} {HEURES[h]} : "
+                                    f"Cours interdit en salle indisponible ({matiere} en {salle})"
+                                )
+
+
+    # Dictionnaire d'assignation prof/classe par matière ; utile dans certaines contraintes
+    assignation_prof_classe = {}  # (classe, matiere, semaine) → bool ou indice
 
+    # Pour chaque matière, on introduit les variables d'équité de répartition des profs
+    # (une seule passe : les compteurs réutilisent les littéraux one-hot de est_prof)
+    enseignements_equite = index_enseignements_profs(CLASSES_BASE)
+    for matiere, prof_ref in PROFESSEURS.items():
+        # ─── Cas A : dictionnaire niveau → liste de profs (ex. Maths : {"6e": ["Dupont", ...], ...})
+        if isinstance(prof_ref, dict):
+            groupes_equite = [
+                (f"{matiere}_{niveau}", liste_profs, [cl for cl in CLASSES if cl.startswith(niveau)])
+                for niveau, liste_profs in prof_ref.items()
+                # Si liste_profs n'est pas une liste ou a longueur ≤ 1, on skip
+                if isinstance(liste_profs, list) and len(liste_profs) > 1
+            ]
         # ─── Cas B : liste globale de profs (ex. EPS : ["Richard", "X"])
         elif isinstance(prof_ref, list) and len(prof_ref) > 1:
-            liste_profs = prof_ref
-
-            # 1) Déterminer les classes concernées par cette matière
-            classes_concernees = []
-            for cl in CLASSES_BASE:
-                niv = cl[:2]
-                if matiere in VOLUME_HORAIRE.get(niv, {}):
-                    classes_concernees.append(cl)
+            # Les classes concernées sont celles dont le niveau suit cette matière
+            groupes_equite = [(
+                matiere,
+                prof_ref,
+                [cl for cl in CLASSES_BASE if matiere in VOLUME_HORAIRE.get(cl[:2], {})]
+            )]
+        # ─── Cas C : exactement un prof (chaîne), rien à faire pour l'équité
+        else:
+            groupes_equite = []
 
-            # 2) Pour chaque créneau, créer IntVar pour choisir le prof (index dans liste_profs)
+        for libelle, liste_profs, classes_concernees in groupes_equite:
+            # 1) Pour chaque créneau d'une classe de base concernée, un IntVar d'indice du prof
             for semaine in SEMAINES:
                 for cl in classes_concernees:
+                    if cl not in CLASSES_BASE:
+                        continue
                     for j in range(len(JOURS)):
                         for h in range(len(HEURES)):
-                            key_prof = (cl, j, h, matiere, semaine)
-                            emploi_du_temps_profs[semaine][key_prof] = model.NewIntVar(
-                                0, len(liste_profs) - 1,
-                                f"prof_{cl}_{j}_{h}_{matiere}_{semaine.replace(' ', '_')}"
-                            )
+                            creer_var_prof(semaine, (cl, j, h, matiere, semaine), len(liste_profs))
+
+            if prof_par_classe:
+                # Charge de chaque prof (heures sur les deux semaines) : somme des volumes
+                # des classes qui lui sont affectées ; l'écart est borné par le plus gros
+                # volume d'une classe (une répartition gloutonne l'atteint toujours)
+                volumes = {
+                    cl: sum(VOLUME_HORAIRE_BIHEBDO.get(cl[:2], {}).get(matiere, {}).values())
+                    for cl in classes_concernees if (cl, matiere) in affectation_prof
+                }
+                if not volumes:
+                    continue
+                ecart_max = max(volumes.values())
+                charges = []
+                for i, prof in enumerate(liste_profs):
+                    var_charge = model.NewIntVar(0, sum(volumes.values()), f"charge_{libelle}_{prof.replace(' ', '_')}")
+                    model.Add(var_charge == sum(
+                        volume * est_affecte[(cl, matiere)][i] for cl, volume in volumes.items()
+                    ))
+                    charges.append(var_charge)
+                # Écart max - min ≤ ecart_max : toutes les charges dans [charge_min, charge_min + ecart_max]
+                charge_min = model.NewIntVar(0, sum(volumes.values()), f"charge_min_{libelle}")
+                for var_charge in charges:
+                    model.Add(var_charge >= charge_min)
+                    model.Add(var_charge <= charge_min + ecart_max)
+
+                # Profs interchangeables : le premier (dans l'ordre des classes) est affecté avant les suivants
+                for rangs in profs_interchangeables(liste_profs, matiere, classes_concernees, enseignements_equite):
+                    imposer_precedence_valeurs(
+                        model, [est_affecte[(cl, matiere)] for cl in volumes], rangs, f"symetrie_{libelle}"
+                    )
+                continue
 
-            # 3) Création de compteurs pour chaque prof
+            # 2) Compteurs pour chaque prof : somme des littéraux « ce prof est choisi ici »
             counts = []
-            for prof in liste_profs:
+            for i, prof in enumerate(liste_profs):
+                occurrences = [
+                    litteraux[i]
+                    for semaine in SEMAINES
+                    for key_prof, litteraux in est_prof[semaine].items()
+                    if key_prof[3] == matiere and key_prof[0] in classes_concernees
+                ]
                 var_count = model.NewIntVar(
                     0,
-                    len(CLASSES_BASE) * len(JOURS) * len(HEURES),
-                    f"nb_{matiere}_{prof.replace(' ', '_')}"
+                    len(CLASSES) * len(JOURS) * len(HEURES) * len(SEMAINES),
+                    f"nb_{libelle}_{prof.replace(' ', '_')}"
                 )
+                model.Add(var_count == sum(occurrences))
                 counts.append(var_count)
 
-            # 4) Pour chaque prof d'indice i, compter ses occurrences
-            for i, prof in enumerate(liste_profs):
-                occurrences = []
-                for semaine in SEMAINES:
-                    for cl in classes_concernees:
-                        for j in range(len(JOURS)):
-                            for h in range(len(HEURES)):
-                                key_prof = (cl, j, h, matiere, semaine)
-                                if key_prof in emploi_du_temps_profs[semaine]:
-                                    b = model.NewBoolVar(
-                                        f"occur_{matiere}_{cl}_{j}_{h}_{prof.replace(' ', '_')}_{semaine.replace(' ', '_')}"
-                                    )
-                                    model.Add(
-                                        emploi_du_temps_profs[semaine][key_prof] == i
-                                    ).OnlyEnforceIf(b)
-                                    model.Add(
-                                        emploi_du_temps_profs[semaine][key_prof] != i
-                                    ).OnlyEnforceIf(b.Not())
-                                    occurrences.append(b)
-                model.Add(counts[i] == sum(occurrences))
-
-            # 5) Contrainte d'équité
-            for a in range(len(liste_profs)):
-                for b in range(a + 1, len(liste_profs)):
-                    model.Add(counts[a] - counts[b] <= 1)
-                    model.Add(counts[b] - counts[a] <= 1)
-
-        # ─── Cas C : exactement un prof (chaîne), rien à faire pour l'équité
-        elif isinstance(prof_ref, str):
-            pass
+            # 3) Contrainte d'équité : max - min ≤ 1, via un minimum commun à tous les compteurs
+            count_min = model.NewIntVar(
+                0,
+                len(CLASSES) * len(JOURS) * len(HEURES) * len(SEMAINES),
+                f"nb_min_{libelle}"
+            )
+            for var_count in counts:
+                model.Add(var_count >= count_min)
+                model.Add(var_count <= count_min + 1)
+
+            # 4) Profs interchangeables : ordre lexicographique des premières utilisations
+            for rangs in profs_interchangeables(liste_profs, matiere, classes_concernees, enseignements_equite):
+                imposer_precedence_valeurs(
+                    model,
+                    [
+                        litteraux
+                        for semaine in SEMAINES
+                        for key_prof, litteraux in est_prof[semaine].items()
+                        if key_prof[3] == matiere and key_prof[0] in classes_concernees
+                    ],
+                    rangs,
+                    f"symetrie_{libelle}"
+                )
 
     # ─── Contrainte supplémentaire : même choix de prof entre Semaine A et B pour une classe donnée
     for (classe, matiere, semaine) in list(assignation_prof_classe.keys()):
@@ -867,124 +1867,99 @@ def creer_modele():
                 # On force la même attribution de prof pour A et B : attention aux cas où les profs diffèrent selon la config
 
     # ─── Contrainte : un même professeur ne peut pas enseigner deux classes différentes au même créneau
-    # 1) Récupérer tous les noms de professeurs exploités    tous_les_profs = set()
-    tous_les_profs = set()
-    for mat, prof_ref in PROFESSEURS.items():
-        if isinstance(prof_ref, str):
-            tous_les_profs.add(prof_ref)
-        elif isinstance(prof_ref, dict):
-            for niv, val in prof_ref.items():
-                if isinstance(val, str):
-                    tous_les_profs.add(val)
-                elif isinstance(val, list):
-                    tous_les_profs.update(val)
-        elif isinstance(prof_ref, list):
-            tous_les_profs.update(prof_ref) 
-            # On couvre ici tous les formats possibles (str, dict, list) pour consolider la liste des profs
-
     # MEMNIV_ACTIVES filtre les cours gérés dynamiquement : pense à vérifier la clé 'memnivmemcours' dans le JSON        
     MEMNIV_ACTIVES = {
         (entry["niveau"], entry["matiere"])
         for entry in config.get("memnivmemcours", [])
     }
 
-   # 2) Pour chaque prof, semaine, créneau, on crée des BoolVar indiquant s'il donne cours dans chaque classe
-    for p in tous_les_profs:
+    # Index prof → enseignements possibles, calculé une fois (au lieu de réexaminer
+    # PROFESSEURS pour chaque prof × créneau × classe × matière)
+    enseignements = index_enseignements_profs(CLASSES_BASE, MEMNIV_ACTIVES)
+
+    for p, cours_possibles in enseignements.items():
         for semaine in SEMAINES:
             for j in range(len(JOURS)):
                 for h in range(len(HEURES)):
                     bools_prof = []
-
-                    # 2.a) Parcourir toutes les classes
-                    for cl in CLASSES_BASE:
-                        niveau_cl = cl[:2]
-
-                        # 2.a.1) Cas où PROFESSEURS[mat] est une chaîne et égale à p
-                        for m_idx, mat in enumerate(MATIERES, start=1):
-                            if (niveau_cl, mat) in MEMNIV_ACTIVES:
-                                continue
-                            prof_ref = PROFESSEURS.get(mat)
-                            if isinstance(prof_ref, str) and prof_ref == p:
-                                b_cl_m = model.NewBoolVar(f"is_{p.replace(' ', '_')}_{cl}_{semaine}_{j}_{h}_matiere_{mat.replace(' ', '_')}")
-                                var_mat = emploi_du_temps[semaine][(cl, j, h)]
-                                model.Add(var_mat == m_idx).OnlyEnforceIf(b_cl_m)
-                                model.Add(var_mat != m_idx).OnlyEnforceIf(b_cl_m.Not())
-                                bools_prof.append(b_cl_m)
-
-                        # 2.a.2) Cas où PROFESSEURS[mat] est un dict
-                        for mat in MATIERES:
-                            prof_ref = PROFESSEURS.get(mat)
-                            mat_idx = MATIERES.index(mat) + 1
-
-                            if isinstance(prof_ref, dict):
-                                profs_niv = prof_ref.get(niveau_cl)
-                                # a) Si c’est une chaîne de caractères
-                                if isinstance(profs_niv, str) and profs_niv == p:
-                                    b_cl_m = model.NewBoolVar(f"is_{p.replace(' ', '_')}_{cl}_{semaine}_{j}_{h}_matiere_{mat.replace(' ', '_')}")
-                                    var_mat = emploi_du_temps[semaine][(cl, j, h)]
-                                    model.Add(var_mat == mat_idx).OnlyEnforceIf(b_cl_m)
-                                    model.Add(var_mat != mat_idx).OnlyEnforceIf(b_cl_m.Not())
-                                    bools_prof.append(b_cl_m)
-
-                                # b) Si c’est une liste
-                                elif isinstance(profs_niv, list) and p in profs_niv:
-                                    key_prof = (cl, j, h, mat, semaine)
-                                    b_cl_m = model.NewBoolVar(f"is_{p.replace(' ', '_')}_{cl}_{semaine}_{j}_{h}_profIndex_{mat.replace(' ', '_')}")
-                                    if key_prof in emploi_du_temps_profs[semaine]:
-                                        idx_p = profs_niv.index(p)
-                                        var_prof_index = emploi_du_temps_profs[semaine][key_prof]
-                                        model.Add(var_prof_index == idx_p).OnlyEnforceIf(b_cl_m)
-                                        model.Add(var_prof_index != idx_p).OnlyEnforceIf(b_cl_m.Not())
-                                    else:
-                                        var_mat = emploi_du_temps[semaine][(cl, j, h)]
-                                        model.Add(var_mat == mat_idx).OnlyEnforceIf(b_cl_m)
-                                        model.Add(var_mat != mat_idx).OnlyEnforceIf(b_cl_m.Not())
-                                    bools_prof.append(b_cl_m)
-
-                            # 2.a.3) Cas où PROFESSEURS[mat] est une liste simple [prof1, prof2, ...]
-                            elif isinstance(prof_ref, list) and p in prof_ref:
-                                key_prof = (cl, j, h, mat, semaine)
-                                b_cl_m = model.NewBoolVar(f"is_{p.replace(' ', '_')}_{cl}_{semaine}_{j}_{h}_profIndex_{mat.replace(' ', '_')}")
-                                if key_prof in emploi_du_temps_profs[semaine]:
-                                    idx_p = prof_ref.index(p)
-                                    var_prof_index = emploi_du_temps_profs[semaine][key_prof]
-                                    model.Add(var_prof_index == idx_p).OnlyEnforceIf(b_cl_m)
-                                    model.Add(var_prof_index != idx_p).OnlyEnforceIf(b_cl_m.Not())
-                                else:
-                                    var_mat = emploi_du_temps[semaine][(cl, j, h)]
-                                    model.Add(var_mat == mat_idx).OnlyEnforceIf(b_cl_m)
-                                    model.Add(var_mat != mat_idx).OnlyEnforceIf(b_cl_m.Not())
-                                bools_prof.append(b_cl_m)
-
-                    # 3) Enfin, on ajoute la contrainte : au plus un BoolVar de cette liste peut être à 1
-                    if bools_prof:
-                        model.Add(sum(bools_prof) <= 1) # Garantie qu’un prof n’est pas doublé sur le même créneau
-
-
-    # ─── Contrainte : interdiction qu'une salle soit occupée par deux classes simultanément
-    for semaine in SEMAINES:
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES)):
-                for idx_salle, nom_salle in enumerate(SALLES_GENERALES, start=1):
-                    bools_salle = []
+                    conditionnels = []  # (cours à ce créneau, « p est affecté à la classe »)
+                    for cl, mat, m_idx, rang in cours_possibles:
+                        key_prof = (cl, j, h, mat, semaine)
+                        if rang is not None and key_prof in est_prof[semaine]:
+                            # Plusieurs profs possibles : littéral « p est le prof choisi ici »
+                            bools_prof.append(est_prof[semaine][key_prof][rang])
+                        elif m_idx not in est_matiere[semaine][(cl, j, h)]:
+                            continue
+                        elif rang is not None and (cl, mat) in est_affecte:
+                            conditionnels.append((x(semaine, cl, j, h, m_idx), est_affecte[(cl, mat)][rang]))
+                        else:
+                            bools_prof.append(x(semaine, cl, j, h, m_idx))
+                    # Mode "classe" : les cours des classes affectées à p comptent aussi,
+                    # via un littéral « cours ici et p affecté à la classe » par cours
+                    if len(bools_prof) + len(conditionnels) > 1:
+                        for cours, affecte in conditionnels:
+                            occupe = model.NewBoolVar(f"occupe_{p.replace(' ', '_')}_{j}_{h}")
+                            model.AddBoolAnd([cours, affecte]).OnlyEnforceIf(occupe)
+                            model.AddBoolOr([cours.Not(), affecte.Not(), occupe])
+                            bools_prof.append(occupe)
+                    # Garantie qu'un prof n'est pas doublé sur le même créneau
+                    if len(bools_prof) > 1:
+                        model.AddAtMostOne(bools_prof)
+
+
+    # ─── Salles en deux phases : capacité agrégée par créneau (condition de Hall)
+    # Pour chaque ensemble S de salles valides d'une classe, les cours ayant besoin
+    # d'une salle générale et dont les salles valides sont incluses dans S sont au plus |S|
+    # (condition exacte pour des ensembles emboîtés par capacité ; sinon le couplage
+    # peut échouer et solve_et_verifie se replie sur le modèle complet)
+    if salles_deux_phases:
+        besoins = {niveau: matieres_a_salle_generale(niveau) for niveau in VOLUME_HORAIRE}
+        ensembles = {
+            classe: frozenset(s for s in salles_valides_par_classe[classe] if 0 < s <= NOMBRE_DE_SALLES)
+            for classe in CLASSES
+        }
+        for semaine in SEMAINES:
+            for j in range(len(JOURS)):
+                for h in range(len(HEURES)):
+                    cours_par_classe = {}
                     for classe in CLASSES:
-                        key = (classe, j, h)
-                        salle_var = emploi_du_temps_salles[semaine][key]
-                        b = model.NewBoolVar(f"{nom_salle}_{classe}_{j}_{h}_{semaine}_used")
-                        model.Add(salle_var == idx_salle).OnlyEnforceIf(b)
-                        model.Add(salle_var != idx_salle).OnlyEnforceIf(b.Not())
-                        bools_salle.append(b)
-                    model.Add(sum(bools_salle) <= 1)
+                        litteraux = [
+                            lit for m_idx, lit in est_matiere[semaine][(classe, j, h)].items()
+                            if m_idx > 0 and MATIERES[m_idx - 1] in besoins.get(classe[:2], ())
+                        ]
+                        if litteraux:
+                            cours_par_classe[classe] = litteraux
+                    for ensemble in {ensembles[classe] for classe in cours_par_classe}:
+                        demandes = [
+                            lit
+                            for classe, litteraux in cours_par_classe.items()
+                            if ensembles[classe] <= ensemble
+                            for lit in litteraux
+                        ]
+                        if len(demandes) > len(ensemble):
+                            model.Add(sum(demandes) <= len(ensemble))
 
+    else:
+        # ─── Contrainte : interdiction qu'une salle soit occupée par deux classes simultanément
+        for semaine in SEMAINES:
+            for j in range(len(JOURS)):
+                for h in range(len(HEURES)):
+                    for idx_salle, nom_salle in enumerate(SALLES_GENERALES, start=1):
+                        bools_salle = [
+                            est_salle[semaine][(classe, j, h)][idx_salle]
+                            for classe in CLASSES
+                            if idx_salle in est_salle[semaine][(classe, j, h)]
+                        ]
+                        if len(bools_salle) > 1:
+                            model.AddAtMostOne(bools_salle)
+            if SALLES_GENERALES:
+                enregistrer(
+                    "double_affectation_salles", 0, f"{semaine} : salle occupée deux fois",
+                    len(JOURS) * len(HEURES) * len(SALLES_GENERALES)
+                )
 
-    # ─── Contrainte : pas de cours les jours sans après-midi pour toutes les classes et sous-groupes
-    for semaine in SEMAINES:
-        for classe in CLASSES:
-            for j, jour in enumerate(JOURS):
-                if jour in JOURS_SANS_APRES_MIDI:
-                    # On bloque tous les créneaux d'après-midi (index ≥ 5)
-                    for h in range(5, len(HEURES)):
-                        model.Add(emploi_du_temps[semaine][(classe, j, h)] == 0) # Bloque systématiquement l'après-midi pour les jours désignés 
+
+    # ─── Pas de cours les jours sans après-midi : appliqué aux domaines (matieres_interdites_par_creneau)
 
 
     # ─── Contrainte : respecter le nombre maximal d'heures de chaque matière sur l'étendue journee/demi-journee
@@ -1004,15 +1979,13 @@ def creer_modele():
                     # Si étendue = journée entière
                     if etendue == "journee":
                         heures_cibles = list(range(len(HEURES)))
-                        vars_jour = []
-                        for h in heures_cibles:
-                            key = (classe, j, h)
-                            if key in emploi_du_temps[semaine]:
-                                v = model.NewBoolVar(f"{classe}_{semaine}_{j}_{h}_{matiere}_limit")
-                                model.Add(emploi_du_temps[semaine][key] == matiere_index).OnlyEnforceIf(v)
-                                model.Add(emploi_du_temps[semaine][key] != matiere_index).OnlyEnforceIf(v.Not())
-                                vars_jour.append(v)
+                        vars_jour = [
+                            x(semaine, classe, j, h, matiere_index)
+                            for h in heures_cibles
+                            if (classe, j, h) in emploi_du_temps[semaine]
+                        ]
                         model.Add(sum(vars_jour) <= max_heures) # Respect du maximum d'heures sur la journée
+                        enregistrer("max_heures_par_etendue", 0, f"{classe} - {jour} : {matiere} (max {max_heures})")
 
                     # Si étendue = demi-journée (matin et après-midi séparés)
                     elif etendue == "demi-journee":
@@ -1020,15 +1993,15 @@ def creer_modele():
                         apres = list(range(5, len(HEURES)))
 
                         for label, heures in [("matin", matin), ("apres", apres)]:
-                            vars_bloc = []
-                            for h in heures:
-                                key = (classe, j, h)
-                                if key in emploi_du_temps[semaine]:
-                                    v = model.NewBoolVar(f"{classe}_{semaine}_{j}_{label}_{h}_{matiere}_limit")
-                                    model.Add(emploi_du_temps[semaine][key] == matiere_index).OnlyEnforceIf(v)
-                                    model.Add(emploi_du_temps[semaine][key] != matiere_index).OnlyEnforceIf(v.Not())
-                                    vars_bloc.append(v)
+                            vars_bloc = [
+                                x(semaine, classe, j, h, matiere_index)
+                                for h in heures
+                                if (classe, j, h) in emploi_du_temps[semaine]
+                            ]
                             model.Add(sum(vars_bloc) <= max_heures) # Respect du maximum d'heures par demi-journée (matin/après-midi)
+                            enregistrer(
+                                "max_heures_par_etendue", 0, f"{classe} - {jour} ({label}) : {matiere} (max {max_heures})"
+                            )
 
 
     """
@@ -1052,93 +2025,6 @@ def creer_modele():
     """
 
     
-    # ─── Contrainte : équilibre d'affectation des profs sur les matières (deuxième passe pour certains profils)
-    # On cherche ici à répartir équitablement les heures entre tous les profs d’une même matière
-    for matiere, prof_ref in PROFESSEURS.items():
-        # a) Cas dict niveau → liste de profs (équité selon niveaux)
-        if isinstance(prof_ref, dict):
-            for niveau, liste_profs in prof_ref.items():
-                if isinstance(liste_profs, list) and len(liste_profs) > 1:
-                    # Création de compteurs "counts[p]" pour chaque prof
-                    counts = []
-                    for prof in liste_profs:
-                        var_count = model.NewIntVar(
-                            0,
-                            len(CLASSES) * len(JOURS) * len(HEURES),
-                            f"nb_{matiere}_{niveau}_{prof.replace(' ', '_')}"
-                        )
-                        counts.append(var_count)
-
-                    # Pour chaque prof p, calcul des occurrences selon les variables d'index
-                    for i, prof in enumerate(liste_profs):
-                        occurrences = []
-                        for semaine in SEMAINES:
-                            for classe in CLASSES:
-                                if not classe.startswith(niveau):
-                                    continue
-                                for j in range(len(JOURS)):
-                                    for h in range(len(HEURES)):
-                                        key_prof = (classe, j, h, matiere, semaine)
-                                        if key_prof in emploi_du_temps_profs[semaine]:
-                                            b = model.NewBoolVar(
-                                                f"occur_{matiere}_{niveau}_{classe}_{j}_{h}_{prof.replace(' ', '_')}_{semaine.replace(' ', '_')}"
-                                            )
-                                            model.Add(
-                                                emploi_du_temps_profs[semaine][key_prof] == i
-                                            ).OnlyEnforceIf(b)
-                                            model.Add(
-                                                emploi_du_temps_profs[semaine][key_prof] != i
-                                            ).OnlyEnforceIf(b.Not())
-                                            occurrences.append(b)
-                        model.Add(counts[i] == sum(occurrences)) # On associe chaque compteur à la somme des présences de p pour cette matière
-
-                    # Contrainte d'équité
-                    # Garantit que la charge horaire est équilibrée entre tous les profs listés
-                    for a in range(len(liste_profs)):
-                        for b in range(a + 1, len(liste_profs)):
-                            model.Add(counts[a] - counts[b] <= 1)
-                            model.Add(counts[b] - counts[a] <= 1)
-
-        # b) Cas liste globale de profs
-        elif isinstance(prof_ref, list) and len(prof_ref) > 1:
-            counts = []
-            for prof in prof_ref:
-                var_count = model.NewIntVar(
-                    0,
-                    len(CLASSES) * len(JOURS) * len(HEURES),
-                    f"nb_{matiere}_{prof.replace(' ', '_')}"
-                )
-                counts.append(var_count)
-
-            for i, prof in enumerate(prof_ref):
-                occurrences = []
-                for semaine in SEMAINES:
-                    for classe in CLASSES:
-                        niveau = classe[:2]
-                        if matiere not in VOLUME_HORAIRE.get(niveau, {}):
-                            continue
-                        for j in range(len(JOURS)):
-                            for h in range(len(HEURES)):
-                                key_prof = (classe, j, h, matiere, semaine)
-                                if key_prof in emploi_du_temps_profs[semaine]:
-                                    b = model.NewBoolVar(
-                                        f"occur_{matiere}_{classe}_{j}_{h}_{prof.replace(' ', '_')}_{semaine.replace(' ', '_')}"
-                                    )
-                                    model.Add(
-                                        emploi_du_temps_profs[semaine][key_prof] == i
-                                    ).OnlyEnforceIf(b)
-                                    model.Add(
-                                        emploi_du_temps_profs[semaine][key_prof] != i
-                                    ).OnlyEnforceIf(b.Not())
-                                    occurrences.append(b)
-                model.Add(counts[i] == sum(occurrences)) # Même principe de comptage pour une liste plate de profs
-
-            # Egalisation de la distribution des cours pour tous les profs de la liste
-            for a in range(len(prof_ref)):
-                for b in range(a + 1, len(prof_ref)):
-                    model.Add(counts[a] - counts[b] <= 1)
-                    model.Add(counts[b] - counts[a] <= 1)
-
     # ─── Contrainte : les sous-groupes ne doivent pas chevaucher leur classe principale
     # On interdit aux sous-groupes LV/option d’avoir cours en même temps que la classe de base
     for semaine in SEMAINES:
@@ -1152,16 +2038,11 @@ def creer_modele():
 
             for j in range(len(JOURS)):
                 for h in range(len(HEURES)):
-                    var_sg = emploi_du_temps[semaine][(sous_groupe, j, h)]
-                    var_cp = emploi_du_temps[semaine][(classe_base, j, h)]
-
-                    # Bool pour « le sous-groupe a cours ici »
-                    sg_has_cours = model.NewBoolVar(f"{sous_groupe}_has_cours_{j}_{h}_{semaine}")
-                    model.Add(var_sg != 0).OnlyEnforceIf(sg_has_cours)
-                    model.Add(var_sg == 0).OnlyEnforceIf(sg_has_cours.Not())
+                    # « le sous-groupe a cours ici » = négation de son littéral « pas de cours »
+                    sg_has_cours = x(semaine, sous_groupe, j, h, 0).Not()
 
                     # interdiction : si le sous-groupe a cours, la classe principale doit être vide
-                    model.Add(var_cp == 0).OnlyEnforceIf(sg_has_cours)
+                    model.AddImplication(sg_has_cours, x(semaine, classe_base, j, h, 0))
 
 
     # ─── Contrainte : deux sous-groupes LV/options d’une même classe ne peuvent pas se chevaucher,
@@ -1188,46 +2069,34 @@ def creer_modele():
             # sinon on interdit tout chevauchement entre **tous** ces sous-groupes
             for j in range(len(JOURS)):
                 for h in range(len(HEURES)):
-                    bools_sg = []
-                    for sfx, grp in sg_entries:
-                        key = (grp, j, h)
-                        b = model.NewBoolVar(f"{grp}_no_overlap_{j}_{h}_{semaine}")
-                        model.Add(emploi_du_temps[semaine][key] != 0).OnlyEnforceIf(b)
-                        model.Add(emploi_du_temps[semaine][key] == 0).OnlyEnforceIf(b.Not())
-                        bools_sg.append(b)
-                    model.Add(sum(bools_sg) <= 1) # Assure qu’au plus un sous-groupe en option/LV est actif par créneau
-
-        # ─── Contrainte : synchronisation des LV entre classes dépendantes ───────────
-        # Tous les sous-groupes LV listés doivent démarrer et finir leurs cours simultanément
-        for semaine in SEMAINES:
-            for mat_sg, cfg in SOUS_GROUPES_CONFIG.items():
-                # Ne traiter que les LV
-                if cfg.get("type") != "LV":
-                    continue
+                    bools_sg = [x(semaine, grp, j, h, 0).Not() for sfx, grp in sg_entries]
+                    model.AddAtMostOne(bools_sg) # Assure qu’au plus un sous-groupe en option/LV est actif par créneau
 
-                suffixe     = cfg["suffixe"]
-                dependants  = cfg.get("groupes_dependants", [])
-                # Il faut au moins deux classes pour synchroniser
-                if len(dependants) < 2:
-                    continue
+    # ─── Contrainte : synchronisation des LV entre classes dépendantes ───────────
+    # Tous les sous-groupes LV listés doivent démarrer et finir leurs cours simultanément
+    for semaine in SEMAINES:
+        for mat_sg, cfg in SOUS_GROUPES_CONFIG.items():
+            # Ne traiter que les LV
+            if cfg.get("type") != "LV":
+                continue
 
-                # Construire la liste des noms complets de sous-groupes (ex. "5e1_esp", "5e2_esp")
-                lv_groupes = [cl_base + suffixe for cl_base in dependants]
-                mat_index  = MATIERES.index(mat_sg) + 1
+            suffixe     = cfg["suffixe"]
+            dependants  = cfg.get("groupes_dependants", [])
+            # Il faut au moins deux classes pour synchroniser
+            if len(dependants) < 2:
+                continue
 
-                for j in range(len(JOURS)):
-                    for h in range(len(HEURES)):
-                        bools = []
-                        for grp in lv_groupes:
-                            # BoolVar = 1 si ce groupe a cours de cette LV à (j,h)
-                            b = model.NewBoolVar(f"sync_{mat_sg}_{grp}_{j}_{h}_{semaine}")
-                            model.Add(emploi_du_temps[semaine][(grp, j, h)] == mat_index).OnlyEnforceIf(b)
-                            model.Add(emploi_du_temps[semaine][(grp, j, h)] != mat_index).OnlyEnforceIf(b.Not())
-                            bools.append(b)
-                        # Imposer que tous ces booléens soient égaux deux à deux (tous ou aucun)
-                        for i in range(len(bools)):
-                            for k in range(i+1, len(bools)):
-                                model.Add(bools[i] == bools[k])
+            # Construire la liste des noms complets de sous-groupes (ex. "5e1_esp", "5e2_esp")
+            lv_groupes = [cl_base + suffixe for cl_base in dependants]
+            mat_index  = MATIERES.index(mat_sg) + 1
+
+            for j in range(len(JOURS)):
+                for h in range(len(HEURES)):
+                    # BoolVar = 1 si ce groupe a cours de cette LV à (j,h)
+                    bools = [x(semaine, grp, j, h, mat_index) for grp in lv_groupes]
+                    # Tous ou aucun : chaque booléen suit celui du premier groupe (meneur)
+                    for b in bools[1:]:
+                        model.Add(b == bools[0])
 
 
     # Minimiser les heures de permanence
@@ -1244,51 +2113,80 @@ def creer_modele():
             for j, jour in enumerate(JOURS):
                 # On évite la première et la dernière heure de la journée
                 for h in range(1, len(HEURES) - 1):
-                    permanence = model.NewBoolVar(
-                        f"permanence_{classe}_{jour}_{h}_{semaine.replace(' ', '_')}"
-                    )
                     # Si la variable d’emploi du temps vaut 0 à ce créneau, c’est une permanence
-                    model.Add(emploi_du_temps[semaine][(classe, j, h)] == 0).OnlyEnforceIf(permanence)
-                    model.Add(emploi_du_temps[semaine][(classe, j, h)] != 0).OnlyEnforceIf(permanence.Not())
-                    permanence_vars.append(permanence)
+                    permanence_vars.append(x(semaine, classe, j, h, 0))
 
     model.Add(total_permanence == sum(permanence_vars))
     # Objectif partiel : réduire au maximum les permanences inutiles
 
-    # ─── Contraintes d'indisponibilité pour tous les professeurs
-    # On applique les indisponibilités listées dans la config pour bloquer les cours
-    for prof, indispos in INDISPONIBILITES_PROFS.items():
-        for jour_str, heures in indispos.items():
-            if jour_str not in JOURS:
-                continue
-            jour_index = JOURS.index(jour_str)
+    # Capacité de la salle de permanence, contrôlée sur les mêmes littéraux « pas de cours » :
+    # une classe est libre quand ni elle ni ses sous-groupes n'ont cours
+    capacite_perm = config.get("permanence", {}).get("capacite", 0)
+    if capacite_perm > 0:
+        cant_cfg = config.get("cantine", {})
+        ratio = cant_cfg.get("proportion_demi_pensionnaire", 1.0)
+        total_eleves = sum(int(CAPACITES_CLASSES.get(cl, 0) * ratio) for cl in CLASSES_BASE)
+        if total_eleves > cant_cfg.get("capacite", 0):
+            # Capacité de cantine insuffisante : tous les créneaux déjeuner sont ignorés
+            ignores = {HEURES.index(c) for c in cant_cfg.get("creneaux_dejeuner", ["12h-13h"]) if c in HEURES}
+        else:
+            ignores = {h_dej}
+        for semaine in SEMAINES:
+            for j, jour in enumerate(JOURS):
+                for h in range(1, len(HEURES) - 1):
+                    if h in ignores or (jour in JOURS_SANS_APRES_MIDI and h > h_dej):
+                        continue
+                    libres = []  # (capacité, contrôle « classe libre »)
+                    for cl in CLASSES_BASE:
+                        groupes = [cl] + [f"{cl}{sfx}" for sfx in SOUS_GROUPES_SUFFIXES if f"{cl}{sfx}" in CLASSES]
+                        vides = [(1, x(semaine, grp, j, h, 0)) for grp in groupes]
+                        libre = vides[0][1] if len(vides) == 1 else (vides, len(vides) - 1)
+                        libres.append((CAPACITES_CLASSES.get(cl, 0), libre))
+                    enregistrer(
+                        "permanence", ([(capacite, libre) for capacite, libre in libres], capacite_perm),
+                        f"{semaine} - {jour} {HEURES[h]} : plus de {capacite_perm} élèves en perm",
+                        nb_controles=([(1, libre) for _, libre in libres], 0)
+                    )
 
-            for classe in CLASSES:
-                niveau_classe = classe[:2]
-                # Vérifier si ce prof enseigne cette matière pour le niveau
-                for matiere, prof_ref in PROFESSEURS.items():
-                    est_concerne = False
-                    if isinstance(prof_ref, str):
-                        est_concerne = (prof_ref == prof)
-                    elif isinstance(prof_ref, dict):
-                        profs_niv = prof_ref.get(niveau_classe)
-                        if isinstance(profs_niv, str):
-                            est_concerne = (profs_niv == prof)
-                        elif isinstance(profs_niv, list):
-                            est_concerne = (prof in profs_niv)
+    # Volume maximal par prof : heures par semaine des classes de base dont il est le
+    # prof référent (premier prof possible, comme verifier_volume_par_professeur)
+    for prof, volume_max in config.get("volume_par_professeur", {}).items():
+        for semaine in SEMAINES:
+            cours_prof = [
+                (1, x(semaine, cl, j, h, m_idx))
+                for cl in CLASSES_BASE
+                for m_idx, matiere in enumerate(MATIERES, start=1)
+                if prof_du_creneau(matiere, cl[:2], -1) == prof
+                for j in range(len(JOURS))
+                for h in range(len(HEURES))
+                if m_idx in est_matiere[semaine][(cl, j, h)]
+            ]
+            enregistrer(
+                "volume_par_professeur", (cours_prof, volume_max),
+                f"{prof} a plus de {volume_max} cours en {semaine}"
+            )
 
-                    if not est_concerne:
+    # Préférences de salle : chaque cours d'un prof qui en a une est un contrôle,
+    # respecté si sa salle (AFFECTATION_MATIERE_SALLE) est la salle préférée
+    for semaine in SEMAINES:
+        for (classe, j, h), matieres_creneau in est_matiere[semaine].items():
+            for m_idx in matieres_creneau:
+                if m_idx == 0:
+                    continue
+                matiere = MATIERES[m_idx - 1]
+                for prof in profs_possibles(matiere, classe[:2]):
+                    salle_preferee = PREFERENCES_SALLE_PROF.get(prof)
+                    if salle_preferee is None:
                         continue
+                    salle = AFFECTATION_MATIERE_SALLE.get(prof)
+                    controle = enseigne(semaine, classe, j, h, matiere, prof)
+                    enregistrer(
+                        "preferences_salle_professeur", 0 if salle == salle_preferee else controle,
+                        f"{classe} - {semaine} - {JOURS[j]} {HEURES[h]} : {prof} en {salle} (préféré : {salle_preferee})",
+                        nb_controles=controle
+                    )
 
-                    matiere_index = MATIERES.index(matiere) + 1
-
-                    # Pour chaque créneau interdit, on bloque l'affectation de la matière
-                    for heure in heures:
-                        clé = (classe, jour_index, heure)
-                        for semaine in SEMAINES:
-                            if clé in emploi_du_temps[semaine]:
-                                model.Add(emploi_du_temps[semaine][clé] != matiere_index)
-                                # On interdit la matière sur les heures non disponibles
+    # ─── Indisponibilités des professeurs : appliquées aux domaines (matieres_interdites_par_creneau)
 
     # ─── Contraintes de pénalités de préférence pour profs hors créneau préféré
     penalites_preferences = []
@@ -1321,84 +2219,22 @@ def creer_modele():
                         for semaine in SEMAINES:
                             if key not in emploi_du_temps[semaine]:
                                 continue
-                            violation = model.NewBoolVar(
-                                f"pref_violation_{prof.replace(' ', '_')}_{classe}_{jour_index}_{h}_{semaine}"
+                            # La violation est exactement le littéral « matière présente ici »
+                            penalites_preferences.append(x(semaine, classe, jour_index, h, mat_idx))
+                            enregistrer(
+                                "preferences_profs", penalites_preferences[-1],
+                                f"{classe} - {semaine} - {jour_str} {HEURES[h]} : "
+                                f"{matiere} hors des préférences de {prof}"
                             )
-                            model.Add(emploi_du_temps[semaine][key] == mat_idx).OnlyEnforceIf(violation)
-                            model.Add(emploi_du_temps[semaine][key] != mat_idx).OnlyEnforceIf(violation.Not())
-                            penalites_preferences.append(violation)
 
 
     poids_pref = 1  # Pondération assignée aux pénalités de préférence dans la fonction objectif
 
-    # ─── Contraintes d'indisponibilité de salles (incl. salles spécialisées)
-    matieres_specialisees = set(AFFECTATION_MATIERE_SALLE.keys())
-    matieres_generales   = set(MATIERES) - matieres_specialisees
-
-    for salle, indispos in INDISPONIBILITES_SALLES.items():
-        # Déterminer quelles matières peuvent être données dans cette salle
-        if salle in AFFECTATION_MATIERE_SALLE.values():
-            # Salle spécialisée : seules les matières assignées à cette salle
-            matieres_concernees = [
-                m for m, s in AFFECTATION_MATIERE_SALLE.items()
-                if s == salle
-            ]
-        else:
-            # Salle générale : toutes les matières non spécialisées
-            matieres_concernees = list(matieres_generales)
-
-        for jour_str, heures in indispos.items():
-            jour_index = JOURS.index(jour_str)
-            for classe in CLASSES + [c for c in CAPACITES_CLASSES if c not in CLASSES]:
-                niveau_classe = classe[:2]
-                for matiere in matieres_concernees:
-                    # Si la matière n'est pas enseignée à ce niveau, on skip
-                    if niveau_classe not in VOLUME_HORAIRE or matiere not in VOLUME_HORAIRE[niveau_classe]:
-                        continue
-                    matiere_index = MATIERES.index(matiere) + 1
-                    for h in heures:
-                        cle = (classe, jour_index, h)
-                        for semaine in SEMAINES:
-                            if cle in emploi_du_temps[semaine]:
-                                model.Add(emploi_du_temps[semaine][cle] != matiere_index)
+    # ─── Indisponibilités des salles : appliquées aux domaines (matieres_interdites_par_creneau)
 
 
     # ─── Attribution des salles en fonction des capacités (inclus salles spécialisées)
-    for semaine in SEMAINES:
-        for classe in CLASSES:
-            # On détermine la classe de base si c'est un sous-groupe
-            classe_base = classe
-            for suffixe in SOUS_GROUPES_SUFFIXES:
-                if classe.endswith(suffixe):
-                    classe_base = classe.replace(suffixe, "")
-                    break
-
-            capacite_classe = CAPACITES_CLASSES.get(classe_base, 0)
-            for j in range(len(JOURS)):
-                for h in range(len(HEURES)):
-                    salle_var = emploi_du_temps_salles[semaine][(classe, j, h)]
-                    # Sélection des salles valides par capacité
-                    salles_valides = [
-                        i
-                        for i, nom in enumerate(SALLES_GENERALES, 1)
-                        if CAPACITES_SALLES.get(nom, 0) >= capacite_classe
-                    ]
-                    # On ajoute aussi les salles spécialisées suffisantes
-                    for nom_salle, cap in CAPACITES_SALLES.items():
-                        if nom_salle not in SALLES_GENERALES and cap >= capacite_classe:
-                            if nom_salle in AFFECTATION_MATIERE_SALLE.values():
-                                try:
-                                    index = SALLES_GENERALES.index(nom_salle) + 1
-                                except ValueError:
-                                    # Salle spécialisée non listée dans SALLES_GENERALES
-                                    continue
-                                salles_valides.append(index)
-                    if not salles_valides:
-                        # Si aucune salle dispos, on force la variable à 0 (pas de cours)
-                        model.Add(salle_var == 0)
-                    else:
-                        # On autorise soit 0 (pas de cours) soit l'une des salles_valides
-                        model.AddAllowedAssignments([salle_var], [[0]] + [[i] for i in salles_valides])
+    # Déjà garantie par le domaine des variables de salle (salles_valides_par_classe).
 
     # Respecter le volume horaire global bihebdo par classe et sous-groupe
     for niveau in ["6e", "5e", "4e", "3e"]:
@@ -1424,160 +2260,39 @@ def creer_modele():
             niveau_classe = classe.split("e")[0] + "e"
         else:
             niveau_classe = classe[:2]
-
-        # Déterminer la/les matières disponibles pour cette classe
-        for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
-            if suffixe in classe:
-                matieres_disponibles = [mat_sg]
-                break
-        # Si pas de suffixe, on prend toutes les matières du niveau
-        else:
-            matieres_disponibles = [
-                m for m in VOLUME_HORAIRE[niveau_classe]
-                if m not in SOUS_GROUPES_SUFFIXES.values()
-            ]
-
-        # On parcourt les matières disponibles pour ce niveau
-        for semaine in SEMAINES:
-            for matiere in matieres_disponibles:
-                # Si la matière n'existe pas dans le bihebdo pour ce niveau, on skip
-                if matiere not in VOLUME_HORAIRE_BIHEBDO.get(niveau_classe, {}):
-                    continue
-
-                occurrences = []
-                for j in range(len(JOURS)):
-                    for h in range(len(HEURES)):
-                        # On évite la pause déjeuner (h == 4) et le mercredi après-midi
-                        if h == 4 or (JOURS[j] in JOURS_SANS_APRES_MIDI and h > 4):
-                            continue
-                        var = model.NewBoolVar(f"{classe}_{j}_{h}_{matiere}_{semaine}")
-                        mat_idx = MATIERES.index(matiere) + 1
-                        emploi = emploi_du_temps[semaine][(classe, j, h)]
-                        model.Add(emploi == mat_idx).OnlyEnforceIf(var)
-                        model.Add(emploi != mat_idx).OnlyEnforceIf(var.Not())
-                        occurrences.append(var)
-
-                # Volume cible pour ce niveau/matière/semaine
-                volume_cible = VOLUME_HORAIRE_BIHEBDO[niveau_classe][matiere][semaine]
-                # On impose que la somme des BoolVar = volume cible
-                model.Add(sum(occurrences) == volume_cible)
-
-    # ─── Contrainte : exclusion de matières
-    def matExcluSuite(pMatiere1, pMatiere2, pContrainte="forte", pClasses=CLASSES_BASE):
-        """
-        Contrainte d'exclusion : la matière pMatiere2 ne peut pas suivre immédiatement
-        pMatiere1 pour les classes spécifiées.
-
-        Arguments:
-            pMatiere1 (str): nom de la matière à exclure en premier.
-            pMatiere2 (str): nom de la matière à exclure en second.
-            pContrainte (str): "forte" ou "faible" pour le type de contrainte.
-            pClasses (list ou str): liste de classes ou préfixe de classe.
-        """
-        matdex_1 = MATIERES.index(pMatiere1) + 1
-        matdex_2 = MATIERES.index(pMatiere2) + 1
-        print("-- Exclusion : " +
-              "/" + pMatiere1 + "\\" +
-              " suivi de " +
-              "/" + pMatiere2 + "\\")
-
-        # Sélection des classes à traiter
-        if pClasses != CLASSES_BASE:
-            choixClasse = [c for c in CLASSES_BASE if pClasses in c]
-        else:
-            choixClasse = pClasses
-
-        # Pour chaque semaine, on applique la contrainte sur les bons IntVar
-        for semaine in SEMAINES:
-            for classe in choixClasse:
-                for j in range(len(JOURS)):
-                    for h in range(len(HEURES) - 1):
-                        excluSuite_a = model.NewBoolVar(f"{classe}_{j}_{h}_excluA_{semaine}")
-                        excluSuite_b = model.NewBoolVar(f"{classe}_{j}_{h+1}_excluB_{semaine}")
-
-                        # On pointe maintenant explicitement sur emploi_du_temps[semaine]
-                        varA = emploi_du_temps[semaine][(classe, j, h)]
-                        varB = emploi_du_temps[semaine][(classe, j, h+1)]
-
-                        model.Add(varA == matdex_1).OnlyEnforceIf(excluSuite_a)
-                        model.Add(varA != matdex_1).OnlyEnforceIf(excluSuite_a.Not())
-                        model.Add(varB == matdex_2).OnlyEnforceIf(excluSuite_b)
-                        model.Add(varB != matdex_2).OnlyEnforceIf(excluSuite_b.Not())
-
-                        if pContrainte == "faible":
-                            model.AddBoolOr([excluSuite_a.Not(), excluSuite_b.Not()])
-                        elif pContrainte == "forte":
-                            model.AddImplication(excluSuite_a, excluSuite_b.Not())
-
-    # ─── Contrainte : inclusion de matières
-    def matIncluSuite(pMatiere1, pMatiere2, pContrainte, pNBFois=1, pClasses=CLASSES_BASE):
-        """
-        Contrainte d'inclusion : pMatiere1 doit être suivi immédiatement par pMatiere2 un
-        certain nombre de fois (défini par pNBFois) selon la force de contrainte.
-
-        Arguments:
-            pMatiere1 (str): matière de départ.
-            pMatiere2 (str): matière d'arrivée.
-            pContrainte (str): "forte", "moyenne" ou "faible".
-            pNBFois (int): nombre minimal/maximum d'occurrences selon pContrainte.
-            pClasses (list ou str): classes concernées ou préfixe.
-        """
-        matdex_1 = MATIERES.index(pMatiere1) + 1
-        matdex_2 = MATIERES.index(pMatiere2) + 1
-        print("-- Inclusion : " + "/" + pMatiere1 + "\\" + " suivi de " + "/" + pMatiere2 + "\\")
-
-        # Sélection des classes visées
-        if pClasses != CLASSES_BASE:
-            choixClasse = [c for c in CLASSES_BASE if pClasses in c]
+
+        # Déterminer la/les matières disponibles pour cette classe
+        for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
+            if suffixe in classe:
+                matieres_disponibles = [mat_sg]
+                break
+        # Si pas de suffixe, on prend toutes les matières du niveau
         else:
-            choixClasse = pClasses
+            matieres_disponibles = [
+                m for m in VOLUME_HORAIRE[niveau_classe]
+                if m not in SOUS_GROUPES_SUFFIXES.values()
+            ]
 
-        # Pour chaque semaine, on applique la contrainte sur les bons IntVar
+        # On parcourt les matières disponibles pour ce niveau
         for semaine in SEMAINES:
-            for classe in choixClasse:
-                sequence_Suivi = []
+            for matiere in matieres_disponibles:
+                # Si la matière n'existe pas dans le bihebdo pour ce niveau, on skip
+                if matiere not in VOLUME_HORAIRE_BIHEBDO.get(niveau_classe, {}):
+                    continue
 
+                occurrences = []
                 for j in range(len(JOURS)):
-                    for h in range(len(HEURES) - 1):
-                        # Booléen qui vaudra 1 si on a pMatiere1 à (j,h) ET pMatiere2 à (j,h+1)
-                        suivi_var = model.NewBoolVar(f"{classe}_{j}_{h}_suivi_{pMatiere1}_{pMatiere2}_{semaine}")
-
-                        # On crée deux BoolVar pour détecter la présence exacte de chaque matière
-                        var_mat1 = model.NewBoolVar(f"{classe}_{j}_{h}_est_{pMatiere1}_{semaine}")
-                        var_mat2 = model.NewBoolVar(f"{classe}_{j}_{h+1}_est_{pMatiere2}_{semaine}")
-
-                        varA = emploi_du_temps[semaine][(classe, j, h)]
-                        varB = emploi_du_temps[semaine][(classe, j, h + 1)]
-
-                        # Si varA == matdex_1 alors var_mat1 = 1, sinon var_mat1 = 0
-                        model.Add(varA == matdex_1).OnlyEnforceIf(var_mat1)
-                        model.Add(varA != matdex_1).OnlyEnforceIf(var_mat1.Not())
-
-                        # Si varB == matdex_2 alors var_mat2 = 1, sinon var_mat2 = 0
-                        model.Add(varB == matdex_2).OnlyEnforceIf(var_mat2)
-                        model.Add(varB != matdex_2).OnlyEnforceIf(var_mat2.Not())
-
-                        # suivi_var = var_mat1 AND var_mat2
-                        model.AddBoolAnd([var_mat1, var_mat2]).OnlyEnforceIf(suivi_var)
-                        model.AddBoolOr([var_mat1.Not(), var_mat2.Not()]).OnlyEnforceIf(suivi_var.Not())
-
-                        sequence_Suivi.append(suivi_var)
-
-                        # Si contrainte forte, on force systématiquement le suivi mat1 → mat2
-                        if pContrainte == "forte":
-                            model.AddImplication(var_mat1, var_mat2)
-
-                # Pour contrainte « moyenne », on exige au moins pNBFois suivis mat1→mat2 sur TOUTE la semaine
-                if pContrainte == "moyenne":
-                    model.Add(sum(sequence_Suivi) >= pNBFois)
-                # Pour contrainte « faible », on impose au plus pNBFois
-                elif pContrainte == "faible":
-                    model.Add(sum(sequence_Suivi) <= pNBFois)
-
-
-    #matIncluSuite("Français", "SVT", "moyenne", 1, "6e")
-
+                    for h in range(len(HEURES)):
+                        # On évite la pause déjeuner (h == 4) et le mercredi après-midi
+                        if h == 4 or (JOURS[j] in JOURS_SANS_APRES_MIDI and h > 4):
+                            continue
+                        mat_idx = MATIERES.index(matiere) + 1
+                        occurrences.append(x(semaine, classe, j, h, mat_idx))
 
+                # Volume cible pour ce niveau/matière/semaine
+                volume_cible = VOLUME_HORAIRE_BIHEBDO[niveau_classe][matiere][semaine]
+                # On impose que la somme des BoolVar = volume cible
+                model.Add(sum(occurrences) == volume_cible)
 
     ### Même Niveau, Même cours
     # /!\ Déactiver Contrainte lignes 162 à 178 pour que cela marche.
@@ -1616,15 +2331,16 @@ def creer_modele():
 
             for j in range(len(JOURS)):
                 for h in range(len(HEURES)):
-                    var = model.NewBoolVar(f"{pMatiere}_{pNiveau}_{semaine}_{j}_{h}")
-                    # Si TOUTES les classes du niveau ont pMatiere à (j,h), alors var = 1
-                    for classe in choixClasse:
-                        model.Add(emploi_du_temps[semaine][(classe, j, h)] == matdex_p).OnlyEnforceIf(var)
-                        model.Add(emploi_du_temps[semaine][(classe, j, h)] != matdex_p).OnlyEnforceIf(var.Not())
+                    # Le littéral de la première classe sert de référence : toutes les
+                    # classes du niveau ont pMatiere à (j,h), ou aucune
+                    var = x(semaine, choixClasse[0], j, h, matdex_p)
+                    for classe in choixClasse[1:]:
+                        model.Add(x(semaine, classe, j, h, matdex_p) == var)
                     positionMatiere.append(var)
 
             # On impose que la somme de tous ces indicateurs vaut exactement le volume entier
             model.Add(sum(positionMatiere) == volume_cible)
+            enregistrer("mem_niveau_cours", 0, f"{semaine} : {pMatiere} non aligné en {pNiveau}")
 
     # ─── Activation dynamique de la contrainte “Même Niveau, Même Cours”
     for entry in config.get("memnivmemcours", []):
@@ -1652,17 +2368,13 @@ def creer_modele():
                             continue
 
                         # sinon, on impose qu'au plus 1 classe du niveau ait cette matière
-                        bools_matiere = []
-                        for cl in classes_niveau:
-                            b = model.NewBoolVar(
-                                f"{cl}_{semaine}_{j}_{h}_is_{mat.replace(' ', '_')}"
-                            )
-                            var_mat = emploi_du_temps[semaine][(cl, j, h)]
-                            model.Add(var_mat == m_idx).OnlyEnforceIf(b)
-                            model.Add(var_mat != m_idx).OnlyEnforceIf(b.Not())
-                            bools_matiere.append(b)
-
-                        model.Add(sum(bools_matiere) <= 1) # Au plus une classe du niveau a cette matière à ce créneau
+                        bools_matiere = [
+                            est_matiere[semaine][(cl, j, h)][m_idx]
+                            for cl in classes_niveau
+                            if m_idx in est_matiere[semaine][(cl, j, h)]
+                        ]
+                        if len(bools_matiere) > 1:
+                            model.AddAtMostOne(bools_matiere) # Au plus une classe du niveau a cette matière à ce créneau
 
 
 
@@ -1741,23 +2453,27 @@ def creer_modele():
                     matdex_h = MATIERES.index(mat) + 1
                     # Si on veut une seule heure fixe
                     if HORAIRE_MAX is None:
-                        h = Hordex_Min
-                        var = model.NewBoolVar(f"{classe}_{semaine}_{jourdex_h}_{h}_matiere_horaire")
-                        model.Add(emploi_du_temps[semaine][(classe, jourdex_h, h)] == matdex_h).OnlyEnforceIf(var)
-                        model.Add(emploi_du_temps[semaine][(classe, jourdex_h, h)] != matdex_h).OnlyEnforceIf(var.Not())
-                        occMatHorair.append(var)
+                        occMatHorair.append(x(semaine, classe, jourdex_h, Hordex_Min, matdex_h))
                     else:
                         # Si on a un intervalle [Hordex_Min..Hordex_Max]
                         for h in range(Hordex_Min, Hordex_Max + 1):
-                            var = model.NewBoolVar(f"{classe}_{semaine}_{jourdex_h}_{h}_matiere_horaire")
-                            model.Add(emploi_du_temps[semaine][(classe, jourdex_h, h)] == matdex_h).OnlyEnforceIf(var)
-                            model.Add(emploi_du_temps[semaine][(classe, jourdex_h, h)] != matdex_h).OnlyEnforceIf(var.Not())
-                            occMatHorair.append(var)
+                            occMatHorair.append(x(semaine, classe, jourdex_h, h, matdex_h))
 
                 # Imposer le nombre d'occurrences pour cette semaine
                 model.Add(sum(occMatHorair) == nbFois) # Nombre exact de fois que la matière doit apparaître
+                if horaires_enregistres:
+                    enregistrer(
+                        "mat_horaire_donne_v2", 0,
+                        f"{classe} - {pJour} ({HORAIRE_MIN}-{HORAIRE_MAX or HORAIRE_MIN}) : attendu {nbFois}"
+                    )
 
     #matHorairDonneV2("6e", MATIERES_SCIENTIFIQUE, "Jeudi", "13h", "17h", 2)
+    # Une clé de sous-groupe désigne d'autres matières pour verifier_matHorairDonneV2 :
+    # la catégorie reste alors vérifiée a posteriori
+    horaires_enregistres = not any(
+        isinstance(entry["matiere"], str) and entry["matiere"] in MATIERES_SOUSGROUPES
+        for entry in config.get("mat_horaire_donne_v2", [])
+    )
     for entry in config.get("mat_horaire_donne_v2", []):
         pClasses    = entry["classes"]                            # ex. "6e"                   
         # On récupère la liste réelle de matières via le sous-groupe
@@ -1769,503 +2485,912 @@ def creer_modele():
 
         matHorairDonneV2(pClasses, pMatiere, pJour, pHorairMin, pHorairMax, pNBFois)
 
-    mat_exclu_entries = config.get("mat_exclu_suite", []) # Liste des exclusions de matières
-    mat_inclu_entries = config.get("mat_inclu_suite", []) # Liste des inclusions de matières
-
-    # (2) Boucle pour appeler matExcluSuite() selon la configuration JSON
-    for entry in mat_exclu_entries:
-        mat1 = entry["matiere1"]
-        mat2 = entry["matiere2"]
-        contrainte = entry.get("contrainte", "forte")
-        classes_cible = entry.get("classes", "CLASSES_BASE")
-
-        # Si classes_cible == "CLASSES_BASE", on envoie la liste python CLASSES_BASE
-        if isinstance(classes_cible, str) and classes_cible == "CLASSES_BASE":
-            matExcluSuite(mat1, mat2, contrainte, CLASSES_BASE)
-        else:
-            # Sinon, classes_cible peut être un préfixe (ex. "6e") ou une liste de classes
-            matExcluSuite(mat1, mat2, contrainte, classes_cible)
+    # ─── Contraintes : suites de matières (exclusion / inclusion)
+    def classes_visees(pClasses):
+        """Classes de base visées par une règle : "CLASSES_BASE", liste ou préfixe."""
+        if pClasses == "CLASSES_BASE":
+            return list(CLASSES_BASE)
+        if isinstance(pClasses, list):
+            return [c for c in CLASSES_BASE if c in pClasses]
+        return [c for c in CLASSES_BASE if pClasses in c]
+
+    # Exclusions et inclusions fortes d'une classe : un seul automate par semaine
+    regles_suites = defaultdict(lambda: ([], []))  # classe → (exclusions, suites forcées)
+    for entry in filter(exclusion_imposee, config.get("mat_exclu_suite", [])):
+        mat1, mat2 = entry["matiere1"], entry["matiere2"]
+        for classe in classes_visees(entry.get("classes", "CLASSES_BASE")):
+            regles_suites[classe][0].append((MATIERES.index(mat1) + 1, MATIERES.index(mat2) + 1))
+            for semaine in SEMAINES:
+                enregistrer(
+                    "mat_exclu_suite", 0, f"{classe} - {semaine} : {mat1} → {mat2}",
+                    len(JOURS) * (len(HEURES) - 1)
+                )
 
-    # (3) Boucle pour appeler matIncluSuite() selon la configuration JSON
-    for entry in mat_inclu_entries:
-        mat1 = entry["matiere1"]
-        mat2 = entry["matiere2"]
+    # Inclusions comptées (« moyenne » : au moins nb_fois, « faible » : au plus) :
+    # somme de littéraux de suite sur la semaine
+    for entry in config.get("mat_inclu_suite", []):
+        mat1, mat2 = entry["matiere1"], entry["matiere2"]
+        matdex_1 = MATIERES.index(mat1) + 1
+        matdex_2 = MATIERES.index(mat2) + 1
         contrainte = entry.get("contrainte")
         nb_fois = entry.get("nb_fois", 1)
-        classes_cible = entry.get("classes", "CLASSES_BASE")
+        print("-- Inclusion : " + "/" + mat1 + "\\" + " suivi de " + "/" + mat2 + "\\")
+        for classe in classes_visees(entry.get("classes", "CLASSES_BASE")):
+            if contrainte == "forte":
+                regles_suites[classe][1].append((matdex_1, matdex_2))
+                continue
+            if contrainte not in ("moyenne", "faible"):
+                continue
+            for semaine in SEMAINES:
+                sequence_Suivi = []
+                for j in range(len(JOURS)):
+                    for h in range(len(HEURES) - 1):
+                        # suivi_var = matière 1 en h ET matière 2 en h+1
+                        suivi_var = model.NewBoolVar(f"{classe}_{j}_{h}_suivi_{mat1}_{mat2}_{semaine}")
+                        var_mat1 = x(semaine, classe, j, h, matdex_1)
+                        var_mat2 = x(semaine, classe, j, h + 1, matdex_2)
+                        model.AddBoolAnd([var_mat1, var_mat2]).OnlyEnforceIf(suivi_var)
+                        model.AddBoolOr([var_mat1.Not(), var_mat2.Not()]).OnlyEnforceIf(suivi_var.Not())
+                        sequence_Suivi.append(suivi_var)
+                if contrainte == "moyenne":
+                    model.Add(sum(sequence_Suivi) >= nb_fois)
+                else:
+                    model.Add(sum(sequence_Suivi) <= nb_fois)
 
-        if isinstance(classes_cible, str) and classes_cible == "CLASSES_BASE":
-            matIncluSuite(mat1, mat2, contrainte, nb_fois, CLASSES_BASE)
-        else:
-            matIncluSuite(mat1, mat2, contrainte, nb_fois, classes_cible)
+    automates_suites = {}  # les classes aux mêmes règles partagent le même automate
+    for classe, (exclusions, suites_forcees) in regles_suites.items():
+        cle = (tuple(exclusions), tuple(suites_forcees))
+        if cle not in automates_suites:
+            automates_suites[cle] = compiler_automate_suites(exclusions, suites_forcees, len(MATIERES) + 1)
+        etat_initial, etats_finaux, transitions = automates_suites[cle]
 
-    # ─── Contrainte : fusionner_groupes_vers_classes
-    # (pour construire le dictionnaire fusion_data) 
-    def fusionner_groupes_vers_classes(
-        emploi_du_temps,
-        emploi_du_temps_salles,
-        emploi_du_temps_profs,
-        solver,
-        semaine
-    ):
-        """
-        Construit un dictionnaire fusion_data[(classe, j, h)] → string décrivant
-        le contenu du créneau (matière, prof, salle) pour chaque classe de base
-        et leurs sous-groupes, pour la semaine donnée.
+        for semaine in SEMAINES:
+            # Créneaux de la semaine, jour après jour, séparés par la valeur len(MATIERES) + 1
+            sequence = []
+            for j in range(len(JOURS)):
+                if j:
+                    sequence.append(len(MATIERES) + 1)
+                sequence += [emploi_du_temps[semaine][(classe, j, h)] for h in range(len(HEURES))]
+            model.AddAutomaton(sequence, etat_initial, etats_finaux, transitions)
 
-        Arguments:
-            emploi_du_temps (dict): variables IntVar matières par créneau.
-            emploi_du_temps_salles (dict): variables IntVar salles par créneau.
-            emploi_du_temps_profs (dict): variables IntVar/BoolVar profs par créneau.
-            solver (CpSolver): instance du solveur ayant résolu le modèle.
-            semaine (str): "Semaine A" ou "Semaine B".
+    # Cantine : créneau de 12h et créneau de déjeuner de chaque classe appliqués
+    # aux domaines (repartir_cantine / matieres_interdites_par_creneau)
 
-        Retourne:
-            dict: fusion_data mapping clé (classe, j, h) → description texte du créneau.
-        """
-        # Dictionnaire pour stocker les données fusionnées
-        fusion_data = {}
+    # Contrainte préférentielle : éviter les journées avec un cartable trop lourd (par niveau)
+    # On pénalise les journées où la somme des "poids" des matières dépasse un seuil toléré
+    penalites_surcharge_poids = []
+    poids_matieres_par_niveau = config.get("poids_matieres_par_niveau", {})
+    seuils_par_niveau = config.get("poids_cartable_max_somme_par_niveau", {})
+    seuil_global = config.get("poids_cartable_max_somme", 6.0)
 
-        # 1) D’abord, pour chaque classe de base
-        for cl in CLASSES_BASE:
+    for classe in CLASSES_BASE:
+        niveau = classe[:2]
+        poids_par_niveau = poids_matieres_par_niveau.get(niveau, {})
+        seuil_max = seuils_par_niveau.get(niveau, seuil_global)
+        if seuil_max <= 0:
+            continue
+
+        # On ajoute une marge de 5% puis on multiplie par 10 pour rester en IntVar
+        seuil_tolerant_x10 = int(seuil_max * 1.05 * 10)
+
+        for semaine in SEMAINES:
             for j, jour in enumerate(JOURS):
-                for h, heure in enumerate(HEURES):
-                    key = (cl, j, h)
-                    contenu = []
+                poids_total_jour_vars = []
+
+                for h in range(len(HEURES)):
+                    # Si jour sans après-midi, on ignore les créneaux h > 4
+                    if jour in JOURS_SANS_APRES_MIDI and h > 4:
+                        continue
 
-                    # a) Cours de la classe principale
-                    mat_idx = solver.Value(emploi_du_temps[semaine][key])
-                    if mat_idx > 0:
-                        mat = MATIERES[mat_idx - 1]
-                        niv = cl[:2]
-                        prof_ref = PROFESSEURS[mat]
+                    # Pesée de chaque matière selon son poids configuré (x10 pour rester entier),
+                    # classe et sous-groupes compris : on réutilise les littéraux one-hot
+                    for grp in [classe] + [f"{classe}{sfx}" for sfx in SOUS_GROUPES_SUFFIXES]:
+                        if grp not in CLASSES:
+                            continue
+                        for code_mat, b in est_matiere[semaine][(grp, j, h)].items():
+                            if code_mat == 0:
+                                continue
+                            poids = poids_par_niveau.get(MATIERES[code_mat - 1], 0.0)
+                            if int(poids * 10):
+                                poids_total_jour_vars.append(int(poids * 10) * b)
 
-                        # Sélection du professeur
-                        if isinstance(prof_ref, dict):
-                            profs_niv = prof_ref.get(niv, None)
-                            key_prof = (cl, j, h, mat, semaine)
+                surcharge = 0
+                if poids_total_jour_vars:
+                    somme_poids_jour = model.NewIntVar(0, 10000, f"somme_poids_jour_{classe}_{j}_{semaine}")
+                    model.Add(somme_poids_jour == sum(poids_total_jour_vars))
 
-                            # Si on a une liste de profs pour ce niveau
-                            if isinstance(profs_niv, list) and len(profs_niv) > 1:
-                                if key_prof in emploi_du_temps_profs[semaine]:
-                                    idx_prof = solver.Value(emploi_du_temps_profs[semaine][key_prof])
-                                    prof_sel = profs_niv[idx_prof]
-                                else:
-                                    prof_sel = profs_niv[0]
-                            # Si on a une chaîne (string) pour ce niveau, on l’utilise telle quelle
-                            elif isinstance(profs_niv, str):
-                                prof_sel = profs_niv
-                            # Si c’est autre chose (ou None), on retombe sur prof_ref complet
-                            else:
-                                prof_sel = prof_ref
-                        else:
-                            # prof_ref est déjà une chaîne, un seul prof pour toute la matière
-                            prof_sel = prof_ref
+                    surcharge = model.NewIntVar(0, 10000, f"surcharge_poids_jour_{classe}_{j}_{semaine}")
+                    # surcharge = max(somme_poids_jour – seuil_tolerant_x10, 0)
+                    model.AddMaxEquality(surcharge, [somme_poids_jour - seuil_tolerant_x10, 0])
+                    penalites_surcharge_poids.append(surcharge)
+                if poids_matieres_par_niveau:
+                    # Journée contrôlée même sans matière pesée (surcharge nulle)
+                    enregistrer(
+                        "poids_cartable", surcharge,
+                        f"{classe} - {semaine} - {jour} : poids > tolérance {seuil_max * 1.05:.2f}kg"
+                    )
 
-                        # Choix de la salle
-                        salle = (
-                            AFFECTATION_MATIERE_SALLE.get(mat)
-                            or AFFECTATION_MATIERE_SALLE.get(prof_sel)
-                        )
-                        # Si pas de salle assignée, on prend l'index de la salle dans emploi_du_temps_salles pour cette semaine
-                        idx_salle = solver.Value(emploi_du_temps_salles[semaine][key])
-                        if not salle and 0 < idx_salle <= len(SALLES_GENERALES):
-                            salle = SALLES_GENERALES[idx_salle - 1]
-
-                        # Affichage de la salle avec sa capacité
-                        cap_s = CAPACITES_SALLES.get(salle)
-                        if cap_s is not None:
-                            salle_aff = f"{salle} - {cap_s} places"
-                        else:
-                            salle_aff = f"{salle}"
-                        contenu.append(f"{mat}\n{prof_sel}\n[{salle_aff}]")
-
-                    # b) Sous-groupes de la même classe de base
-                    for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
-                        grp = f"{cl}{suffixe}"
-                        if grp in CLASSES:
-                            key_sg = (grp, j, h)
-                            # On récupère l'index de la matière programmée pour ce sous-groupe
-                            mat_idx_sg = solver.Value(emploi_du_temps[semaine][key_sg])
-                            if mat_idx_sg > 0:
-                                # On convertit l'index en nom de matière
-                                mat2 = MATIERES[mat_idx_sg - 1]
-                                # On récupère la référence au(x) professeur(s) pour cette matière
-                                prof_ref2 = PROFESSEURS[mat2]
-
-                                if isinstance(prof_ref2, dict):
-                                    # Cas dict : plusieurs profs possibles selon le niveau (niv doit venir du contexte)
-                                    profs2 = prof_ref2.get(niv, None)
-                                    key_prof2 = (grp, j, h, mat2, semaine)
-
-                                    if isinstance(profs2, list) and len(profs2) > 1:
-                                        # Si liste de profs, on choisit l'index enregistré ou le premier par défaut
-                                        if key_prof2 in emploi_du_temps_profs[semaine]:
-                                            idx2 = solver.Value(emploi_du_temps_profs[semaine][key_prof2])
-                                            prof2 = profs2[idx2]
-                                        else:
-                                            prof2 = profs2[0]
-                                    elif isinstance(profs2, str):
-                                        # ⚠️ Si unique prof sous forme de chaîne
-                                        prof2 = profs2
-                                    else:
-                                        # ⚠️ Pas de donnée spécifique niveau : on garde la référence complète
-                                        prof2 = prof_ref2
-                                else:
-                                    # ⚠️ Cas simple : prof_ref2 est déjà une chaîne ou liste
-                                    prof2 = prof_ref2
-
-                                # On récupère l'index de la salle pour ce sous-groupe
-                                idx_sg = solver.Value(emploi_du_temps_salles[semaine][key_sg])
-                                # On détermine la salle via le mapping matière→salle ou prof→salle
-                                salle2 = (
-                                    AFFECTATION_MATIERE_SALLE.get(mat2)
-                                    or AFFECTATION_MATIERE_SALLE.get(prof2)
-                                )
-                                if not salle2 and 0 < idx_sg <= len(SALLES_GENERALES):
-                                    # Si pas de mapping, on prend la salle générale correspondante
-                                    salle2 = SALLES_GENERALES[idx_sg - 1]
-
-                                # On récupère la capacité de la salle si disponible
-                                cap_sg = CAPACITES_SALLES.get(salle2)
-                                if cap_sg is not None:
-                                    salle_aff2 = f"{salle2} - {cap_sg} places"
-                                else:
-                                    salle_aff2 = f"{salle2}"
-                                # On construit la ligne de contenu pour le sous-groupe
-                                contenu.append(f"{mat2} ({grp})\n{prof2}\n[{salle_aff2}]")
-
-                    # On fusionne les contenus récupérés ou on place '---' si rien à afficher
-                    fusion_data[key] = "\n\n".join(contenu) if contenu else "---"
-
-        # 2) Optionnel : traiter chaque sous-groupe indépendamment
-        for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
-            for cl_base in CLASSES_BASE:
-                grp = f"{cl_base}{suffixe}"
-                if grp not in CLASSES:
-                    continue
-                for j, jour in enumerate(JOURS):
-                    for h, heure in enumerate(HEURES):
-                        key_sg = (grp, j, h)
-                        contenu_sg = []
-                        mat_idx_sg = solver.Value(emploi_du_temps[semaine][key_sg])
-                        if mat_idx_sg > 0:
-                            mat2 = MATIERES[mat_idx_sg - 1]
-                            prof_ref2 = PROFESSEURS[mat2]
-
-                            # ── Bloc corrigé pour la section “chaque sous-groupe isolément” ────
-                            if isinstance(prof_ref2, dict):
-                                # On déduit le niveau à partir de la classe de base
-                                niv_b = cl_base[:2]
-                                profs2 = prof_ref2.get(niv_b, None)
-                                key_prof2 = (grp, j, h, mat2, semaine)
-
-                                if isinstance(profs2, list) and len(profs2) > 1:
-                                    # Choix du prof selon l'index ou par défaut le premier
-                                    if key_prof2 in emploi_du_temps_profs[semaine]:
-                                        idx2 = solver.Value(emploi_du_temps_profs[semaine][key_prof2])
-                                        prof2 = profs2[idx2]
-                                    else:
-                                        prof2 = profs2[0]
-                                elif isinstance(profs2, str):
-                                    # Cas unique : prof est une chaîne
-                                    prof2 = profs2
-                                else:
-                                    # Pas de donnée spécifique au niveau, on reprend la référence globale
-                                    prof2 = prof_ref2
-                            else:
-                                # prof_ref2 n'est pas un dict → on l'utilise directement
-                                prof2 = prof_ref2
-
-                            # Récupération et détermination de la salle pour le sous-groupe
-                            idx_s2 = solver.Value(emploi_du_temps_salles[semaine][key_sg])
-                            salle2 = (
-                                AFFECTATION_MATIERE_SALLE.get(mat2)
-                                or AFFECTATION_MATIERE_SALLE.get(prof2)
-                            )
-                            if not salle2 and 0 < idx_s2 <= len(SALLES_GENERALES):
-                                # Fallback sur la salle générale si pas de mapping trouvé
-                                salle2 = SALLES_GENERALES[idx_s2 - 1]
-                            cap_s2 = CAPACITES_SALLES.get(salle2)
-                            if cap_s2 is not None:
-                                salle_aff2 = f"{salle2} - {cap_s2} places"
-                            else:
-                                salle_aff2 = f"{salle2}"
-                                # Assemblage du contenu pour ce sous-groupe isolé
-                            contenu_sg.append(f"{mat2}\n{prof2}\n[{salle_aff2}]")
-
-                        # ⚠️ On stocke le résultat, ou '---' si vide
-                        fusion_data[key_sg] = "\n\n".join(contenu_sg) if contenu_sg else "---"
-
-        return fusion_data
-
-    # Synchroniser les créneaux pour chaque matière de sous-groupe
-    # Assure que tous les sous-groupes d'une même matière démarrent et finissent leurs cours en même temps
-    for suffixe, matiere in SOUS_GROUPES_SUFFIXES.items():
-        groupes_matiere = [classe for classe in CLASSES if classe.endswith(suffixe)]
+    # 🔁 On ajoute ces pénalités à l’objectif
+    poids_surcharge = 5  # Pondération des pénalités de surcharge de cartable
 
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES)):
-                bools = []
+    # Totaux nommés de chaque terme de l'objectif : le suivi des solutions
+    # (SuiviSolutions) les relit pour publier le détail des pénalités
+    total_preferences = model.NewIntVar(0, len(penalites_preferences), "total_preferences")
+    model.Add(total_preferences == sum(penalites_preferences))
+    total_surcharge_cartable = model.NewIntVar(
+        0, 10000 * len(penalites_surcharge_poids), "total_surcharge_cartable"
+    )
+    model.Add(total_surcharge_cartable == sum(penalites_surcharge_poids))
+
+    # # ─── Minimiser les différences entre Semaine A et Semaine B ─────────
+    # diff_vars = []
+    # for cl in CLASSES:
+    #     for j in range(len(JOURS)):
+    #         for h in range(len(HEURES)):
+    #             # les deux variables IntVar pour le même créneau en A et B
+    #             varA = emploi_du_temps["Semaine A"][(cl, j, h)]
+    #             varB = emploi_du_temps["Semaine B"][(cl, j, h)]
+    #             # booléen qui vaut 1 si varA != varB
+    #             b = model.NewBoolVar(f"diff_{cl}_{j}_{h}")
+    #             # b → varA != varB  et  ¬b → varA == varB
+    #             model.Add(varA != varB).OnlyEnforceIf(b)
+    #             model.Add(varA == varB).OnlyEnforceIf(b.Not())
+    #             diff_vars.append(b)
 
-                for groupe in groupes_matiere:
-                    if (groupe, j, h) in emploi_du_temps:
-                        var = model.NewBoolVar(f"{matiere}_{groupe}_{j}_{h}")
-                        # BoolVar = 1 <=> ce groupe a cours de cette matière à (j,h)
-                        model.Add(emploi_du_temps[(groupe, j, h)] == MATIERES.index(matiere) + 1).OnlyEnforceIf(var)
-                        model.Add(emploi_du_temps[(groupe, j, h)] != MATIERES.index(matiere) + 1).OnlyEnforceIf(var.Not())
-                        bools.append(var)
+    # poids_semaines = 1  # ajustez ce coefficient selon l'importance de la similarité
 
-                # Imposer la synchronisation : pour chaque paire, si l'un a cours, l'autre aussi
-                for i in range(len(bools)):
-                    for k in range(i + 1, len(bools)):
-                        model.AddBoolOr([bools[i].Not(), bools[k]])
-                        model.AddBoolOr([bools[k].Not(), bools[i]])
 
 
-    # Lecture des paramètres cantine et mise en place des créneaux interdits
-    cantine_config     = config.get("cantine", {})
-    cap_cantine        = cantine_config.get("capacite", 200)
-    ratio_demi         = cantine_config.get("proportion_demi_pensionnaire", 0.8)
-    creneaux_dej       = cantine_config.get("creneaux_dejeuner", [])
-    assignation_niveaux= cantine_config.get("assignation_niveaux", {})
-    priorite_active    = cantine_config.get("priorite_active", True)
+    model.Minimize(
+        total_permanence
+        + poids_pref * total_preferences
+        + poids_surcharge * total_surcharge_cartable
+ #       + poids_semaines * sum(diff_vars)
+    )
 
-    # Vérification que tous les créneaux dejeuner figurent bien dans HEURES 
-    for c in creneaux_dej:
-        if c not in HEURES:
-            raise ValueError(f"Créneau cantine '{c}' non reconnu dans HEURES.")
+    # Point de départ de la recherche : l'emploi du temps relu plus haut
+    if edt_hint is not None:
+        hints, stats_hints = lire_hints_edt(
+            edt_hint, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
+        )
+        for var, valeur in hints:
+            model.AddHint(var, valeur)
+        print(f"🧭 Hint depuis {chemin_hint} : {stats_hints['hints']} valeurs, "
+              f"{stats_hints['cours_ignores']}/{stats_hints['cours_lus']} cours ignorés")
 
-    # On recherche dynamiquement le créneau principal commençant par "12h"
-    lunch_slot = next((slot for slot in HEURES if slot.startswith("12h")), None)
-    if lunch_slot is None:
-        raise ValueError("Aucun créneau HEURES ne commence par '12h'")
-    h_dej = HEURES.index(lunch_slot)
+    # Rapport de taille du modèle (à comparer avant/après une modification de l'encodage)
+    stats = statistiques_modele(model)
+    print(f"📊 Modèle CP-SAT : {stats['variables']} variables, {stats['contraintes']} contraintes")
 
-    # Bloquer systématiquement ce créneau pour toutes les classes
-    for semaine in SEMAINES:
-        for classe in CLASSES:
-            for j in range(len(JOURS)):
-                model.Add(emploi_du_temps[semaine][(classe, j, h_dej)] == 0)
+    return model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
 
-    # Allocation des créneaux déjeuner selon la capacité de la cantine
-    if lunch_slot in creneaux_dej:
-        total_eleves = sum(int(CAPACITES_CLASSES.get(cl, 0) * ratio_demi) for cl in CLASSES_BASE)
-        if total_eleves <= cap_cantine:
-            # Capacité suffisante
-            classe_creneau_dej = {cl: h_dej for cl in CLASSES_BASE}
-            print(f"✅ Tous les élèves peuvent déjeuner à {lunch_slot} (capacité suffisante)")
+
+class CreneauDerive:
+    """
+    Créneau (classe, jour, heure) du modèle à intervalles : sa matière n'est pas
+    une variable du modèle mais se déduit des séances placées. Index() renvoie
+    un indice virtuel, au-delà des variables du modèle, que
+    EmploiDuTempsIntervalles.figer() remplit dans la SolutionFigee.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def Index(self):
+        return self.index
+
+
+class EmploiDuTempsIntervalles(dict):
+    """
+    emploi_du_temps du modèle à intervalles : {semaine: {(classe, j, h): CreneauDerive}}.
+
+    Garde les séances du modèle pour convertir une solution (CpSolver ou
+    SolutionFigee) en SolutionFigee lisible par la fusion et les vérifications.
+    """
+
+    def __init__(self, seances, nb_variables, pas_jour):
+        super().__init__()
+        self.seances = seances
+        self.nb_variables = nb_variables
+        self.pas_jour = pas_jour
+        self.nb_creneaux = 0
+        for semaine in SEMAINES:
+            self[semaine] = {}
+            for classe in CLASSES:
+                for j in range(len(JOURS)):
+                    for h in range(len(HEURES)):
+                        self[semaine][(classe, j, h)] = CreneauDerive(nb_variables + self.nb_creneaux)
+                        self.nb_creneaux += 1
+
+    def figer(self, solver):
+        """
+        Retourne une SolutionFigee où chaque créneau vaut l'indice de la matière
+        de la séance qui le couvre (0 sinon).
+        """
+        if isinstance(solver, SolutionFigee):
+            valeurs = list(solver.valeurs[:self.nb_variables])
         else:
-            if not priorite_active:
-                # Répartition automatique sans priorité
-                from itertools import cycle
-                print("🔁 Capacité insuffisante : répartition automatique sans priorité")
-                iter_slots = cycle([HEURES.index(c) for c in creneaux_dej])
-                classe_creneau_dej = {cl: next(iter_slots) for cl in CLASSES_BASE}
+            valeurs = list(solver.ResponseProto().solution)
+        valeurs += [0] * self.nb_creneaux
+        for seance in self.seances:
+            if not solver.Value(seance["presence"]):
+                continue
+            debut = solver.Value(seance["debut"])
+            j, h = divmod(debut, self.pas_jour)
+            for k in range(seance["duree"]):
+                for classe in seance["classes"]:
+                    creneau = self[seance["semaine"]][(classe, j, h + k)]
+                    valeurs[creneau.Index()] = seance["m_idx"]
+        return SolutionFigee(valeurs, solver.ObjectiveValue())
+
+
+def profs_possibles(matiere, niveau):
+    """Liste des profs pouvant enseigner une matière à un niveau (PROFESSEURS : chaîne, dict ou liste)."""
+    prof_ref = PROFESSEURS.get(matiere)
+    if isinstance(prof_ref, dict):
+        prof_ref = prof_ref.get(niveau)
+    if isinstance(prof_ref, str):
+        return [prof_ref]
+    return list(prof_ref or [])
+
+
+def creer_modele_intervalles():
+    """
+    Modèle alternatif à base d'intervalles : chaque cours est une séance (1 h
+    ou plusieurs heures consécutives) optionnelle, de début variable, au lieu
+    d'une variable de matière par créneau.
+
+      - Volume horaire : somme des durées des séances présentes = volume cible.
+      - Non-chevauchement (AddNoOverlap) par classe (avec ses sous-groupes),
+        par prof, par salle générale et par (niveau, matière).
+      - Cantine : créneau de déjeuner de chaque classe au choix parmi les créneaux
+        autorisés, capacité tenue par AddCumulative.
+      - Indisponibilités (profs, salles), jours sans après-midi, max d'heures par
+        étendue, cours à horaire donné, suites de matières, même niveau même cours
+        et synchronisation des LV.
+      - Même objectif que creer_modele (permanences, préférences, cartable).
+
+    Un prof est affecté à une classe pour toute l'année quand la matière a
+    plusieurs profs possibles (équité sur la charge horaire, comme le mode
+    affectation_prof = "classe").
+
+    Retourne:
+        tuple: (model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs),
+            emploi_du_temps étant un EmploiDuTempsIntervalles (créneaux déduits des
+            séances), emploi_du_temps_salles des 0 (salles dédiées aux profs/matières)
+            et emploi_du_temps_profs les variables d'affectation des profs.
+    """
+    attribuer_salles_professeurs()
+    VOLUME_HORAIRE_BIHEBDO = calculer_volume_bihebdo()
+    parametres = config.get("parametres_solveur", {})
+    durees_autorisees = parametres.get("durees_seances", [1, 2])
+
+    model = cp_model.CpModel()
+
+    # Axe du temps : t = j * pas_jour + h ; le pas laisse un trou entre deux
+    # jours pour qu'une fin de journée ne « touche » jamais le lendemain
+    pas_jour = len(HEURES) + 1
+    h_dej = next(h for h, heure in enumerate(HEURES) if heure.startswith("12h"))
+    # Demi-journées (début, longueur) : le créneau de 12h n'est jamais un cours
+    demi_journees = [(0, h_dej), (h_dej + 1, len(HEURES) - h_dej - 1)]
+
+    MEMNIV_ACTIVES = {(e["niveau"], e["matiere"]) for e in config.get("memnivmemcours", [])}
+    regles_max = {(r["niveau"], r["matiere"]): r for r in MAX_HEURES_PAR_ETENDUE}
+
+    def classe_de_base(classe):
+        for suffixe in SOUS_GROUPES_SUFFIXES:
+            if classe.endswith(suffixe):
+                return classe[:-len(suffixe)], suffixe
+        return classe, None
+
+    def classes_ciblees(p_classes):
+        if p_classes in (None, "CLASSES_BASE"):
+            return list(CLASSES_BASE)
+        if isinstance(p_classes, list):
+            return [c for c in CLASSES_BASE if c in p_classes]
+        return [c for c in CLASSES_BASE if p_classes in c]
+
+    # ─── Unités : groupes de classes ayant exactement les mêmes séances
+    # (même niveau même cours, LV synchronisées entre classes dépendantes)
+    unites = {}
+    for classe in CLASSES:
+        base, suffixe = classe_de_base(classe)
+        niveau = base[:2]
+        if suffixe:
+            matieres = [SOUS_GROUPES_SUFFIXES[suffixe]]
+        else:
+            matieres = [m for m in VOLUME_HORAIRE[niveau] if m not in SOUS_GROUPES_SUFFIXES.values()]
+        for matiere in matieres:
+            if matiere not in VOLUME_HORAIRE_BIHEBDO.get(niveau, {}):
+                continue
+            cfg_sg = SOUS_GROUPES_CONFIG.get(matiere, {})
+            if not suffixe and (niveau, matiere) in MEMNIV_ACTIVES:
+                groupe = tuple(cl for cl in CLASSES_BASE if cl.startswith(niveau))
+            elif suffixe and cfg_sg.get("type") == "LV" and len(cfg_sg.get("groupes_dependants", [])) > 1 \
+                    and base in cfg_sg["groupes_dependants"]:
+                groupe = tuple(cl + suffixe for cl in cfg_sg["groupes_dependants"] if cl + suffixe in CLASSES)
             else:
-                # Répartition par priorité de niveaux
-                print(f"❌ Capacité insuffisante à {lunch_slot} : assignation par niveau")
-                classe_creneau_dej = {}
-                for cl in CLASSES_BASE:
-                    niv = cl[:2]
-                    for slot, niveaux in assignation_niveaux.items():
-                        if niv in niveaux:
-                            classe_creneau_dej[cl] = HEURES.index(slot)
-                            break
-                    else:
-                        raise ValueError(f"Aucun créneau cantine défini pour le niveau '{niv}' (classe {cl}).")
-    else:
-        raise ValueError(f"Le créneau principal '{lunch_slot}' doit être inclus dans les créneaux possibles.")
+                groupe = (classe,)
+            unites[(groupe, matiere)] = VOLUME_HORAIRE_BIHEBDO[niveau][matiere]
+
+    # ─── Séances candidates de chaque unité : la présence et la durée sont choisies
+    # par le solveur, la somme des durées présentes valant le volume de la semaine
+    seances = []
+    for (groupe, matiere), volumes in unites.items():
+        m_idx = MATIERES.index(matiere) + 1
+        niveau = groupe[0][:2]
+        regle = regles_max.get((niveau, matiere))
+        duree_max = max(l for _, l in demi_journees)
+        if regle is not None:
+            duree_max = min(duree_max, regle["max_heures"])
+        for entree in config.get("mat_inclu_suite", []):
+            # Inclusion forte : chaque heure de matiere1 est suivie de matiere2
+            if entree.get("contrainte") == "forte" and entree["matiere1"] == matiere \
+                    and set(groupe) & set(classes_ciblees(entree.get("classes"))):
+                duree_max = 1
+        durees = sorted(d for d in durees_autorisees if 1 <= d <= duree_max) or [1]
+
+        for semaine in SEMAINES:
+            volume = volumes[semaine]
+            if volume <= 0:
+                continue
+            seances_unite = []
+            for d in durees:
+                precedente = None
+                for k in range(volume // d):
+                    nom = f"seance_{'_'.join(groupe)}_{matiere}_{d}h_{k}_{semaine.replace(' ', '_')}"
+                    presence = model.NewBoolVar(f"p_{nom}")
+                    # Une demi-journée au plus, parmi celles où la séance tient
+                    demis = {}
+                    for j, jour in enumerate(JOURS):
+                        for i, (debut_demi, longueur) in enumerate(demi_journees):
+                            if longueur < d or (i == 1 and jour in JOURS_SANS_APRES_MIDI):
+                                continue
+                            demis[(j, i)] = model.NewBoolVar(f"d{j}{i}_{nom}")
+                    model.Add(sum(demis.values()) == presence)
+                    decalage = model.NewIntVar(0, max(l for _, l in demi_journees) - d, f"h_{nom}")
+                    for (j, i), lit in demis.items():
+                        model.Add(decalage <= demi_journees[i][1] - d).OnlyEnforceIf(lit)
+                    debut = model.NewIntVar(0, len(JOURS) * pas_jour, f"debut_{nom}")
+                    model.Add(debut == decalage + sum(
+                        (j * pas_jour + demi_journees[i][0]) * lit for (j, i), lit in demis.items()
+                    ))
+                    seance = {
+                        "classes": groupe, "semaine": semaine, "matiere": matiere, "m_idx": m_idx,
+                        "duree": d, "presence": presence, "debut": debut, "decalage": decalage,
+                        "demis": demis,
+                        "intervalle": model.NewOptionalFixedSizeIntervalVar(debut, d, presence, nom),
+                    }
+                    # Séances interchangeables : présentes d'abord, dans l'ordre chronologique
+                    if precedente is not None:
+                        model.AddImplication(presence, precedente["presence"])
+                        model.Add(precedente["debut"] + d <= debut).OnlyEnforceIf(presence)
+                    precedente = seance
+                    seances_unite.append(seance)
+            model.Add(sum(s["duree"] * s["presence"] for s in seances_unite) == volume)
+            seances.extend(seances_unite)
+
+    def seances_de(classe, semaine, matieres=None):
+        return [
+            s for s in seances
+            if s["semaine"] == semaine and classe in s["classes"]
+            and (matieres is None or s["matiere"] in matieres)
+        ]
+
+    def jour_de(seance, j):
+        """Expression linéaire valant 1 si la séance a lieu le jour j."""
+        return sum(lit for (jj, _), lit in seance["demis"].items() if jj == j)
+
+    def intervalles_fixes(indispos, nom):
+        """Intervalles fixes d'une heure pour des indisponibilités {jour: [h, ...]}."""
+        fixes = []
+        for jour, heures in (indispos or {}).items():
+            if jour not in JOURS:
+                continue
+            for h in heures:
+                debut = JOURS.index(jour) * pas_jour + h
+                fixes.append(model.NewIntervalVar(debut, 1, debut + 1, f"indispo_{nom}_{jour}_{h}"))
+        return fixes
+
+    # ─── Cantine : un créneau de déjeuner par classe et par jour, capacité cumulative
+    cantine_config = config.get("cantine", {})
+    cap_cantine = cantine_config.get("capacite", 200)
+    ratio_demi = cantine_config.get("proportion_demi_pensionnaire", 0.8)
+    creneaux_dej = [HEURES.index(c) for c in cantine_config.get("creneaux_dejeuner", []) if c in HEURES]
+    dejeuners = {}
+    total_eleves = sum(int(CAPACITES_CLASSES.get(cl, 0) * ratio_demi) for cl in CLASSES_BASE)
+    if total_eleves > cap_cantine:
+        _, classe_creneau_dej = repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config)
+        for semaine in SEMAINES:
+            intervalles, demandes = [], []
+            for cl in CLASSES_BASE:
+                if cantine_config.get("priorite_active", True):
+                    candidats = [classe_creneau_dej[cl]]
+                else:
+                    candidats = creneaux_dej or [h_dej]
+                for j in range(len(JOURS)):
+                    debut = model.NewIntVarFromDomain(
+                        cp_model.Domain.FromValues([j * pas_jour + h for h in candidats]),
+                        f"dejeuner_{cl}_{j}_{semaine.replace(' ', '_')}"
+                    )
+                    itv = model.NewFixedSizeIntervalVar(debut, 1, f"itv_dejeuner_{cl}_{j}_{semaine.replace(' ', '_')}")
+                    dejeuners.setdefault((cl, semaine), []).append(itv)
+                    intervalles.append(itv)
+                    demandes.append(int(CAPACITES_CLASSES.get(cl, 0) * ratio_demi))
+            model.AddCumulative(intervalles, demandes, cap_cantine)
+
+    # ─── Non-chevauchement par classe : la classe, ses sous-groupes et son déjeuner.
+    # Les LV d'une même classe peuvent se dérouler en parallèle quand elle en a plusieurs.
+    for semaine in SEMAINES:
+        for cl in CLASSES_BASE:
+            propres = [s["intervalle"] for s in seances_de(cl, semaine)] + dejeuners.get((cl, semaine), [])
+            pistes = [
+                (suffixe, [s["intervalle"] for s in seances_de(cl + suffixe, semaine)])
+                for suffixe in SOUS_GROUPES_SUFFIXES if cl + suffixe in CLASSES
+            ]
+            nb_lv = sum(1 for suffixe, _ in pistes if SOUS_GROUPES_TYPES.get(suffixe) == "LV")
+            if nb_lv > 1:
+                for _, intervalles in pistes:
+                    model.AddNoOverlap(propres + intervalles)
+            else:
+                model.AddNoOverlap(propres + [itv for _, intervalles in pistes for itv in intervalles])
+
+    # ─── Deux classes d'un même niveau n'ont pas la même matière au même moment
+    # (hors même niveau même cours et LV)
+    for semaine in SEMAINES:
+        for niveau in NIVEAUX:
+            classes_niveau = [cl for cl in CLASSES_BASE if cl.startswith(niveau)]
+            for matiere in VOLUME_HORAIRE.get(niveau, {}):
+                if (niveau, matiere) in MEMNIV_ACTIVES or SOUS_GROUPES_CONFIG.get(matiere, {}).get("type") == "LV":
+                    continue
+                intervalles = [
+                    s["intervalle"] for cl in classes_niveau for s in seances_de(cl, semaine, [matiere])
+                ]
+                if len(classes_niveau) > 1 and len(intervalles) > 1:
+                    model.AddNoOverlap(intervalles)
+
+    # ─── Profs : affectation par (classe, matière) quand plusieurs profs sont possibles
+    affectation_prof = {}
+    est_affecte = {}
+    for (groupe, matiere) in unites:
+        for cl in groupe:
+            profs = profs_possibles(matiere, cl[:2])
+            if len(profs) > 1 and (cl, matiere) not in affectation_prof:
+                nom = f"prof_{cl}_{matiere}"
+                affectation_prof[(cl, matiere)] = model.NewIntVar(0, len(profs) - 1, nom)
+                est_affecte[(cl, matiere)] = encoder_one_hot(model, affectation_prof[(cl, matiere)], range(len(profs)), nom)
+
+    # Équité : charge horaire (deux semaines) de chaque prof d'une même matière/niveau
+    enseignements_equite = index_enseignements_profs(CLASSES_BASE)
+    groupes_equite = defaultdict(list)
+    for (cl, matiere) in affectation_prof:
+        groupes_equite[(matiere, cl[:2])].append(cl)
+    for (matiere, niveau), classes_eq in groupes_equite.items():
+        profs = profs_possibles(matiere, niveau)
+        volume = sum(VOLUME_HORAIRE_BIHEBDO[niveau][matiere].values())
+        charges = []
+        for i, prof in enumerate(profs):
+            charge = model.NewIntVar(0, volume * len(classes_eq), f"charge_{matiere}_{niveau}_{prof.replace(' ', '_')}")
+            model.Add(charge == sum(volume * est_affecte[(cl, matiere)][i] for cl in classes_eq))
+            charges.append(charge)
+        charge_min = model.NewIntVar(0, volume * len(classes_eq), f"charge_min_{matiere}_{niveau}")
+        for charge in charges:
+            model.Add(charge >= charge_min)
+            model.Add(charge <= charge_min + volume)
+        for rangs in profs_interchangeables(profs, matiere, classes_eq, enseignements_equite):
+            imposer_precedence_valeurs(
+                model, [est_affecte[(cl, matiere)] for cl in classes_eq], rangs, f"symetrie_{matiere}_{niveau}"
+            )
+
+    # Intervalles de chaque prof (classes de base, comme la contrainte du modèle par créneau)
+    intervalles_prof = defaultdict(list)   # (semaine, prof) → intervalles
+    intervalles_salle = defaultdict(list)  # (semaine, salle générale) → intervalles
+    for seance in seances:
+        deja_vus = set()
+        for cl in seance["classes"]:
+            if cl not in CLASSES_BASE:
+                continue
+            profs = profs_possibles(seance["matiere"], cl[:2])
+            for i, prof in enumerate(profs):
+                if len(profs) == 1:
+                    # Prof unique : la séance partagée (même niveau même cours) ne compte qu'une fois
+                    if prof in deja_vus:
+                        continue
+                    deja_vus.add(prof)
+                    itv = seance["intervalle"]
+                else:
+                    # Séance du prof i : présente et classe affectée à ce prof
+                    lit = model.NewBoolVar(f"{prof}_{cl}_{seance['intervalle'].Name()}")
+                    affecte = est_affecte[(cl, seance["matiere"])][i]
+                    model.AddImplication(lit, seance["presence"])
+                    model.AddImplication(lit, affecte)
+                    model.AddBoolOr([seance["presence"].Not(), affecte.Not(), lit])
+                    itv = model.NewOptionalFixedSizeIntervalVar(
+                        seance["debut"], seance["duree"], lit, f"{prof}_{seance['intervalle'].Name()}"
+                    )
+                intervalles_prof[(seance["semaine"], prof)].append(itv)
+                salle = AFFECTATION_MATIERE_SALLE.get(seance["matiere"]) or AFFECTATION_MATIERE_SALLE.get(prof)
+                if salle in SALLES_GENERALES:
+                    intervalles_salle[(seance["semaine"], salle)].append(itv)
+
+    for (semaine, prof), intervalles in intervalles_prof.items():
+        fixes = intervalles_fixes(INDISPONIBILITES_PROFS.get(prof), f"{prof}_{semaine}")
+        if len(intervalles) + len(fixes) > 1:
+            model.AddNoOverlap(intervalles + fixes)
+
+    # ─── Salles : une salle générale n'accueille qu'un cours à la fois ; les salles
+    # spécialisées (laboratoire, gymnase...) ne sont soumises qu'à leurs indisponibilités
+    for (semaine, salle), intervalles in intervalles_salle.items():
+        fixes = intervalles_fixes(INDISPONIBILITES_SALLES.get(salle), f"{salle}_{semaine}")
+        if len(intervalles) + len(fixes) > 1:
+            model.AddNoOverlap(intervalles + fixes)
+    for salle, indispos in INDISPONIBILITES_SALLES.items():
+        if salle in SALLES_GENERALES:
+            continue
+        matieres_salle = {m for m, s in AFFECTATION_MATIERE_SALLE.items() if s == salle and m in MATIERES}
+        for semaine in SEMAINES:
+            fixes = intervalles_fixes(indispos, f"{salle}_{semaine}")
+            for seance in seances:
+                if seance["semaine"] == semaine and seance["matiere"] in matieres_salle and fixes:
+                    model.AddNoOverlap([seance["intervalle"]] + fixes)
+
+    # ─── Maximum d'heures d'une matière par journée / demi-journée
+    for (niveau, matiere), regle in regles_max.items():
+        for semaine in SEMAINES:
+            for cl in CLASSES_BASE:
+                if not cl.startswith(niveau):
+                    continue
+                seances_cl = seances_de(cl, semaine, [matiere])
+                for j in range(len(JOURS)):
+                    if regle["etendue"] == "journee":
+                        model.Add(sum(s["duree"] * jour_de(s, j) for s in seances_cl) <= regle["max_heures"])
+                    elif regle["etendue"] == "demi-journee":
+                        for i in range(len(demi_journees)):
+                            model.Add(sum(
+                                s["duree"] * s["demis"][(j, i)] for s in seances_cl if (j, i) in s["demis"]
+                            ) <= regle["max_heures"])
+
+    # ─── Suites de matières : exclusion (matiere2 juste après matiere1 interdite)
+    for entree in filter(exclusion_imposee, config.get("mat_exclu_suite", [])):
+        for cl in classes_ciblees(entree.get("classes")):
+            for semaine in SEMAINES:
+                for a in seances_de(cl, semaine, [entree["matiere1"]]):
+                    for b in seances_de(cl, semaine, [entree["matiere2"]]):
+                        model.Add(a["debut"] + a["duree"] != b["debut"]).OnlyEnforceIf([a["presence"], b["presence"]])
+
+    # ─── Suites de matières : inclusion (matiere2 juste après matiere1, nb_fois)
+    for entree in config.get("mat_inclu_suite", []):
+        nb_fois = entree.get("nb_fois", 1)
+        for cl in classes_ciblees(entree.get("classes")):
+            for semaine in SEMAINES:
+                suivis = []
+                premieres = seances_de(cl, semaine, [entree["matiere1"]])
+                for a in premieres:
+                    suivis_a = []
+                    for b in seances_de(cl, semaine, [entree["matiere2"]]):
+                        suivi = model.NewBoolVar(f"suivi_{a['intervalle'].Name()}_{b['intervalle'].Name()}")
+                        model.AddImplication(suivi, a["presence"])
+                        model.AddImplication(suivi, b["presence"])
+                        model.Add(a["debut"] + a["duree"] == b["debut"]).OnlyEnforceIf(suivi)
+                        model.Add(a["debut"] + a["duree"] != b["debut"]).OnlyEnforceIf(
+                            [a["presence"], b["presence"], suivi.Not()]
+                        )
+                        suivis_a.append(suivi)
+                    if entree.get("contrainte") == "forte":
+                        model.Add(sum(suivis_a) == a["presence"])
+                    suivis += suivis_a
+                if entree.get("contrainte") == "moyenne":
+                    model.Add(sum(suivis) >= nb_fois)
+                elif entree.get("contrainte") == "faible":
+                    model.Add(sum(suivis) <= nb_fois)
+
+    # ─── Cours à horaire donné : nb_fois heures de la matière dans la plage du jour
+    for entree in config.get("mat_horaire_donne_v2", []):
+        p_matiere = entree["matiere"]
+        noms = p_matiere if isinstance(p_matiere, list) else [p_matiere]
+        matieres = {m for m in MATIERES for nom in noms if nom in m}
+        j = JOURS.index(entree["jour"])
+        h_min = next(h for h, heure in enumerate(HEURES) if heure.startswith(entree["horaire_min"]))
+        h_max = next(
+            (h for h, heure in enumerate(HEURES) if entree.get("horaire_max") and heure.endswith(entree["horaire_max"])),
+            h_min
+        )
+        for cl in classes_ciblees(entree["classes"]):
+            nb_fois = entree.get("nb_fois")
+            if nb_fois is None:
+                nb_fois = h_max - h_min + 1
+            if isinstance(p_matiere, str) and p_matiere in VOLUME_HORAIRE.get(cl[:2], {}):
+                nb_fois = min(nb_fois, VOLUME_HORAIRE[cl[:2]][p_matiere])
+            for semaine in SEMAINES:
+                dedans = []
+                for s in seances_de(cl, semaine, matieres):
+                    lit = model.NewBoolVar(f"plage_{s['intervalle'].Name()}")
+                    model.AddImplication(lit, s["presence"])
+                    model.Add(s["debut"] >= j * pas_jour + h_min).OnlyEnforceIf(lit)
+                    model.Add(s["debut"] + s["duree"] <= j * pas_jour + h_max + 1).OnlyEnforceIf(lit)
+                    # Hors plage : la séance ne la chevauche pas
+                    plage = model.NewOptionalFixedSizeIntervalVar(
+                        j * pas_jour + h_min, h_max - h_min + 1, lit.Not(), f"hors_plage_{s['intervalle'].Name()}"
+                    )
+                    model.AddNoOverlap([s["intervalle"], plage])
+                    dedans.append(s["duree"] * lit)
+                model.Add(sum(dedans) == nb_fois)
+
+    # ─── Objectif : permanences (créneaux vides hors première et dernière heure),
+    # préférences des profs et cartable, comme creer_modele
+    longueur_apres = demi_journees[1][1]
+    heures_interieures = []
+    for seance in seances:
+        # bord ⇔ la séance couvre la première ou la dernière heure de la journée
+        bord = model.NewBoolVar(f"bord_{seance['intervalle'].Name()}")
+        matin = sum(lit for (_, i), lit in seance["demis"].items() if i == 0)
+        apres = sum(lit for (_, i), lit in seance["demis"].items() if i == 1)
+        est_matin = model.NewBoolVar(f"matin_{seance['intervalle'].Name()}")
+        model.Add(est_matin == matin)
+        est_apres = model.NewBoolVar(f"apres_{seance['intervalle'].Name()}")
+        model.Add(est_apres == apres)
+        model.AddImplication(bord, seance["presence"])
+        model.Add(seance["decalage"] == 0).OnlyEnforceIf([bord, est_matin])
+        model.Add(seance["decalage"] + seance["duree"] == longueur_apres).OnlyEnforceIf([bord, est_apres])
+        model.Add(seance["decalage"] >= 1).OnlyEnforceIf([bord.Not(), est_matin])
+        model.Add(seance["decalage"] + seance["duree"] <= longueur_apres - 1).OnlyEnforceIf([bord.Not(), est_apres])
+        heures_interieures.append(len(seance["classes"]) * (seance["duree"] * seance["presence"] - bord))
+
+    nb_creneaux_interieurs = len(CLASSES) * len(JOURS) * (len(HEURES) - 2) * len(SEMAINES)
+    total_permanence = model.NewIntVar(0, nb_creneaux_interieurs, "total_permanence")
+    model.Add(total_permanence == nb_creneaux_interieurs - sum(heures_interieures))
 
-    # Interdire tout cours pendant le créneau déjeuner assigné
-    for semaine in SEMAINES:
-        for cl, h_dej in classe_creneau_dej.items():
-            for j in range(len(JOURS)):
-                model.Add(emploi_du_temps[semaine][(cl, j, h_dej)] == 0)
+    penalites_preferences = []
+    for prof, prefs in PREFERENCES_PROFS.items():
+        for seance in seances:
+            concernees = sum(
+                1 for cl in seance["classes"] if prof in profs_possibles(seance["matiere"], cl[:2])
+            )
+            if not concernees:
+                continue
+            for jour, heures in prefs.items():
+                if jour not in JOURS:
+                    continue
+                for h in heures:
+                    couvre = model.NewBoolVar(f"pref_{prof}_{jour}_{h}_{seance['intervalle'].Name()}")
+                    hors = model.NewOptionalFixedSizeIntervalVar(
+                        JOURS.index(jour) * pas_jour + h, 1, couvre.Not(), f"hors_pref_{couvre.Name()}"
+                    )
+                    model.AddNoOverlap([seance["intervalle"], hors])
+                    penalites_preferences.append(concernees * couvre)
 
-    # Contrainte préférentielle : éviter les journées avec un cartable trop lourd (par niveau)
-    # On pénalise les journées où la somme des "poids" des matières dépasse un seuil toléré
     penalites_surcharge_poids = []
     poids_matieres_par_niveau = config.get("poids_matieres_par_niveau", {})
     seuils_par_niveau = config.get("poids_cartable_max_somme_par_niveau", {})
     seuil_global = config.get("poids_cartable_max_somme", 6.0)
-
-    for classe in CLASSES_BASE:
-        niveau = classe[:2]
+    for cl in CLASSES_BASE:
+        niveau = cl[:2]
         poids_par_niveau = poids_matieres_par_niveau.get(niveau, {})
         seuil_max = seuils_par_niveau.get(niveau, seuil_global)
         if seuil_max <= 0:
             continue
-
-        # On ajoute une marge de 5% puis on multiplie par 10 pour rester en IntVar
         seuil_tolerant_x10 = int(seuil_max * 1.05 * 10)
-
         for semaine in SEMAINES:
-            for j, jour in enumerate(JOURS):
-                poids_total_jour_vars = []
+            seances_cl = [
+                s for grp in [cl] + [f"{cl}{sfx}" for sfx in SOUS_GROUPES_SUFFIXES] if grp in CLASSES
+                for s in seances_de(grp, semaine)
+            ]
+            for j in range(len(JOURS)):
+                termes = [
+                    int(poids_par_niveau.get(s["matiere"], 0.0) * 10) * s["duree"] * jour_de(s, j)
+                    for s in seances_cl if int(poids_par_niveau.get(s["matiere"], 0.0) * 10)
+                ]
+                if not termes:
+                    continue
+                somme_poids_jour = model.NewIntVar(0, 10000, f"somme_poids_jour_{cl}_{j}_{semaine}")
+                model.Add(somme_poids_jour == sum(termes))
+                surcharge = model.NewIntVar(0, 10000, f"surcharge_poids_jour_{cl}_{j}_{semaine}")
+                model.AddMaxEquality(surcharge, [somme_poids_jour - seuil_tolerant_x10, 0])
+                penalites_surcharge_poids.append(surcharge)
+
+    poids_pref = 1
+    poids_surcharge = 5
+    total_preferences = model.NewIntVar(0, max(0, sum(10 * len(SEMAINES) for _ in penalites_preferences)), "total_preferences")
+    model.Add(total_preferences == sum(penalites_preferences))
+    total_surcharge_cartable = model.NewIntVar(0, 10000 * len(penalites_surcharge_poids), "total_surcharge_cartable")
+    model.Add(total_surcharge_cartable == sum(penalites_surcharge_poids))
+    model.Minimize(
+        total_permanence
+        + poids_pref * total_preferences
+        + poids_surcharge * total_surcharge_cartable
+    )
 
+    # ─── Variables lues par la fusion et les vérifications
+    emploi_du_temps = EmploiDuTempsIntervalles(seances, len(model.Proto().variables), pas_jour)
+    emploi_du_temps_salles = {
+        semaine: {key: 0 for key in emploi_du_temps[semaine]} for semaine in SEMAINES
+    }
+    emploi_du_temps_profs = {semaine: {} for semaine in SEMAINES}
+    for (cl, matiere), var in affectation_prof.items():
+        for semaine in SEMAINES:
+            for j in range(len(JOURS)):
                 for h in range(len(HEURES)):
-                    # Si jour sans après-midi, on ignore les créneaux h > 4
-                    if jour in JOURS_SANS_APRES_MIDI and h > 4:
-                        continue
+                    emploi_du_temps_profs[semaine][(cl, j, h, matiere, semaine)] = var
 
-                    # On crée une liste de (BoolVar, poids)
-                    poids_h_terms = []
-                    mat_index = emploi_du_temps[semaine][(classe, j, h)]
-                    # Pesée de chaque matière selon son poids configuré
-                    for m, matiere in enumerate(MATIERES):
-                        code_mat = m + 1
-                        # Poids pour la matière au niveau courant
-                        poids = poids_par_niveau.get(matiere, 0.0)
-
-                        b = model.NewBoolVar(f"poids_{classe}_{j}_{h}_{matiere}_{semaine}")
-                        model.Add(mat_index == code_mat).OnlyEnforceIf(b)
-                        model.Add(mat_index != code_mat).OnlyEnforceIf(b.Not())
-                        poids_h_terms.append((b, poids))
-
-                    # Inclusion des sous-groupes dans le calcul de poids si présents
-                    for suffixe in SOUS_GROUPES_SUFFIXES:
-                        grp = f"{classe}{suffixe}"
-                        if grp in CLASSES:
-                            mat_index_sg = emploi_du_temps[semaine][(grp, j, h)]
-                            for m, matiere in enumerate(MATIERES):
-                                code_mat = m + 1
-                                poids = poids_par_niveau.get(matiere, 0.0)
-
-                                b_sg = model.NewBoolVar(f"poids_{grp}_{j}_{h}_{matiere}_{semaine}")
-                                model.Add(mat_index_sg == code_mat).OnlyEnforceIf(b_sg)
-                                model.Add(mat_index_sg != code_mat).OnlyEnforceIf(b_sg.Not())
-                                poids_h_terms.append((b_sg, poids))
-
-                    if poids_h_terms:
-                        poids_total_h = model.NewIntVar(0, 1000, f"poids_total_{classe}_{j}_{h}_{semaine}")
-                        # On convertit poids en entier (x10) pour la somme
-                        model.Add(poids_total_h == sum(int(p * 10) * var for var, p in poids_h_terms))
-                        poids_total_jour_vars.append(poids_total_h)
+    print(f"⏱️ Modèle à intervalles : {len(seances)} séances candidates")
+    return model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
 
-                if poids_total_jour_vars:
-                    somme_poids_jour = model.NewIntVar(0, 10000, f"somme_poids_jour_{classe}_{j}_{semaine}")
-                    model.Add(somme_poids_jour == sum(poids_total_jour_vars))
 
-                    surcharge = model.NewIntVar(0, 10000, f"surcharge_poids_jour_{classe}_{j}_{semaine}")
-                    # surcharge = max(somme_poids_jour – seuil_tolerant_x10, 0)
-                    model.AddMaxEquality(surcharge, [somme_poids_jour - seuil_tolerant_x10, 0])
-                    penalites_surcharge_poids.append(surcharge)
+class TableauxSolution:
+    """
+    Solution lue une seule fois, en tableaux NumPy d'entiers indexés
+    [semaine, classe, jour, heure] dans l'ordre de SEMAINES, CLASSES, JOURS et HEURES.
+
+    Attributs:
+        matiere (np.ndarray): indice de la matière (0 = pas de cours).
+        salle (np.ndarray): indice de la salle (0 = aucune).
+        prof (np.ndarray): rang du prof choisi dans la liste des profs de la matière
+            au niveau (-1 si le créneau n'a pas de variable de prof).
+    """
 
-    # 🔁 On ajoute ces pénalités à l’objectif
-    poids_surcharge = 5  # Pondération des pénalités de surcharge de cartable
+    def __init__(self, matiere, salle, prof):
+        self.matiere = matiere
+        self.salle = salle
+        self.prof = prof
 
-    # # ─── Minimiser les différences entre Semaine A et Semaine B ─────────
-    # diff_vars = []
-    # for cl in CLASSES:
-    #     for j in range(len(JOURS)):
-    #         for h in range(len(HEURES)):
-    #             # les deux variables IntVar pour le même créneau en A et B
-    #             varA = emploi_du_temps["Semaine A"][(cl, j, h)]
-    #             varB = emploi_du_temps["Semaine B"][(cl, j, h)]
-    #             # booléen qui vaut 1 si varA != varB
-    #             b = model.NewBoolVar(f"diff_{cl}_{j}_{h}")
-    #             # b → varA != varB  et  ¬b → varA == varB
-    #             model.Add(varA != varB).OnlyEnforceIf(b)
-    #             model.Add(varA == varB).OnlyEnforceIf(b.Not())
-    #             diff_vars.append(b)
+    def semaine(self, semaine):
+        """Tableaux (matiere, salle, prof) [classe, jour, heure] d'une semaine."""
+        s = SEMAINES.index(semaine)
+        return self.matiere[s], self.salle[s], self.prof[s]
 
-    # poids_semaines = 1  # ajustez ce coefficient selon l'importance de la similarité
 
+def valeurs_solution(solver):
+    """Valeurs de toutes les variables d'une solution (CpSolver ou SolutionFigee), par Index()."""
+    if isinstance(solver, SolutionFigee):
+        return np.asarray(solver.valeurs, dtype=np.int64)
+    return np.asarray(solver.ResponseProto().solution, dtype=np.int64)
 
 
-    model.Minimize(
-        total_permanence
-        + poids_pref * sum(penalites_preferences)
-        + poids_surcharge * sum(penalites_surcharge_poids)
- #       + poids_semaines * sum(diff_vars)
-    )
+# Plan d'extraction du dernier modèle lu : (dictionnaires du modèle, indices)
+_plan_extraction = None
 
 
-    return model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
+def plan_extraction(emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs):
+    """
+    Indices des variables de matière, de salle et de prof dans le vecteur des valeurs.
 
+    Ne dépend que du modèle : calculé une fois puis réutilisé tant que les mêmes
+    dictionnaires de variables sont passés. Les entiers constants (salles du modèle
+    à intervalles) sont rangés en tête du vecteur, avant les valeurs du modèle.
 
-def compter_volume_matiere_avec_sousgroupes(emploi_du_temps, solver):
+    Retourne:
+        tuple: (constantes, indices_matiere, indices_salle, cles_prof) où cles_prof est
+        un tableau [n, 6] de (semaine, classe, jour, heure, indice de la matière, indice de la variable).
     """
-    Calcule le nombre d'heures planifiées par matière pour chaque classe de base,
-    en incluant les contributions des sous-groupes **uniquement** si la classe de base
-    est listée dans 'groupes_dependants' pour ce sous-groupe. Les volumes attendus
-    ne contiennent pas les sous-groupes dont la classe de base n'est pas dépendante.
+    global _plan_extraction
+    modele = (emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs)
+    if _plan_extraction is not None and all(a is b for a, b in zip(_plan_extraction[0], modele)):
+        return _plan_extraction[1]
+
+    forme = (len(SEMAINES), len(CLASSES), len(JOURS), len(HEURES))
+    constantes = [
+        var for semaine in SEMAINES
+        for var in emploi_du_temps_salles[semaine].values() if isinstance(var, int)
+    ]
+    decalage = len(constantes)
+    rangs_constantes = iter(range(decalage))
+
+    def indice(var):
+        if isinstance(var, int):
+            return next(rangs_constantes)
+        return var.Index() + decalage
+
+    indices_matiere = np.empty(forme, dtype=np.int64)
+    indices_salle = np.empty(forme, dtype=np.int64)
+    for s, semaine in enumerate(SEMAINES):
+        for c, classe in enumerate(CLASSES):
+            for j in range(len(JOURS)):
+                for h in range(len(HEURES)):
+                    key = (classe, j, h)
+                    indices_matiere[s, c, j, h] = indice(emploi_du_temps[semaine][key])
+                    indices_salle[s, c, j, h] = indice(emploi_du_temps_salles[semaine][key])
+
+    rang_classe = {classe: c for c, classe in enumerate(CLASSES)}
+    cles_prof = np.asarray([
+        (s, rang_classe[cl], j, h, MATIERES.index(m) + 1, indice(var))
+        for s, semaine in enumerate(SEMAINES)
+        for (cl, j, h, m, _), var in emploi_du_temps_profs[semaine].items()
+    ], dtype=np.int64).reshape(-1, 6)
+
+    plan = (np.asarray(constantes, dtype=np.int64), indices_matiere, indices_salle, cles_prof)
+    _plan_extraction = (modele, plan)
+    return plan
+
+
+def extraire_solution(solver, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs):
     """
-    volumes = {}
+    Extrait en une passe les matières, salles et profs de toute la solution
+    (les deux semaines) dans un TableauxSolution.
 
-    for classe in CLASSES:
-        # On détecte si c'est un sous-groupe et on filtre selon 'groupes_dependants'
-        suffixe = next((s for s in SOUS_GROUPES_SUFFIXES if classe.endswith(s)), None)
-        if suffixe:
-            mat_sg      = SOUS_GROUPES_SUFFIXES[suffixe]
-            classe_base = classe[:-len(suffixe)]
-            # on ignore les sous-groupes dont la classe de base n'est pas dépendante
-            if classe_base not in SOUS_GROUPES_CONFIG[mat_sg].get("groupes_dependants", []):
-                continue
-        else:
-            classe_base = classe
+    Les valeurs sont lues d'un seul accès NumPy dans le vecteur des valeurs, aux
+    indices donnés par plan_extraction, au lieu d'un solver.Value() par créneau et par lecture.
 
-        niveau = classe_base[:2]
+    Arguments:
+        solver (CpSolver ou SolutionFigee): solution à lire.
+        emploi_du_temps (dict): variables matières par semaine et créneau.
+        emploi_du_temps_salles (dict): variables salles (ou entiers constants).
+        emploi_du_temps_profs (dict): variables d'indice du prof par (classe, j, h, matière, semaine).
 
-        # Initialisation du compteur et des attendus (filtrage des sous-groupes)
-        if classe_base not in volumes:
-            # On ne garde l’attendu de chaque matière que si :
-            #  - c’est une matière “classique”
-            #  - ou c’est un sous-groupe MAT pour lequel la classe_base est dépendante
-            attendu = {}
-            for mat, vol in VOLUME_HORAIRE.get(niveau, {}).items():
-                if mat in SOUS_GROUPES_SUFFIXES.values():
-                    # mat est un sous-groupe → inclure seulement si dépendante
-                    if classe_base in SOUS_GROUPES_CONFIG[mat].get("groupes_dependants", []):
-                        attendu[mat] = vol
-                else:
-                    attendu[mat] = vol
+    Retourne:
+        TableauxSolution: les tableaux matiere, salle et prof.
+    """
+    constantes, indices_matiere, indices_salle, cles_prof = plan_extraction(
+        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
+    )
+    valeurs = np.concatenate([constantes, valeurs_solution(solver)])
+    matiere = valeurs[indices_matiere]
+    salle = valeurs[indices_salle]
+    prof = np.full(matiere.shape, -1, dtype=np.int64)
+    if len(cles_prof):
+        s, c, j, h, m, idx = cles_prof.T
+        # Seule la variable de prof de la matière placée au créneau est lue
+        place = matiere[s, c, j, h] == m
+        prof[s[place], c[place], j[place], h[place]] = valeurs[idx[place]]
+    return TableauxSolution(matiere, salle, prof)
 
-            volumes[classe_base] = {
-                "par_matiere": {m: 0 for m in MATIERES},
-                "attendus":    attendu
-            }
 
-        # Comptage heure par heure
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES)):
-                key = (classe, j, h)
-                if key in emploi_du_temps:
-                    val = solver.Value(emploi_du_temps[key])
-                    if val != 0:
-                        matiere = MATIERES[val - 1]
-                        volumes[classe_base]["par_matiere"][matiere] += 1
-
-    # Affichage des écarts
-    print("\n🚨 Écarts de volume horaire :")
-    for classe_base, info in volumes.items():
-        niveau = classe_base[:2]
-        erreurs = []
-        for matiere, nb_heures in info["par_matiere"].items():
-            attendu = info["attendus"].get(matiere)
-            if isinstance(attendu, int) and nb_heures != attendu:
-                erreurs.append((matiere, nb_heures, attendu))
+def rangs_classes(classes):
+    """Indices dans CLASSES (axe classe des tableaux de TableauxSolution) d'une liste de classes."""
+    return [CLASSES.index(c) for c in classes]
+
+
+def prof_du_creneau(matiere, niveau, rang):
+    """
+    Prof qui assure un cours : celui du rang choisi par le solveur, ou le premier
+    prof possible si le créneau n'a pas de variable de prof (rang = -1).
+    """
+    profs = profs_possibles(matiere, niveau)
+    return profs[max(rang, 0)] if profs else None
+
+
+def profs_des_creneaux(edt, profs, classes):
+    """
+    Nom du prof de chaque cours des classes données, pour une semaine.
+
+    Arguments:
+        edt (np.ndarray): matières [classe, jour, heure] de la semaine.
+        profs (np.ndarray): rangs des profs [classe, jour, heure] de la semaine.
+        classes (list): classes à lire (dans cet ordre).
+
+    Retourne:
+        np.ndarray: tableau objet [classe de la liste, jour, heure] (None sans cours).
+    """
+    rangs = rangs_classes(classes)
+    noms = np.full((len(classes), len(JOURS), len(HEURES)), None, dtype=object)
+    connus = {}  # (niveau, indice matière, rang) → prof
+    matieres, rangs_profs = edt[rangs].tolist(), profs[rangs].tolist()
+    for k, j, h in np.argwhere(edt[rangs]).tolist():
+        cle = (classes[k][:2], matieres[k][j][h], rangs_profs[k][j][h])
+        if cle not in connus:
+            connus[cle] = prof_du_creneau(MATIERES[cle[1] - 1], cle[0], cle[2])
+        noms[k, j, h] = connus[cle]
+    return noms
 
-        if erreurs:
-            print(f"\n❌ {classe_base} (niveau {niveau})")
-            for matiere, nb, att in erreurs:
-                print(f"   - {matiere:15}: {nb}h au lieu de {att}h ({nb - att:+})")
-    return volumes
 
 # Vérification des volumes horaires par matière
-def compter_volume_matiere_avec_sousgroupes(emploi_du_temps, solver):
+def compter_volume_matiere_avec_sousgroupes(edt):
     """
     Calcule le nombre d'heures planifiées par matière pour chaque classe de base,
     en incluant les contributions des sous-groupes **uniquement** si la classe de base
     est listée dans 'groupes_dependants' pour ce sous-groupe.
     (Version légère pour la vérification des contraintes.)
+
+    Arguments:
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
     """
     volumes = {}
+    # Nombre d'heures de chaque indice de matière, pour chaque classe (colonne 0 = trous)
+    heures = np.stack([
+        np.bincount(edt[c].ravel(), minlength=len(MATIERES) + 1) for c in range(len(CLASSES))
+    ])
 
     # On parcourt toutes les classes, y compris les sous-groupes
-    # et on compte les heures planifiées par matière.
-    for classe in CLASSES:
+    for c, classe in enumerate(CLASSES):
         suffixe = next((s for s in SOUS_GROUPES_SUFFIXES if classe.endswith(s)), None)
         if suffixe:
             mat_sg      = SOUS_GROUPES_SUFFIXES[suffixe]
@@ -2279,7 +3404,6 @@ def compter_volume_matiere_avec_sousgroupes(emploi_du_temps, solver):
         # (ex. "6e1" → "6e")
         niveau = classe_base[:2]
 
-        # Initialisation du compteur et des attendus
         # On initialise le volume pour la classe de base si pas déjà fait
         if classe_base not in volumes:
             # même filtrage des attendus
@@ -2293,31 +3417,27 @@ def compter_volume_matiere_avec_sousgroupes(emploi_du_temps, solver):
                     # Matière classique, on l'inclut
                     attendu[mat] = vol
             volumes[classe_base] = {
-                "par_matiere": {m: 0 for m in MATIERES},
+                "par_matiere": np.zeros(len(MATIERES) + 1, dtype=np.int64),
                 "attendus":    attendu
             }
 
-        # Comptage des heures assignées
-        for j in range(len(JOURS)):
-            # On parcourt les créneaux horaires
-            for h in range(len(HEURES)):
-                key = (classe, j, h)
-                # On vérifie si la clé existe dans l'emploi du temps et on récupère la valeur assignée
-                if key in emploi_du_temps:
-                    val = solver.Value(emploi_du_temps[key])
-                    # Si la valeur n'est pas 0, on incrémente le compteur pour la matière correspondante
-                    # (val = 0 signifie pas de cours à ce créneau)
-                    if val != 0:
-                        mat = MATIERES[val - 1]
-                        volumes[classe_base]["par_matiere"][mat] += 1
-    
+        # Heures de la classe (ou du sous-groupe) ajoutées à sa classe de base
+        volumes[classe_base]["par_matiere"] += heures[c]
+
+    # Conversion en dictionnaire matière → nombre d'heures
+    for info in volumes.values():
+        info["par_matiere"] = {m: int(info["par_matiere"][i]) for i, m in enumerate(MATIERES, 1)}
     return volumes # Retourne le dictionnaire des volumes par classe et matière
 
 # Vérification des permanences
-def verifier_permanence(solver, emploi_un_semaine, capacite_perm):
+def verifier_permanence(edt, capacite_perm):
     """
     Vérifie la gestion des permanences pour une semaine donnée en excluant
     dynamiquement les créneaux déjeuner selon la capacité de la cantine.
+
+    Arguments:
+        edt (np.ndarray): matières [classe, jour, heure] de la semaine.
+        capacite_perm (int): capacité de la salle de permanence.
     """
     global avancement
     res = resultats_contraintes["permanence"]
@@ -2356,7 +3476,18 @@ def verifier_permanence(solver, emploi_un_semaine, capacite_perm):
         # capacité suffisante → on ne bloque que 12h-13h
         ignored = {h_dej}
 
-    # 5) boucle de vérification
+    # 5) une classe de base est libre quand ni elle ni ses sous-groupes n'ont cours
+    libre = np.stack([
+        (edt[rangs_classes([cl] + [
+            f"{cl}{sfx}"
+            for sfx in SOUS_GROUPES_SUFFIXES
+            if f"{cl}{sfx}" in CLASSES
+        ])] == 0).all(axis=0)
+        for cl in CLASSES_BASE
+    ])
+    capacites = np.array([CAPACITES_CLASSES.get(cl, 0) for cl in CLASSES_BASE])
+
+    # 6) boucle de vérification
     for j, jour in enumerate(JOURS):
         for h in range(nb_heures):
             # on saute : première, dernière, créneaux déjeuner dynamiques,
@@ -2368,25 +3499,14 @@ def verifier_permanence(solver, emploi_un_semaine, capacite_perm):
                 or (jour in JOURS_SANS_APRES_MIDI and h > h_dej)
             ):
                 continue
-            
-            # on vérifie les classes de base et leurs sous-groupes
-            # pour chaque classe de base, on regarde les sous-groupes
-            libres = []
-            for cl in CLASSES_BASE:
-                groupes = [cl] + [
-                    f"{cl}{sfx}"
-                    for sfx in SOUS_GROUPES_SUFFIXES
-                    if f"{cl}{sfx}" in CLASSES
-                ]
-                if all(solver.Value(emploi_un_semaine[(g, j, h)]) == 0 for g in groupes):
-                    libres.append((cl, CAPACITES_CLASSES.get(cl, 0)))
 
-            if not libres: # aucune classe libre à ce créneau
+            libres = np.flatnonzero(libre[:, j, h])
+            if not len(libres): # aucune classe libre à ce créneau
                 continue
-            
+
             # on calcule le nombre total d'élèves libres
             # et on compare à la capacité de permanence
-            total_libres = sum(cap for _, cap in libres)
+            total_libres = int(capacites[libres].sum())
             res["total"] += 1
 
             # on vérifie si le total respecte la capacité de permanence
@@ -2394,33 +3514,29 @@ def verifier_permanence(solver, emploi_un_semaine, capacite_perm):
             if total_libres <= capacite_perm:
                 res["respectees"] += 1
                 avancement += 1
-                #print(f"[Run {current_seed}] Progression (verifier_permanence) : {avancement}")
             else:
-                clist = ", ".join(f"{cl}({cap}p)" for cl, cap in libres)
+                clist = ", ".join(f"{CLASSES_BASE[i]}({capacites[i]}p)" for i in libres)
                 res["details"].append(
                     f"{jour} {HEURES[h]} : {total_libres} élèves en perm (max {capacite_perm}) — {clist}"
                 )
 
 # Vérification du volume horaire planifié par classe
-def verifier_volume_horaire(emploi_du_temps, solver):
+def verifier_volume_horaire(edt):
     """
     Vérifie que le volume horaire planifié par classe correspond aux volumes attendus.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (pour une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
     """
 
     global avancement
     # On initialise le compteur global d'avancement et les résultats de cette contrainte
     res = resultats_contraintes["volume_horaire"]
-    # Calcul des volumes planifiés en incluant les sous-groupes si pertinents 
-    volumes = compter_volume_matiere_avec_sousgroupes(emploi_du_temps, solver)
+    # Calcul des volumes planifiés en incluant les sous-groupes si pertinents
+    volumes = compter_volume_matiere_avec_sousgroupes(edt)
 
     # Parcours de chaque classe et de ses informations de volume
     for classe, info in volumes.items():
-        # Extraction du niveau (ex. "6e", "5e") pour contextualiser les données
-        niveau = classe[:2]
         # Pour chaque matière, comparer heures planifiées vs attendues
         for matiere, nb_heures in info["par_matiere"].items():
             # Récupération du volume attendu pour cette matière
@@ -2433,55 +3549,41 @@ def verifier_volume_horaire(emploi_du_temps, solver):
                     # Si le volume correspond, on marque comme respecté
                     res["respectees"] += 1
                     avancement += 1
-                    # Affichage de l'avancement pour le suivi
-                    #print(f"[Run {current_seed}] Progression (verifier_volume_horaire) : {avancement}")
                 else:
                     # Si le volume ne correspond pas, on enregistre l'erreur dans les détails pour un rapport ultérieur
                     res["details"].append(f"{classe} - {matiere} : {nb_heures}h au lieu de {attendu}h")
 
 # Vérification des jours sans après-midi
-def verifier_jours_sans_apres_midi(emploi_du_temps, solver, jours_sans_apres_midi):
+def verifier_jours_sans_apres_midi(edt, jours_sans_apres_midi):
     """
     Vérifie que pour tous les jours sans après-midi, aucun cours n'est planifié
     à partir du créneau d'indice 5 (13h-14h et suivants).
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         jours_sans_apres_midi (list): liste des jours interdits l'après-midi.
     """
     global avancement
     # On récupère le conteneur de résultats pour cette contrainte
     res = resultats_contraintes["jours_sans_apres_midi"]
-    for classe in CLASSES:
-        # Boucle sur chaque jour pour la classe
-        for j, jour in enumerate(JOURS):
-            if jour not in jours_sans_apres_midi:
-                # Si le jour n'est pas interdit l'après-midi, on passe au suivant
-                continue
-            # Vérification des créneaux de 13h (index 5) à la fin
-            for h in range(5, len(HEURES)):
-                # Lecture de la matière effective au créneau
-                mat_index = solver.Value(emploi_du_temps[(classe, j, h)])
-                res["total"] += 1  # On compte cette vérification
-                if mat_index == 0:
-                    # Pas de cours → contrainte respectée
-                    res["respectees"] += 1
-                    avancement += 1
-                    #print(f"[Run {current_seed}] Progression (verifier_jour_sans_apres_midi) : {avancement}")
-                else:
-                    # Violation détectée : on note la matière interdite
-                    mat = MATIERES[mat_index-1]
-                    res["details"].append(f"{classe} - {jour} {HEURES[h]} : Cours interdit ({mat})")
-
-
-def verifier_indisponibilites_profs(emploi_un_semaine, solver, indispos_profs):
+    jours = [j for j, jour in enumerate(JOURS) if jour in jours_sans_apres_midi]
+    # Créneaux de 13h (index 5) à la fin des jours concernés, pour toutes les classes
+    apres_midi = edt[:, jours, 5:]
+    res["total"] += apres_midi.size
+    res["respectees"] += int((apres_midi == 0).sum())
+    avancement += int((apres_midi == 0).sum())
+    # Violations : on note la matière interdite
+    for c, k, h in np.argwhere(apres_midi != 0):
+        mat = MATIERES[apres_midi[c, k, h] - 1]
+        res["details"].append(f"{CLASSES[c]} - {JOURS[jours[k]]} {HEURES[h + 5]} : Cours interdit ({mat})")
+
+
+def verifier_indisponibilites_profs(edt, indispos_profs):
     """
     Vérifie que pour chaque prof, aucun cours n'est planifié aux créneaux où il est indisponible.
 
     Arguments:
-        emploi_un_semaine (dict): variables IntVar matières par créneau (pour cette semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         indispos_profs (dict): mapping professeur → jours → liste d'heures interdites.
     """
     global avancement
@@ -2495,8 +3597,10 @@ def verifier_indisponibilites_profs(emploi_un_semaine, solver, indispos_profs):
                 # Ignorer si le jour n'existe pas dans la liste
                 continue
             jour_index = JOURS.index(jour_str)
+            # Créneaux existants uniquement
+            heures = [h for h in heures if 0 <= h < len(HEURES)]
 
-            for classe in CLASSES:
+            for c, classe in enumerate(CLASSES):
                 niveau_classe = classe[:2]
                 # On vérifie si ce prof peut enseigner cette matière/niveau
                 for matiere, prof_ref in PROFESSEURS.items():
@@ -2514,36 +3618,26 @@ def verifier_indisponibilites_profs(emploi_un_semaine, solver, indispos_profs):
                         continue  # Si le prof n'enseigne pas ici, on passe
 
                     mat_idx = MATIERES.index(matiere) + 1
-                    # On teste chaque créneau où le prof est indisponible
-                    for h in heures:
-                        key = (classe, jour_index, h)
-                        if key not in emploi_un_semaine:
-                            # Créneau non concerné par ce planning
-                            continue
-
-                        res["total"] += 1  # On compte cette vérification
-                        val_creneau = solver.Value(emploi_un_semaine[key])
-                        if val_creneau != mat_idx:
-                            # Aucune matière planifiée → contrainte respectée
-                            res["respectees"] += 1
-                            avancement += 1
-                            #print(f"[Run {current_seed}] Progression (verifier_indisponibilite_prof) : {avancement}")
-                        else:
-                            # Violation : le cours du prof est planifié alors qu'il est indisponible
-                            res["details"].append(
-                                f"{classe} - {jour_str} {HEURES[h]} : "
-                                f"{matiere} planifié(e) alors que {prof} est indisponible"
-                            )
+                    # On teste d'un coup les créneaux où le prof est indisponible
+                    places = edt[c, jour_index, heures] == mat_idx
+                    res["total"] += len(heures)
+                    res["respectees"] += len(heures) - int(places.sum())
+                    avancement += len(heures) - int(places.sum())
+                    # Violation : le cours du prof est planifié alors qu'il est indisponible
+                    for k in np.flatnonzero(places):
+                        res["details"].append(
+                            f"{classe} - {jour_str} {HEURES[heures[k]]} : "
+                            f"{matiere} planifié(e) alors que {prof} est indisponible"
+                        )
 
 # Vérification du volume maximal de cours par professeur
-def verifier_volume_par_professeur(emploi_du_temps, solver, volume_par_prof):
+def verifier_volume_par_professeur(edt, volume_par_prof):
     """
     Vérifie que chaque professeur n'excède pas le nombre maximal de cours
     qui lui est assigné (volume_par_prof).
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         volume_par_prof (dict): mapping prof → volume max.
     """
     global avancement
@@ -2552,33 +3646,15 @@ def verifier_volume_par_professeur(emploi_du_temps, solver, volume_par_prof):
     # Préparation d'un compteur par professeur concerné
     compteur = {prof: 0 for prof in volume_par_prof}
 
-    # Parcours de chaque classe de base uniquement
-    for classe in CLASSES_BASE:
-        niveau = classe[:2]
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES)):
-                matiere_index = solver.Value(emploi_du_temps[(classe, j, h)])
-                if matiere_index == 0:
-                    # Pas de cours → on passe
-                    continue
-                matiere = MATIERES[matiere_index - 1]
-                prof_ref = PROFESSEURS[matiere]
-
-                # Détermination du professeur référent pour cette matière/niveau
-                if isinstance(prof_ref, dict):
-                    profs = prof_ref.get(niveau, [])
-                    if isinstance(profs, list) and profs:
-                        prof = profs[0]  # Choix du premier prof de la liste
-                    elif isinstance(profs, str):
-                        prof = profs    # Chaîne unique → on l'utilise directement
-                    else:
-                        prof = None     # Pas de prof disponible pour ce niveau
-                else:
-                    prof = prof_ref     # Cas simple : prof_ref est une chaîne ou liste
-
-                if prof in compteur:
-                    # Incrément du nombre de cours planifiés pour ce prof
-                    compteur[prof] += 1
+    # Parcours de chaque classe de base uniquement : heures par matière
+    for classe, c in zip(CLASSES_BASE, rangs_classes(CLASSES_BASE)):
+        heures = np.bincount(edt[c].ravel(), minlength=len(MATIERES) + 1)
+        for matiere_index in np.flatnonzero(heures[1:]) + 1:
+            # Professeur référent pour cette matière/niveau : le premier prof de la liste
+            prof = prof_du_creneau(MATIERES[matiere_index - 1], classe[:2], -1)
+            if prof in compteur:
+                # Incrément du nombre de cours planifiés pour ce prof
+                compteur[prof] += int(heures[matiere_index])
 
     # Vérification finale : comparaison avec les volumes maximaux
     for prof, nb_cours in compteur.items():
@@ -2586,7 +3662,6 @@ def verifier_volume_par_professeur(emploi_du_temps, solver, volume_par_prof):
         if nb_cours <= volume_par_prof.get(prof, float('inf')):
             res["respectees"] += 1
             avancement += 1
-            #print(f"[Run {current_seed}] Progression (verifier_volume_par_professeur) : {avancement}")
         else:
             # Violation : le prof a plus de cours que le volume autorisé
             res["details"].append(f"{prof} a {nb_cours} cours (max {volume_par_prof.get(prof)})")
@@ -2637,8 +3712,7 @@ def verifier_cantine(classe_creneau_dej, cap_cantine, ratio_demi, capacites_clas
 
 # Vérification du poids du cartable par jour
 def verifier_poids_cartable(
-    emploi_du_temps,
-    solver,
+    edt,
     poids_matieres_par_niveau,
     seuils_par_niveau,
     seuil_global,
@@ -2650,8 +3724,7 @@ def verifier_poids_cartable(
     (pour les matières planifiées) dépasse le seuil toléré pour la journée.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         poids_matieres_par_niveau (dict): mapping niveau → mapping matière → poids.
         seuils_par_niveau (dict): mapping niveau → seuil max toléré.
         seuil_global (float): seuil global si niveau non spécifié.
@@ -2662,7 +3735,13 @@ def verifier_poids_cartable(
     # Récupération du conteneur de résultats pour la surcharge de cartable
     res = resultats_contraintes["poids_cartable"]
 
-    for classe in CLASSES_BASE:
+    # Créneaux comptés : on ignore l'après-midi (h > 4) des jours interdits
+    comptes = np.ones((len(JOURS), len(HEURES)), dtype=bool)
+    for j, jour in enumerate(JOURS):
+        if jour in jours_sans_apres_midi:
+            comptes[j, 5:] = False
+
+    for classe, c in zip(CLASSES_BASE, rangs_classes(CLASSES_BASE)):
         niveau = classe[:2]
         # Obtenir les poids pour ce niveau ou utiliser le seuil global
         poids_par_niveau = poids_matieres_par_niveau.get(niveau, {})
@@ -2674,27 +3753,17 @@ def verifier_poids_cartable(
         # Ajout d'une marge de 5 % sur le seuil
         seuil_tolerance = seuil_max * 1.05
 
-        for j, jour in enumerate(JOURS):
-            poids_total_jour = 0.0
-
-            for h, heure in enumerate(HEURES):
-                # Ignorer l'après-midi si le jour est interdit
-                if jour in jours_sans_apres_midi and h > 4:
-                    continue
-
-                matiere_index = solver.Value(emploi_du_temps[(classe, j, h)])
-                if matiere_index > 0:
-                    matiere = MATIERES[matiere_index - 1]
-                    poids = poids_par_niveau.get(matiere, 0.0)
-                    # Accumulation du poids total pour la journée
-                    poids_total_jour += poids
+        # Poids de chaque indice de matière (0 = pas de cours), puis poids total par jour
+        poids = np.array([0.0] + [poids_par_niveau.get(m, 0.0) for m in MATIERES])
+        poids_jours = np.where(comptes, poids[edt[c]], 0.0).sum(axis=1)
 
+        for j, jour in enumerate(JOURS):
+            poids_total_jour = poids_jours[j]
             # Validation et comptage de cette journée
             res["total"] += 1
             if poids_total_jour <= seuil_tolerance:
                 res["respectees"] += 1
                 avancement += 1
-                #print(f"[Run {current_seed}] Progression (verifier_poids_cartable {pSemaine}) : {avancement}")
             else:
                 # Surcharge détectée → ajout du détail avec valeurs précises
                 res["details"].append(
@@ -2703,13 +3772,12 @@ def verifier_poids_cartable(
                 )
 
 # Vérification des indisponibilités de salles
-def verifier_indisponibilites_salles(emploi_du_temps, solver, indispos_salles, affectation_matiere_salle):
+def verifier_indisponibilites_salles(edt, indispos_salles, affectation_matiere_salle):
     """
     Vérifie qu'aucune salle indisponible n'est utilisée pour une matière qui y est assignée.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         indispos_salles (dict): mapping salle → jours → liste d'heures interdites.
         affectation_matiere_salle (dict): mapping matière/prof → salle assignée.
     """
@@ -2731,43 +3799,50 @@ def verifier_indisponibilites_salles(emploi_du_temps, solver, indispos_salles, a
                 if m in MATIERES and affectation_matiere_salle[m] == salle
             ]
 
-            for classe in CLASSES:
-                niveau = classe[:2]
+            # Matières de toutes les classes aux créneaux interdits : [classe, heure]
+            creneaux = edt[:, jour_index, heures]
+            for c, classe in enumerate(CLASSES):
                 # Pour chaque matière concernée, vérifier chaque créneau interdit
                 for matiere in matieres_concernees:
-                    mat_index = MATIERES.index(matiere) + 1
-                    for h in heures:
-                        # Comptage de la vérification
-                        res["total"] += 1
-                        val = solver.Value(emploi_du_temps[(classe, jour_index, h)])
-                        if val == mat_index:
-                            # Violation : cours planifié dans une salle indisponible
-                            res["details"].append(
-                                f"{classe} - {jour_str} {HEURES[h]} : Cours interdit en salle indisponible ({matiere} en {salle})"
-                            )
-                        else:
-                            # Contrainte respectée pour ce créneau
-                            res["respectees"] += 1
-                            avancement += 1
-                            #print(f"[Run {current_seed}] Progression (verifier_indisponibilites_salles) : {avancement}")
+                    places = creneaux[c] == MATIERES.index(matiere) + 1
+                    # Comptage des vérifications
+                    res["total"] += len(heures)
+                    res["respectees"] += len(heures) - int(places.sum())
+                    avancement += len(heures) - int(places.sum())
+                    # Violation : cours planifié dans une salle indisponible
+                    for k in np.flatnonzero(places):
+                        res["details"].append(
+                            f"{classe} - {jour_str} {HEURES[heures[k]]} : Cours interdit en salle indisponible ({matiere} en {salle})"
+                        )
+
+def suites_de_matieres(edt, pMatiere1, pMatiere2, choixClasse):
+    """
+    Repère les suites pMatiere1 → pMatiere2 (deux créneaux consécutifs d'un même jour).
+
+    Retourne:
+        np.ndarray: booléens [classe de choixClasse, jour, heure h] (suite entre h et h + 1).
+    """
+    matdex_1 = MATIERES.index(pMatiere1) + 1
+    matdex_2 = MATIERES.index(pMatiere2) + 1
+    cours = edt[rangs_classes(choixClasse)]
+    return (cours[:, :, :-1] == matdex_1) & (cours[:, :, 1:] == matdex_2)
 
 # Vérification de l'exclusion de séquence de matières
-def verifier_matExcluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pClasses=CLASSES_BASE):
+def verifier_matExcluSuite(edt, pMatiere1, pMatiere2, pClasses=None):
     """
     Vérifie l'absence de la séquence pMatiere1 → pMatiere2 dans l'emploi du temps des classes.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         pMatiere1 (str): matière 1 (ne doit pas être suivie de pMatiere2).
         pMatiere2 (str): matière 2.
         pClasses (list ou str): classes concernées ou préfixe.
     """
     global avancement
+    if pClasses is None:
+        pClasses = CLASSES_BASE
     # On initialise les compteurs de violations et totaux
     res = resultats_contraintes["mat_exclu_suite"]
-    matdex_1 = MATIERES.index(pMatiere1) + 1
-    matdex_2 = MATIERES.index(pMatiere2) + 1
 
     choixClasse = []
     if pClasses != CLASSES_BASE:
@@ -2778,22 +3853,14 @@ def verifier_matExcluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pClass
     else:
         choixClasse = pClasses
 
-    violations = 0
-    total_possibles = 0
-
-    for classe in choixClasse:
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES) - 1):
-                total_possibles += 1
-                # Lecture des matières consécutives
-                val_actuel = solver.Value(emploi_du_temps[(classe, j, h)])
-                val_suivant = solver.Value(emploi_du_temps[(classe, j, h + 1)])
-                if val_actuel == matdex_1 and val_suivant == matdex_2:
-                    # Violation détectée
-                    violations += 1
-                    res["details"].append(
-                        f"{classe} - {JOURS[j]} {HEURES[h]} suivi de {HEURES[h+1]} : {pMatiere1} → {pMatiere2}"
-                    )
+    suites = suites_de_matieres(edt, pMatiere1, pMatiere2, choixClasse)
+    total_possibles = suites.size
+    # Violations détectées
+    for k, j, h in np.argwhere(suites):
+        res["details"].append(
+            f"{choixClasse[k]} - {JOURS[j]} {HEURES[h]} suivi de {HEURES[h+1]} : {pMatiere1} → {pMatiere2}"
+        )
+    violations = int(suites.sum())
 
     # Mise à jour des compteurs globaux
     res["total"] += total_possibles
@@ -2801,17 +3868,15 @@ def verifier_matExcluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pClass
         # Si aucune violation, on compte toutes les opportunités comme respectées
         res["respectees"] += total_possibles
         avancement += 1
-        #print(f"[Run {current_seed}] Progression (verifier_matExcluSuite) : {avancement}")
     return violations == 0
 
 # Vérification de l'inclusion de séquence de matières
-def verifier_matIncluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pContrainte, pNBFois=1, pClasses=CLASSES_BASE):
+def verifier_matIncluSuite(edt, pMatiere1, pMatiere2, pContrainte, pNBFois=1, pClasses=None):
     """
     Vérifie la contrainte d'inclusion pMatiere1 → pMatiere2 selon le type de contrainte.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau.
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         pMatiere1 (str): matière de départ.
         pMatiere2 (str): matière d'arrivée.
         pContrainte (str): "forte", "moyenne" ou "faible".
@@ -2819,10 +3884,10 @@ def verifier_matIncluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pContr
         pClasses (list ou str): classes concernées ou préfixe.
     """
     global avancement
+    if pClasses is None:
+        pClasses = CLASSES_BASE
     # Initialisation des compteurs
     res = resultats_contraintes["mat_inclu_suite"]
-    matdex_1 = MATIERES.index(pMatiere1) + 1
-    matdex_2 = MATIERES.index(pMatiere2) + 1
 
     choixClasse = []
     if pClasses != CLASSES_BASE:
@@ -2833,24 +3898,14 @@ def verifier_matIncluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pContr
     else:
         choixClasse = pClasses
 
-    total_possibles = 0
-    total_suivi = 0
-
-    for classe in choixClasse:
-        occurences_classe = 0
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES) - 1):
-                total_possibles += 1
-                # Lecture des matières consécutives
-                val_actuel = solver.Value(emploi_du_temps[(classe, j, h)])
-                val_suivant = solver.Value(emploi_du_temps[(classe, j, h + 1)])
-                if val_actuel == matdex_1 and val_suivant == matdex_2:
-                    # Compte de l'occurrence
-                    occurences_classe += 1
-                    total_suivi += 1
-        if occurences_classe > 0:
-            # Enregistrement des détails par classe
-            res["details"].append(f"{classe} : {occurences_classe} occurrences de {pMatiere1} → {pMatiere2}")
+    suites = suites_de_matieres(edt, pMatiere1, pMatiere2, choixClasse)
+    total_possibles = suites.size
+    # Compte des occurrences par classe
+    occurences = suites.sum(axis=(1, 2))
+    total_suivi = int(occurences.sum())
+    for k in np.flatnonzero(occurences):
+        # Enregistrement des détails par classe
+        res["details"].append(f"{choixClasse[k]} : {occurences[k]} occurrences de {pMatiere1} → {pMatiere2}")
 
     res["total"] += total_possibles
 
@@ -2866,7 +3921,6 @@ def verifier_matIncluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pContr
         # Si la contrainte est respectée, on compte tous les cas possibles
         res["respectees"] += total_possibles
         avancement += 1
-        #print(f"[Run {current_seed}] Progression (verifier_matIncluSuite) : {avancement}")
     else:
         # Violation de la contrainte
         res["details"].append(
@@ -2875,13 +3929,12 @@ def verifier_matIncluSuite(emploi_du_temps, solver, pMatiere1, pMatiere2, pContr
     return respect
 
 # Vérification de la contrainte "Même Niveau, Même Cours"
-def verifier_memNivMemCours(emploi_du_temps, solver, pNiveau, pMatiere):
+def verifier_memNivMemCours(edt, pNiveau, pMatiere):
     """
     Vérifie la contrainte "Même Niveau, Même Cours" pour une matière donnée.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau.
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         pNiveau (str): niveau ciblé (ex. "6e").
         pMatiere (str): matière concernée.
     Retourne:
@@ -2901,29 +3954,23 @@ def verifier_memNivMemCours(emploi_du_temps, solver, pNiveau, pMatiere):
         return False
 
     res["total"] += 1  # une contrainte globale
-    violations = []
 
-    # Pour chaque créneau, vérifier si la matière est présente pour toutes les classes ou aucune
-    for j in range(len(JOURS)):
-        for h in range(len(HEURES)):
-            presences = []
-            for c in choixClasse:
-                val = solver.Value(emploi_du_temps[(c, j, h)])
-                presences.append(val == matdex_p)
-            # Détection de la violation si certains ont la matière et d’autres non
-            if any(presences) and not all(presences):
-                viol_classes = [choixClasse[i] for i, present in enumerate(presences) if present]
-                non_viol_classes = [choixClasse[i] for i, present in enumerate(presences) if not present]
-                violations.append(
-                    f"{JOURS[j]} {HEURES[h]} : {pMatiere} donné dans {viol_classes} "
-                    f"mais pas dans {non_viol_classes}"
-                )
+    # Présence de la matière [classe, jour, heure] : violation si certaines classes
+    # l'ont à un créneau et d'autres non
+    presences = edt[rangs_classes(choixClasse)] == matdex_p
+    violations = []
+    for j, h in np.argwhere(presences.any(axis=0) & ~presences.all(axis=0)):
+        viol_classes = [choixClasse[i] for i in np.flatnonzero(presences[:, j, h])]
+        non_viol_classes = [choixClasse[i] for i in np.flatnonzero(~presences[:, j, h])]
+        violations.append(
+            f"{JOURS[j]} {HEURES[h]} : {pMatiere} donné dans {viol_classes} "
+            f"mais pas dans {non_viol_classes}"
+        )
 
     if not violations:
         # Pas de violation → contrainte respectée
         res["respectees"] += 1
         avancement += 1
-        #print(f"[Run {current_seed}] Progression (verifier_memNIvMemCours) : {avancement}")
         return True
     else:
         # Enregistrement des détails des violations
@@ -2932,14 +3979,13 @@ def verifier_memNivMemCours(emploi_du_temps, solver, pNiveau, pMatiere):
 
 
 # Vérification des limites d'heures par étendue (journée ou demi-journée)
-def verifier_max_heures_par_etendue(emploi_du_temps, solver, max_heures_par_etendue):
+def verifier_max_heures_par_etendue(edt, max_heures_par_etendue):
     """
     Vérifie les contraintes de nombre maximal d'heures par étendue (journée ou demi-journée)
     définies dans max_heures_par_etendue.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         max_heures_par_etendue (list): liste de règles avec "niveau", "matiere", "max_heures", "etendue"
     """
     global avancement
@@ -2954,56 +4000,32 @@ def verifier_max_heures_par_etendue(emploi_du_temps, solver, max_heures_par_eten
         max_heures = regle["max_heures"]
         etendue = regle["etendue"]
 
-        for classe in CLASSES_BASE:
-            if not classe.startswith(niveau):
-                continue  # Ignore les classes d'un autre niveau
+        # Étendues contrôlées : la journée entière, ou le matin et l'après-midi séparés
+        if etendue == "journee":
+            etendues = [("", slice(None))]
+        elif etendue == "demi-journee":
+            etendues = [(" (matin)", slice(0, 4)), (" (apres)", slice(5, None))]
+        else:
+            continue
 
-            for j, jour in enumerate(JOURS):
-                if etendue == "journee":
-                    heures_cibles = range(len(HEURES))
-                    compteur = 0
-                    for h in heures_cibles:
-                        if (classe, j, h) in emploi_du_temps:
-                            if solver.Value(emploi_du_temps[(classe, j, h)]) == matiere_index:
-                                compteur += 1
-                    res["total"] += 1
-                    if compteur <= max_heures:
-                        # Limite journalière respectée
-                        res["respectees"] += 1
-                        avancement += 1
-                        #print(f"[Run {current_seed}] Progression (verifier_max_heures_par_etendue) : {avancement}")
-                    else:
-                        # Dépassement de la limite journalière
-                        res["details"].append(
-                            f"{classe} - {jour} : {compteur}h de {matiere} (max {max_heures})"
-                        )
+        classes = [classe for classe in CLASSES_BASE if classe.startswith(niveau)]
+        places = edt[rangs_classes(classes)] == matiere_index
+        # Heures de la matière [classe, jour, étendue]
+        compteurs = np.stack([places[:, :, bloc].sum(axis=2) for _, bloc in etendues], axis=2)
 
-                elif etendue == "demi-journee":
-                    matin = range(4)
-                    apres = range(5, len(HEURES))
-                    for label, heures in [("matin", matin), ("apres", apres)]:
-                        compteur = 0
-                        for h in heures:
-                            if (classe, j, h) in emploi_du_temps:
-                                if solver.Value(emploi_du_temps[(classe, j, h)]) == matiere_index:
-                                    compteur += 1
-                        res["total"] += 1
-                        if compteur <= max_heures:
-                            # Limite demi-journée respectée
-                            res["respectees"] += 1
-                            avancement += 1
-                            #print(f"[Run {current_seed}] Progression (verifier_max_heures_par_etendue) : {avancement}")
-                        else:
-                            # Dépassement de la limite demi-journée
-                            res["details"].append(
-                                f"{classe} - {jour} ({label}) : {compteur}h de {matiere} (max {max_heures})"
-                            )
+        res["total"] += compteurs.size
+        res["respectees"] += int((compteurs <= max_heures).sum())
+        avancement += int((compteurs <= max_heures).sum())
+        # Dépassements de la limite journalière ou demi-journée
+        for k, j, e in np.argwhere(compteurs > max_heures):
+            res["details"].append(
+                f"{classes[k]} - {JOURS[j]}{etendues[e][0]} : {compteurs[k, j, e]}h de {matiere} (max {max_heures})"
+            )
 
 
 # Vérification de la contrainte matHorairDonneV2
 def verifier_matHorairDonneV2(
-    emploi_du_temps,
-    solver,
+    edt,
     pClasses,
     pMatiere,
     pJour,
@@ -3012,12 +4034,11 @@ def verifier_matHorairDonneV2(
     pNBFois=None
 ):
     """
-    Vérifie la contrainte matHorairDonneV2 : 
+    Vérifie la contrainte matHorairDonneV2 :
     impose qu'une matière apparaisse un certain nombre de fois dans un horaire donné.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
         pClasses (str ou list): préfixe ou liste de classes.
         pMatiere (str, list ou sous-groupe): matière ou liste de matières ou clé de sous-groupe.
         pJour (str): jour ciblé (ex. "Jeudi").
@@ -3077,27 +4098,20 @@ def verifier_matHorairDonneV2(
     # Nombre d'occurrences attendu calculé
 
     # 6) Comptage et comparaison pour chaque classe
-    for classe in choixClasse:
+    indices_cibles = [MATIERES.index(m) + 1 for m in liste_matieres if m in MATIERES]
+    compteurs = np.isin(
+        edt[rangs_classes(choixClasse), jourdex_h, Hordex_Min:Hordex_Max + 1], indices_cibles
+    ).sum(axis=1)
+    for classe, compteur in zip(choixClasse, compteurs):
         if isinstance(pMatiere, str) and pMatiere in VOLUME_HORAIRE.get(classe[:-1], {}):
             max_possible = VOLUME_HORAIRE[classe[:-1]][pMatiere]
             nbFois = min(nbFois, max_possible)  # Ajustement si nécessaire
 
-        compteur = 0
-        for h in range(Hordex_Min, Hordex_Max + 1):
-            key = (classe, jourdex_h, h)
-            if key in emploi_du_temps:
-                val = solver.Value(emploi_du_temps[key])
-                if val > 0:
-                    mat = MATIERES[val - 1]
-                    if mat in liste_matieres:
-                        compteur += 1
-
         res["total"] += 1
         if compteur == nbFois:
             # Contrainte respectée pour cette classe et ce jour
             res["respectees"] += 1
             avancement += 1
-            #print(f"[Run {current_seed}] Progression (verifier_matHoraireDonneV2) : {avancement}")
         else:
             # Violation : nombre d'occurrences différent de l'attendu
             res["details"].append(
@@ -3106,19 +4120,14 @@ def verifier_matHorairDonneV2(
             )
 
 # Vérification des préférences de salle des professeurs
-def verifier_preferences_salle_professeur(solver,emploi_du_temps, emploi_du_temps_profs,JOURS,HEURES,MATIERES, PROFESSEURS, PREFERENCES_SALLE_PROF,):
+def verifier_preferences_salle_professeur(edt, profs, PREFERENCES_SALLE_PROF):
     """
     Vérifie que, lorsque un professeur ayant une préférence de salle donne cours,
     il est bien dans sa salle préférée (ou la salle assignée).
 
     Arguments:
-        solver (CpSolver): solveur ayant résolu le modèle.
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        emploi_du_temps_profs (dict): variables IntVar/BoolVar profs par créneau.
-        JOURS (list): liste des jours.
-        HEURES (list): liste des créneaux horaires.
-        MATIERES (list): liste des matières.
-        PROFESSEURS (dict): mapping matière → prof ou liste/dict de profs.
+        edt (np.ndarray): matières [classe, jour, heure] d'une semaine.
+        profs (np.ndarray): rangs des profs [classe, jour, heure] de la semaine.
         PREFERENCES_SALLE_PROF (dict): mapping prof → salle préférée.
     """
 
@@ -3130,137 +4139,70 @@ def verifier_preferences_salle_professeur(solver,emploi_du_temps, emploi_du_temp
     res["respectees"] = 0
     res["details"].clear()
 
-    # 2) Parcourir chaque classe, chaque jour et chaque heure
-    for classe in CLASSES:
-        niveau_classe = classe[:2]
-
-        for j, jour in enumerate(JOURS):
-            for h, heure in enumerate(HEURES):
-                # a) Obtenir l'index de la matière (0 = pas de cours)
-                mat_index = solver.Value(emploi_du_temps[(classe, j, h)])
-                if mat_index == 0:
-                    # Pas de cours à ce créneau → rien à vérifier
-                    continue
-
-                # b) Déterminer le nom de la matière et du professeur effectif
-                mat = MATIERES[mat_index - 1]
-                prof_ref = PROFESSEURS.get(mat)
-
-                # c) Trouver le professeur qui enseigne réellement ce créneau
-                if isinstance(prof_ref, str):
-                    # Contrainte simple : la matière est donnée par un seul prof
-                    prof_enseigne = prof_ref
-                else:
-                    # prof_ref est un dict {niveau → liste ou chaîne}
-                    profs_niv = prof_ref.get(niveau_classe)
-                    if isinstance(profs_niv, list):
-                        # Plusieurs profs possibles : on regarde la variable emploi_du_temps_profs
-                        key_prof = (classe, j, h, mat)
-                        if key_prof in emploi_du_temps_profs:
-                            idx = solver.Value(emploi_du_temps_profs[key_prof])
-                            prof_enseigne = profs_niv[idx]
-                        else:
-                            # Si aucune variable n'a été créée, on prend le premier de la liste
-                            prof_enseigne = profs_niv[0]
-                    else:
-                        # profs_niv est directement une chaîne
-                        prof_enseigne = profs_niv
-
-                # d) Si ce prof n'a pas de préférence de salle, on passe au suivant
-                if prof_enseigne not in PREFERENCES_SALLE_PROF:
-                    continue
+    # 2) Professeur qui enseigne chaque cours, puis cours des profs ayant une préférence
+    noms = profs_des_creneaux(edt, profs, CLASSES)
+    for c, j, h in zip(*np.nonzero(edt)):
+        prof_enseigne = noms[c, j, h]
+        if prof_enseigne not in PREFERENCES_SALLE_PROF:
+            continue
 
-                salle_preferee = PREFERENCES_SALLE_PROF[prof_enseigne]
+        salle_preferee = PREFERENCES_SALLE_PROF[prof_enseigne]
 
-                # e) Incrémenter le total de cas à vérifier
-                res["total"] += 1
+        # Incrémenter le total de cas à vérifier
+        res["total"] += 1
 
-                # f) Récupérer la salle « logique » de ce professeur dans AFFECTATION_MATIERE_SALLE
-                actual_salle = AFFECTATION_MATIERE_SALLE.get(prof_enseigne)
+        # Récupérer la salle « logique » de ce professeur dans AFFECTATION_MATIERE_SALLE
+        actual_salle = AFFECTATION_MATIERE_SALLE.get(prof_enseigne)
 
-                # g) Comparer : si la salle affichée correspond bien à la préférence
-                if actual_salle == salle_preferee:
-                    res["respectees"] += 1
-                    avancement += 1
-                    #print(f"[Run {current_seed}] Progression (verifier_preferences_salle_professeur) : {avancement}")
-                else:
-                    # Si la clé n'existe pas dans AFFECTATION_MATIERE_SALLE, actual_salle sera None
-                    res["details"].append(
-                        f"{classe} - {jour} {heure} : {prof_enseigne} en {actual_salle} "
-                        f"(préféré : {salle_preferee})"
-                    )
+        # Comparer : si la salle affichée correspond bien à la préférence
+        if actual_salle == salle_preferee:
+            res["respectees"] += 1
+            avancement += 1
+        else:
+            # Si la clé n'existe pas dans AFFECTATION_MATIERE_SALLE, actual_salle sera None
+            res["details"].append(
+                f"{CLASSES[c]} - {JOURS[j]} {HEURES[h]} : {prof_enseigne} en {actual_salle} "
+                f"(préféré : {salle_preferee})"
+            )
 
 # Vérification de la double affectation des salles
-def verifier_double_affectation_salles(emploi_du_temps, emploi_du_temps_salles, solver, SALLES_GENERALES, CLASSES):
+def verifier_double_affectation_salles(salles, SALLES_GENERALES):
     """
     Vérifie qu'aucune salle n'est attribuée à plus d'une classe au même créneau.
 
     Arguments:
-        emploi_du_temps (dict): variables IntVar matières par créneau (une semaine).
-        emploi_du_temps_salles (dict): variables IntVar salles par créneau (une semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
+        salles (np.ndarray): salles [classe, jour, heure] d'une semaine.
         SALLES_GENERALES (list): liste des salles communes.
-        CLASSES (list): liste de toutes les classes (base + sous-groupes).
     """
     global avancement
     res = resultats_contraintes["double_affectation_salles"]
 
-    # Pour chaque jour j, chaque heure h, on compte combien de classes sont dans chaque salle.
-    for j in range(len(JOURS)):
-        for h in range(len(HEURES)):
-            # Construire un compteur {nom_salle: [liste_classes_occupant]}
-            classes_par_salle = {salle: [] for salle in SALLES_GENERALES}
-            # Pour chaque classe, on récupère la valeur de l’IntVar salle
-            for classe in CLASSES:
-                clé = (classe, j, h)
-                salle_idx = solver.Value(emploi_du_temps_salles[clé])
-                if salle_idx > 0 and salle_idx <= len(SALLES_GENERALES):
-                    nom_salle = SALLES_GENERALES[salle_idx - 1]
-                    classes_par_salle[nom_salle].append(classe)
-
-            # Pour chaque salle, on incrémente 'total' et on regarde s’il y a au plus une classe
-            for salle, liste_classes in classes_par_salle.items():
-                res["total"] += 1
-                if len(liste_classes) <= 1:
-                    res["respectees"] += 1
-                    avancement += 1
-                    #print(f"[Run {current_seed}] Progression (verifier_double_affectation_salles) : {avancement}")
-                else:
-                    # Violation : plusieurs classes dans la même salle
-                    clist = ", ".join(liste_classes)
-                    res["details"].append(
-                        f"{JOURS[j]} {HEURES[h]} – Salle '{salle}' occupée par {clist}"
-                    )
-
+    # Occupation [jour, heure, salle] : classes présentes dans chaque salle générale
+    occupation = np.stack(
+        [(salles == idx_salle).sum(axis=0) for idx_salle in range(1, len(SALLES_GENERALES) + 1)],
+        axis=2
+    )
+    res["total"] += occupation.size
+    res["respectees"] += int((occupation <= 1).sum())
+    avancement += int((occupation <= 1).sum())
+    # Violation : plusieurs classes dans la même salle
+    for j, h, s in np.argwhere(occupation > 1):
+        clist = ", ".join(CLASSES[c] for c in np.flatnonzero(salles[:, j, h] == s + 1))
+        res["details"].append(
+            f"{JOURS[j]} {HEURES[h]} – Salle '{SALLES_GENERALES[s]}' occupée par {clist}"
+        )
+
 # Vérification de la double affectation des professeurs
-def verifier_double_affectation_profs(
-    emploi_du_temps_semaine,
-    emploi_du_temps_profs_semaine,
-    solver,
-    PROFESSEURS,
-    CLASSES,
-    JOURS,
-    HEURES,
-    resultats_contraintes,
-    semaine  # ← nouveau paramètre
-):
+def verifier_double_affectation_profs(edt, profs, semaine):
     """
     Vérifie qu'aucun professeur n'est assigné à deux classes différentes au même créneau
     pour la semaine spécifiée.
 
     Arguments:
-        emploi_du_temps_semaine (dict): variables IntVar matières par créneau (cette semaine).
-        emploi_du_temps_profs_semaine (dict): variables IntVar/BoolVar profs par créneau (cette semaine).
-        solver (CpSolver): solveur ayant résolu le modèle.
-        PROFESSEURS (dict): mapping matière → prof(s).
-        CLASSES (list): liste de toutes les classes.
-        JOURS (list): liste des jours.
-        HEURES (list): liste des horaires.
-        resultats_contraintes (dict): dictionnaire pour stocker résultats des vérifications.
+        edt (np.ndarray): matières [classe, jour, heure] de la semaine.
+        profs (np.ndarray): rangs des profs [classe, jour, heure] de la semaine.
         semaine (str): "Semaine A" ou "Semaine B".
     """
-    from collections import defaultdict
-
     global avancement
     # Récupération de l’espace de résultats pour la contrainte
     res = resultats_contraintes["double_affectation_profs"]
@@ -3271,71 +4213,19 @@ def verifier_double_affectation_profs(
         for entry in config.get("memnivmemcours", [])
     }
 
+    # Professeur effectif de chaque cours des classes de base
+    noms = profs_des_creneaux(edt, profs, CLASSES_BASE)
+    rangs = rangs_classes(CLASSES_BASE)
+
     # Parcours par jour et par créneau horaire
     for j in range(len(JOURS)):
         for h in range(len(HEURES)):
-            # Initialisation du compteur prof → liste de classes
+            # Compteur prof → liste de classes
             prof_count = defaultdict(list)
-
-            # Parcours des classes de base pour identifier quel prof enseigne
-            for cl in CLASSES_BASE:
-                # Détermination du niveau de la classe (ex. "6e")
-                niveau_cl = cl[:2]
-
-                key_cl = (cl, j, h)
-                if key_cl not in emploi_du_temps_semaine:
-                    continue
-                mat_idx = solver.Value(emploi_du_temps_semaine[key_cl])
-                if mat_idx == 0:
-                    continue  # Pas de cours planifié
-
-                # Conversion de l’index en nom de matière
-                mat = MATIERES[mat_idx - 1]
-
+            for k, cl in enumerate(CLASSES_BASE):
                 # Ignorer si la matière est gérée dynamiquement par memnivmemcours
-                if (niveau_cl, mat) in memniv_active:
-                    continue
-
-                prof_ref = PROFESSEURS[mat]
-
-                # 🔍 Détermination du professeur effectif à ce créneau
-                if isinstance(prof_ref, str):
-                    # Cas simple : chaîne unique
-                    prof_sel = prof_ref
-
-                elif isinstance(prof_ref, dict):
-                    # Cas dict : choisir selon niveau et variable profs_semaine
-                    profs_niv = prof_ref.get(niveau_cl)
-                    if isinstance(profs_niv, str):
-                        prof_sel = profs_niv
-                    elif isinstance(profs_niv, list) and profs_niv:
-                        prof_sel = profs_niv[0]
-                        for key_prof, var in emploi_du_temps_profs_semaine.items():
-                            cl_k, j_k, h_k, mat_k, sem_k = key_prof
-                            if (cl_k, j_k, h_k, mat_k) == (cl, j, h, mat):
-                                idx = solver.Value(var)
-                                prof_sel = profs_niv[idx]
-                                break
-                    else:
-                        prof_sel = None
-
-                elif isinstance(prof_ref, list) and prof_ref:
-                    # Cas liste globale de profs
-                    profs_niv = prof_ref
-                    prof_sel = profs_niv[0]
-                    for key_prof, var in emploi_du_temps_profs_semaine.items():
-                        cl_k, j_k, h_k, mat_k, sem_k = key_prof
-                        if (cl_k, j_k, h_k, mat_k) == (cl, j, h, mat):
-                            idx = solver.Value(var)
-                            prof_sel = profs_niv[idx]
-                            break
-
-                else:
-                    prof_sel = None
-
-                if prof_sel:
-                    # Ajout de la classe à la liste du prof pour ce créneau
-                    prof_count[prof_sel].append(cl)
+                if noms[k, j, h] and (cl[:2], MATIERES[edt[rangs[k], j, h] - 1]) not in memniv_active:
+                    prof_count[noms[k, j, h]].append(cl)
 
             # Vérification finale : un prof ne doit pas avoir plus d’une classe simultanée
             for prof, classes in prof_count.items():
@@ -3344,7 +4234,6 @@ def verifier_double_affectation_profs(
                     # Contrainte respectée pour ce prof
                     res["respectees"] += 1
                     avancement += 1
-                    #print(f"[Run {current_seed}] Progression (verifier_double_affectation_profs) : {avancement}")
                 else:
                     # Violation détectée : le prof est assigné à plusieurs classes simultanément
                     clist = ", ".join(classes)
@@ -3352,7 +4241,6 @@ def verifier_double_affectation_profs(
                         f"{semaine} – {JOURS[j]} {HEURES[h]} : Prof '{prof}' en double dans {clist}"
                     )
 
-
 # Initialisation du dictionnaire global de résultats
 resultats_contraintes = {
     "volume_horaire":         {"total": 0, "respectees": 0, "details": []},
@@ -3370,10 +4258,48 @@ resultats_contraintes = {
     "mem_niveau_cours":       {"total": 0, "respectees": 0, "details": []},
     "max_heures_par_etendue": {"total": 0, "respectees": 0, "details": []},
     "mat_horaire_donne_v2":   {"total": 0, "respectees": 0, "details": []},
-    "preferences_salle_professeur": {"total": 0, "respectees": 0, "details": []}
+    "preferences_salle_professeur": {"total": 0, "respectees": 0, "details": []},
+    "preferences_profs":      {"total": 0, "respectees": 0, "details": []}
 }
 
 # Vérifie et résout le modèle CP-SAT, puis vérifie les contraintes
+def valeur_controle(condition, solver):
+    """
+    Valeur d'une violation ou d'un nombre de contrôles du registre dans une solution :
+    un entier, une variable (ou un littéral), ou un couple (termes, borne) valant 1
+    si la somme des coef × valeur des termes [(coef, condition)] dépasse la borne, 0 sinon.
+    """
+    if isinstance(condition, tuple):
+        termes, borne = condition
+        return int(sum(coef * valeur_controle(terme, solver) for coef, terme in termes) > borne)
+    return solver.Value(condition)
+
+
+def remplir_depuis_registre(registre, solver):
+    """
+    Remplit resultats_contraintes depuis le registre construit par creer_modele,
+    en une passe sur les littéraux de violation (sans relire l'emploi du temps).
+
+    Arguments:
+        registre (dict): catégorie → [(violation, nb_controles, détail)].
+        solver (CpSolver ou SolutionFigee): solution à vérifier.
+    """
+    global avancement
+    for categorie, controles in registre.items():
+        res = resultats_contraintes[categorie]
+        for violation, nb_controles, detail in controles:
+            # Nombre de contrôles lu dans la solution (cours d'un prof, créneau avec une classe libre...)
+            nb_controles = valeur_controle(nb_controles, solver)
+            if not nb_controles:
+                continue
+            res["total"] += nb_controles
+            if valeur_controle(violation, solver):
+                res["details"].append(detail)
+            else:
+                res["respectees"] += nb_controles
+                avancement += 1
+
+
 def solve_et_verifie(
     model,
     emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs,
@@ -3382,11 +4308,17 @@ def solve_et_verifie(
     CAPACITES_CLASSES, INDISPONIBILITES_PROFS, INDISPONIBILITES_SALLES,
     config, AFFECTATION_MATIERE_SALLE,
     fusionner_groupes_vers_classes,
-    seed
+    seed,
+    solution=None,
+    temps_max=None,
+    suivi=None,
+    arret_demande=None
 ):
     """
     Résout le modèle CP-SAT avec la graine donnée, puis vérifie toutes les contraintes
     configurées dans 'config'. Les vérifications sont faites pour la Semaine A et B.
+    Si 'solution' est fournie (run résolu dans un processus du pool), la résolution
+    est sautée et seules la fusion et les vérifications sont faites.
 
     Arguments:
         model (CpModel): le modèle CP-SAT à résoudre.
@@ -3407,6 +4339,10 @@ def solve_et_verifie(
         AFFECTATION_MATIERE_SALLE (dict): mapping matière/prof → salle assignée.
         fusionner_groupes_vers_classes (func): fonction pour fusionner groupes → texte.
         seed (int): graine aléatoire pour le solveur.
+        solution (SolutionFigee, optionnel): solution déjà calculée pour cette graine.
+        temps_max (float, optionnel): limite de temps (secondes) de la résolution.
+        suivi (SuiviSolutions, optionnel): callback appelé à chaque solution améliorante.
+        arret_demande (callable, optionnel): interrompt la résolution dès qu'il renvoie True.
 
     Retourne:
         tuple:
@@ -3420,83 +4356,101 @@ def solve_et_verifie(
         resultats_contraintes[cat]["respectees"] = 0
         resultats_contraintes[cat]["details"].clear()
 
-    # Lancer le solveur
-    solver = cp_model.CpSolver()
-    solver.parameters.random_seed = seed
-    status = solver.Solve(model)
-    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        return None, 0.0, None
+    # Lancer le solveur (sauf si la solution a déjà été calculée par un worker)
+    if solution is None:
+        solver = cp_model.CpSolver()
+        solver.parameters.random_seed = seed
+        if temps_max:
+            solver.parameters.max_time_in_seconds = temps_max
+        # Une résolution interrompue (limite de temps, StopSearch) garde la meilleure solution trouvée
+        fin_resolution = surveiller_arret(solver, arret_demande)
+        try:
+            status = solver.Solve(model, suivi)
+        finally:
+            fin_resolution.set()
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None, 0.0, None
+    else:
+        solver = solution
+
+    # Modèle à intervalles : les créneaux se déduisent des séances placées
+    if isinstance(emploi_du_temps, EmploiDuTempsIntervalles):
+        solver = emploi_du_temps.figer(solver)
+    # Résolution en deux phases : affectation des salles par couplage, repli sur le
+    # modèle complet si un cours ne peut obtenir de salle
+    elif config.get("parametres_solveur", {}).get("salles_deux_phases"):
+        solution_salles = affecter_salles(solver, emploi_du_temps, emploi_du_temps_salles)
+        if solution_salles is not None:
+            solver = solution_salles
+        else:
+            print("⚠️ Affectation des salles impossible : repli sur le modèle complet")
+            model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, solver = resoudre_modele_joint(
+                model, solver, emploi_du_temps, emploi_du_temps_profs, seed, temps_max, arret_demande
+            )
+            if solver is None:
+                return None, 0.0, None
+
+    # Écart entre la solution et le point de départ (démarrage à chaud)
+    stats_hints = statistiques_hints(model, solver)
+    if stats_hints:
+        avancement_global["conservation_hint"] = stats_hints
+        print(f"🧭 Hint : {stats_hints['conserves']}/{stats_hints['hints']} valeurs conservées")
+
+    # Lecture unique de la solution (matières, salles, profs des deux semaines),
+    # partagée par la fusion et les vérifications
+    tableaux = extraire_solution(solver, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs)
 
     # Fusionner les emplois du temps pour chaque semaine
     fusion_A = fusionner_groupes_vers_classes(
-        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, solver, "Semaine A"
+        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, tableaux, "Semaine A"
     )
     fusion_B = fusionner_groupes_vers_classes(
-        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, solver, "Semaine B"
+        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, tableaux, "Semaine B"
     )
 
     global current_seed
     current_seed = seed
 
+    # Catégories comptées depuis le registre du modèle (lu après un éventuel repli sur
+    # le modèle joint) ; les autres sont vérifiées ci-dessous par leur verifier_*
+    registre = getattr(model, "registre_contraintes", {})
+    remplir_depuis_registre(registre, solver)
+
     # ─── VÉRIFICATIONS POUR CHAQUE SEMAINE ────────────────────────────────────
     for semaine in SEMAINES:
+        # Tableaux [classe, jour, heure] de la semaine
+        edt, salles, profs = tableaux.semaine(semaine)
+
         # 1) verifier_volume_horaire  ← si on a défini "volume_horaire" dans config
         if "volume_horaire" in config:
-            verifier_volume_horaire(emploi_du_temps[semaine], solver)
+            verifier_volume_horaire(edt)
 
         # 2) verifier_jours_sans_apres_midi ← si "jours_sans_apres_midi" défini et non vide
         jours_sans_ap = config.get("jours_sans_apres_midi", [])
-        if jours_sans_ap:
-            verifier_jours_sans_apres_midi(
-                emploi_du_temps[semaine], solver, jours_sans_ap
-            )
+        if jours_sans_ap and "jours_sans_apres_midi" not in registre:
+            verifier_jours_sans_apres_midi(edt, jours_sans_ap)
 
         # 3) verifier_indisponibilites_profs ← si "indisponibilites_profs" existe
-        if config.get("indisponibilites_profs"):
-            verifier_indisponibilites_profs(
-                emploi_du_temps[semaine], solver, INDISPONIBILITES_PROFS
-            )
+        if config.get("indisponibilites_profs") and "indisponibilites_profs" not in registre:
+            verifier_indisponibilites_profs(edt, INDISPONIBILITES_PROFS)
 
         # 4) verifier_volume_par_professeur ← si "volume_par_professeur" existe
         vol_par_prof = config.get("volume_par_professeur", {})
-        if vol_par_prof:
-            verifier_volume_par_professeur(
-                emploi_du_temps[semaine], solver, vol_par_prof
-            )
+        if vol_par_prof and "volume_par_professeur" not in registre:
+            verifier_volume_par_professeur(edt, vol_par_prof)
 
         # 5) verifier_indisponibilites_salles ← si "indisponibilites_salles" existe
-        if config.get("indisponibilites_salles"):
-            verifier_indisponibilites_salles(
-                emploi_du_temps[semaine],
-                solver,
-                INDISPONIBILITES_SALLES,
-                AFFECTATION_MATIERE_SALLE
-            )
+        if config.get("indisponibilites_salles") and "indisponibilites_salles" not in registre:
+            verifier_indisponibilites_salles(edt, INDISPONIBILITES_SALLES, AFFECTATION_MATIERE_SALLE)
 
         # 6) verifier_double_affectation_salles ← on appelle systématiquement si on a défini SALLES_GENERALES
-        if SALLES_GENERALES:
-            verifier_double_affectation_salles(
-                emploi_du_temps[semaine],
-                emploi_du_temps_salles[semaine],
-                solver,
-                SALLES_GENERALES,
-                CLASSES
-            )
+        if SALLES_GENERALES and "double_affectation_salles" not in registre:
+            verifier_double_affectation_salles(salles, SALLES_GENERALES)
 
         # 7) verifier_double_affectation_profs ← on l’appelle toujours, 
         #    mais on peut vérifier la présence de PROFESSEURS et CLASSES
         if PROFESSEURS and CLASSES:
-            verifier_double_affectation_profs(
-                emploi_du_temps[semaine],
-                emploi_du_temps_profs[semaine],
-                solver,
-                PROFESSEURS,
-                CLASSES,
-                JOURS,
-                HEURES,
-                resultats_contraintes,
-                semaine
-            )
+            verifier_double_affectation_profs(edt, profs, semaine)
 
         # 8) verifier_cantine ← si "cantine" existe dans config
         if "cantine" in config:
@@ -3510,20 +4464,15 @@ def solve_et_verifie(
 
         # 9) verifier_permanence ← si "permanence" existe ET qu’on a configuré une capacité
         perm_cfg = config.get("permanence", {})
-        if perm_cfg and perm_cfg.get("capacite", 0) > 0:
+        if perm_cfg and perm_cfg.get("capacite", 0) > 0 and "permanence" not in registre:
             # récupérer h_dej une seule fois
-            verifier_permanence(
-                solver,
-                emploi_du_temps[semaine],
-                perm_cfg["capacite"]
-            )
+            verifier_permanence(edt, perm_cfg["capacite"])
 
 
         # 10) verifier_poids_cartable ← si "poids_matieres" existe
-        if config.get("poids_matieres_par_niveau"):
+        if config.get("poids_matieres_par_niveau") and "poids_cartable" not in registre:
             verifier_poids_cartable(
-                emploi_du_temps[semaine],
-                solver,
+                edt,
                 config.get("poids_matieres_par_niveau", {}),
                 config.get("poids_cartable_max_somme_par_niveau", {}),
                 config.get("poids_cartable_max_somme", 0.0),
@@ -3532,7 +4481,10 @@ def solve_et_verifie(
             )
 
         # 11) verifier_matExcluSuite ← si "mat_exclu_suite" existe et non vide
+        # (seulement les règles non imposées si la catégorie est au registre)
         entries_exclu = config.get("mat_exclu_suite", [])
+        if "mat_exclu_suite" in registre:
+            entries_exclu = [entry for entry in entries_exclu if not exclusion_imposee(entry)]
         if entries_exclu:
             for entry in entries_exclu:
                 m1 = entry["matiere1"]
@@ -3541,13 +4493,9 @@ def solve_et_verifie(
                 classes_cible = entry.get("classes", "CLASSES_BASE")
                 # si "CLASSES_BASE" dans JSON, on renvoie la constante Python CLASSES_BASE
                 if isinstance(classes_cible, str) and classes_cible == "CLASSES_BASE":
-                    verifier_matExcluSuite(
-                        emploi_du_temps[semaine], solver, m1, m2, CLASSES_BASE
-                    )
+                    verifier_matExcluSuite(edt, m1, m2, CLASSES_BASE)
                 else:
-                    verifier_matExcluSuite(
-                        emploi_du_temps[semaine], solver, m1, m2, classes_cible
-                    )
+                    verifier_matExcluSuite(edt, m1, m2, classes_cible)
 
         # 12) verifier_matIncluSuite ← si "mat_inclu_suite" existe
         entries_inclu = config.get("mat_inclu_suite", [])
@@ -3559,35 +4507,21 @@ def solve_et_verifie(
                 nb_fois = entry.get("nb_fois", 1)
                 classes_cible = entry.get("classes", "CLASSES_BASE")
                 if isinstance(classes_cible, str) and classes_cible == "CLASSES_BASE":
-                    verifier_matIncluSuite(
-                        emploi_du_temps[semaine],
-                        solver,
-                        m1, m2, contra, nb_fois, CLASSES_BASE
-                    )
+                    verifier_matIncluSuite(edt, m1, m2, contra, nb_fois, CLASSES_BASE)
                 else:
-                    verifier_matIncluSuite(
-                        emploi_du_temps[semaine],
-                        solver,
-                        m1, m2, contra, nb_fois, classes_cible
-                    )
+                    verifier_matIncluSuite(edt, m1, m2, contra, nb_fois, classes_cible)
 
         # 13) verifier_memNivMemCours ← si on a configuré expressément une matière à vérifier
-        if config.get("memnivmemcours"):
+        if config.get("memnivmemcours") and "mem_niveau_cours" not in registre:
             for entry in config.get("memnivmemcours", []):
                 niveau  = entry["niveau"]    # ex. "6e"
                 matiere = entry["matiere"]   # ex. "Maths"
-                for semaine in SEMAINES:
-                    verifier_memNivMemCours(
-                        emploi_du_temps[semaine],
-                        solver,
-                        niveau,
-                        matiere
-                    )
+                verifier_memNivMemCours(edt, niveau, matiere)
 
 
         # 14) verifier_matHorairDonneV2 ← si on a défini la clé correspondante dans JSON
         mat_horaire_entries = config.get("mat_horaire_donne_v2", [])
-        if mat_horaire_entries:
+        if mat_horaire_entries and "mat_horaire_donne_v2" not in registre:
             for entry in mat_horaire_entries:
                 classes_cible = entry["classes"]
                 matieres_cible = entry["matiere"]  
@@ -3596,8 +4530,7 @@ def solve_et_verifie(
                 horaire_max = entry.get("horaire_max")
                 nb_fois = entry.get("nb_fois")
                 verifier_matHorairDonneV2(
-                    emploi_du_temps[semaine],
-                    solver,
+                    edt,
                     classes_cible,
                     matieres_cible,
                     jour_cible,
@@ -3607,30 +4540,331 @@ def solve_et_verifie(
                 )
 
         # 15) verifier_preferences_salle_professeur ← si "preferences_salle_professeur" existe
-        if config.get("preferences_salle_professeur"):
+        if config.get("preferences_salle_professeur") and "preferences_salle_professeur" not in registre:
             verifier_preferences_salle_professeur(
-                solver,
-                emploi_du_temps[semaine],
-                emploi_du_temps_profs[semaine],
-                JOURS, HEURES, MATIERES, PROFESSEURS,
-                config.get("preferences_salle_professeur", {})
+                edt, profs, config.get("preferences_salle_professeur", {})
             )
 
         # 16) verifier_max_heures_par_etendue ← si "max_heures_par_etendue" existe
-        if config.get("max_heures_par_etendue"):
-            verifier_max_heures_par_etendue(
-                emploi_du_temps[semaine],
-                solver,
-                config.get("max_heures_par_etendue", [])
-            )
+        if config.get("max_heures_par_etendue") and "max_heures_par_etendue" not in registre:
+            verifier_max_heures_par_etendue(edt, config.get("max_heures_par_etendue", []))
 
     # ─── Calcule le taux global de contraintes respectées (Semaine A + Semaine B) ──
     total_c = sum(stats["total"] for stats in resultats_contraintes.values())
     total_r = sum(stats["respectees"] for stats in resultats_contraintes.values())
     taux = (total_r / total_c) if total_c > 0 else 1.0
 
-    # Affichage du rapport détaillé des contraintes
-    return {"Semaine A": fusion_A, "Semaine B": fusion_B}, taux, resultats_contraintes
+    # Copie : resultats_contraintes est réinitialisé au run suivant
+    return {"Semaine A": fusion_A, "Semaine B": fusion_B}, taux, copy.deepcopy(resultats_contraintes)
+
+
+class SolutionFigee:
+    """
+    Valeurs d'une solution CP-SAT, détachées du solveur qui les a produites.
+
+    Expose Value() comme un CpSolver résolu, ce qui permet de réutiliser telles
+    quelles la fusion et les vérifications sur une solution calculée dans un
+    autre processus (valeurs indexées par Index() des variables du modèle).
+    """
+
+    def __init__(self, valeurs, objectif=None):
+        self.valeurs = valeurs
+        self.objectif = objectif
+
+    def Value(self, var):
+        if isinstance(var, int):
+            return var
+        index = var.Index()
+        if index >= 0:
+            return self.valeurs[index]
+        # Littéral négatif (b.Not()) : index = -index_variable - 1
+        return 1 - self.valeurs[-index - 1]
+
+    BooleanValue = Value
+
+    def ObjectiveValue(self):
+        return self.objectif
+
+
+def couplage_maximum(demandes):
+    """
+    Couplage biparti maximum demandeurs → salles (chemins augmentants de Kuhn).
+
+    Arguments:
+        demandes (list): liste de (demandeur, salles possibles), traitée dans
+            l'ordre : un demandeur couplé le reste, les premiers sont donc prioritaires.
+
+    Retourne:
+        dict: demandeur → salle attribuée (les demandeurs non couplés sont absents).
+    """
+    occupant = {}  # salle → demandeur
+    possibles = dict(demandes)
+
+    def augmenter(demandeur, visitees):
+        for salle in possibles[demandeur]:
+            if salle in visitees:
+                continue
+            visitees.add(salle)
+            if salle not in occupant or augmenter(occupant[salle], visitees):
+                occupant[salle] = demandeur
+                return True
+        return False
+
+    for demandeur, _ in demandes:
+        augmenter(demandeur, set())
+    return {demandeur: salle for salle, demandeur in occupant.items()}
+
+
+def affecter_salles(solver, emploi_du_temps, emploi_du_temps_salles):
+    """
+    Deuxième phase de la résolution en deux phases : affecte les salles d'une
+    solution (matières et profs fixés) par un couplage maximum à chaque créneau.
+
+    Les cours ayant besoin d'une salle générale (matieres_a_salle_generale) sont
+    couplés en premier et doivent tous obtenir une salle ; les autres cours
+    reçoivent les salles restantes quand c'est possible (0 sinon, comme le
+    permet le modèle complet).
+
+    Arguments:
+        solver (CpSolver ou SolutionFigee): solution de la première phase.
+        emploi_du_temps, emploi_du_temps_salles (dict): variables du modèle.
+
+    Retourne:
+        SolutionFigee: la solution complétée par les salles, ou None si un cours
+            ayant besoin d'une salle générale n'a pu en obtenir.
+    """
+    if isinstance(solver, SolutionFigee):
+        valeurs = list(solver.valeurs)
+    else:
+        valeurs = list(solver.ResponseProto().solution)
+    besoins = {}
+
+    for semaine in SEMAINES:
+        for j in range(len(JOURS)):
+            for h in range(len(HEURES)):
+                prioritaires, autres = [], []
+                for classe in CLASSES:
+                    key = (classe, j, h)
+                    m = solver.Value(emploi_du_temps[semaine][key])
+                    if m == 0:
+                        continue
+                    var_salle = emploi_du_temps_salles[semaine][key]
+                    bornes = var_salle.Proto().domain
+                    salles = [
+                        s for i in range(0, len(bornes), 2)
+                        for s in range(max(bornes[i], 1), bornes[i + 1] + 1)
+                    ]
+                    niveau = classe[:2]
+                    if niveau not in besoins:
+                        besoins[niveau] = matieres_a_salle_generale(niveau)
+                    if MATIERES[m - 1] in besoins[niveau]:
+                        prioritaires.append((key, salles))
+                    else:
+                        autres.append((key, salles))
+
+                couplage = couplage_maximum(prioritaires + autres)
+                for key, _ in prioritaires:
+                    if key not in couplage:
+                        print(f"⚠️ Aucune salle pour {key[0]} le {JOURS[j]} à {HEURES[h]} ({semaine})")
+                        return None
+                for key, _ in prioritaires + autres:
+                    valeurs[emploi_du_temps_salles[semaine][key].Index()] = couplage.get(key, 0)
+
+    return SolutionFigee(valeurs, solver.ObjectiveValue())
+
+
+def resoudre_modele_joint(model, solver, emploi_du_temps, emploi_du_temps_profs, seed,
+                          temps_max=None, arret_demande=None):
+    """
+    Repli de la résolution en deux phases : construit le modèle complet (salles
+    comprises) et le résout en partant des matières et profs de la première phase.
+
+    Le modèle complet reprend la répartition des demi-heures entre semaines du
+    modèle de la première phase (model.volume_bihebdo), ainsi que sa cantine
+    (configurer_cantine) : la solution de la première phase y reste réalisable,
+    hors salles.
+
+    Retourne:
+        tuple: (model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs,
+            solver) du modèle complet, solver valant None si aucune solution.
+    """
+    joint = creer_modele(salles_deux_phases=False, volume_bihebdo=model.volume_bihebdo)
+    model_joint, edt_joint, _, profs_joint = joint
+    configurer_cantine(
+        model_joint, edt_joint, SEMAINES, JOURS, HEURES, CLASSES_BASE, CAPACITES_CLASSES, config
+    )
+    model_joint.ClearHints()
+    hints = {}  # indexés par variable (les créneaux constants partagent la même)
+    for source, cible in ((emploi_du_temps, edt_joint), (emploi_du_temps_profs, profs_joint)):
+        for semaine in SEMAINES:
+            for key, var in source[semaine].items():
+                if key in cible[semaine]:
+                    hints[cible[semaine][key].Index()] = (cible[semaine][key], solver.Value(var))
+    for var, valeur in hints.values():
+        model_joint.AddHint(var, valeur)
+
+    solver_joint = cp_model.CpSolver()
+    solver_joint.parameters.random_seed = seed
+    if temps_max:
+        solver_joint.parameters.max_time_in_seconds = temps_max
+    fin_resolution = surveiller_arret(solver_joint, arret_demande)
+    try:
+        status = solver_joint.Solve(model_joint)
+    finally:
+        fin_resolution.set()
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        solver_joint = None
+    return (*joint, solver_joint)
+
+
+def surveiller_arret(solver, arret_demande, periode=0.2):
+    """
+    Surveille une demande d'annulation pendant une résolution : un thread
+    interroge arret_demande() toutes les `periode` secondes et appelle
+    solver.StopSearch() dès qu'elle est vraie (le solveur garde alors sa
+    meilleure solution).
+
+    Retourne:
+        threading.Event: à positionner (set) une fois la résolution terminée.
+    """
+    fin_resolution = threading.Event()
+    if arret_demande is None:
+        return fin_resolution
+
+    def surveiller():
+        while not fin_resolution.wait(periode):
+            if arret_demande():
+                solver.StopSearch()
+                return
+
+    threading.Thread(target=surveiller, daemon=True).start()
+    return fin_resolution
+
+
+# Noms des variables créées par creer_modele pour chaque terme de l'objectif
+TERMES_OBJECTIF = {
+    "permanence": "total_permanence",
+    "preferences": "total_preferences",
+    "cartable": "total_surcharge_cartable",
+}
+
+
+def indices_termes_objectif(model):
+    """
+    Retrouve dans le proto du modèle l'indice de la variable de chaque terme de
+    l'objectif (fonctionne aussi sur un modèle reconstruit depuis son proto).
+
+    Retourne:
+        dict: terme ("permanence", "preferences", "cartable") → indice de variable.
+    """
+    noms = {nom: terme for terme, nom in TERMES_OBJECTIF.items()}
+    return {
+        noms[var.name]: index
+        for index, var in enumerate(model.Proto().variables)
+        if var.name in noms
+    }
+
+
+class SuiviSolutions(cp_model.CpSolverSolutionCallback):
+    """
+    Callback CP-SAT appelé à chaque solution améliorante : publie l'objectif,
+    la meilleure borne, l'écart relatif et le détail des pénalités.
+
+    La publication passe par la fonction `publier(seed, info)`, ce qui permet
+    de l'utiliser dans ce processus (avancement_global) comme dans un worker
+    du pool (file de messages vers le processus principal).
+    """
+
+    def __init__(self, seed, termes, publier):
+        super().__init__()
+        self.seed = seed
+        self.termes = termes
+        self.publier = publier
+        self.nb_solutions = 0
+        self.temps_premiere_solution = None
+
+    def on_solution_callback(self):
+        self.nb_solutions += 1
+        if self.temps_premiere_solution is None:
+            self.temps_premiere_solution = self.WallTime()
+        objectif = self.ObjectiveValue()
+        borne = self.BestObjectiveBound()
+        self.publier(self.seed, {
+            "objectif": objectif,
+            "borne": borne,
+            "gap": (objectif - borne) / max(1.0, abs(objectif)),
+            "penalites": {
+                terme: self.SolutionIntegerValue(index)
+                for terme, index in self.termes.items()
+            },
+            "solutions_trouvees": self.nb_solutions,
+            "temps_solution": self.WallTime(),
+            "temps_premiere_solution": self.temps_premiere_solution,
+        })
+
+
+def publier_solution(seed, info):
+    """Reporte une solution améliorante dans avancement_global (lue par l'interface)."""
+    avancement_global.update(info)
+    avancement_global["seed_solution"] = seed
+    avancement_global["derniere_maj"] = time.time()
+
+
+def reset_suivi_solution():
+    """Efface de avancement_global la dernière solution intermédiaire publiée."""
+    avancement_global.update({
+        "objectif": None,
+        "borne": None,
+        "gap": None,
+        "penalites": {},
+        "solutions_trouvees": 0,
+        "temps_solution": 0,
+        "seed_solution": None,
+    })
+
+
+# Modèle CP-SAT reconstruit une fois par processus du pool (voir executer_runs_avec_suivi)
+_modele_worker = None
+_termes_worker = None
+_file_suivi_worker = None
+_arret_worker = None
+
+
+def _initialiser_worker(proto_serialise, file_suivi=None, evenement_arret=None):
+    """Reconstruit le modèle CP-SAT du worker à partir de son proto sérialisé."""
+    global _modele_worker, _termes_worker, _file_suivi_worker, _arret_worker
+    _modele_worker = cp_model.CpModel()
+    _modele_worker.Proto().ParseFromString(proto_serialise)
+    _termes_worker = indices_termes_objectif(_modele_worker)
+    _file_suivi_worker = file_suivi
+    _arret_worker = evenement_arret
+
+
+def _resoudre_seed_worker(seed, nb_workers, temps_max=None):
+    """
+    Résout le modèle du worker avec la graine donnée (dans la limite de temps_max secondes).
+    Les solutions améliorantes sont envoyées au processus principal par la file de suivi ;
+    l'événement d'arrêt partagé interrompt la résolution (meilleure solution conservée).
+
+    Retourne:
+        tuple: (seed, SolutionFigee ou None si aucune solution).
+    """
+    solver = cp_model.CpSolver()
+    solver.parameters.random_seed = seed
+    solver.parameters.num_workers = nb_workers
+    if temps_max:
+        solver.parameters.max_time_in_seconds = temps_max
+    suivi = None
+    if _file_suivi_worker is not None:
+        suivi = SuiviSolutions(seed, _termes_worker, lambda s, info: _file_suivi_worker.put((s, info)))
+    fin_resolution = surveiller_arret(solver, _arret_worker.is_set if _arret_worker is not None else None)
+    try:
+        status = solver.Solve(_modele_worker, suivi)
+    finally:
+        fin_resolution.set()
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return seed, None
+    return seed, SolutionFigee(list(solver.ResponseProto().solution), solver.ObjectiveValue())
 
 
 # Fonction utilitaire pour calculer le pourcentage global à partir de resultats_contraintes
@@ -3737,136 +4971,27 @@ def configurer_cantine(
     Retourne :
         dict[str,int] : mapping classe → indice du créneau déjeuner.
     """
-    cantine_config     = config.get("cantine", {})
-    cap_cantine        = cantine_config.get("capacite", 200)
-    ratio_demi         = cantine_config.get("proportion_demi_pensionnaire", 0.8)
-    creneaux_dej       = cantine_config.get("creneaux_dejeuner", [])
-    assignation_niveaux= cantine_config.get("assignation_niveaux", {})
-    priorite_active    = cantine_config.get("priorite_active", True)
-
-    # Vérification que tous les créneaux dejeuner figurent bien dans HEURES 
-    for c in creneaux_dej:
-        if c not in HEURES:
-            raise ValueError(f"Créneau cantine '{c}' non reconnu dans HEURES.")
+    h_dej, classe_creneau_dej = repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config)
 
-    # On recherche dynamiquement le créneau principal commençant par "12h"
-    lunch_slot = next((slot for slot in HEURES if slot.startswith("12h")), None)
-    if lunch_slot is None:
-        raise ValueError("Aucun créneau HEURES ne commence par '12h'")
-    h_dej = HEURES.index(lunch_slot)
+    def interdire(var):
+        # Créneau déjà fixé à 0 par le pré-calcul des domaines de creer_modele
+        if list(var.Proto().domain) != [0, 0]:
+            model.Add(var == 0)
 
-    # Bloquer systématiquement ce créneau pour toutes les classes
+    # Bloquer systématiquement le créneau de 12h pour toutes les classes
     for semaine in SEMAINES:
         for classe in CLASSES:
             for j in range(len(JOURS)):
-                model.Add(emploi_du_temps[semaine][(classe, j, h_dej)] == 0)
-
-    # Allocation des créneaux déjeuner selon la capacité de la cantine
-    if lunch_slot in creneaux_dej:
-        total_eleves = sum(int(CAPACITES_CLASSES.get(cl, 0) * ratio_demi) for cl in CLASSES_BASE)
-        if total_eleves <= cap_cantine:
-            # Capacité suffisante
-            classe_creneau_dej = {cl: h_dej for cl in CLASSES_BASE}
-            print(f"✅ Tous les élèves peuvent déjeuner à {lunch_slot} (capacité suffisante)")
-        else:
-            if not priorite_active:
-                # Répartition automatique sans priorité
-                from itertools import cycle
-                print("🔁 Capacité insuffisante : répartition automatique sans priorité")
-                iter_slots = cycle([HEURES.index(c) for c in creneaux_dej])
-                classe_creneau_dej = {cl: next(iter_slots) for cl in CLASSES_BASE}
-            else:
-                # Répartition par priorité de niveaux
-                print(f"❌ Capacité insuffisante à {lunch_slot} : assignation par niveau")
-                classe_creneau_dej = {}
-                for cl in CLASSES_BASE:
-                    niv = cl[:2]
-                    for slot, niveaux in assignation_niveaux.items():
-                        if niv in niveaux:
-                            classe_creneau_dej[cl] = HEURES.index(slot)
-                            break
-                    else:
-                        raise ValueError(f"Aucun créneau cantine défini pour le niveau '{niv}' (classe {cl}).")
-    else:
-        raise ValueError(f"Le créneau principal '{lunch_slot}' doit être inclus dans les créneaux possibles.")
+                interdire(emploi_du_temps[semaine][(classe, j, h_dej)])
 
-    # 6) Interdire les cours à ces créneaux
+    # Interdire les cours au créneau déjeuner de chaque classe
     for sem in SEMAINES:
-        for cl, h_dej in classe_creneau_dej.items():
+        for cl, h_cl in classe_creneau_dej.items():
             for j in range(len(JOURS)):
-                model.Add(emploi_du_temps[sem][(cl, j, h_dej)] == 0)
+                interdire(emploi_du_temps[sem][(cl, j, h_cl)])
 
     return classe_creneau_dej
 
-# Création du modèle et des variables
-model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs = creer_modele()
-
-# Configuration de la cantine (et blocage des créneaux déjeuner)
-classe_creneau_dej = configurer_cantine(
-    model,
-    emploi_du_temps,
-    SEMAINES,
-    JOURS,
-    HEURES,
-    CLASSES_BASE,
-    CAPACITES_CLASSES,
-    config
-)
-
-# Synchronisation des sous-groupes
-def synchroniser_sous_groupes(
-    model,
-    emploi_du_temps,
-    SOUS_GROUPES_SUFFIXES,
-    CLASSES,
-    JOURS,
-    HEURES,
-    MATIERES
-):
-    """
-    Pour chaque suffixe de sous-groupe, crée des BoolVar indiquant
-    si cette matière de sous-groupe est planifiée, puis synchronise
-    tous ces BoolVar entre eux (tous ou aucun).
-
-    Arguments :
-        model (CpModel)                : votre modèle CP-SAT.
-        emploi_du_temps (dict)         : IntVar matières par créneau.
-        SOUS_GROUPES_SUFFIXES (dict)   : suffixe → nom de matière.
-        CLASSES (list[str])            : toutes les classes (base + sous-groupes).
-        JOURS (list[str])              : liste des jours.
-        HEURES (list[str])             : liste des créneaux (ex. "8h-9h").
-        MATIERES (list[str])           : liste des matières.
-    """
-    for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
-        groupes_matiere = [cls for cls in CLASSES if cls.endswith(suffixe)]
-        idx_mat = MATIERES.index(mat_sg) + 1
-        for j in range(len(JOURS)):
-            for h in range(len(HEURES)):
-                bools = []
-                for grp in groupes_matiere:
-                    key = (grp, j, h)
-                    if key in emploi_du_temps:
-                        v = model.NewBoolVar(f"{mat_sg}_{grp}_{j}_{h}")
-                        model.Add(emploi_du_temps[key] == idx_mat).OnlyEnforceIf(v)
-                        model.Add(emploi_du_temps[key] != idx_mat).OnlyEnforceIf(v.Not())
-                        bools.append(v)
-                # Synchroniser : si un v est vrai, tous doivent l’être
-                for i in range(len(bools)):
-                    for k in range(i + 1, len(bools)):
-                        model.AddBoolOr([bools[i].Not(), bools[k]])
-                        model.AddBoolOr([bools[k].Not(), bools[i]])
-
-# Synchronisation des sous-groupes
-synchroniser_sous_groupes(
-    model,
-    emploi_du_temps,
-    SOUS_GROUPES_SUFFIXES,
-    CLASSES,
-    JOURS,
-    HEURES,
-    MATIERES
-)
-
 def preparer_mappings_affichage(PROFESSEURS, AFFECTATION_MATIERE_SALLE):
     """
     Initialise deux dictionnaires :
@@ -3882,6 +5007,9 @@ def preparer_mappings_affichage(PROFESSEURS, AFFECTATION_MATIERE_SALLE):
                         dictProfs.setdefault(prof, {"matiere": mat, "emploiTemps": []})
                 else:
                     dictProfs.setdefault(val,  {"matiere": mat, "emploiTemps": []})
+        elif isinstance(nomProf, list):
+            for prof in nomProf:
+                dictProfs.setdefault(prof, {"matiere": mat, "emploiTemps": []})
         else:
             dictProfs.setdefault(nomProf, {"matiere": mat, "emploiTemps": []})
 
@@ -3890,67 +5018,11 @@ def preparer_mappings_affichage(PROFESSEURS, AFFECTATION_MATIERE_SALLE):
         if isinstance(salle_entry, list):
             for s in salle_entry:
                 dictSalles.setdefault(s, {"emploiTemps": []})
-        else:
-            dictSalles.setdefault(salle_entry, {"emploiTemps": []})
-
-    return dictProfs, dictSalles
-
-
-
-# Préparation des mappings pour l'affichage (avant d'utiliser attributProfsCours etc.)
-dictProfs, dictSalles = preparer_mappings_affichage(
-    PROFESSEURS,
-    AFFECTATION_MATIERE_SALLE
-)
-
-
-for prof in dictProfs:
-    dictProfs[prof]["emploiTemps"] = [
-        [JOURS[i]] + ["---"] * len(HEURES)
-        for i in range(len(JOURS))
-    ]
-for salle in dictSalles:
-    dictSalles[salle]["emploiTemps"] = [
-        [JOURS[i]] + ["---"] * len(HEURES)
-        for i in range(len(JOURS))
-    ]
+        else:
+            dictSalles.setdefault(salle_entry, {"emploiTemps": []})
 
-# Fonction pour attribuer l'emploi du temps des professeurs à partir du tableau d'une classe
-def attributProfsCours(pTable, pClasse):
-    """
-    Met à jour dictProfs en ajoutant l'emploi du temps d'un professeur à partir
-    du tableau pTable d'une classe donnée.
+    return dictProfs, dictSalles
 
-    Arguments:
-        pTable (list): tableau 2D représentant l'emploi du temps d'une classe.
-        pClasse (str): nom de la classe correspondante.
-    """
-    for prof in dictProfs:
-        # Initialisation de la table temporaire pour ce professeur
-        profTable = []
-        # Récupère l'ancien emploi du temps pour fusionner en cas de double appel
-        profSecond = dictProfs[prof].get("emploiTemps", [])
-        for row_idx in range(len(pTable)):
-            row = []
-            for col_idx in range(len(pTable[row_idx])):
-                if col_idx == 0:
-                    # Colonne 0 contient le jour, on l’affiche directement
-                    row.append(f"{JOURS[row_idx]}")
-                else:
-                    cell = pTable[row_idx][col_idx]
-                    if cell.find(prof) != -1:
-                        # Si la cellule contient le nom du prof, on extrait la salle
-                        affichSalle = cell[cell.find("Salle"):]
-                        row.append(f"{prof}\n{pClasse}\n[{affichSalle}]")
-                    elif profSecond and profSecond[row_idx][col_idx] != "---":
-                        # Sinon, on conserve l’ancienne valeur si elle n’est pas vide
-                        row.append(profSecond[row_idx][col_idx])
-                    else:
-                        # Aucun cours → on met un placeholder
-                        row.append("---")
-            profTable.append(row)
-        # Mise à jour de l’emploi du temps du prof dans le dictionnaire global
-        dictProfs[prof]["emploiTemps"] = profTable
 
 # Fonction pour afficher l'emploi du temps des professeurs
 def affichCoursProfs():
@@ -3963,47 +5035,6 @@ def affichCoursProfs():
         # Utilisation de tabulate pour un rendu en grille
         #print(tabulate(dictProfs[prof]["emploiTemps"], headers, tablefmt="grid"))
 
-# Fonction pour attribuer l'emploi du temps des salles à partir du tableau d'une classe
-def attributEDTSalles(pTable, pClasse):
-    """
-    Met à jour dictSalles en ajoutant l'emploi du temps d'une salle à partir
-    du tableau pTable d'une classe donnée.
-
-    Arguments:
-        pTable (list): tableau 2D représentant l'emploi du temps d'une classe.
-        pClasse (str): nom de la classe correspondante.
-    """
-    for salle in dictSalles:
-        # Initialisation de la table temporaire pour cette salle
-        salleTable = []
-        # Récupère l'ancien emploi du temps pour fusion éventuelle
-        salleSecond = dictSalles[salle].get("emploiTemps", [])
-        for row_idx in range(len(pTable)):
-            row = []
-            for col_idx in range(len(pTable[row_idx])):
-                if col_idx == 0:
-                    # Première colonne → jour
-                    row.append(f"{JOURS[row_idx]}")
-                else:
-                    cell = pTable[row_idx][col_idx]
-                    if cell.find(salle) != -1:
-                        # Si la cellule contient le nom de la salle, on cherche le prof associé
-                        leProf = ""
-                        for prof in dictProfs:
-                            if cell.find(prof) != -1:
-                                leProf = prof
-                                break
-                        row.append(f"{leProf}\n{pClasse}\n[{salle}]")
-                    elif salleSecond and salleSecond[row_idx][col_idx] != "---":
-                        # Conserve l’ancien contenu si existant
-                        row.append(salleSecond[row_idx][col_idx])
-                    else:
-                        # Pas de cours → placeholder
-                        row.append("---")
-            salleTable.append(row)
-        # Mise à jour de l’emploi du temps de la salle
-        dictSalles[salle]["emploiTemps"] = salleTable
-
 # Fonction pour afficher l'emploi du temps des salles
 def affichEDTSalles():
     """
@@ -4015,147 +5046,136 @@ def affichEDTSalles():
         # Affichage en grille via tabulate
         #print(tabulate(dictSalles[salle]["emploiTemps"], headers, tablefmt="grid"))
 
-# Fonction pour fusionner les groupes vers les classes (texte pour affichage)
-def fusionner_groupes_vers_classes(emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, solver, semaine):
+@dataclass(slots=True)
+class CoursCreneau:
     """
-    Construit un dictionnaire fusion_data[(classe, j, h)] → string décrivant le contenu
-    du créneau pour chaque classe de base et sous-groupe, pour la semaine donnée.
-    Identique à la version interne, mais utile pour génération d'EDT final.
+    Cours placé sur un créneau, tel que le montrent les emplois du temps.
+
+    Attributs:
+        matiere (str): nom de la matière.
+        prof (str): prof qui assure le cours.
+        salle (str): salle du cours.
+        capacite (int | None): nombre de places de la salle, si connu.
+        groupe (str | None): sous-groupe, quand le cours est affiché dans sa classe de base.
     """
-    # Initialisation du dictionnaire pour stocker les données fusionnées
-    fusion_data = {}
+    matiere: str
+    prof: str
+    salle: str
+    capacite: int | None = None
+    groupe: str | None = None
 
-    # 1) D’abord, pour chaque classe de base
-    for cl in CLASSES_BASE:
-        for j, jour in enumerate(JOURS):
-            for h, heure in enumerate(HEURES):
-                key = (cl, j, h)
-                contenu = []
+    @property
+    def libelle(self):
+        """Matière suivie du sous-groupe entre parenthèses s'il y a lieu."""
+        return f"{self.matiere} ({self.groupe})" if self.groupe else self.matiere
 
-                # a) Cours de la classe principale
-                mat_idx = solver.Value(emploi_du_temps[semaine][key])
-                if mat_idx > 0:
-                    # Convertir l'index en matière
-                    mat = MATIERES[mat_idx - 1]
-                    niv = cl[:2]
-                    prof_ref = PROFESSEURS[mat]
+    def texte(self):
+        """Bloc de texte "matière\nprof\n[salle - N places]" d'un cours."""
+        salle_aff = f"{self.salle} - {self.capacite} places" if self.capacite is not None else self.salle
+        return f"{self.libelle}\n{self.prof}\n[{salle_aff}]"
 
-                    # Choix du prof
-                    if isinstance(prof_ref, dict):
-                        # Sélection du professeur selon le niveau et variable d'emploi du temps
-                        profs_niv = prof_ref.get(niv, [])
-                        key_prof = (cl, j, h, mat, semaine)
-                        if key_prof in emploi_du_temps_profs[semaine]:
-                            prof_sel = profs_niv[solver.Value(emploi_du_temps_profs[semaine][key_prof])]
-                        else:
-                            prof_sel = profs_niv[0] if profs_niv else prof_ref
-                    else:
-                        # Professeur est une chaîne unique
-                        prof_sel = prof_ref
 
-                    # Choix de la salle
-                    salle = (
-                        AFFECTATION_MATIERE_SALLE.get(mat)
-                        or AFFECTATION_MATIERE_SALLE.get(prof_sel)
-                    )
-                    idx_salle = solver.Value(emploi_du_temps_salles[semaine][key])
-                    if not salle and 0 < idx_salle <= len(SALLES_GENERALES):
-                        # Si pas de salle assignée, on utilise la salle générale
-                        salle = SALLES_GENERALES[idx_salle - 1]
-
-                    cap_s = CAPACITES_SALLES.get(salle)
-                    if cap_s is not None:
-                        salle_aff = f"{salle} - {cap_s} places"
-                    else:
-                        # Si pas de capacité définie, on affiche juste le nom de la salle
-                        salle_aff = f"{salle}"
-                    contenu.append(f"{mat}\n{prof_sel}\n[{salle_aff}]")
-
-                # b) Sous-groupes de la même classe de base
-                for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
-                    grp = f"{cl}{suffixe}"
-                    if grp in CLASSES:
-                        key_sg = (grp, j, h)
-                        mat_idx_sg = solver.Value(emploi_du_temps[semaine][key_sg])
-                        if mat_idx_sg > 0:
-                            # Convertir l'index en matière pour le sous-groupe
-                            mat2 = MATIERES[mat_idx_sg - 1]
-                            prof_ref2 = PROFESSEURS[mat2]
-
-                            if isinstance(prof_ref2, dict):
-                                profs2 = prof_ref2.get(niv, [])
-                                key_prof2 = (grp, j, h, mat2, semaine)
-                                if key_prof2 in emploi_du_temps_profs[semaine]:
-                                    prof2 = profs2[solver.Value(emploi_du_temps_profs[semaine][key_prof2])]
-                                else:
-                                    prof2 = profs2[0] if profs2 else prof_ref2
-                            else:
-                                # Professeur est une chaîne unique
-                                prof2 = prof_ref2
-
-                            idx_sg = solver.Value(emploi_du_temps_salles[semaine][key_sg])
-                            salle2 = (
-                                AFFECTATION_MATIERE_SALLE.get(mat2)
-                                or AFFECTATION_MATIERE_SALLE.get(prof2)
-                            )
-                            if not salle2 and 0 < idx_sg <= len(SALLES_GENERALES):
-                                salle2 = SALLES_GENERALES[idx_sg - 1]
+def texte_creneau(cours):
+    """Texte d'affichage d'un créneau de la fusion : ses cours séparés d'une ligne vide, ou "---"."""
+    return "\n\n".join(c.texte() for c in cours) if cours else "---"
+
+
+# Fonction pour fusionner les groupes vers les classes
+def fusionner_groupes_vers_classes(emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs, solver, semaine):
+    """
+    Construit un dictionnaire fusion_data[(classe, j, h)] → tuple de CoursCreneau
+    (vide sans cours) pour chaque classe de base et sous-groupe, pour la semaine donnée.
+    Une classe de base reçoit ses cours puis ceux de ses sous-groupes (groupe renseigné).
+    solver peut être un TableauxSolution déjà extrait (sinon la solution est extraite ici).
+    """
+    if isinstance(solver, TableauxSolution):
+        tableaux = solver
+    else:
+        tableaux = extraire_solution(solver, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs)
+    edt, salles, profs = tableaux.semaine(semaine)
+    noms = profs_des_creneaux(edt, profs, CLASSES)
+
+    # Cours (matière, prof, salle, capacité) de chaque créneau occupé de la semaine
+    cours = {}
+    places = np.argwhere(edt).tolist()
+    edt, salles, noms = edt.tolist(), salles.tolist(), noms.tolist()
+    for c, j, h in places:
+        mat = MATIERES[edt[c][j][h] - 1]
+        prof = noms[c][j][h]
+
+        # Choix de la salle : salle dédiée à la matière ou au prof, sinon la salle générale
+        salle = (
+            AFFECTATION_MATIERE_SALLE.get(mat)
+            or AFFECTATION_MATIERE_SALLE.get(prof)
+        )
+        idx_salle = salles[c][j][h]
+        if not salle and 0 < idx_salle <= len(SALLES_GENERALES):
+            salle = SALLES_GENERALES[idx_salle - 1]
+
+        cours[(c, j, h)] = (mat, str(prof), str(salle), CAPACITES_SALLES.get(salle))
 
-                            cap_sg = CAPACITES_SALLES.get(salle2)
-                            if cap_sg is not None:
-                                salle_aff2 = f"{salle2} - {cap_sg} places"
-                            else:
-                                # Si pas de capacité définie, on affiche juste le nom de la salle
-                                salle_aff2 = f"{salle2}"
-                            contenu.append(f"{mat2} ({grp})\n{prof2}\n[{salle_aff2}]")
+    # Initialisation du dictionnaire pour stocker les données fusionnées
+    fusion_data = {}
 
-                # Fusion du contenu
-                fusion_data[key] = "\n\n".join(contenu) if contenu else "---"
+    # 1) D’abord, pour chaque classe de base : ses cours puis ceux de ses sous-groupes
+    for cl in CLASSES_BASE:
+        c = CLASSES.index(cl)
+        groupes = [
+            (f"{cl}{suffixe}", CLASSES.index(f"{cl}{suffixe}"))
+            for suffixe in SOUS_GROUPES_SUFFIXES
+            if f"{cl}{suffixe}" in CLASSES
+        ]
+        for j in range(len(JOURS)):
+            for h in range(len(HEURES)):
+                contenu = []
+                if (c, j, h) in cours:
+                    contenu.append(CoursCreneau(*cours[(c, j, h)]))
+                for grp, g in groupes:
+                    if (g, j, h) in cours:
+                        contenu.append(CoursCreneau(*cours[(g, j, h)], groupe=grp))
+                fusion_data[(cl, j, h)] = tuple(contenu)
 
     # 2) Optionnel : traiter chaque sous-groupe indépendamment
-    for suffixe, mat_sg in SOUS_GROUPES_SUFFIXES.items():
+    for suffixe in SOUS_GROUPES_SUFFIXES:
         for cl_base in CLASSES_BASE:
             grp = f"{cl_base}{suffixe}"
             if grp not in CLASSES:
                 continue
-            for j, jour in enumerate(JOURS):
-                for h, heure in enumerate(HEURES):
-                    key_sg = (grp, j, h)
-                    contenu_sg = []
-                    mat_idx_sg = solver.Value(emploi_du_temps[semaine][key_sg])
-                    if mat_idx_sg > 0:
-                        # Construction du bloc d'affichage pour le sous-groupe
-                        mat2 = MATIERES[mat_idx_sg - 1]
-                        prof_ref2 = PROFESSEURS[mat2]
-
-                        if isinstance(prof_ref2, dict):
-                            niv_b = cl_base[:2]
-                            profs2 = prof_ref2.get(niv_b, [])
-                            key_prof2 = (grp, j, h, mat2, semaine)
-                            if key_prof2 in emploi_du_temps_profs[semaine]:
-                                prof2 = profs2[solver.Value(emploi_du_temps_profs[semaine][key_prof2])]
-                            else:
-                                prof2 = profs2[0] if profs2 else prof_ref2
-                        else:
-                            prof2 = prof_ref2
+            g = CLASSES.index(grp)
+            for j in range(len(JOURS)):
+                for h in range(len(HEURES)):
+                    if (g, j, h) in cours:
+                        fusion_data[(grp, j, h)] = (CoursCreneau(*cours[(g, j, h)]),)
+                    else:
+                        fusion_data[(grp, j, h)] = ()
 
-                        idx_s2 = solver.Value(emploi_du_temps_salles[semaine][key_sg])
-                        salle2 = (
-                            AFFECTATION_MATIERE_SALLE.get(mat2)
-                            or AFFECTATION_MATIERE_SALLE.get(prof2)
-                        )
-                        if not salle2 and 0 < idx_s2 <= len(SALLES_GENERALES):
-                            salle2 = SALLES_GENERALES[idx_s2 - 1]
-                        cap_s2 = CAPACITES_SALLES.get(salle2)
-                        if cap_s2 is not None:
-                            salle_aff2 = f"{salle2} - {cap_s2} places"
-                        else:
-                            salle_aff2 = f"{salle2}"
-                        contenu_sg.append(f"{mat2}\n{prof2}\n[{salle_aff2}]")
+    return fusion_data
 
-                    fusion_data[key_sg] = "\n\n".join(contenu_sg) if contenu_sg else "---"
 
-    return fusion_data
+def indexer_profs_salles(fusion_semaine):
+    """
+    Index inversé d'une semaine de fusion, construit en une seule passe sur ses créneaux.
+
+    Le cours d'un sous-groupe, aussi affiché dans sa classe de base, n'est repris
+    que sous la clé du sous-groupe. Si deux classes ont le même prof (ou la même
+    salle) sur un créneau, la dernière rencontrée l'emporte.
+
+    Arguments:
+        fusion_semaine (dict): fusion[(classe, j, h)] → tuple de CoursCreneau.
+
+    Retourne:
+        tuple: (par_prof, par_salle), chacun nom → {(j, h): (classe, CoursCreneau)}
+        dans l'ordre de première apparition.
+    """
+    par_prof = {}
+    par_salle = {}
+    for (cl, j, h), cours in fusion_semaine.items():
+        for c in cours:
+            if c.groupe:
+                continue
+            par_prof.setdefault(c.prof, {})[(j, h)] = (cl, c)
+            par_salle.setdefault(c.salle, {})[(j, h)] = (cl, c)
+    return par_prof, par_salle
 
 
 def afficher_resultat_si_disponible():
@@ -4163,28 +5183,6 @@ def afficher_resultat_si_disponible():
     if fusion_choisie:
         print("Résultat final :", fusion_choisie)
 
-# Fonction pour choisir la fusion et les résultats correspondant à la meilleure graine
-def choisir_run(fusions_par_run, meilleur_seed):
-    """
-    Sélectionne dans fusions_par_run la fusion et les résultats
-    correspondant à la meilleure graine.
-    Retourne (fusion_choisie, resultats_choisis).
-    """
-    fusion_choisie = None
-    resultats_choisis = None
-    for seed_i, fusion_i, resultats_i in fusions_par_run:
-        if seed_i == meilleur_seed:
-            fusion_choisie = fusion_i
-            resultats_choisis = resultats_i
-            break
-    if fusion_choisie is None:
-        print(f"Aucun run trouvé pour le seed {meilleur_seed}.")
-    else:
-        print(f"\n--- Emploi du temps pour la meilleure run (seed = {meilleur_seed}) ---\n")
-    return fusion_choisie, resultats_choisis
-
-
-
 # Fonction pour détecter les salles surchargées
 def detecter_salles_surchargees(fusion, CLASSES, SOUS_GROUPES_SUFFIXES,
                                 CAPACITES_CLASSES, SALLES_GENERALES,
@@ -4209,10 +5207,10 @@ def detecter_salles_surchargees(fusion, CLASSES, SOUS_GROUPES_SUFFIXES,
             for h in range(len(HEURES)):
                 compte = defaultdict(int)
                 for cl in CLASSES:
-                    contenu = fusion[sem].get((cl, j, h), "")
-                    if "[" in contenu and "]" in contenu:
-                        salle = contenu.split("[",1)[1].split("]",1)[0].split(" - ")[0].strip()
-                        compte[salle] += taille_par_classe[cl]
+                    contenu = fusion[sem].get((cl, j, h))
+                    if contenu:
+                        # Premier cours du créneau (celui de la classe elle-même s'il existe)
+                        compte[contenu[0].salle] += taille_par_classe[cl]
                 for salle, total in compte.items():
                     cap = CAPACITES_CLASSES.get(salle, 0)
                     if total > cap:
@@ -4234,39 +5232,43 @@ def afficher_edts_elèves(fusion, CLASSES, SEMAINES, JOURS, HEURES):
             table = []
             for j, jour in enumerate(JOURS):
                 row = [jour] + [
-                    fusion[sem].get((cl, j, h), "---")
+                    texte_creneau(fusion[sem].get((cl, j, h)))
                     for h in range(len(HEURES))
                 ]
                 table.append(row)
             #print(tabulate(table, headers, tablefmt="grid"))
 
 # Fonction pour afficher les emplois du temps des professeurs et des salles
-def afficher_edts_profs_salles(fusion, SEMAINES, CLASSES, JOURS, HEURES,
+def afficher_edts_profs_salles(fusion, SEMAINES, JOURS, HEURES,
                                dictProfs, dictSalles,
-                               attributProfsCours, attributEDTSalles,
-                               affichCoursProfs, affichEDTSalles):
+                               affichCoursProfs, affichEDTSalles, index=None):
     """
-    Pour chaque semaine, reconstruit pTable pour chaque classe, met à jour
-    dictProfs/dictSalles via attributProfsCours/attributEDTSalles, puis affiche.
+    Pour chaque semaine, remplit l'emploiTemps de dictProfs/dictSalles depuis
+    l'index inversé de la fusion (indexer_profs_salles, calculé ici s'il n'est
+    pas fourni), puis affiche.
     """
-    # Remise à zéro
-    for prof in dictProfs:
-        dictProfs[prof]["emploiTemps"] = []
-    for salle in dictSalles:
-        dictSalles[salle]["emploiTemps"] = []
+    def tableau(creneaux):
+        # Une ligne par jour : le jour puis "prof\nclasse\n[salle]" par heure ("---" si libre)
+        lignes = []
+        for j in range(len(JOURS)):
+            ligne = [JOURS[j]]
+            for h in range(len(HEURES)):
+                if (j, h) in creneaux:
+                    cl, c = creneaux[(j, h)]
+                    ligne.append(f"{c.prof}\n{cl}\n[{c.salle}]")
+                else:
+                    ligne.append("---")
+            lignes.append(ligne)
+        return lignes
 
     for sem in SEMAINES:
+        par_prof, par_salle = index[sem] if index else indexer_profs_salles(fusion[sem])
+        for prof in dictProfs:
+            dictProfs[prof]["emploiTemps"] = tableau(par_prof.get(prof, {}))
+        for salle in dictSalles:
+            dictSalles[salle]["emploiTemps"] = tableau(par_salle.get(salle, {}))
+
         print(f"\n##### Professeurs — {sem} #####\n")
-        for cl in CLASSES:
-            pTable = [
-                [JOURS[j]] + [
-                    fusion[sem].get((cl, j, h), "---") or "---"
-                    for h in range(len(HEURES))
-                ]
-                for j in range(len(JOURS))
-            ]
-            attributProfsCours(pTable, cl)
-            attributEDTSalles(pTable, cl)
         affichCoursProfs()
         print(f"\n##### Salles — {sem} #####\n")
         affichEDTSalles()
@@ -4276,173 +5278,84 @@ def afficher_edts_profs_salles(fusion, SEMAINES, CLASSES, JOURS, HEURES,
         for salle in dictSalles:
             dictSalles[salle]["emploiTemps"] = []
 
-def generer_json_edt(fusion, SEMAINES, CLASSES_BASE, JOURS, HEURES, MATIERES):
+def construire_vues_edt(fusion, SEMAINES, CLASSES_BASE, JOURS, HEURES, index=None):
     """
-    Génère et écrit "emploi_du_temps_global.json" contenant
-    edt_classe, edt_prof et edt_salle structurés comme dans l'exemple fourni.
+    Construit l'emploi du temps global {"edt_classe", "edt_prof", "edt_salle"}
+    d'une fusion, structuré comme dans l'exemple fourni.
+
+    edt_classe est projeté depuis les CoursCreneau de la fusion, edt_prof et
+    edt_salle depuis l'index inversé par semaine (indexer_profs_salles), calculé
+    ici s'il n'est pas fourni.
     """
-    import json
+    # ne garder que la partie avant "-" (ex. "8h30" à partir de "8h30-9h20")
+    heures_simples = [heure.split("-", 1)[0] for heure in HEURES]
+    if index is None:
+        index = {semaine: indexer_profs_salles(fusion[semaine]) for semaine in SEMAINES}
 
-    # 1. Construire 'edt_classe'
     edt_classe = {}
+    edt_profs = {}
+    edt_salles = {}
     for semaine in SEMAINES:
+        # 1. 'edt_classe' : chaque classe de base avec les cours de ses sous-groupes
         edt_classe[semaine] = {}
         for cl in CLASSES_BASE:
             edt_classe[semaine][cl] = {}
             for j, jour in enumerate(JOURS):
                 edt_classe[semaine][cl][jour] = {}
-                for h, heure in enumerate(HEURES):
-                    clé = (cl, j, h)
-                    contenu = meilleure_fusion[semaine].get(clé, "")
-                    if not contenu or contenu.strip() == "---":
+                for h in range(len(HEURES)):
+                    cours = fusion[semaine].get((cl, j, h))
+                    if not cours:
                         continue
-
-                    # ne garder que la partie avant "-" (ex. "8h30" à partir de "8h30-9h20")
-                    heure_simple = heure.split("-", 1)[0]
-
-                    # extraction des blocs (sous-groupes éventuels)
-                    blocs = contenu.split("\n\n")
-                    matieres_liste = []
-                    profs_liste    = []
-                    salles_liste   = []
-
-                    for bloc in blocs:
-                        lignes = bloc.split("\n")
-                        if len(lignes) < 3:
-                            continue
-                        mat   = lignes[0].strip()
-                        prof  = lignes[1].strip()
-                        salle_brute = lignes[2].strip()
-                        if salle_brute.startswith("[") and "]" in salle_brute:
-                            sauv = salle_brute.lstrip("[").rstrip("]")
-                            salle_extr = sauv.split(" -")[0]
-                        else:
-                            salle_extr = salle_brute.strip("[]")
-                        matieres_liste.append(mat)
-                        profs_liste.append(prof)
-                        salles_liste.append(salle_extr)
-
-                    edt_classe[semaine][cl][jour][heure_simple] = {
-                        "matiere":     matieres_liste,
-                        "professeurs": profs_liste,
-                        "salle":       salles_liste
+                    edt_classe[semaine][cl][jour][heures_simples[h]] = {
+                        "matiere":     [c.libelle for c in cours],
+                        "professeurs": [c.prof for c in cours],
+                        "salle":       [c.salle for c in cours]
                     }
 
-    # 2. Construire 'edt_profs'
-    edt_profs = {}
-    for semaine in SEMAINES:
-        edt_profs[semaine] = {}
-        # première passe : collecte de tous les profs
-        profs_tous = set()
-        for (cl, j, h), contenu in meilleure_fusion[semaine].items():
-            if not contenu or contenu.strip() == "---":
-                continue
-            for bloc in contenu.split("\n\n"):
-                lignes = bloc.split("\n")
-                if len(lignes) < 3:
-                    continue
-                profs_tous.add(lignes[1].strip())
-
-        for prof in profs_tous:
-            edt_profs[semaine][prof] = {jour: {} for jour in JOURS}
+        par_prof, par_salle = index[semaine]
 
-        # deuxième passe : remplissage
-        for (cl, j, h), contenu in meilleure_fusion[semaine].items():
-            if not contenu or contenu.strip() == "---":
-                continue
-            jour = JOURS[j]
-            heure = HEURES[h]
-
-            # ne garder que la partie avant "-" (ex. "8h30")
-            heure_simple = heure.split("-", 1)[0]
-
-            for bloc in contenu.split("\n\n"):
-                lignes = bloc.split("\n")
-                if len(lignes) < 3:
-                    continue
-                mat         = lignes[0].strip()
-                prof        = lignes[1].strip()
-                salle_brute = lignes[2].strip()
-                if salle_brute.startswith("[") and "]" in salle_brute:
-                    sauv       = salle_brute.lstrip("[").rstrip("]")
-                    salle_extr = sauv.split(" -")[0]
-                else:
-                    salle_extr = salle_brute.strip("[]")
-
-                if prof not in edt_profs[semaine]:
-                    edt_profs[semaine][prof] = {jour2: {} for jour2 in JOURS}
-
-                edt_profs[semaine][prof][jour][heure_simple] = {
+        # 2. 'edt_profs'
+        edt_profs[semaine] = {}
+        for prof, creneaux in par_prof.items():
+            edt_prof = edt_profs[semaine][prof] = {jour: {} for jour in JOURS}
+            for (j, h), (cl, c) in creneaux.items():
+                edt_prof[JOURS[j]][heures_simples[h]] = {
                     "classe":  [cl],
-                    "matiere": [mat],
-                    "salle":   [salle_extr]
+                    "matiere": [c.matiere],
+                    "salle":   [c.salle]
                 }
 
-
-    # 3. Construire 'edt_salles'
-    edt_salles = {}
-    for semaine in SEMAINES:
+        # 3. 'edt_salles'
         edt_salles[semaine] = {}
-        salles_toutes = set()
-        for contenu in meilleure_fusion[semaine].values():
-            if not contenu or contenu.strip() == "---":
-                continue
-            for bloc in contenu.split("\n\n"):
-                lignes = bloc.split("\n")
-                if len(lignes) < 3:
-                    continue
-                salle_brute = lignes[2].strip()
-                if salle_brute.startswith("[") and "]" in salle_brute:
-                    sauv       = salle_brute.lstrip("[").rstrip("]")
-                    salle_extr = sauv.split(" -")[0]
-                else:
-                    salle_extr = salle_brute.strip("[]")
-                salles_toutes.add(salle_extr)
-
-        for salle_extr in salles_toutes:
-            edt_salles[semaine][salle_extr] = {jour: {} for jour in JOURS}
-
-        for (cl, j, h), contenu in meilleure_fusion[semaine].items():
-            if not contenu or contenu.strip() == "---":
-                continue
-            jour  = JOURS[j]
-            heure = HEURES[h]
-
-            # ne garder que la partie avant "-" (ex. "8h30")
-            heure_simple = heure.split("-", 1)[0]
-
-            for bloc in contenu.split("\n\n"):
-                lignes      = bloc.split("\n")
-                if len(lignes) < 3:
-                    continue
-                mat         = lignes[0].strip()
-                prof        = lignes[1].strip()
-                salle_brute = lignes[2].strip()
-                if salle_brute.startswith("[") and "]" in salle_brute:
-                    sauv       = salle_brute.lstrip("[").rstrip("]")
-                    salle_extr = sauv.split(" -")[0]
-                else:
-                    salle_extr = salle_brute.strip("[]")
-
-                if salle_extr not in edt_salles[semaine]:
-                    edt_salles[semaine][salle_extr] = {jour2: {} for jour2 in JOURS}
-
-                edt_salles[semaine][salle_extr][jour][heure_simple] = {
+        for salle, creneaux in par_salle.items():
+            edt_salle = edt_salles[semaine][salle] = {jour: {} for jour in JOURS}
+            for (j, h), (cl, c) in creneaux.items():
+                edt_salle[JOURS[j]][heures_simples[h]] = {
                     "classe":      [cl],
-                    "matiere":     [mat],
-                    "professeurs": [prof]
+                    "matiere":     [c.matiere],
+                    "professeurs": [c.prof]
                 }
 
-    # 4. Écrire le JSON final
-    final_output = {
+    return {
         "edt_classe": edt_classe,
         "edt_prof":   edt_profs,
         "edt_salle":  edt_salles
     }
-    with open("data/emploi_du_temps_global.json", "w", encoding="utf-8") as f:
-        json.dump(final_output, f, ensure_ascii=False, indent=4)
 
-    print("→ Fichier JSON généré : data/emploi_du_temps_global.json")
+
+def generer_json_edt(fusion, SEMAINES, CLASSES_BASE, JOURS, HEURES, MATIERES, index=None):
+    """
+    Génère et écrit l'emploi du temps global (voir construire_vues_edt) au format
+    config["parametres_solveur"]["format_edt"] : "compact.gz" par défaut,
+    "compact", "compact.xz" ou "json" (voir format_edt).
+    """
+    final_output = construire_vues_edt(fusion, SEMAINES, CLASSES_BASE, JOURS, HEURES, index=index)
+
+    # Format compact par défaut ; "json" garde l'export historique
+    format_fichier = config.get("parametres_solveur", {}).get("format_edt", format_edt.FORMAT_PAR_DEFAUT)
+    chemin = format_edt.sauvegarder_edt(final_output, format_fichier)
+
+    print(f"→ Emploi du temps enregistré : {chemin}")
 
 
 constraint_status = {
@@ -4462,18 +5375,18 @@ constraint_status = {
     "mem_niveau_cours":              "optionnelle",
     "max_heures_par_etendue":        "optionnelle",
     "mat_horaire_donne_v2":          "optionnelle",
-    "preferences_salle_professeur":  "optionnelle"
+    "preferences_salle_professeur":  "optionnelle",
+    "preferences_profs":             "optionnelle"
 }
 
 # Fonction pour générer le fichier JSON des rapports de contraintes
-def generer_json_rapports(fusions_par_run, constraint_status):
+def generer_json_rapports(journal_runs, constraint_status):
     """
-    Génère et écrit "tous_rapports_contraintes.json" à partir de fusions_par_run
-    et du mapping constraint_status.
+    Génère et écrit "tous_rapports_contraintes.json" à partir du journal des runs
+    du lot (relu run par run) et du mapping constraint_status.
     """
-    import json
     tous = {}
-    for seed_i, _, resultats_i in fusions_par_run:
+    for seed_i, _, resultats_i in journal_runs:
         statuts = {}
         for cat, stats in resultats_i.items():
             statuts[cat] = {
@@ -4488,29 +5401,10 @@ def generer_json_rapports(fusions_par_run, constraint_status):
         for s in run.values():
             total += s["total"]; resp += s["respectees"]
     tous["pourcentage_global"] = round((resp/total)*100,2) if total else 100.0
-    with open("data/tous_rapports_contraintes.json", "w", encoding="utf-8") as f:
-        json.dump(tous, f, ensure_ascii=False, indent=4)
+    # Écriture atomique : la page des résultats peut relire le fichier pendant la fin du lot
+    ecrire_atomique("data/tous_rapports_contraintes.json", json.dumps(tous, ensure_ascii=False, indent=4))
     print(f"→ Tous les rapports écrits (global {tous['pourcentage_global']}%)")
 
-if fusion_choisie:
-    surchargees = detecter_salles_surchargees(
-        fusion_choisie, CLASSES, SOUS_GROUPES_SUFFIXES,
-        CAPACITES_CLASSES, SALLES_GENERALES,
-        SEMAINES, JOURS, HEURES
-    )
-    afficher_edts_elèves(fusion_choisie, CLASSES, SEMAINES, JOURS, HEURES)
-    afficher_edts_profs_salles(
-        fusion_choisie, SEMAINES, CLASSES, JOURS, HEURES,
-        dictProfs, dictSalles,
-        attributProfsCours, attributEDTSalles,
-        affichCoursProfs, affichEDTSalles
-    )
-    # (optionnel) afficher surchargees
-    generer_json_edt(fusion_choisie, SEMAINES, CLASSES_BASE, JOURS, HEURES, MATIERES)
-    generer_json_rapports(fusions_par_run, constraint_status)
-    if resultats_choisis:
-        afficher_rapport_contraintes(resultats_choisis)
-
 
 avancement_global = {
     "run_actuel": 0,
@@ -4525,11 +5419,335 @@ avancement_global = {
     "taux_actuel": 0,
     "derniere_maj": 0,
     "phase_actuelle": "Initialisation",
-    "etape_actuelle": ""
+    "etape_actuelle": "",
+    "raison_arret": None,
+    "arret_demande": False,
+    "diagnostic": None
 }
 
-def lancer_depuis_interface(nombre_runs):
-    global fusions_par_run, taux_par_run, meilleur_seed, meilleure_fusion, meilleur_resultats, fusion_choisie
+# ─── Cache des modèles construits ───────────────────────────────────────────
+# Un modèle construit (CpModelProto sérialisé, variables, registre des contraintes,
+# répartition cantine et salles des profs) est conservé dans DOSSIER_CACHE_MODELES
+# sous l'empreinte de ce qui le détermine : contenu de la configuration, du fichier
+# de hint éventuel, du code du solveur et version d'OR-Tools. Les MODELES_CONSERVES
+# plus récemment utilisés sont gardés. parametres_solveur["cache_modele"] = false
+# désactive le cache (par exemple pour tirer une nouvelle répartition des demi-heures).
+
+DOSSIER_CACHE_MODELES = "data/cache"
+MODELES_CONSERVES = 4
+
+
+class _PicklerModele(pickle.Pickler):
+    """Pickler qui remplace les variables CP-SAT par leur indice dans le proto."""
+
+    def persistent_id(self, obj):
+        if isinstance(obj, cp_model.IntVar):
+            return ("v", obj.Index())
+        if isinstance(obj, cp_model.IntervalVar):
+            return ("i", obj.Index())
+        if isinstance(obj, cp_model_helper.NotBooleanVariable):
+            return ("n", obj.Not().Index())
+        return None
+
+
+class _UnpicklerModele(pickle.Unpickler):
+    """Unpickler qui recrée les variables CP-SAT d'un modèle relu depuis son proto."""
+
+    def __init__(self, fichier, model):
+        super().__init__(fichier)
+        self.model = model
+        self.variables = {}
+
+    def persistent_load(self, pid):
+        variable = self.variables.get(pid)
+        if variable is None:
+            genre, index = pid
+            if genre == "i":
+                variable = self.model.GetIntervalVarFromProtoIndex(index)
+            else:
+                variable = self.model.GetIntVarFromProtoIndex(index)
+                if genre == "n":
+                    variable = variable.Not()
+            self.variables[pid] = variable
+        return variable
+
+
+def empreinte_modele(config):
+    """
+    Empreinte de ce qui détermine le modèle construit par SolverSession.construire_modele :
+    configuration, fichier de hint éventuel, code de ce module et version d'OR-Tools.
+    """
+    empreinte = hashlib.sha256()
+    empreinte.update(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    chemin_hint = config.get("parametres_solveur", {}).get("hint_edt")
+    if chemin_hint is True:
+        format_hint = format_edt.format_existant()
+        chemin_hint = format_edt.chemin_format(format_hint) if format_hint else None
+    if chemin_hint and os.path.exists(chemin_hint):
+        with open(chemin_hint, "rb") as f:
+            empreinte.update(f.read())
+    with open(__file__, "rb") as f:
+        empreinte.update(f.read())
+    empreinte.update(ortools.__version__.encode())
+    return empreinte.hexdigest()
+
+
+def chemin_cache_modele(empreinte, dossier=DOSSIER_CACHE_MODELES):
+    return os.path.join(dossier, f"modele_{empreinte[:32]}.pkl")
+
+
+def sauvegarder_modele_cache(empreinte, session, dossier=DOSSIER_CACHE_MODELES):
+    """
+    Enregistre le modèle construit d'une session dans le cache, puis supprime les
+    modèles les moins récemment utilisés au-delà de MODELES_CONSERVES.
+    Ne fait rien si le modèle contient un objet non sérialisable.
+    """
+    contenu = io.BytesIO()
+    try:
+        pickler = _PicklerModele(contenu, protocol=pickle.HIGHEST_PROTOCOL)
+        # Le proto d'abord : il doit être relu avant les variables, qui y renvoient
+        pickler.dump(session.model.Proto().SerializeToString())
+        pickler.dump({
+            "variables": (session.emploi_du_temps, session.emploi_du_temps_salles, session.emploi_du_temps_profs),
+            "registre": getattr(session.model, "registre_contraintes", None),
+            "volume_bihebdo": getattr(session.model, "volume_bihebdo", None),
+            "classe_creneau_dej": session.classe_creneau_dej,
+            "affectation_matiere_salle": dict(AFFECTATION_MATIERE_SALLE),
+            "stats_hint": session.stats_hint,
+        })
+    except Exception as e:
+        # PicklingError, TypeError, mais aussi AttributeError (classe locale), RecursionError...
+        print(f"⚠️ Modèle non mis en cache : {e}")
+        return
+    ecrire_atomique(chemin_cache_modele(empreinte, dossier), contenu.getvalue())
+
+    modeles = sorted(
+        (os.path.join(dossier, nom) for nom in os.listdir(dossier)
+         if nom.startswith("modele_") and nom.endswith(".pkl")),
+        key=os.path.getmtime
+    )
+    for chemin in modeles[:max(0, len(modeles) - MODELES_CONSERVES)]:
+        os.remove(chemin)
+
+
+def charger_modele_cache(empreinte, dossier=DOSSIER_CACHE_MODELES):
+    """
+    Relit un modèle du cache.
+
+    Retourne:
+        tuple ou None: (model, variables, classe_creneau_dej, affectation_matiere_salle,
+            stats_hint), ou None si l'empreinte n'est pas en cache (ou fichier illisible).
+    """
+    chemin = chemin_cache_modele(empreinte, dossier)
+    try:
+        with open(chemin, "rb") as f:
+            contenu = f.read()
+        model = cp_model.CpModel()
+        unpickler = _UnpicklerModele(io.BytesIO(contenu), model)
+        model.Proto().ParseFromString(unpickler.load())
+        model.rebuild_var_and_constant_map()
+        donnees = unpickler.load()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Modèle en cache illisible ({chemin}) : {e}")
+        return None
+    os.utime(chemin)  # utilisation récente (éviction LRU)
+    if donnees.get("volume_bihebdo") is not None:
+        model.volume_bihebdo = donnees["volume_bihebdo"]
+    return (
+        model, donnees["variables"], donnees["classe_creneau_dej"],
+        donnees["affectation_matiere_salle"], donnees["stats_hint"], donnees["registre"]
+    )
+
+
+class SolverSession:
+    """
+    Session de calcul : charge explicitement un fichier de configuration, puis
+    construit et conserve le modèle CP-SAT, ses variables et l'état d'avancement.
+
+    L'import du module ne construit plus rien : c'est la session qui publie les
+    constantes (config, SEMAINES, JOURS, CLASSES, ...) au niveau du module, car
+    les fonctions de contraintes et de vérification les lisent comme globales.
+    Une session peut être rechargée (config.json modifié) sans redémarrer l'application.
+
+    Attributs:
+        chemin_config (str): chemin du fichier JSON de configuration.
+        donnees (dict): constantes issues de init_donnees(), None avant chargement.
+        model (CpModel): modèle CP-SAT construit, None avant construction.
+        emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs (dict): variables du modèle.
+        classe_creneau_dej (dict): classe → indice du créneau déjeuner.
+        empreinte (str): empreinte (empreinte_modele) de la configuration du modèle construit.
+        avancement (dict): état d'avancement partagé avec get_avancement_info().
+    """
+
+    def __init__(self, chemin_config="data/config.json"):
+        self.chemin_config = chemin_config
+        self.donnees = None
+        self.model = None
+        self.emploi_du_temps = None
+        self.emploi_du_temps_salles = None
+        self.emploi_du_temps_profs = None
+        self.classe_creneau_dej = None
+        self.stats_hint = None
+        self.empreinte = None
+        self.affectation_matiere_salle = None
+        self.avancement = avancement_global
+
+    def charger(self):
+        """
+        Lit le fichier de configuration et publie les constantes au niveau du module.
+
+        Retourne:
+            SolverSession: la session elle-même (chaînage).
+        """
+        self.donnees = init_donnees(self.chemin_config)
+        globals().update(self.donnees)
+        return self
+
+    def construire_modele(self):
+        """
+        Construit le modèle CP-SAT (creer_modele), applique la cantine, puis
+        prépare les mappings d'affichage.
+        Avec config["parametres_solveur"]["modele"] = "intervalles", le modèle
+        vient de creer_modele_intervalles (cantine et sous-groupes compris).
+        Charge la configuration au préalable si nécessaire.
+
+        Si rien n'a changé depuis la construction précédente (même empreinte_modele),
+        le modèle de la session est conservé ; sinon il est relu depuis le cache sur
+        disque (DOSSIER_CACHE_MODELES) s'il y est, et construit puis mis en cache sinon.
+
+        Retourne:
+            SolverSession: la session elle-même (chaînage).
+        """
+        global model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs
+        global classe_creneau_dej, dictProfs, dictSalles
+
+        if self.donnees is None:
+            self.charger()
+
+        # Empreinte calculée avant creer_modele, qui complète AFFECTATION_MATIERE_SALLE
+        empreinte = None
+        if config.get("parametres_solveur", {}).get("cache_modele", True):
+            empreinte = empreinte_modele(config)
+
+        if empreinte is not None and self.model is not None and empreinte == self.empreinte:
+            print("♻️ Configuration inchangée : modèle conservé")
+            AFFECTATION_MATIERE_SALLE.update(self.affectation_matiere_salle)
+        elif empreinte is not None and (modele_cache := charger_modele_cache(empreinte)) is not None:
+            print("♻️ Modèle relu depuis le cache")
+            (
+                self.model,
+                (self.emploi_du_temps, self.emploi_du_temps_salles, self.emploi_du_temps_profs),
+                self.classe_creneau_dej,
+                affectation_matiere_salle,
+                self.stats_hint,
+                registre
+            ) = modele_cache
+            if registre is not None:
+                self.model.registre_contraintes = registre
+            AFFECTATION_MATIERE_SALLE.update(affectation_matiere_salle)
+        else:
+            self._creer_modele()
+            if empreinte is not None:
+                sauvegarder_modele_cache(empreinte, self)
+        self.empreinte = empreinte
+        self.affectation_matiere_salle = dict(AFFECTATION_MATIERE_SALLE)
+        avancement_global["reparation_hint"] = self.stats_hint
+
+        # Publication au niveau du module pour les fonctions qui lisent ces globales
+        model = self.model
+        emploi_du_temps = self.emploi_du_temps
+        emploi_du_temps_salles = self.emploi_du_temps_salles
+        emploi_du_temps_profs = self.emploi_du_temps_profs
+        classe_creneau_dej = self.classe_creneau_dej
+
+        # Préparation des mappings pour l'affichage (après creer_modele, qui
+        # complète AFFECTATION_MATIERE_SALLE avec la salle de chaque prof)
+        dictProfs, dictSalles = preparer_mappings_affichage(
+            PROFESSEURS,
+            AFFECTATION_MATIERE_SALLE
+        )
+        for prof in dictProfs:
+            dictProfs[prof]["emploiTemps"] = [
+                [JOURS[i]] + ["---"] * len(HEURES)
+                for i in range(len(JOURS))
+            ]
+        for salle in dictSalles:
+            dictSalles[salle]["emploiTemps"] = [
+                [JOURS[i]] + ["---"] * len(HEURES)
+                for i in range(len(JOURS))
+            ]
+        return self
+
+    def _creer_modele(self):
+        """Construit le modèle, ses variables, la cantine et le hint réparé (sans cache)."""
+        if config.get("parametres_solveur", {}).get("modele") == "intervalles":
+            # Modèle à intervalles : cantine et sous-groupes sont gérés par le modèle
+            (
+                self.model,
+                self.emploi_du_temps,
+                self.emploi_du_temps_salles,
+                self.emploi_du_temps_profs
+            ) = creer_modele_intervalles()
+            _, self.classe_creneau_dej = repartir_cantine(HEURES, CLASSES_BASE, CAPACITES_CLASSES, config)
+        else:
+            # Création du modèle et des variables
+            (
+                self.model,
+                self.emploi_du_temps,
+                self.emploi_du_temps_salles,
+                self.emploi_du_temps_profs
+            ) = creer_modele()
+
+            # Configuration de la cantine (et blocage des créneaux déjeuner)
+            self.classe_creneau_dej = configurer_cantine(
+                self.model,
+                self.emploi_du_temps,
+                SEMAINES,
+                JOURS,
+                HEURES,
+                CLASSES_BASE,
+                CAPACITES_CLASSES,
+                config
+            )
+
+        # Démarrage à chaud : le hint partiel lu par creer_modele devient une solution complète
+        self.stats_hint = reparer_hint(
+            self.model, config.get("parametres_solveur", {}).get("temps_max_reparation_hint", 10)
+        )
+
+    def recharger(self, chemin_config=None):
+        """
+        Relit la configuration (éventuellement depuis un autre fichier) et
+        reconstruit le modèle.
+
+        Arguments:
+            chemin_config (str, optionnel): nouveau chemin de configuration.
+
+        Retourne:
+            SolverSession: la session elle-même (chaînage).
+        """
+        if chemin_config is not None:
+            self.chemin_config = chemin_config
+        # Le modèle précédent est gardé : il est réutilisé si la configuration n'a pas changé
+        self.donnees = None
+        return self.charger().construire_modele()
+
+
+def get_session(chemin_config="data/config.json"):
+    """
+    Retourne la session de calcul courante, en la créant (sans la construire)
+    au premier appel ou si un autre fichier de configuration est demandé.
+    """
+    global session
+    if session is None or session.chemin_config != chemin_config:
+        session = SolverSession(chemin_config)
+    return session
+
+
+def lancer_depuis_interface(nombre_runs, runs_paralleles=None):
+    global journal_runs, taux_par_run, meilleur_seed, meilleure_fusion, meilleur_resultats, fusion_choisie
     global avancement_global
     
     # Initialisation du suivi
@@ -4546,7 +5764,10 @@ def lancer_depuis_interface(nombre_runs):
         "taux_actuel": 0,
         "derniere_maj": time.time(),
         "phase_actuelle": "Préparation",
-        "etape_actuelle": "Création du modèle..."
+        "etape_actuelle": "Création du modèle...",
+        "raison_arret": None,
+        "arret_demande": False,
+        "diagnostic": None
     })
 
     try:
@@ -4554,23 +5775,39 @@ def lancer_depuis_interface(nombre_runs):
         avancement_global["etape_actuelle"] = "Création du modèle CP-SAT..."
         avancement_global["derniere_maj"] = time.time()
         
-        model, emploi_du_temps, emploi_du_temps_salles, emploi_du_temps_profs = creer_modele()
+        # On relit config.json à chaque lancement : une modification est prise en
+        # compte sans redémarrer l'application
+        session_courante = get_session().charger()
+
+        # Analyse statique avant la construction du modèle : un lot infaisable d'emblée est refusé
+        diagnostic = analyser_faisabilite(session_courante.donnees)
+        avancement_global["diagnostic"] = diagnostic
+        for probleme in diagnostic["avertissements"]:
+            print(f"⚠️ {probleme}")
+        if diagnostic["bloquants"]:
+            for probleme in diagnostic["bloquants"]:
+                print(f"⛔ {probleme}")
+            print(f"⛔ Configuration infaisable ({diagnostic['duree_ms']:.1f} ms d'analyse) : calcul refusé")
+            avancement_global["raison_arret"] = "infaisable"
+            avancement_global["etape_actuelle"] = diagnostic["bloquants"][0]
+            return
+        session_courante.construire_modele()
         
         # 2) Exécution des runs avec suivi
         avancement_global["phase_actuelle"] = "Calcul des emplois du temps"
         avancement_global["etape_actuelle"] = f"Lancement de {nombre_runs} runs..."
         avancement_global["derniere_maj"] = time.time()
         
-        fusions_par_run, \
+        journal_runs, \
         taux_par_run, \
         meilleur_seed, \
         meilleure_fusion, \
         meilleur_resultats = executer_runs_avec_suivi(
             nombre_runs,
-            model,
-            emploi_du_temps,
-            emploi_du_temps_salles,
-            emploi_du_temps_profs,
+            session_courante.model,
+            session_courante.emploi_du_temps,
+            session_courante.emploi_du_temps_salles,
+            session_courante.emploi_du_temps_profs,
             JOURS,
             HEURES,
             MATIERES,
@@ -4584,7 +5821,8 @@ def lancer_depuis_interface(nombre_runs):
             config,
             AFFECTATION_MATIERE_SALLE,
             fusionner_groupes_vers_classes,
-            solve_et_verifie
+            solve_et_verifie,
+            runs_paralleles=runs_paralleles
         )
 
         # 3) Sélection de la meilleure fusion
@@ -4592,7 +5830,11 @@ def lancer_depuis_interface(nombre_runs):
         avancement_global["etape_actuelle"] = "Sélection de la meilleure solution..."
         avancement_global["derniere_maj"] = time.time()
         
-        fusion_choisie, resultats_choisis = choisir_run(fusions_par_run, meilleur_seed)
+        fusion_choisie = meilleure_fusion
+        if fusion_choisie is None:
+            print("Aucun run n'a trouvé de solution.")
+        else:
+            print(f"\n--- Emploi du temps pour la meilleure run (seed = {meilleur_seed}) ---\n")
 
         # 4) Affichage à l'écran + génération des JSON
         if fusion_choisie:
@@ -4605,18 +5847,22 @@ def lancer_depuis_interface(nombre_runs):
             avancement_global["etape_actuelle"] = "Génération des emplois du temps professeurs..."
             avancement_global["derniere_maj"] = time.time()
             
-            # b) Affichage des EDT profs et des salles
-            affichCoursProfs()
-            affichEDTSalles()
+            # b) Affichage des EDT profs et des salles, depuis l'index inversé de la fusion
+            index_profs_salles = {sem: indexer_profs_salles(fusion_choisie[sem]) for sem in SEMAINES}
+            afficher_edts_profs_salles(fusion_choisie, SEMAINES, JOURS, HEURES,
+                                       dictProfs, dictSalles,
+                                       affichCoursProfs, affichEDTSalles,
+                                       index=index_profs_salles)
 
             avancement_global["etape_actuelle"] = "Génération des fichiers JSON..."
             avancement_global["derniere_maj"] = time.time()
             
             # c) Génération du fichier JSON global
-            generer_json_edt(fusion_choisie, SEMAINES, CLASSES_BASE, JOURS, HEURES, MATIERES)
+            generer_json_edt(fusion_choisie, SEMAINES, CLASSES_BASE, JOURS, HEURES, MATIERES,
+                             index=index_profs_salles)
 
             # d) Génération de tous les rapports de contraintes
-            generer_json_rapports(fusions_par_run, constraint_status)
+            generer_json_rapports(journal_runs, constraint_status)
 
             avancement_global["etape_actuelle"] = "Terminé avec succès !"
             print("✅ Emplois du temps générés avec succès !")
@@ -4657,7 +5903,13 @@ def executer_runs_avec_suivi(
     config,
     AFFECTATION_MATIERE_SALLE,
     fusionner_groupes_vers_classes,
-    solve_et_verifie
+    solve_et_verifie,
+    runs_paralleles=None,
+    workers_total=None,
+    temps_max_par_run=None,
+    temps_max_total=None,
+    patience=None,
+    arret_si_parfait=None
 ):
     """
 
@@ -4666,6 +5918,19 @@ def executer_runs_avec_suivi(
     Met à jour les variables globales pour permettre le suivi en temps réel dans l'interface Dash.
     Cette fonction exécute plusieurs optimisations avec des seeds différents et retourne les résultats
     bruts sans formatage de présentation.
+
+    Avec runs_paralleles > 1, les seeds sont résolues K à la fois dans un pool de
+    processus ; les workers de recherche CP-SAT (workers_total) sont répartis entre
+    les K résolutions simultanées. La fusion et la vérification restent faites ici,
+    dans l'ordre d'arrivée des solutions.
+
+    Chaque run est borné par temps_max_par_run et le lot entier par temps_max_total.
+    Le lot s'arrête aussi dès qu'un run atteint 100 % de contraintes respectées
+    (arret_si_parfait) ou quand le meilleur taux n'a pas progressé depuis
+    `patience` runs. demander_arret() interrompt les résolutions en cours et
+    abandonne les seeds restantes ; les meilleures solutions déjà trouvées sont
+    vérifiées normalement. La raison de l'arrêt est publiée dans
+    avancement_global["raison_arret"].
     
     Args:
         NOMBRE_DE_RUNS (int): Nombre total de runs d'optimisation à exécuter
@@ -4687,10 +5952,23 @@ def executer_runs_avec_suivi(
         AFFECTATION_MATIERE_SALLE (dict): Affectation des matières aux salles
         fusionner_groupes_vers_classes (function): Fonction de fusion des groupes
         solve_et_verifie (function): Fonction de résolution et vérification
+        runs_paralleles (int, optional): Nombre de seeds résolues simultanément.
+            Par défaut config["parametres_solveur"]["runs_paralleles"], sinon 1 (séquentiel).
+        workers_total (int, optional): Nombre total de workers CP-SAT à répartir.
+            Par défaut config["parametres_solveur"]["workers_total"], sinon os.cpu_count().
+        temps_max_par_run (float, optional): Limite de temps d'une résolution, en secondes
+            (défaut : parametres_solveur["temps_max_par_run"], sinon 120 ; 0 = illimité).
+        temps_max_total (float, optional): Budget total du lot, en secondes
+            (défaut : parametres_solveur["temps_max_total"], sinon illimité).
+        patience (int, optional): Nombre de runs sans amélioration avant arrêt
+            (défaut : parametres_solveur["patience"], sinon pas d'arrêt).
+        arret_si_parfait (bool, optional): Arrêt dès qu'un run atteint 100 %
+            (défaut : parametres_solveur["arret_si_parfait"], sinon True).
     
     Returns:
         tuple: Un tuple contenant :
-            - fusions_par_run (list): Liste des résultats de fusion pour chaque run réussi
+            - journal_runs (format_edt.JournalRuns): Journal du lot sur disque (data/runs),
+              une ligne par run réussi : seed, taux, résultats et emploi du temps compact
             - taux_par_run (list): Liste des taux de réussite pour chaque run
             - meilleur_seed (int): Seed ayant donné le meilleur résultat
             - meilleure_fusion (dict): Meilleure fusion obtenue
@@ -4706,11 +5984,31 @@ def executer_runs_avec_suivi(
 
     """
     global avancement_global
+
+    parametres = config.get("parametres_solveur", {})
+    if runs_paralleles is None:
+        runs_paralleles = parametres.get("runs_paralleles", 1)
+    if workers_total is None:
+        workers_total = parametres.get("workers_total", os.cpu_count() or 1)
+    runs_paralleles = max(1, min(int(runs_paralleles), NOMBRE_DE_RUNS))
+    if temps_max_par_run is None:
+        temps_max_par_run = parametres.get("temps_max_par_run", 120)
+    if temps_max_total is None:
+        temps_max_total = parametres.get("temps_max_total")
+    if patience is None:
+        patience = parametres.get("patience")
+    if arret_si_parfait is None:
+        arret_si_parfait = parametres.get("arret_si_parfait", True)
     
     # Initialisation correcte des variables de suivi
     avancement_global.update({
         "total_runs": NOMBRE_DE_RUNS,
         "run_actuel": 0,
+        "runs_termines": 0,
+        "runs_paralleles": runs_paralleles,
+        "temps_max_par_run": temps_max_par_run,
+        "temps_max_total": temps_max_total,
+        "raison_arret": None,
         "en_cours": True,
         "termine": False,
         "temps_debut": time.time(),
@@ -4722,81 +6020,74 @@ def executer_runs_avec_suivi(
         "meilleur_taux": 0,
         "taux_actuel": 0,
         "seed_actuelle": None,
+        "debut_run": time.time(),
         "derniere_maj": time.time()
     })
+    reset_suivi_solution()
     
     # Initialisation des variables pour stocker les meilleurs résultats
-    meilleur_taux_global = -1.0
-    meilleure_fusion = None
-    meilleur_seed = None
-    meilleur_resultats = None
+    meilleur = {"taux": -1.0, "fusion": None, "seed": None, "resultats": None, "run": 0}
 
-    # Listes pour stocker les résultats de chaque run
-    fusions_par_run = []
+    # Les runs réussis sont écrits au fil de l'eau dans le journal du lot ;
+    # seule la meilleure fusion reste en mémoire
+    journal_runs = format_edt.JournalRuns.nouveau()
     taux_par_run = []
 
-    # Boucle principale sur les runs
-    for idx_run, seed in enumerate(range(NOMBRE_DE_RUNS), start=1):
-        # Mise à jour AVANT de commencer le run
-        avancement_global["run_actuel"] = idx_run
-        avancement_global["seed_actuelle"] = seed
-        avancement_global["etape_actuelle"] = "en_cours"
-        avancement_global["derniere_maj"] = time.time()
-        avancement_global["taux_actuel"] = 0
-        
-        # Marquer le début du run pour le calcul du temps
-        debut_run = time.time()
-        
-        # Appel à la fonction de résolution et vérification
-        fusion_par_semaine, taux_i, resultats_i = solve_et_verifie(
-            model,
-            emploi_du_temps,
-            emploi_du_temps_salles,
-            emploi_du_temps_profs,
-            JOURS,
-            HEURES,
-            MATIERES,
-            PROFESSEURS,
-            SOUS_GROUPES_SUFFIXES,
-            CLASSES,
-            CLASSES_BASE,
-            CAPACITES_CLASSES,
-            INDISPONIBILITES_PROFS,
-            INDISPONIBILITES_SALLES,
-            config,
-            AFFECTATION_MATIERE_SALLE,
-            fusionner_groupes_vers_classes,
-            seed
-        )
-        
-        # Calcul du temps de ce run
-        fin_run = time.time()
-        duree_run = fin_run - debut_run
+    # Arguments communs à tous les appels de solve_et_verifie
+    arguments = (
+        model,
+        emploi_du_temps,
+        emploi_du_temps_salles,
+        emploi_du_temps_profs,
+        JOURS,
+        HEURES,
+        MATIERES,
+        PROFESSEURS,
+        SOUS_GROUPES_SUFFIXES,
+        CLASSES,
+        CLASSES_BASE,
+        CAPACITES_CLASSES,
+        INDISPONIBILITES_PROFS,
+        INDISPONIBILITES_SALLES,
+        config,
+        AFFECTATION_MATIERE_SALLE,
+        fusionner_groupes_vers_classes
+    )
 
+    def enregistrer_run(seed, fusion_par_semaine, taux_i, resultats_i):
+        """Intègre le résultat d'un run terminé et met à jour l'avancement."""
         if fusion_par_semaine is None:
             avancement_global["taux_actuel"] = 0
         else:
-            # Si une solution a été trouvée, on stocke les résultats
-            fusions_par_run.append((seed, fusion_par_semaine, resultats_i))
+            # Si une solution a été trouvée, on l'écrit dans le journal du lot
+            journal_runs.ajouter(seed, taux_i, resultats_i, construire_vues_edt(
+                fusion_par_semaine, list(fusion_par_semaine), CLASSES_BASE, JOURS, HEURES
+            ))
             taux_par_run.append((seed, taux_i))
             
             avancement_global["taux_actuel"] = taux_i
 
             # Mise à jour du meilleur résultat si nécessaire
-            if taux_i > meilleur_taux_global:
-                meilleur_taux_global = taux_i
-                meilleure_fusion = copy.deepcopy(fusion_par_semaine)
-                meilleur_seed = seed
-                meilleur_resultats = resultats_i
+            if taux_i > meilleur["taux"]:
+                meilleur["taux"] = taux_i
+                meilleur["fusion"] = fusion_par_semaine
+                meilleur["seed"] = seed
+                meilleur["resultats"] = resultats_i
+                meilleur["run"] = avancement_global["runs_termines"] + 1
                 avancement_global["meilleur_taux"] = taux_i
 
+        avancement_global["runs_termines"] += 1
+        runs_effectues = avancement_global["runs_termines"]
+
         # Calcul de l'estimation du temps restant pour plusieurs runs
+        # (temps écoulé réel : la concurrence des runs parallèles est donc prise en compte)
         if NOMBRE_DE_RUNS > 1:
             elapsed_total = time.time() - avancement_global["temps_debut"]
-            runs_effectues = idx_run
             avg_time_per_run = elapsed_total / runs_effectues
             runs_restants = NOMBRE_DE_RUNS - runs_effectues
             est_remaining = avg_time_per_run * runs_restants
+            if temps_max_total:
+                est_remaining = min(est_remaining, max(0, temps_max_total - elapsed_total))
 
             # CORRECTION : Calcul de l'heure de fin SEULEMENT si elle n'existe pas encore
             # ou si l'estimation a significativement changé (pour éviter les fluctuations)
@@ -4810,12 +6101,173 @@ def executer_runs_avec_suivi(
             avancement_global["temps_estime_restant"] = est_remaining
             avancement_global["derniere_maj"] = time.time()
 
+    def limite_run():
+        """Temps accordé au prochain run : budget par run, borné par le budget total restant."""
+        limite = temps_max_par_run or None
+        if temps_max_total:
+            restant = temps_max_total - (time.time() - avancement_global["temps_debut"])
+            limite = restant if limite is None else min(limite, restant)
+        return limite
+
+    def raison_arret():
+        """Retourne la raison d'arrêter le lot avant la fin des seeds, ou None."""
+        if avancement_global["arret_demande"]:
+            return "annulation"
+        if arret_si_parfait and meilleur["taux"] >= 1.0:
+            return "taux_parfait"
+        if patience and avancement_global["runs_termines"] - meilleur["run"] >= patience:
+            return "stagnation"
+        limite = limite_run()
+        if limite is not None and limite <= 0:
+            return "budget_total"
+        return None
+
+    # Variables des termes de l'objectif, relues à chaque solution améliorante
+    termes = indices_termes_objectif(model)
+
+    if runs_paralleles == 1:
+        # Boucle principale sur les runs (mode séquentiel)
+        for idx_run, seed in enumerate(range(NOMBRE_DE_RUNS), start=1):
+            avancement_global["raison_arret"] = raison_arret()
+            if avancement_global["raison_arret"]:
+                break
+
+            # Mise à jour AVANT de commencer le run
+            avancement_global["run_actuel"] = idx_run
+            avancement_global["seed_actuelle"] = seed
+            avancement_global["etape_actuelle"] = "en_cours"
+            avancement_global["derniere_maj"] = time.time()
+            avancement_global["taux_actuel"] = 0
+            avancement_global["debut_run"] = time.time()
+            reset_suivi_solution()
+
+            # Appel à la fonction de résolution et vérification
+            # (les solutions intermédiaires sont publiées au fil de l'eau)
+            enregistrer_run(seed, *solve_et_verifie(
+                *arguments, seed,
+                temps_max=limite_run(),
+                suivi=SuiviSolutions(seed, termes, publier_solution),
+                arret_demande=lambda: avancement_global["arret_demande"]
+            ))
+    else:
+        # Mode portefeuille : K seeds résolues en parallèle, workers CP-SAT répartis
+        workers_par_run = max(1, workers_total // runs_paralleles)
+        print(f"⚙️ {runs_paralleles} runs en parallèle, {workers_par_run} worker(s) CP-SAT chacun")
+        avancement_global["etape_actuelle"] = "en_cours"
+        avancement_global["run_actuel"] = 1
+
+        # "spawn" : l'application Dash est multithreadée, un fork n'est pas sûr ici
+        contexte = multiprocessing.get_context("spawn")
+        # File par laquelle les workers envoient leurs solutions améliorantes
+        with contexte.Manager() as gestionnaire:
+            file_suivi = gestionnaire.Queue()
+            evenement_arret = gestionnaire.Event()
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=runs_paralleles,
+                mp_context=contexte,
+                initializer=_initialiser_worker,
+                initargs=(model.Proto().SerializeToString(), file_suivi, evenement_arret)
+            ) as pool:
+                # Soumission au fil de l'eau (K runs en vol) pour pouvoir arrêter le lot
+                seeds = list(range(NOMBRE_DE_RUNS))
+                en_vol = set()
+
+                def soumettre_suivant():
+                    if seeds:
+                        en_vol.add(pool.submit(_resoudre_seed_worker, seeds.pop(0), workers_par_run, limite_run()))
+                        avancement_global["debut_run"] = time.time()
+
+                def relayer_suivi():
+                    """Publie les solutions reçues des workers depuis le dernier passage."""
+                    while True:
+                        try:
+                            publier_solution(*file_suivi.get_nowait())
+                        except queue.Empty:
+                            return
+
+                if not avancement_global["arret_demande"]:
+                    for _ in range(runs_paralleles):
+                        soumettre_suivant()
+
+                while en_vol:
+                    terminees, en_vol = concurrent.futures.wait(
+                        en_vol, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    relayer_suivi()
+                    # Annulation : les workers interrompent leur résolution en cours
+                    if avancement_global["arret_demande"] and not evenement_arret.is_set():
+                        evenement_arret.set()
+                    for future in terminees:
+                        seed, solution = future.result()
+                        avancement_global["seed_actuelle"] = seed
+                        if solution is None:
+                            enregistrer_run(seed, None, 0.0, None)
+                        else:
+                            # Fusion + vérification dans ce processus, sur la solution figée
+                            enregistrer_run(seed, *solve_et_verifie(*arguments, seed, solution=solution))
+                        # run_actuel = prochain run à terminer (pourcentage = runs terminés / total)
+                        avancement_global["run_actuel"] = min(
+                            avancement_global["runs_termines"] + 1, NOMBRE_DE_RUNS
+                        )
+                        # Les runs déjà lancés vont à leur terme (bornés par leur limite de temps)
+                        if avancement_global["raison_arret"] is None and (
+                            seeds or avancement_global["arret_demande"]
+                        ):
+                            avancement_global["raison_arret"] = raison_arret()
+                        if avancement_global["raison_arret"] is None:
+                            soumettre_suivant()
+
     # Marquer comme terminé
+    if avancement_global["raison_arret"] is None:
+        avancement_global["raison_arret"] = "toutes_les_runs"
+    else:
+        print(f"⏹️ Arrêt anticipé du lot ({avancement_global['raison_arret']}) après "
+              f"{avancement_global['runs_termines']}/{NOMBRE_DE_RUNS} runs")
     avancement_global["termine"] = True
     avancement_global["en_cours"] = False
     avancement_global["etape_actuelle"] = "termine"
     
-    return fusions_par_run, taux_par_run, meilleur_seed, meilleure_fusion, meilleur_resultats
+    print(f"🗂️ {len(journal_runs)} run(s) enregistrée(s) dans {journal_runs.chemin}")
+
+    return journal_runs, taux_par_run, meilleur["seed"], meilleur["fusion"], meilleur["resultats"]
+
+def demander_arret():
+    """
+    Demande l'annulation du calcul en cours (bouton « Annuler » de la page calcul).
+
+    Les résolutions en cours sont interrompues par StopSearch, les seeds restantes
+    sont abandonnées, puis la meilleure solution déjà trouvée est fusionnée,
+    vérifiée et exportée comme à la fin normale d'un calcul.
+
+    Returns:
+        bool: True si un calcul était en cours.
+    """
+    if not avancement_global["en_cours"] or avancement_global["termine"]:
+        return False
+    avancement_global["arret_demande"] = True
+    avancement_global["etape_actuelle"] = "Annulation demandée..."
+    avancement_global["derniere_maj"] = time.time()
+    print("⏹️ Annulation demandée : arrêt des résolutions en cours")
+    return True
+
+
+def progression_run_courant():
+    """
+    Avancement des runs en cours, compté en runs : part de la limite de temps
+    consommée (un gap nul signifie un optimum prouvé, le run va s'arrêter).
+    """
+    if not avancement_global.get("en_cours") or avancement_global.get("termine"):
+        return 0.0
+    progression = 0.0
+    temps_max = avancement_global.get("temps_max_par_run")
+    if temps_max:
+        progression = (time.time() - avancement_global.get("debut_run", time.time())) / temps_max
+    if avancement_global.get("gap") == 0:
+        progression = 1.0
+    runs_restants = avancement_global["total_runs"] - avancement_global.get("runs_termines", 0)
+    en_vol = min(avancement_global.get("runs_paralleles", 1), runs_restants)
+    return min(1.0, progression) * en_vol
+
 
 def get_avancement_info():
     """
@@ -4840,6 +6292,16 @@ def get_avancement_info():
             - taux_actuel (float): Taux du run en cours
             - seed_actuelle (int): Seed du run en cours
             - termine (bool): True si l'exécution est terminée
+            - raison_arret (str): Raison de la fin du lot ('toutes_les_runs',
+              'taux_parfait', 'stagnation', 'budget_total', 'annulation', 'infaisable') ou None
+            - objectif (float): Objectif de la dernière solution améliorante (ou None)
+            - borne (float): Meilleure borne inférieure connue de l'objectif
+            - gap (float): Écart relatif objectif/borne (0 = optimum prouvé)
+            - penalites (dict): Détail de l'objectif ('permanence', 'preferences', 'cartable')
+            - solutions_trouvees (int): Nombre de solutions du run en cours
+            - reparation_hint (dict): Réparation du hint de démarrage à chaud (ou None)
+            - conservation_hint (dict): Valeurs du hint conservées par la dernière solution
+            - diagnostic (dict): Analyse préalable de la configuration (analyser_faisabilite)
     
     Note:
         Utilise la variable globale `avancement_global` pour récupérer les
@@ -4861,7 +6323,13 @@ def get_avancement_info():
             "meilleur_taux": 0,
             "taux_actuel": 0,
             "seed_actuelle": None,
-            "termine": False
+            "termine": False,
+            "raison_arret": None,
+            "objectif": None,
+            "borne": None,
+            "gap": None,
+            "penalites": {},
+            "solutions_trouvees": 0
         }
     
     # Calcul du pourcentage global
@@ -4872,18 +6340,9 @@ def get_avancement_info():
         run_actuel = avancement_global["run_actuel"]
         
         if total_runs > 0:
-            runs_completes = max(0, run_actuel - 1)
-            progress_runs = runs_completes / total_runs
-            
-            if total_runs == 1:
-                if avancement_global["temps_debut"] > 0:
-                    temps_ecoule = time.time() - avancement_global["temps_debut"]
-                    progress_temporelle = min(0.8, temps_ecoule / 120)
-                    pourcentage = 5 + (85 * progress_temporelle)
-                else:
-                    pourcentage = 10
-            else:
-                pourcentage = 5 + (85 * progress_runs)
+            runs_completes = avancement_global.get("runs_termines", max(0, run_actuel - 1))
+            progress_runs = (runs_completes + progression_run_courant()) / total_runs
+            pourcentage = 5 + (85 * min(1.0, progress_runs))
         else:
             pourcentage = 10
     elif avancement_global["phase_actuelle"] == "finalisation":
@@ -4907,7 +6366,16 @@ def get_avancement_info():
         "meilleur_taux": avancement_global["meilleur_taux"],
         "taux_actuel": avancement_global["taux_actuel"],
         "seed_actuelle": avancement_global["seed_actuelle"],
-        "termine": avancement_global["termine"]
+        "termine": avancement_global["termine"],
+        "raison_arret": avancement_global.get("raison_arret"),
+        "objectif": avancement_global.get("objectif"),
+        "borne": avancement_global.get("borne"),
+        "gap": avancement_global.get("gap"),
+        "penalites": avancement_global.get("penalites", {}),
+        "solutions_trouvees": avancement_global.get("solutions_trouvees", 0),
+        "reparation_hint": avancement_global.get("reparation_hint"),
+        "conservation_hint": avancement_global.get("conservation_hint"),
+        "diagnostic": avancement_global.get("diagnostic")
     }
 
 def reset_avancement():
@@ -4942,5 +6410,8 @@ def reset_avancement():
         "taux_actuel": 0,
         "derniere_maj": 0,
         "phase_actuelle": "initialisation",
-        "etape_actuelle": ""
+        "etape_actuelle": "",
+        "raison_arret": None,
+        "arret_demande": False,
+        "diagnostic": None
     })
\ No newline at end of file
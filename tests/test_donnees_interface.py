@@ -0,0 +1,204 @@
+"""
+Tests du module donnees_interface : écriture différée du document JSON
+(regroupement des modifications, délai maximal) et vider(), puis stockage SQLite
+(ordre des clés, fusion dans une section découpée, modifications d'une autre connexion).
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import donnees_interface  # noqa: E402
+from donnees_interface import DocumentInterface, DocumentInterfaceSQLite  # noqa: E402
+
+DOCUMENT = {"1_horaires": {"debut": "8h30"}, "3_ressources": {"classes": ["6e1"], "profs": []}}
+
+
+@pytest.fixture
+def document(tmp_path):
+    chemin = tmp_path / "data_interface.json"
+    chemin.write_text(json.dumps(DOCUMENT), encoding="utf-8")
+    doc = DocumentInterface(str(chemin))
+    yield doc
+    if doc._minuteur is not None:
+        doc._minuteur.cancel()
+
+
+def lire(doc):
+    with open(doc.chemin, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def attendre(condition, delai=5.0):
+    """Attend que condition() soit vraie (au plus delai secondes)."""
+    fin = time.monotonic() + delai
+    while not condition():
+        if time.monotonic() > fin:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_modifications_regroupees(document, monkeypatch):
+    """Des modifications rapprochées sont visibles tout de suite et écrites en une seule fois."""
+    monkeypatch.setattr(donnees_interface, "DELAI_ECRITURE", 0.3)
+    monkeypatch.setattr(donnees_interface, "DELAI_MAX_ECRITURE", 10.0)
+    for i in range(5):
+        document.remplacer_section(["1_horaires", "debut"], f"{8 + i}h00")
+    assert document.vue()["1_horaires"]["debut"] == "12h00"
+    assert document.ecritures == 0
+    assert lire(document) == DOCUMENT
+
+    assert attendre(lambda: document.ecritures == 1)
+    assert lire(document)["1_horaires"]["debut"] == "12h00"
+    time.sleep(0.4)
+    assert document.ecritures == 1
+    assert not document._en_attente
+
+
+def test_delai_maximal(document, monkeypatch):
+    """L'écriture a lieu au plus DELAI_MAX_ECRITURE après la première modification, même si les saisies continuent."""
+    monkeypatch.setattr(donnees_interface, "DELAI_ECRITURE", 60.0)
+    monkeypatch.setattr(donnees_interface, "DELAI_MAX_ECRITURE", 0.2)
+    document.remplacer_section(["3_ressources", "profs"], ["M. A"])
+    assert attendre(lambda: document.ecritures == 1)
+    assert lire(document)["3_ressources"]["profs"] == ["M. A"]
+
+
+def test_vider(document, monkeypatch):
+    """vider() écrit tout de suite, annule le minuteur et ne réécrit pas sans nouvelle modification."""
+    monkeypatch.setattr(donnees_interface, "DELAI_ECRITURE", 60.0)
+    monkeypatch.setattr(donnees_interface, "DELAI_MAX_ECRITURE", 60.0)
+    document.remplacer_section(["3_ressources", "classes"], ["6e1", "6e2"])
+    assert document._minuteur is not None
+    lectures = document.lectures
+
+    assert document.vider() is True
+    assert document._minuteur is None
+    assert lire(document)["3_ressources"] == {"classes": ["6e1", "6e2"], "profs": []}
+    assert document.vider() is False
+    assert document.ecritures == 1
+    # Le fichier écrit est celui du cache : pas de relecture
+    document.vue()
+    assert document.lectures == lectures
+
+
+def test_vider_echec(tmp_path, monkeypatch):
+    """Si l'écriture échoue, les modifications restent en attente pour le vider() suivant."""
+    monkeypatch.setattr(donnees_interface, "DELAI_ECRITURE", 60.0)
+    monkeypatch.setattr(donnees_interface, "DELAI_MAX_ECRITURE", 60.0)
+    # Un dossier à la place du fichier : le renommage final échoue
+    chemin = tmp_path / "data_interface.json"
+    chemin.mkdir()
+    doc = DocumentInterface(str(chemin))
+    try:
+        doc.enregistrer(DOCUMENT)
+        assert doc.vider() is False
+        assert doc._en_attente
+        assert os.listdir(tmp_path) == ["data_interface.json"]
+        chemin.rmdir()
+        assert doc.vider() is True
+        assert lire(doc) == DOCUMENT
+        assert os.listdir(tmp_path) == ["data_interface.json"]
+    finally:
+        if doc._minuteur is not None:
+            doc._minuteur.cancel()
+
+
+def test_immediat_et_invalider(document, monkeypatch):
+    """immediat=True écrit sans attendre ; invalider() écrit l'attente puis relit le fichier."""
+    monkeypatch.setattr(donnees_interface, "DELAI_ECRITURE", 60.0)
+    monkeypatch.setattr(donnees_interface, "DELAI_MAX_ECRITURE", 60.0)
+    document.remplacer_section(["1_horaires", "debut"], "9h00", immediat=True)
+    assert document.ecritures == 1
+    assert lire(document)["1_horaires"]["debut"] == "9h00"
+
+    document.remplacer_section(["1_horaires", "fin"], "17h00")
+    lectures = document.lectures
+    document.invalider()
+    assert document.ecritures == 2
+    assert document.vue()["1_horaires"] == {"debut": "9h00", "fin": "17h00"}
+    assert document.lectures == lectures + 1
+
+
+# Stockage SQLite
+
+# Clés volontairement hors de l'ordre alphabétique, à tous les niveaux
+DOCUMENT_SQLITE = {
+    "contraintes": {"profs": {"M. B": {"jours": ["Lundi"]}, "M. A": {}}, "classes": {"6e2": {}, "6e1": {}}},
+    "1_horaires": {"fin": "17h00", "debut": "8h30"},
+    "3_ressources": {"salles": ["S2", "S1"], "classes": ["6e2", "6e1"]},
+    "affichage": {},
+}
+
+
+@pytest.fixture
+def base(tmp_path):
+    chemin_json = tmp_path / "data_interface.json"
+    chemin_json.write_text(json.dumps(DOCUMENT_SQLITE, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(tmp_path / "data_interface.sqlite3"), str(chemin_json)
+
+
+def test_sqlite_ordre_des_cles(base, tmp_path):
+    """Import puis export rendent le fichier à l'identique, ordre des clés compris, même depuis une autre connexion."""
+    chemin, chemin_json = base
+    doc = DocumentInterfaceSQLite(chemin, chemin_json=chemin_json)
+    attendu = json.dumps(DOCUMENT_SQLITE, ensure_ascii=False, indent=2)
+    assert json.dumps(doc.vue(), ensure_ascii=False, indent=2) == attendu
+
+    export = tmp_path / "export.json"
+    DocumentInterfaceSQLite(chemin, chemin_json=chemin_json).exporter_json(str(export))
+    assert export.read_text(encoding="utf-8") == attendu
+
+
+def test_sqlite_fusion_section_decoupee(base):
+    """remplacer_section(..., fusionner=True) sur une section découpée ne touche que ses sous-clés."""
+    chemin, chemin_json = base
+    assert "contraintes" in donnees_interface.SECTIONS_DECOUPEES
+    doc = DocumentInterfaceSQLite(chemin, chemin_json=chemin_json)
+    doc.remplacer_section(
+        ["contraintes"], {"profs": {"M. A": {"jours": ["Mardi"]}, "M. C": {}}, "salles": {"S1": {}}}, fusionner=True
+    )
+    attendu = {
+        "profs": {"M. B": {"jours": ["Lundi"]}, "M. A": {"jours": ["Mardi"]}, "M. C": {}},
+        "classes": {"6e2": {}, "6e1": {}},
+        "salles": {"S1": {}},
+    }
+    for vue in (doc.vue(), DocumentInterfaceSQLite(chemin, chemin_json=chemin_json).vue()):
+        assert json.dumps(vue["contraintes"]) == json.dumps(attendu)
+        assert list(vue) == list(DOCUMENT_SQLITE)
+    assert dict(doc._lire_lignes("contraintes")) == {
+        ("contraintes", ""): (0, "{}"),
+        ("contraintes", "profs"): (0, json.dumps(attendu["profs"], ensure_ascii=False)),
+        ("contraintes", "classes"): (1, json.dumps(attendu["classes"], ensure_ascii=False)),
+        ("contraintes", "salles"): (2, json.dumps(attendu["salles"], ensure_ascii=False)),
+    }
+
+
+def test_sqlite_modification_autre_connexion(base):
+    """Une écriture d'une autre connexion (PRAGMA data_version) invalide le cache, en lecture comme en écriture."""
+    chemin, chemin_json = base
+    a = DocumentInterfaceSQLite(chemin, chemin_json=chemin_json)
+    b = DocumentInterfaceSQLite(chemin, chemin_json=chemin_json)
+    a.vue()
+    lectures = a.lectures
+    a.vue()
+    assert a.lectures == lectures
+
+    b.remplacer_section(["1_horaires", "fin"], "16h30")
+    assert a.vue()["1_horaires"]["fin"] == "16h30"
+    assert a.lectures == lectures + 1
+
+    # a écrit sans avoir relu : son cache ne doit pas effacer la modification de b
+    b.remplacer_section(["3_ressources", "salles"], ["S3"])
+    a.remplacer_section(["affichage", "theme"], "sombre")
+    vue = a.vue()
+    assert vue["3_ressources"]["salles"] == ["S3"]
+    assert vue["affichage"] == {"theme": "sombre"}
+    assert b.vue() == vue
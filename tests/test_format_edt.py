@@ -0,0 +1,107 @@
+"""
+Tests du module format_edt : aller-retour de l'emploi du temps global dans
+chaque format de fichier, écriture atomique et rotation des journaux de runs.
+"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import format_edt  # noqa: E402
+
+with open(os.path.join(RACINE, "data", "emploi_du_temps_global.json"), encoding="utf-8") as f:
+    EDT = json.load(f)
+
+
+def identique(a, b):
+    """Égalité stricte, ordre des clés compris."""
+    return json.dumps(a, ensure_ascii=False) == json.dumps(b, ensure_ascii=False)
+
+
+def test_encodage_aller_retour():
+    """encoder_edt puis decoder_edt (via JSON) rend l'emploi du temps à l'identique."""
+    compact = json.loads(json.dumps(format_edt.encoder_edt(EDT)))
+    assert identique(format_edt.decoder_edt(compact), EDT)
+
+
+def test_vues_du_solveur_deduites():
+    """Les vues profs et salles de construire_vues_edt se déduisent de edt_classe, ordre compris."""
+    from solver import CoursCreneau, construire_vues_edt
+
+    jours, heures = ["Lundi", "Mardi"], ["8h30-9h20", "9h30-10h20", "10h30-11h20"]
+    # Suffixes dans un ordre non alphabétique, comme dans la configuration
+    suffixes, classes = ["_lat", "_esp"], ["3e1", "3e2"]
+    cours = {
+        ("3e2", 0, 2): CoursCreneau("Maths", "M. A", "S1"),
+        ("3e1", 0, 1): CoursCreneau("Français", "Mme B", "S2"),
+        ("3e1_esp", 0, 0): CoursCreneau("Espagnol", "M. C", "S3"),
+        ("3e2_lat", 1, 0): CoursCreneau("Latin", "Mme D", "S4"),
+        ("3e2_esp", 1, 0): CoursCreneau("Espagnol", "M. C", "S3"),
+        ("3e1_lat", 1, 1): CoursCreneau("Latin", "Mme D", "S1"),
+        ("3e2", 1, 2): CoursCreneau("Histoire", "Mme B", "S2"),
+    }
+    # Même construction que fusionner_groupes_vers_classes
+    fusion = {}
+    for cl in classes:
+        for j in range(len(jours)):
+            for h in range(len(heures)):
+                contenu = [cours[(cl, j, h)]] if (cl, j, h) in cours else []
+                for sfx in suffixes:
+                    if (cl + sfx, j, h) in cours:
+                        c = cours[(cl + sfx, j, h)]
+                        contenu.append(CoursCreneau(c.matiere, c.prof, c.salle, groupe=cl + sfx))
+                fusion[(cl, j, h)] = tuple(contenu)
+    for sfx in suffixes:
+        for cl in classes:
+            for j in range(len(jours)):
+                for h in range(len(heures)):
+                    fusion[(cl + sfx, j, h)] = (cours[(cl + sfx, j, h)],) if (cl + sfx, j, h) in cours else ()
+
+    edt = construire_vues_edt({"Semaine A": fusion}, ["Semaine A"], classes, jours, heures)
+    compact = json.loads(json.dumps(format_edt.encoder_edt(edt)))
+    assert "cours" in compact and not compact.get("vues")
+    assert identique(format_edt.decoder_edt(compact), edt)
+
+
+def test_encodage_vue_modifiee():
+    """Une vue modifiée à la main, qui ne se déduit plus de edt_classe, est conservée."""
+    edt = copy.deepcopy(EDT)
+    prof = next(iter(edt["edt_prof"]))
+    edt["edt_prof"][prof] = {"modifiee": True}
+    compact = json.loads(json.dumps(format_edt.encoder_edt(edt)))
+    assert identique(format_edt.decoder_edt(compact), edt)
+
+
+@pytest.mark.parametrize("format", list(format_edt.EXTENSIONS))
+def test_sauvegarde_aller_retour(tmp_path, format):
+    """Chaque format relu (lire_edt, charger_edt) rend l'emploi du temps écrit, sans fichier temporaire."""
+    base = str(tmp_path / "edt")
+    chemin = format_edt.sauvegarder_edt(EDT, format, base=base)
+    assert chemin == format_edt.chemin_format(format, base)
+    assert identique(format_edt.lire_edt(chemin), EDT)
+    assert identique(format_edt.charger_edt(base=base), EDT)
+    assert os.listdir(tmp_path) == [os.path.basename(chemin)]
+
+
+def test_format_inconnu(tmp_path):
+    with pytest.raises(ValueError):
+        format_edt.sauvegarder_edt(EDT, "xml", base=str(tmp_path / "edt"))
+
+
+def test_rotation_journaux(tmp_path):
+    """Un nouveau lot ne garde que LOTS_CONSERVES journaux, sans fichier temporaire."""
+    dossier = str(tmp_path / "runs")
+    for i in range(format_edt.LOTS_CONSERVES + 2):
+        journal = format_edt.JournalRuns.nouveau(dossier)
+        journal.ajouter(i, 1.0, {}, EDT)
+    lots = format_edt.JournalRuns.lots(dossier)
+    assert len(lots) == format_edt.LOTS_CONSERVES
+    assert sorted(os.listdir(dossier)) == lots
+    dernier = format_edt.JournalRuns.dernier(dossier)
+    assert identique(dernier.charger(format_edt.LOTS_CONSERVES + 1)["edt"], EDT)
@@ -0,0 +1,183 @@
+"""
+Tests du module solver : construction du modèle par la session, hint de
+démarrage à chaud, repli de la résolution en deux phases et cache des modèles.
+
+Chaque test travaille dans un dossier temporaire contenant une copie de
+data/config.json (les chemins data/... du solveur sont relatifs).
+"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import solver  # noqa: E402
+from ortools.sat.python import cp_model  # noqa: E402
+
+with open(os.path.join(RACINE, "data", "config.json"), encoding="utf-8") as f:
+    CONFIG = json.load(f)
+
+
+@pytest.fixture
+def dossier(tmp_path, monkeypatch):
+    """Dossier de travail temporaire (data/ relatif au dossier courant)."""
+    (tmp_path / "data").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def session_pour(config, parametres=None):
+    """Construit une session sur une copie de config (paramètres du solveur ajoutés)."""
+    config = copy.deepcopy(config)
+    config.setdefault("parametres_solveur", {}).update(parametres or {})
+    with open("data/config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+    return solver.SolverSession("data/config.json").construire_modele()
+
+
+def test_hint_prof_liste_globale(dossier):
+    """Un prof d'une liste globale (PROFESSEURS[matière] = [...]) reçoit son hint."""
+    config = copy.deepcopy(CONFIG)
+    config["professeurs"]["EPS"] = ["Mme Richard", "M. Test"]
+    session = session_pour(config, {"cache_modele": False})
+
+    edt_classe = {"Semaine A": {"6e1": {"Lundi": {"8h": {
+        "matiere": ["EPS"], "professeurs": ["M. Test"], "salle": ["Gymnase"]
+    }}}}}
+    hints, stats = solver.lire_hints_edt(
+        edt_classe, session.emploi_du_temps, session.emploi_du_temps_salles, session.emploi_du_temps_profs
+    )
+    var_prof = session.emploi_du_temps_profs["Semaine A"][("6e1", 0, 0, "EPS", "Semaine A")]
+    valeurs = {var.Index(): valeur for var, valeur in hints}
+    assert stats["cours_ignores"] == 0
+    assert valeurs[var_prof.Index()] == 1
+
+
+def test_repli_joint_garde_volumes(dossier):
+    """
+    Le modèle complet du repli reprend la répartition A/B et la cantine de la
+    première phase : la solution de la première phase (salles comprises) y reste réalisable.
+    """
+    session = session_pour(CONFIG, {"salles_deux_phases": True, "cache_modele": False})
+    phase1 = cp_model.CpSolver()
+    phase1.parameters.random_seed = 0
+    phase1.parameters.max_time_in_seconds = 5
+    assert phase1.Solve(session.model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    complete = solver.affecter_salles(phase1, session.emploi_du_temps, session.emploi_du_temps_salles)
+    assert complete is not None
+
+    model_joint, *variables_joint, _ = solver.resoudre_modele_joint(
+        session.model, phase1, session.emploi_du_temps, session.emploi_du_temps_profs, 0, temps_max=0.01
+    )
+    assert model_joint.volume_bihebdo == session.model.volume_bihebdo
+
+    # Toutes les variables du modèle complet fixées aux valeurs de la première phase
+    model_joint.ClearHints()
+    hints = {}
+    variables = (session.emploi_du_temps, session.emploi_du_temps_salles, session.emploi_du_temps_profs)
+    for source, cible in zip(variables, variables_joint):
+        for semaine in solver.SEMAINES:
+            for key, var in source[semaine].items():
+                hints[cible[semaine][key].Index()] = (cible[semaine][key], complete.Value(var))
+    for var, valeur in hints.values():
+        model_joint.AddHint(var, valeur)
+    verification = cp_model.CpSolver()
+    verification.parameters.fix_variables_to_their_hinted_value = True
+    verification.parameters.max_time_in_seconds = 10
+    assert verification.Solve(model_joint) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+def test_exclusion_non_imposee_hors_registre(dossier):
+    """Seules les exclusions "forte"/"faible" sont posées dans le modèle et au registre."""
+    config = copy.deepcopy(CONFIG)
+    config["mat_exclu_suite"] = [
+        {"matiere1": "Maths", "matiere2": "Français", "contrainte": "forte", "classes": "6e"},
+        {"matiere1": "Français", "matiere2": "Maths", "contrainte": "moyenne", "classes": "6e"},
+    ]
+    session = session_pour(config, {"cache_modele": False})
+    details = [detail for _, _, detail in session.model.registre_contraintes["mat_exclu_suite"]]
+    assert details and all(detail.endswith("Maths → Français") for detail in details)
+
+
+def compteurs(categorie):
+    """(total, respectées) d'une catégorie de resultats_contraintes."""
+    res = solver.resultats_contraintes[categorie]
+    return res["total"], res["respectees"]
+
+
+def test_registre_categories_souples(dossier):
+    """Les catégories souples lues dans le registre comptent comme leurs verifier_*, semaine par semaine."""
+    session = session_pour(CONFIG, {"cache_modele": False})
+    resolution = cp_model.CpSolver()
+    resolution.parameters.random_seed = 0
+    resolution.parameters.max_time_in_seconds = 5
+    assert resolution.Solve(session.model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    tableaux = solver.extraire_solution(
+        resolution, session.emploi_du_temps, session.emploi_du_temps_salles, session.emploi_du_temps_profs
+    )
+    registre = session.model.registre_contraintes
+    categories = ("volume_par_professeur", "permanence", "preferences_salle_professeur")
+
+    for semaine in solver.SEMAINES:
+        for res in solver.resultats_contraintes.values():
+            res.update(total=0, respectees=0, details=[])
+        solver.remplir_depuis_registre(
+            {cat: [c for c in registre[cat] if semaine in c[2]] for cat in categories}, resolution
+        )
+        lus = {cat: compteurs(cat) for cat in categories}
+
+        for res in solver.resultats_contraintes.values():
+            res.update(total=0, respectees=0, details=[])
+        edt, _, profs = tableaux.semaine(semaine)
+        solver.verifier_volume_par_professeur(edt, CONFIG["volume_par_professeur"])
+        solver.verifier_permanence(edt, CONFIG["permanence"]["capacite"])
+        solver.verifier_preferences_salle_professeur(edt, profs, CONFIG["preferences_salle_professeur"])
+        assert lus == {cat: compteurs(cat) for cat in categories}
+
+
+def test_cache_aller_retour(dossier, capsys):
+    """
+    Un modèle relu depuis le cache a le même proto et les mêmes variables : la même
+    affectation y donne la même fusion et le même registre des contraintes.
+    """
+    session = session_pour(CONFIG)
+    assert os.listdir("data/cache") == [os.path.basename(solver.chemin_cache_modele(session.empreinte))]
+    resolution = cp_model.CpSolver()
+    resolution.parameters.random_seed = 0
+    resolution.parameters.max_time_in_seconds = 5
+    assert resolution.Solve(session.model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    capsys.readouterr()
+    relue = session_pour(CONFIG)
+    assert "Modèle relu depuis le cache" in capsys.readouterr().out
+    assert relue.model.Proto().SerializeToString() == session.model.Proto().SerializeToString()
+
+    # Même affectation imposée au modèle relu, par indice de variable
+    proto = relue.model.Proto()
+    for index in range(len(proto.variables)):
+        var = relue.model.GetIntVarFromProtoIndex(index)
+        relue.model.AddHint(var, resolution.Value(session.model.GetIntVarFromProtoIndex(index)))
+    verification = cp_model.CpSolver()
+    verification.parameters.fix_variables_to_their_hinted_value = True
+    verification.parameters.max_time_in_seconds = 10
+    assert verification.Solve(relue.model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    for semaine in solver.SEMAINES:
+        assert solver.fusionner_groupes_vers_classes(
+            session.emploi_du_temps, session.emploi_du_temps_salles, session.emploi_du_temps_profs, resolution, semaine
+        ) == solver.fusionner_groupes_vers_classes(
+            relue.emploi_du_temps, relue.emploi_du_temps_salles, relue.emploi_du_temps_profs, verification, semaine
+        )
+
+    lus = []
+    for model, resolveur in ((session.model, resolution), (relue.model, verification)):
+        for res in solver.resultats_contraintes.values():
+            res.update(total=0, respectees=0, details=[])
+        solver.remplir_depuis_registre(model.registre_contraintes, resolveur)
+        lus.append({cat: compteurs(cat) for cat in model.registre_contraintes})
+    assert lus[0] == lus[1]